@@ -1,5 +1,5 @@
 # backend/api/admin_monitoring_routes.py
-# Purpose: Admin monitoring endpoints — system health, activity, costs, OAuth, BaseLinker sync
+# Purpose: Admin monitoring endpoints — system health, activity, costs, OAuth, BaseLinker sync, Groq keys
 # NOT for: License management or admin overview (those are in admin_routes.py)
 
 import asyncio
@@ -262,3 +262,20 @@ async def trigger_baselinker_sync(
     if "fatal" in result:
         result["fatal"] = "sync_failed"
     return result
+
+
+@router.get("/groq-keys")
+async def get_groq_key_state(
+    _admin: str = Depends(require_admin),
+):
+    """Per-key Groq rate-limit state from the key scheduler — remaining budget, quarantine, counters.
+
+    WHY: Shows which keys are drained or cooling down before users start seeing 429s.
+    """
+    from services.groq_key_scheduler import key_scheduler
+    keys = key_scheduler.snapshot()
+    return {
+        "configured_keys": len(settings.groq_api_keys),
+        "quarantined": sum(1 for k in keys if k["quarantined"]),
+        "keys": keys,
+    }
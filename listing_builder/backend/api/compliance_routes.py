@@ -15,14 +15,17 @@ from schemas.compliance import (
     ComplianceReportsListResponse,
     ComplianceReportSummary,
 )
-from schemas.audit import AuditRequest, AuditResult
+from schemas.audit import AuditRequest, AuditResult, TosAuditResponse
 from services.audit_service import audit_product, audit_product_from_data
+from services.tos_audit_service import audit_catalog
 from services.allegro_api import fetch_seller_offers, fetch_offer_details
 from api.dependencies import require_user_id, require_premium
 from models.compliance import ComplianceReport, ComplianceReportItem
 from models.oauth_connection import OAuthConnection
 from typing import Optional
 import asyncio
+import csv
+import io
 import structlog
 
 logger = structlog.get_logger()
@@ -36,6 +39,10 @@ MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
 
 ALLOWED_EXTENSIONS = {".xlsm", ".xlsx", ".csv"}
 
+# WHY 100MB: GET_MERCHANT_LISTINGS_ALL_DATA for a 100k-SKU catalog with descriptions runs 50-80MB
+MAX_CATALOG_FILE_SIZE = 100 * 1024 * 1024
+CATALOG_EXTENSIONS = {".txt", ".tsv", ".csv"}
+
 
 @router.post("/validate", status_code=201)
 @limiter.limit("5/minute")
@@ -213,6 +220,52 @@ async def audit_product_card(request: Request, body: AuditRequest, db: Session =
         raise HTTPException(status_code=500, detail="Audit nie powiódł się")
 
 
+@router.post("/tos-audit", response_model=TosAuditResponse)
+@limiter.limit("2/minute")
+async def tos_audit_catalog(
+    request: Request,
+    file: UploadFile = File(..., description="Listings report (GET_MERCHANT_LISTINGS_ALL_DATA .txt/.tsv) or CSV"),
+    marketplace: str = Query("amazon", description="amazon / amazon_de / ... — other marketplaces pass untouched"),
+    include_passing: bool = Query(False, description="Also list SKUs without violations"),
+    db: Session = Depends(get_db),
+    _user_id: str = Depends(require_user_id),
+):
+    """Audit a whole seller catalog against Amazon TOS rules.
+
+    Returns aggregate counts (by severity and rule) plus per-SKU violations.
+    """
+    filename = (file.filename or "").strip()
+    ext = _get_extension(filename)
+    if ext not in CATALOG_EXTENSIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported file type '{ext}'. Allowed: {', '.join(sorted(CATALOG_EXTENSIONS))}",
+        )
+
+    file_bytes = await file.read()
+    if len(file_bytes) > MAX_CATALOG_FILE_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"File too large ({len(file_bytes) / 1024 / 1024:.1f}MB). Max: 100MB",
+        )
+    if not file_bytes.strip():
+        raise HTTPException(status_code=400, detail="File is empty")
+
+    require_premium(request, db)
+
+    # WHY: SP-API flat-file reports for EU marketplaces are often Windows-1252, not UTF-8
+    try:
+        content = file_bytes.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        content = file_bytes.decode("cp1252", errors="replace")
+    # WHY: DictReader is lazy — rows stream into the audit's worker chunks as they are parsed
+    rows = csv.DictReader(io.StringIO(content), delimiter="," if ext == ".csv" else "\t")
+
+    logger.info("tos_audit_start", filename=filename, size=len(file_bytes), marketplace=marketplace)
+    # WHY: to_thread — the audit is CPU-bound for seconds on large catalogs; keep the event loop free
+    return await asyncio.to_thread(audit_catalog, rows, marketplace.lower(), include_passing=include_passing)
+
+
 MAX_STORE_SCAN = 50  # WHY: 50 parallel API calls is safe for Allegro rate limits
 
 
@@ -3,8 +3,10 @@
 # NOT for: LLM prompts or keyword logic (that's in services/optimizer_service.py)
 
 from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field, field_validator
-from typing import List, Optional, Dict, Any
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from slowapi import Limiter
@@ -15,12 +17,18 @@ import structlog
 
 from services.optimizer_service import optimize_listing
 from services.llm_providers import PROVIDERS
-from services.stripe_service import validate_license
-from database import get_db
-from models.optimization import OptimizationRun
+from services.batch_optimizer import run_batch, BATCH_CONCURRENCY, BATCH_MAX_CONCURRENCY
+from services.batch_job_service import (
+    JOB_MAX_PRODUCTS, create_job, start_job, is_running, job_to_dict,
+    get_job_results, stream_job_events, parse_last_event_id, supply_api_keys,
+)
+from services.stripe_service import avalidate_license, validate_license
+from database import AnySession, get_async_db, get_async_session_factory, get_db, SessionLocal, task_session
+from models.optimization import OptimizationRun, OptimizationBatchJob
 from models.shared_listing import SharedListing
 from api.dependencies import require_user_id, require_admin
 from utils.privacy import hash_ip
+from utils.sse import SSE_HEADERS, sse_event
 import secrets
 
 limiter = Limiter(key_func=get_remote_address)
@@ -54,6 +62,17 @@ def _check_tier_limit(request: Request, db: Session, requested_count: int = 1):
     )
 
 
+async def _acheck_tier_limit(request: Request, db: AnySession) -> None:
+    """_check_tier_limit for async routes — the license lookup awaits on an AsyncSession."""
+    license_key = request.headers.get("X-License-Key", "")
+    if license_key and await avalidate_license(license_key, db):
+        return
+    raise HTTPException(
+        status_code=402,
+        detail="Wymagana subskrypcja Premium (19 zł/mies). Wykup aby korzystać z Optymalizatora!",
+    )
+
+
 class OptimizerKeyword(BaseModel):
     """Single keyword with optional search volume"""
     phrase: str = Field(..., min_length=1, max_length=200)
@@ -79,6 +98,8 @@ class OptimizerRequest(BaseModel):
     # WHY: Imported product data — AI uses as reference to improve listing
     original_description: Optional[str] = Field(default="", max_length=5000)
     original_bullets: Optional[List[str]] = Field(default_factory=list, max_length=10)
+    # WHY: Opt out of the LLM response cache — "regenerate" must produce a fresh listing
+    use_cache: bool = True
 
     @field_validator("original_bullets")
     @classmethod
@@ -161,27 +182,8 @@ class OptimizerResponse(BaseModel):
     account_type: str = "seller"
 
 
-@router.post("/generate", response_model=OptimizerResponse)
-@limiter.limit("10/minute")
-async def generate_listing(request: Request, body: OptimizerRequest, db: Session = Depends(get_db), user_id: str = Depends(require_user_id)):
-    """
-    Generate an optimized listing using Groq LLM + keyword analysis.
-
-    WHY: Runs 3 LLM calls (title, bullets, description) then computes
-    coverage scores, backend keyword packing, and compliance checks.
-    """
-    # SECURITY: Server-side tier check before any LLM calls
-    _check_tier_limit(request, db)
-
-    logger.info(
-        "optimizer_request",
-        product=body.product_title[:50],
-        brand=body.brand,
-        marketplace=body.marketplace,
-        keyword_count=len(body.keywords),
-    )
-
-    # WHY: Build provider_config if client requested non-Groq provider
+def _resolve_provider_config(body: OptimizerRequest, db: Session, user_id: str) -> Optional[dict]:
+    """Build provider_config if client requested non-Groq provider (None = Groq)."""
     provider_config = None
     if body.llm_provider and body.llm_provider != "groq":
         if body.llm_provider not in PROVIDERS:
@@ -213,92 +215,225 @@ async def generate_listing(request: Request, body: OptimizerRequest, db: Session
                 "provider": body.llm_provider,
                 "api_key": api_key,
             }
+    return provider_config
 
-    # WHY: Beast (qwen3:235b) runs 4 sequential LLM calls ~14s each = ~56s total.
+
+def _llm_timeout(provider_config: Optional[dict]) -> float:
+    # WHY: Beast (qwen3:235b) runs 4 LLM calls ~14s each = ~56s total.
     # Groq is fast (2-5s total), so 60s is fine. Beast needs 180s.
-    llm_timeout = 180.0 if (provider_config and provider_config.get("provider") == "beast") else 60.0
+    return 180.0 if (provider_config and provider_config.get("provider") == "beast") else 60.0
+
+
+def _optimize_kwargs(body: OptimizerRequest, provider_config: Optional[dict], user_id: str) -> dict:
+    return dict(
+        product_title=body.product_title,
+        brand=body.brand,
+        keywords=[
+            {"phrase": k.phrase, "search_volume": k.search_volume}
+            for k in body.keywords
+        ],
+        marketplace=body.marketplace,
+        mode=body.mode,
+        product_line=body.product_line or "",
+        language=body.language,
+        audience_context=body.audience_context or "",
+        account_type=body.account_type,
+        category=body.category or "",
+        provider_config=provider_config,
+        user_id=user_id,
+        original_description=body.original_description or "",
+        original_bullets=body.original_bullets or [],
+        use_cache=body.use_cache,
+    )
+
 
+def _save_history(db: Session, request: Request, body: OptimizerRequest, user_id: str, result: dict) -> None:
+    """Auto-save to history — non-blocking, don't fail the response if DB save fails."""
     try:
-        result = await asyncio.wait_for(
-            optimize_listing(
-                product_title=body.product_title,
-                brand=body.brand,
-                keywords=[
-                    {"phrase": k.phrase, "search_volume": k.search_volume}
-                    for k in body.keywords
-                ],
-                marketplace=body.marketplace,
-                mode=body.mode,
-                product_line=body.product_line or "",
-                language=body.language,
-                db=db,
-                audience_context=body.audience_context or "",
-                account_type=body.account_type,
-                category=body.category or "",
-                provider_config=provider_config,
-                user_id=user_id,
-                original_description=body.original_description or "",
-                original_bullets=body.original_bullets or [],
-            ),
-            timeout=llm_timeout,
+        run = OptimizationRun(
+            user_id=user_id,
+            product_title=body.product_title,
+            brand=body.brand,
+            marketplace=body.marketplace,
+            mode=body.mode,
+            coverage_pct=result.get("scores", {}).get("coverage_pct", 0),
+            compliance_status=result.get("compliance", {}).get("status", "UNKNOWN"),
+            # SECURITY: Strip API key before persisting — never store user keys in history
+            request_data={k: v for k, v in body.model_dump().items() if k != "llm_api_key"},
+            response_data=result,
+            trace_data=result.get("trace"),
+            client_ip=_hashed_ip(request),
         )
-
-        logger.info(
-            "optimizer_success",
-            coverage=result.get("scores", {}).get("coverage_pct", 0),
-            compliance=result.get("compliance", {}).get("status", "UNKNOWN"),
+        db.add(run)
+        db.commit()
+    except Exception as save_err:
+        db.rollback()
+        logger.warning("optimizer_history_save_failed", error=str(save_err))
+
+
+def _optimizer_error(e: Exception) -> HTTPException:
+    """Map optimizer failures to user-facing HTTP errors — never leak provider details."""
+    if isinstance(e, HTTPException):
+        return e
+    if isinstance(e, asyncio.TimeoutError):
+        return HTTPException(
+            status_code=504,
+            detail="Optymalizacja przekroczyła limit czasu (60s). Spróbuj ponownie za chwilę.",
         )
+    error_msg = str(e).lower()
+    # WHY: Differentiate between rate limit (all keys exhausted) and other errors
+    if "rate_limit" in error_msg or "429" in error_msg or "too many" in error_msg:
+        return HTTPException(
+            status_code=503,
+            detail="Serwer AI jest chwilowo przeciążony. Spróbuj ponownie za minutę.",
+        )
+    return HTTPException(status_code=500, detail="Optymalizacja nie powiodła się. Spróbuj ponownie.")
+
+
+# WHY: Proxies drop idle connections — a comment frame every 15s keeps slow Beast runs alive
+GENERATE_STREAM_KEEPALIVE = 15.0
+
+
+async def _generate_events(
+    kwargs: dict, timeout: float,
+    on_result: Optional[Callable[[Session, dict], None]] = None,
+    session_factory: Optional[Callable[[], Session]] = None,
+) -> AsyncIterator[str]:
+    """Run optimize_listing in a task and relay its on_event callbacks as SSE frames.
+
+    WHY own session: FastAPI closes yield-dependencies before the stream body runs.
+    Optimization queries use an AsyncSession when available; on_result gets the sync one.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
 
-        # WHY: Auto-save to history — non-blocking, don't fail the response if DB save fails
+    async def emit(event: str, data: dict) -> None:
+        await queue.put((event, data))
+
+    async def run() -> None:
+        db = (session_factory or SessionLocal)()
+        async_factory = get_async_session_factory() if session_factory is None else None
+        adb = async_factory() if async_factory is not None else None
         try:
-            run = OptimizationRun(
-                user_id=user_id,
-                product_title=body.product_title,
-                brand=body.brand,
-                marketplace=body.marketplace,
-                mode=body.mode,
-                coverage_pct=result.get("scores", {}).get("coverage_pct", 0),
-                compliance_status=result.get("compliance", {}).get("status", "UNKNOWN"),
-                # SECURITY: Strip API key before persisting — never store user keys in history
-                request_data={k: v for k, v in body.model_dump().items() if k != "llm_api_key"},
-                response_data=result,
-                trace_data=result.get("trace"),
-                client_ip=_hashed_ip(request),
+            result = await asyncio.wait_for(
+                optimize_listing(db=adb or db, on_event=emit, **kwargs), timeout=timeout,
             )
-            db.add(run)
-            db.commit()
-        except Exception as save_err:
-            logger.warning("optimizer_history_save_failed", error=str(save_err))
+            if on_result:
+                on_result(db, result)
+            await queue.put(("done", result))
+        except Exception as e:
+            logger.error("optimizer_stream_error", error=str(e), product=kwargs["product_title"][:50])
+            err = _optimizer_error(e)
+            await queue.put(("error", {"status": err.status_code, "detail": err.detail}))
+        finally:
+            if adb is not None:
+                await adb.close()
+            db.close()
+
+    task = asyncio.create_task(run())
+    try:
+        while True:
+            try:
+                event, data = await asyncio.wait_for(queue.get(), timeout=GENERATE_STREAM_KEEPALIVE)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            yield sse_event(event, data)
+            if event in ("done", "error"):
+                return
+    finally:
+        # WHY: Client closed the tab — stop spending LLM tokens on a listing nobody will see
+        if not task.done():
+            task.cancel()
 
-        return result
 
-    except asyncio.TimeoutError:
-        logger.error("optimizer_timeout", product=body.product_title[:50])
-        raise HTTPException(
-            status_code=504,
-            detail="Optymalizacja przekroczyła limit czasu (60s). Spróbuj ponownie za chwilę.",
+@router.post("/generate", response_model=OptimizerResponse)
+@limiter.limit("10/minute")
+async def generate_listing(
+    request: Request, body: OptimizerRequest, db: Session = Depends(get_db),
+    adb: Optional[AsyncSession] = Depends(get_async_db), user_id: str = Depends(require_user_id),
+):
+    """
+    Generate an optimized listing using Groq LLM + keyword analysis.
+
+    WHY: Runs 3 LLM calls (title, bullets, description) then computes
+    coverage scores, backend keyword packing, and compliance checks.
+    Hot-path queries (license, RAG, few-shot examples, learning) go through adb when available.
+    """
+    # SECURITY: Server-side tier check before any LLM calls
+    await _acheck_tier_limit(request, adb or db)
+
+    logger.info(
+        "optimizer_request",
+        product=body.product_title[:50],
+        brand=body.brand,
+        marketplace=body.marketplace,
+        keyword_count=len(body.keywords),
+    )
+
+    provider_config = _resolve_provider_config(body, db, user_id)
+
+    try:
+        result = await asyncio.wait_for(
+            optimize_listing(db=adb or db, **_optimize_kwargs(body, provider_config, user_id)),
+            timeout=_llm_timeout(provider_config),
         )
     except HTTPException:
         raise
     except Exception as e:
-        error_msg = str(e).lower()
-        logger.error("optimizer_error", error=str(e), product=body.product_title[:50], exc_info=True)
-        # WHY: Differentiate between rate limit (all keys exhausted) and other errors
-        if "rate_limit" in error_msg or "429" in error_msg or "too many" in error_msg:
-            raise HTTPException(
-                status_code=503,
-                detail="Serwer AI jest chwilowo przeciążony. Spróbuj ponownie za minutę.",
-            )
-        raise HTTPException(status_code=500, detail="Optymalizacja nie powiodła się. Spróbuj ponownie.")
+        if isinstance(e, asyncio.TimeoutError):
+            logger.error("optimizer_timeout", product=body.product_title[:50])
+        else:
+            logger.error("optimizer_error", error=str(e), product=body.product_title[:50], exc_info=True)
+        raise _optimizer_error(e)
+
+    logger.info(
+        "optimizer_success",
+        coverage=result.get("scores", {}).get("coverage_pct", 0),
+        compliance=result.get("compliance", {}).get("status", "UNKNOWN"),
+    )
+    _save_history(db, request, body, user_id, result)
+    return result
+
+
+@router.post("/generate/stream")
+@limiter.limit("10/minute")
+async def generate_listing_stream(
+    request: Request, body: OptimizerRequest, db: Session = Depends(get_db),
+    adb: Optional[AsyncSession] = Depends(get_async_db), user_id: str = Depends(require_user_id),
+):
+    """
+    Streaming /generate: server-sent events while the listing is built.
+
+    Events: "token" {section, delta} where the provider streams, "section" {section, text|bullets}
+    as each LLM call finishes, "fallback" if a non-Groq provider failed and Groq restarts,
+    then "done" with the same payload /generate returns (scores included), or "error".
+    WHY: Time-to-first-content drops from the whole pipeline to roughly one LLM latency.
+    """
+    # SECURITY: Tier check and provider validation happen before the stream opens → normal HTTP errors
+    await _acheck_tier_limit(request, adb or db)
+    provider_config = _resolve_provider_config(body, db, user_id)
+    kwargs = _optimize_kwargs(body, provider_config, user_id)
+    logger.info("optimizer_stream_request", product=body.product_title[:50], marketplace=body.marketplace)
+
+    return StreamingResponse(
+        _generate_events(
+            kwargs, _llm_timeout(provider_config),
+            on_result=lambda session, result: _save_history(session, request, body, user_id, result),
+        ),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
 
 
-# WHY: Batch endpoint processes multiple products sequentially
+# WHY: Batch endpoint processes products with bounded concurrency (services/batch_optimizer.py)
 BATCH_MAX_PRODUCTS = 50
 
 
 class BatchOptimizerRequest(BaseModel):
     """Batch of products to optimize"""
     products: List[OptimizerRequest] = Field(..., min_length=1, max_length=BATCH_MAX_PRODUCTS)
+    # WHY: Products processed at once — per-provider caps in PROVIDER_CONCURRENCY still apply
+    concurrency: int = Field(default=BATCH_CONCURRENCY, ge=1, le=BATCH_MAX_CONCURRENCY)
 
 
 class BatchOptimizerResult(BaseModel):
@@ -307,6 +442,7 @@ class BatchOptimizerResult(BaseModel):
     status: str  # "completed" or "error"
     error: Optional[str] = None
     result: Optional[OptimizerResponse] = None
+    duration_ms: float = 0  # WHY: Per-item wall-clock — compare against batch duration_ms
 
 
 class BatchOptimizerResponse(BaseModel):
@@ -315,6 +451,19 @@ class BatchOptimizerResponse(BaseModel):
     succeeded: int
     failed: int
     results: List[BatchOptimizerResult]
+    duration_ms: float = 0  # WHY: Whole-batch wall-clock — sum of item durations / this = speedup
+    concurrency: int = 1
+
+
+def _batch_provider_config(product: OptimizerRequest) -> Optional[dict]:
+    """Build provider_config per product — each could have different provider."""
+    if product.llm_provider and product.llm_provider != "groq":
+        if product.llm_provider in PROVIDERS and product.llm_api_key:
+            return {
+                "provider": product.llm_provider,
+                "api_key": product.llm_api_key,
+            }
+    return None
 
 
 @router.post("/generate-batch", response_model=BatchOptimizerResponse)
@@ -323,121 +472,195 @@ async def generate_batch(request: Request, body: BatchOptimizerRequest, db: Sess
     """
     Generate optimized listings for multiple products.
 
-    WHY: Processes sequentially because each product runs 3 LLM calls.
+    WHY: Runs up to `concurrency` products at once (each product runs 4 LLM calls).
     Per-product error handling ensures one failure doesn't abort the batch.
     """
     # SECURITY: Server-side tier check — batch counts ALL items against daily limit
     _check_tier_limit(request, db, requested_count=len(body.products))
 
-    results: List[BatchOptimizerResult] = []
-    succeeded = 0
-    failed = 0
+    logger.info("batch_optimizer_start", total_products=len(body.products), concurrency=body.concurrency)
 
-    logger.info("batch_optimizer_start", total_products=len(body.products))
-
-    for i, product in enumerate(body.products):
-        try:
-            # WHY: Build provider_config per product — each could have different provider
-            batch_provider_config = None
-            if product.llm_provider and product.llm_provider != "groq":
-                if product.llm_provider in PROVIDERS and product.llm_api_key:
-                    batch_provider_config = {
-                        "provider": product.llm_provider,
-                        "api_key": product.llm_api_key,
-                    }
-
-            batch_timeout = 180.0 if (batch_provider_config and batch_provider_config.get("provider") == "beast") else 60.0
-            data = await asyncio.wait_for(
-                optimize_listing(
-                    product_title=product.product_title,
-                    brand=product.brand,
-                    keywords=[
-                        {"phrase": k.phrase, "search_volume": k.search_volume}
-                        for k in product.keywords
-                    ],
-                    marketplace=product.marketplace,
-                    mode=product.mode,
-                    product_line=product.product_line or "",
-                    language=product.language,
-                    db=db,
-                    audience_context=product.audience_context or "",
-                    account_type=product.account_type,
-                    category=product.category or "",
-                    provider_config=batch_provider_config,
-                    user_id=user_id,
-                    original_description=product.original_description or "",
-                    original_bullets=product.original_bullets or [],
-                ),
-                timeout=batch_timeout,
+    async def _optimize_one(_index: int, product: OptimizerRequest) -> Dict[str, Any]:
+        # WHY own session: products run concurrently — the request's db is only for the tier check
+        async with task_session(db) as item_db:
+            return await optimize_listing(
+                db=item_db, **_optimize_kwargs(product, _batch_provider_config(product), user_id),
             )
 
-            results.append(BatchOptimizerResult(
-                product_title=product.product_title,
-                status="completed",
-                result=OptimizerResponse(**data),
-            ))
-            succeeded += 1
-
-            logger.info(
-                "batch_item_success",
-                index=i,
-                product=product.product_title[:50],
-                coverage=data.get("scores", {}).get("coverage_pct", 0),
-            )
+    def _provider_for(product: OptimizerRequest) -> Optional[str]:
+        config = _batch_provider_config(product)
+        return config["provider"] if config else "groq"
 
-        except asyncio.TimeoutError:
-            logger.error("batch_item_timeout", index=i, product=product.product_title[:50])
-            results.append(BatchOptimizerResult(
-                product_title=product.product_title,
-                status="error",
-                error="Timeout — produkt zbyt duży lub serwer AI przeciążony",
-            ))
-            failed += 1
-            continue
+    batch = await run_batch(
+        body.products, _optimize_one, _provider_for,
+        concurrency=body.concurrency, label_for=lambda p: p.product_title,
+    )
 
-        except Exception as e:
-            error_msg = str(e).lower()
-            logger.error("batch_item_error", index=i, error=str(e))
-            # WHY: Rate limit = all keys exhausted — remaining products will also fail
-            if "rate_limit" in error_msg or "429" in error_msg:
-                results.append(BatchOptimizerResult(
-                    product_title=product.product_title,
-                    status="error",
-                    error="Serwer AI przeciążony — spróbuj za minutę",
-                ))
-                failed += 1
-                # WHY: Skip remaining products — they'll all hit the same rate limit
-                for remaining in body.products[i + 1:]:
-                    results.append(BatchOptimizerResult(
-                        product_title=remaining.product_title,
-                        status="error",
-                        error="Pominięto — serwer AI przeciążony",
-                    ))
-                    failed += 1
-                break
-
-            results.append(BatchOptimizerResult(
-                product_title=product.product_title,
-                status="error",
-                error="Optymalizacja nie powiodła się",
-            ))
-            failed += 1
+    results = [
+        BatchOptimizerResult(
+            product_title=body.products[r["index"]].product_title,
+            status=r["status"],
+            error=r["error"],
+            result=OptimizerResponse(**r["data"]) if r["data"] else None,
+            duration_ms=r["duration_ms"],
+        )
+        for r in batch["results"]
+    ]
 
     logger.info(
         "batch_optimizer_done",
         total=len(body.products),
-        succeeded=succeeded,
-        failed=failed,
+        succeeded=batch["succeeded"],
+        failed=batch["failed"],
+        rate_limited=batch["rate_limited"],
+        duration_ms=batch["duration_ms"],
     )
 
     return BatchOptimizerResponse(
         total=len(body.products),
-        succeeded=succeeded,
-        failed=failed,
+        succeeded=batch["succeeded"],
+        failed=batch["failed"],
         results=results,
+        duration_ms=batch["duration_ms"],
+        concurrency=batch["concurrency"],
+    )
+
+
+# --- Background batch jobs (durable, streamed) ---
+
+class BatchJobRequest(BaseModel):
+    """Large batch processed in the background — results persisted per item"""
+    products: List[OptimizerRequest] = Field(..., min_length=1, max_length=JOB_MAX_PRODUCTS)
+    concurrency: int = Field(default=BATCH_CONCURRENCY, ge=1, le=BATCH_MAX_CONCURRENCY)
+
+
+class ResumeJobRequest(BaseModel):
+    """Optional /resume body — user LLM keys are never persisted, so a restart loses them"""
+    # WHY: provider -> key; applied to every item of the job that picked that provider
+    llm_api_keys: Dict[str, str] = Field(default_factory=dict, max_length=len(PROVIDERS))
+
+    @field_validator("llm_api_keys")
+    @classmethod
+    def _known_providers(cls, keys: Dict[str, str]) -> Dict[str, str]:
+        for provider, key in keys.items():
+            if provider not in PROVIDERS:
+                raise ValueError(f"Nieznany provider: {provider}")
+            if len(key) > 200:
+                raise ValueError("Klucz API za długi")
+        return keys
+
+
+def _get_user_job(db: Session, job_id: int, user_id: str) -> OptimizationBatchJob:
+    job = db.query(OptimizationBatchJob).filter(
+        OptimizationBatchJob.id == job_id, OptimizationBatchJob.user_id == user_id,
+    ).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.post("/jobs", status_code=202)
+@limiter.limit("3/minute")
+async def create_batch_job(request: Request, body: BatchJobRequest, db: Session = Depends(get_db), user_id: str = Depends(require_user_id)):
+    """
+    Submit a batch for background optimization. Returns the job id immediately.
+
+    WHY 202: A 500-SKU batch takes minutes — stream GET /jobs/{id}/events instead of
+    holding one HTTP request open until a proxy kills it.
+    """
+    _check_tier_limit(request, db, requested_count=len(body.products))
+
+    job = create_job(db, user_id, [p.model_dump() for p in body.products], concurrency=body.concurrency)
+    start_job(job.id)
+    return job_to_dict(job)
+
+
+@router.get("/jobs")
+async def list_batch_jobs(
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    user_id: str = Depends(require_user_id),
+):
+    """List the user's batch jobs, newest first."""
+    jobs = (
+        db.query(OptimizationBatchJob)
+        .filter(OptimizationBatchJob.user_id == user_id)
+        .order_by(OptimizationBatchJob.created_at.desc())
+        .limit(limit)
+        .all()
+    )
+    return {"items": [job_to_dict(j) for j in jobs]}
+
+
+@router.get("/jobs/{job_id}")
+async def get_batch_job(job_id: int, db: Session = Depends(get_db), user_id: str = Depends(require_user_id)):
+    """Job status and progress counters."""
+    return job_to_dict(_get_user_job(db, job_id, user_id))
+
+
+@router.get("/jobs/{job_id}/results")
+async def get_batch_job_results(
+    job_id: int,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_db),
+    user_id: str = Depends(require_user_id),
+):
+    """Finished items so far (paginated) plus current errors — usable while still running."""
+    job = _get_user_job(db, job_id, user_id)
+    return get_job_results(db, job, offset=offset, limit=limit)
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_batch_job(
+    request: Request,
+    job_id: int,
+    after_run: int = Query(0, ge=0),
+    after_error: int = Query(0, ge=0),
+    db: Session = Depends(get_db),
+    user_id: str = Depends(require_user_id),
+):
+    """
+    Server-sent events: "item" per finished product, "progress", then "done".
+
+    WHY Last-Event-ID: EventSource reconnects send it automatically, so a dropped
+    connection resumes after the last delivered item instead of replaying everything.
+    """
+    _get_user_job(db, job_id, user_id)
+    if request.headers.get("last-event-id"):
+        after_run, after_error = parse_last_event_id(request.headers["last-event-id"])
+
+    return StreamingResponse(
+        stream_job_events(job_id, user_id, after_run_id=after_run, errors_seen=after_error),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
     )
 
 
+@router.post("/jobs/{job_id}/resume")
+@limiter.limit("5/minute")
+async def resume_batch_job(
+    request: Request, job_id: int, body: Optional[ResumeJobRequest] = None,
+    db: Session = Depends(get_db), user_id: str = Depends(require_user_id),
+):
+    """Re-run every item that has no saved result (failed, skipped, or interrupted).
+
+    Items on a non-Groq provider need their key in memory — pass llm_api_keys again
+    after a restart, or they fail with "key required" instead of running on Groq.
+    """
+    job = _get_user_job(db, job_id, user_id)
+    if is_running(job.id):
+        raise HTTPException(status_code=409, detail="Zadanie jest już w trakcie")
+    if job.status == "completed" and not job.failed_count:
+        return job_to_dict(job)
+
+    _check_tier_limit(request, db, requested_count=(job.total or 0) - (job.completed_count or 0))
+    if body and body.llm_api_keys:
+        supply_api_keys(job, body.llm_api_keys)
+    start_job(job.id)
+    return {**job_to_dict(job), "running": True}
+
+
 # --- History endpoints ---
 
 @router.get("/history")
@@ -1,5 +1,5 @@
 # backend/api/research_routes.py
-# Purpose: Audience research endpoint — calls Groq directly with key rotation
+# Purpose: Audience research endpoint — calls Groq directly with scheduled key rotation
 # NOT for: LLM prompts (that's ov_skills.py) or optimizer logic (optimizer_service.py)
 
 from fastapi import APIRouter, HTTPException, Depends, Request
@@ -8,10 +8,9 @@ from typing import Optional
 from sqlalchemy.orm import Session
 from slowapi import Limiter
 from slowapi.util import get_remote_address
-from groq import Groq
 import structlog
 
-from config import settings
+from services.groq_client import agroq_chat
 from services.stripe_service import validate_license
 from services.ov_skills import build_skill_prompt
 from database import get_db
@@ -88,34 +87,20 @@ def _check_research_limit(request: Request, db: Session):
         )
 
 
-def _call_groq_research(system_prompt: str, user_prompt: str) -> dict:
-    """Call Groq with key rotation. Returns {text, tokens_used, model}."""
-    keys = settings.groq_api_keys
-    last_error = None
-
-    for i, key in enumerate(keys):
-        try:
-            client = Groq(api_key=key)
-            response = client.chat.completions.create(
-                model=MODEL,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt},
-                ],
-                temperature=0.3,
-                max_tokens=4096,
-            )
-            text = response.choices[0].message.content.strip()
-            total = response.usage.total_tokens if response.usage else 0
-            return {"text": text, "tokens_used": total, "model": MODEL}
-        except Exception as e:
-            last_error = e
-            if "429" in str(e) or "rate_limit" in str(e):
-                logger.warning("research_groq_rate_limit", key_index=i, remaining=len(keys) - i - 1)
-                continue
-            raise
-
-    raise last_error or RuntimeError("All Groq keys exhausted")
+async def _call_groq_research(system_prompt: str, user_prompt: str) -> dict:
+    """Call Groq on the scheduler-picked key. Returns {text, tokens_used, model}."""
+    response = await agroq_chat(
+        [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt},
+        ],
+        temperature=0.3,
+        max_tokens=4096,
+        model=MODEL,
+    )
+    text = response.choices[0].message.content.strip()
+    total = response.usage.total_tokens if response.usage else 0
+    return {"text": text, "tokens_used": total, "model": MODEL}
 
 
 @router.post("/audience", response_model=AudienceResearchResponse)
@@ -127,7 +112,7 @@ async def research_audience(
     user_id: str = Depends(require_user_id),
 ):
     """
-    Run audience research via Groq directly (6-key rotation).
+    Run audience research via Groq directly (scheduled key rotation).
     WHY: Direct call is more reliable than n8n single-key webhook.
     """
     skill = body.skill or "deep-customer-research"
@@ -151,7 +136,7 @@ async def research_audience(
     logger.info("research_audience_start", product=body.product[:50], skill=skill)
 
     try:
-        result = _call_groq_research(prompts["system"], prompts["user"])
+        result = await _call_groq_research(prompts["system"], prompts["user"])
     except Exception as e:
         logger.error("research_audience_error", error=str(e), error_type=type(e).__name__)
         # WHY generic: internal errors (Groq API keys, network) must not leak to client
@@ -26,6 +26,9 @@ class Settings(BaseSettings):
     supabase_key: str
     supabase_service_key: str
     database_url: str
+    # WHY: asyncpg engine for request-path queries (database.get_async_db) — off = sync Session everywhere
+    async_db_enabled: bool = True
+    async_db_pool_size: int = 10
 
     # AI/LLM - Groq (PRIMARY, NOT OpenAI)
     groq_model: str = "llama-3.3-70b-versatile"  # WHY: Configurable via env — test new models without code change
@@ -90,11 +93,44 @@ class Settings(BaseSettings):
     telegram_bot_token: str = ""  # WHY: Empty = Telegram alerts disabled
     telegram_chat_id: str = "7002371113"
 
+    # Optimizer LLM call ordering (optimizer_llm.PIPELINE_MODES)
+    optimizer_pipeline: str = "speculative"  # WHY: "sequential" = title-first (A/B latency), "fused" = one JSON call
+
+    # LLM response cache — identical optimizer prompts reuse the stored response
+    llm_cache_enabled: bool = True  # WHY: Kill switch without a deploy if cached output looks stale
+    llm_cache_db: bool = True  # WHY: Postgres tier survives restarts; False = in-process LRU only
+    llm_cache_ttl_seconds: int = 86400  # WHY: 24h — prompts embed RAG context, which changes with ingestion
+
     # RAG Search Mode + Cloudflare Workers AI embeddings (free)
-    rag_mode: str = "hybrid"  # WHY: "lexical" | "hybrid" | "semantic" — embeddings ready, hybrid active
+    rag_mode: str = "hybrid"  # WHY: "lexical" | "hybrid" | "semantic" | "memory" — embeddings ready, hybrid active
+    # WHY: rag_mode "memory" = semantic search over an mmap'd export of chunk embeddings
+    # (scripts/export_vector_index.py) — no DB round-trip; Postgres is used while it is stale
+    vector_index_dir: str = "data/knowledge_index"
+    vector_index_auto_rebuild: bool = True  # WHY: Re-export in the background when knowledge_chunks changes
+    # WHY: Where hybrid results are fused — "python" (hybrid_merge in the app), "weighted" (same
+    # formula in Postgres, only final rows leave the DB), "rrf" (reciprocal rank fusion in Postgres)
+    rag_fusion: str = "python"
+    # WHY: pgvector hnsw.ef_search per request (SET LOCAL) — higher = better recall, slower; must be
+    # >= the result limit. 0 = server default (40)
+    rag_hnsw_ef_search: int = 0
+    rag_cache_enabled: bool = True  # WHY: Same-niche products repeat queries — skip expansion, embedding and SQL
+    rag_cache_ttl_seconds: int = 3600  # WHY: Upper bound on staleness if the knowledge_version check is unavailable
+    rag_cache_version_check_seconds: int = 30  # WHY: How long an ingestion run can go unnoticed by the API
+    # WHY: Groq query expansion before retrieval (query_understanding.py) — keyword-style queries
+    # skip it, results are cached, and retrieval goes on with the raw query after the budget
+    query_expansion_gate: bool = True
+    query_expansion_cache_ttl_seconds: int = 86400
+    query_expansion_budget_ms: int = 400  # WHY: 0 = wait for the call however long it takes
     cf_account_id: str = ""  # WHY: Cloudflare account for Workers AI embeddings
     cf_auth_email: str = ""  # Cloudflare auth email
     cf_api_key: str = ""  # Cloudflare Global API Key
+    # WHY: "cloudflare" = Workers AI over HTTP; "local" = same bge-small model on CPU via ONNX Runtime
+    # (pip install -r requirements-local-embed.txt) — no rate limits, bulk backfill in minutes
+    embedding_backend: str = "cloudflare"
+    local_embedding_model_dir: str = "data/bge-small-en-v1.5"  # WHY: Downloaded on first use if missing
+    local_embedding_batch_size: int = 32
+    local_embedding_threads: int = 2  # WHY: Batches run in parallel; ORT intra-op threads = cores / this
+    embedding_cache_db: bool = True  # WHY: Query embeddings survive restarts; False = in-process LRU only
 
     # Scraping
     scrape_do_token: str = ""  # Scrape.do API token (recommended for Allegro)
@@ -2,9 +2,12 @@
 # Purpose: EFSA-approved health claims database for EU supplement compliance
 # NOT for: FDA claims, non-EU markets, or LLM-generated content
 
-from typing import Dict, List, Any, Optional
+from functools import lru_cache
+from typing import Dict, List, Any, Optional, Tuple
 import re
 
+from services.phrase_matcher import PhraseMatcher
+
 
 # WHY: ~50 most common supplement ingredients with their EFSA-approved claims
 # Source: EU Register of nutrition and health claims (EC 432/2012)
@@ -529,6 +532,37 @@ EFSA_CLAIMS_DB: Dict[str, Dict[str, Any]] = {
 }
 
 
+# ── Claim index (built once at import) ──
+
+def _normalize(name: str) -> str:
+    return " ".join(name.lower().split())
+
+
+# WHY: Every spelling a seller might type (DB key or alias) → canonical key, so exact names
+# resolve in one dict lookup. The old linear scan let partial matches of earlier entries win
+# over exact aliases ("casein" → selen via "se", "withania somnifera" → eisen via "fe").
+_ALIAS_INDEX: Dict[str, str] = {}
+for _key, _entry in EFSA_CLAIMS_DB.items():
+    for _name in [_key, *_entry.get("aliases", [])]:
+        _ALIAS_INDEX.setdefault(_normalize(_name), _key)
+
+# WHY: Canonical key → its forbidden patterns, compiled once instead of per lookup call
+_FORBIDDEN_INDEX: Dict[str, List[Tuple[str, re.Pattern]]] = {
+    key: [(p, re.compile(p, re.IGNORECASE)) for p in entry.get("forbidden_patterns", [])]
+    for key, entry in EFSA_CLAIMS_DB.items()
+}
+
+# WHY: One automaton pass over title+bullets finds every known ingredient name;
+# _NAME_KEYS maps each matcher phrase back to its canonical key
+_NAME_KEYS: List[str] = []
+_NAMES: List[str] = []
+for _key, _entry in EFSA_CLAIMS_DB.items():
+    for _name in [_key, *_entry.get("aliases", [])]:
+        _NAMES.append(_name.lower())
+        _NAME_KEYS.append(_key)
+_NAME_MATCHER = PhraseMatcher(_NAMES)
+
+
 def lookup_ingredients(
     ingredients: List[str],
     current_bullets: List[str],
@@ -542,10 +576,9 @@ def lookup_ingredients(
     results = []
 
     for ingredient_raw in ingredients:
-        ingredient = ingredient_raw.strip().lower()
-        entry = _find_entry(ingredient)
+        key = resolve_ingredient(ingredient_raw)
 
-        if not entry:
+        if key is None:
             results.append({
                 "name": ingredient_raw.strip(),
                 "found": False,
@@ -554,15 +587,16 @@ def lookup_ingredients(
                 "suggestion": f"No EFSA data for '{ingredient_raw.strip()}' — check EU Register manually",
             })
             continue
+        entry = EFSA_CLAIMS_DB[key]
 
         # Check current bullets for forbidden patterns
         forbidden_found = []
-        for pattern in entry.get("forbidden_patterns", []):
-            matches = re.findall(pattern, bullets_text, re.IGNORECASE)
-            if matches:
+        for pattern, compiled in _FORBIDDEN_INDEX[key]:
+            match = compiled.search(bullets_text)
+            if match:
                 forbidden_found.append({
                     "pattern": pattern,
-                    "matched_text": matches[0],
+                    "matched_text": match.group(),
                 })
 
         suggestion = ""
@@ -587,23 +621,25 @@ def lookup_ingredients(
     return results
 
 
-def _find_entry(ingredient: str) -> Optional[Dict[str, Any]]:
-    """Find EFSA entry by name or alias."""
-    # Direct match
-    if ingredient in EFSA_CLAIMS_DB:
-        return EFSA_CLAIMS_DB[ingredient]
+@lru_cache(maxsize=1024)
+def resolve_ingredient(ingredient: str) -> Optional[str]:
+    """Canonical EFSA_CLAIMS_DB key for an ingredient name or alias, or None.
+
+    Exact (whitespace/case-normalized) names first; otherwise the first entry, in DB order,
+    whose key or alias contains the ingredient or is contained in it.
+    """
+    name = _normalize(ingredient)
+    if not name:
+        return None
+    if name in _ALIAS_INDEX:
+        return _ALIAS_INDEX[name]
 
-    # Search aliases
+    # Partial match — ingredient contains the key or vice versa
     for key, entry in EFSA_CLAIMS_DB.items():
-        aliases = entry.get("aliases", [])
-        if ingredient in [a.lower() for a in aliases]:
-            return entry
-        # Partial match — ingredient contains the key or vice versa
-        if key in ingredient or ingredient in key:
-            return entry
-        for alias in aliases:
-            if alias.lower() in ingredient or ingredient in alias.lower():
-                return entry
+        for alias in [key, *entry.get("aliases", [])]:
+            alias = alias.lower()
+            if alias in name or name in alias:
+                return key
 
     return None
 
@@ -615,16 +651,7 @@ def auto_detect_ingredients(title: str, bullets: List[str]) -> List[str]:
     Scans text for known EFSA ingredients.
     """
     text = f"{title} {' '.join(bullets)}".lower()
-    found = []
-
-    for key, entry in EFSA_CLAIMS_DB.items():
-        names_to_check = [key] + [a.lower() for a in entry.get("aliases", [])]
-        for name in names_to_check:
-            # WHY: Word boundary check — avoid matching "protein" inside "lipoprotein"
-            if re.search(r'\b' + re.escape(name) + r'\b', text):
-                # Use the DB key as canonical name
-                if key not in found:
-                    found.append(key)
-                break
-
-    return found
+    # WHY: Whole-word matches only — avoid matching "protein" inside "lipoprotein"
+    found = {_NAME_KEYS[idx] for idx in _NAME_MATCHER.found(text)}
+    # Use the DB key as canonical name, in DB order
+    return [key for key in EFSA_CLAIMS_DB if key in found]
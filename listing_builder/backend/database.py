@@ -2,12 +2,17 @@
 # Purpose: Database connection and session management (Supabase PostgreSQL)
 # NOT for: Models or business logic
 
+import importlib.util
+from contextlib import asynccontextmanager
+
 from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 from supabase import create_client, Client
 from config import settings
-from typing import Generator
+from typing import Any, AsyncGenerator, AsyncIterator, Callable, Generator, Optional, TypeVar, Union
 import structlog
 
 logger = structlog.get_logger()
@@ -26,6 +31,104 @@ engine = create_engine(
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# WHY: Async engine (asyncpg) for request-path queries — a slow Supabase query awaits instead of
+# blocking the event loop, so in-flight LLM calls keep progressing. Created on first use;
+# None when asyncpg isn't installed, the URL isn't Postgres (SQLite tests) or it's switched off.
+_async_engine: Optional[AsyncEngine] = None
+_async_session_factory: Optional[async_sessionmaker] = None
+_async_init_done = False
+
+T = TypeVar("T")
+AnySession = Union[Session, AsyncSession]
+
+
+def async_database_url(url: str) -> Optional[tuple[str, dict]]:
+    """(asyncpg URL, connect_args) for a Postgres DATABASE_URL, None for other databases.
+
+    WHY: asyncpg takes ssl=..., not libpq's sslmode. Supabase's transaction pooler (port 6543)
+    can't keep prepared statements across transactions — asyncpg's statement cache is disabled there.
+    """
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "postgresql":
+        return None
+    query = dict(parsed.query)
+    connect_args: dict[str, Any] = {}
+    sslmode = query.pop("sslmode", None)
+    if sslmode and sslmode != "disable":
+        connect_args["ssl"] = "require"
+    if parsed.port == 6543:
+        connect_args["statement_cache_size"] = 0
+        query["prepared_statement_cache_size"] = "0"
+    parsed = parsed.set(drivername="postgresql+asyncpg", query=query)
+    return parsed.render_as_string(hide_password=False), connect_args
+
+
+def get_async_session_factory() -> Optional[async_sessionmaker]:
+    """AsyncSession factory, or None when the async layer is unavailable (callers use SessionLocal)."""
+    global _async_engine, _async_session_factory, _async_init_done
+    if _async_init_done:
+        return _async_session_factory
+    _async_init_done = True
+    if not settings.async_db_enabled:
+        return None
+    target = async_database_url(_db_url)
+    if target is None:
+        return None
+    if importlib.util.find_spec("asyncpg") is None:
+        logger.warning("async_db_unavailable", reason="asyncpg not installed")
+        return None
+    url, connect_args = target
+    _async_engine = create_async_engine(
+        url,
+        pool_pre_ping=True,
+        pool_size=settings.async_db_pool_size,
+        max_overflow=20,
+        connect_args=connect_args,
+    )
+    # WHY: expire_on_commit=False — attribute access after commit would need an implicit await
+    _async_session_factory = async_sessionmaker(_async_engine, expire_on_commit=False, autoflush=False)
+    return _async_session_factory
+
+
+async def close_async_engine() -> None:
+    global _async_engine, _async_session_factory, _async_init_done
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    _async_engine, _async_session_factory, _async_init_done = None, None, False
+
+
+async def run_db(db: AnySession, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run sync-Session code `fn(session, *args)` against either kind of session.
+
+    WHY: The knowledge search stack (search_strategies, knowledge_cache, vector_index) is
+    written for Session and shared with scripts. AsyncSession.run_sync drives the same code
+    over asyncpg without blocking the loop; a plain Session just calls it.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(lambda session: fn(session, *args, **kwargs))
+    return fn(db, *args, **kwargs)
+
+
+@asynccontextmanager
+async def task_session(db: Session) -> AsyncIterator[AnySession]:
+    """A session of its own for one of several concurrent tasks that were handed `db`.
+
+    WHY: A Session is not safe for concurrent use — batch items awaiting LLM calls would
+    interleave queries and commits on one connection. AsyncSession when the async layer is
+    up, else a Session on db's engine (so dependency overrides in tests still apply).
+    """
+    async_factory = get_async_session_factory()
+    if async_factory is not None:
+        async with async_factory() as adb:
+            yield adb
+        return
+    task_db = Session(bind=db.get_bind(), autoflush=False)
+    try:
+        yield task_db
+    finally:
+        task_db.close()
+
+
 # Declarative base for models
 Base = declarative_base()
 
@@ -70,6 +173,29 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+async def get_async_db() -> AsyncGenerator[Optional[AsyncSession], None]:
+    """
+    FastAPI dependency for async database sessions — next to get_db, not instead of it.
+    Yields None when the async layer is unavailable; routes then use their sync session.
+
+    Usage in routes:
+        @app.get("/items")
+        async def get_items(db: Session = Depends(get_db), adb: AsyncSession | None = Depends(get_async_db)):
+            rows = await aget_past_successes(adb or db, "amazon_de")
+    """
+    factory = get_async_session_factory()
+    if factory is None:
+        yield None
+        return
+    async with factory() as db:
+        try:
+            yield db
+        except Exception as e:
+            logger.error("database_error", error=str(e))
+            await db.rollback()
+            raise
+
+
 def init_db():
     """
     Initialize database - create all tables.
@@ -98,6 +98,13 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error("monitor_scheduler_init_failed", error=str(e))
 
+    # WHY: Batch jobs interrupted by a restart/deploy continue from their last saved item
+    try:
+        from services.batch_job_service import resume_interrupted_jobs
+        resume_interrupted_jobs(SessionLocal)
+    except Exception as e:
+        logger.error("batch_job_resume_failed", error=str(e))
+
     # NOTE: No pre-warm — Render free tier health check needs fast startup.
     # First user request to /api/news/feed warms the cache (~10s).
 
@@ -109,6 +116,21 @@ async def lifespan(app: FastAPI):
         stop_scheduler()
     except Exception:
         pass
+    try:
+        from services.llm_providers import close_http_pools
+        await close_http_pools()
+    except Exception:
+        pass
+    try:
+        from database import close_async_engine
+        await close_async_engine()
+    except Exception:
+        pass
+    try:
+        from services.tos_audit_service import shutdown_pool
+        shutdown_pool()
+    except Exception:
+        pass
     logger.info("application_shutting_down")
 
 
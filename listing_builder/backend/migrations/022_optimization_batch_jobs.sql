@@ -0,0 +1,37 @@
+-- backend/migrations/022_optimization_batch_jobs.sql
+-- Purpose: Durable background batch optimization jobs + link finished runs to their job
+-- NOT for: Single-listing history (optimization_runs rows without batch_job_id)
+
+CREATE TABLE IF NOT EXISTS optimization_batch_jobs (
+    id SERIAL PRIMARY KEY,
+    user_id VARCHAR(255) NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    total INT DEFAULT 0,
+    completed_count INT DEFAULT 0,
+    failed_count INT DEFAULT 0,
+    concurrency INT DEFAULT 4,
+    request_data JSONB,
+    error_log JSONB DEFAULT '[]'::jsonb,
+    error_message TEXT,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+    completed_at TIMESTAMPTZ
+);
+
+CREATE INDEX IF NOT EXISTS idx_obj_user_created ON optimization_batch_jobs(user_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_obj_status ON optimization_batch_jobs(status);
+
+ALTER TABLE optimization_runs ADD COLUMN IF NOT EXISTS batch_job_id INT;
+ALTER TABLE optimization_runs ADD COLUMN IF NOT EXISTS batch_index INT;
+
+-- WHY: Resume + SSE replay look up finished items per job, ordered by id
+CREATE INDEX IF NOT EXISTS idx_optimization_runs_batch_job
+    ON optimization_runs(batch_job_id, id) WHERE batch_job_id IS NOT NULL;
+
+-- WHY: One row per batch item — the worker's INSERT … ON CONFLICT (batch_job_id, batch_index)
+-- DO NOTHING relies on it, so a resume after restart or a second worker can't duplicate an item.
+-- NULLs are distinct: single-listing runs never conflict.
+CREATE UNIQUE INDEX IF NOT EXISTS uq_optimization_runs_batch_item
+    ON optimization_runs(batch_job_id, batch_index);
+
+ALTER TABLE optimization_batch_jobs ENABLE ROW LEVEL SECURITY;
@@ -0,0 +1,21 @@
+-- backend/migrations/023_llm_response_cache.sql
+-- Purpose: Postgres tier of the optimizer LLM response cache (services/llm_cache.py)
+-- NOT for: Listing history or few-shot examples (listing_history table)
+
+CREATE TABLE IF NOT EXISTS llm_response_cache (
+    -- WHY: sha256(provider|model|temperature|max_tokens|sha256(prompt)) — content-addressed
+    cache_key CHAR(64) PRIMARY KEY,
+    provider VARCHAR(30) NOT NULL,
+    model VARCHAR(100) NOT NULL,
+    response TEXT NOT NULL,
+    usage JSONB,
+    hit_count INT NOT NULL DEFAULT 0,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    expires_at TIMESTAMPTZ NOT NULL
+);
+
+-- WHY: TTL sweep + oldest-first size eviction both scan by time
+CREATE INDEX IF NOT EXISTS idx_llm_cache_expires ON llm_response_cache(expires_at);
+CREATE INDEX IF NOT EXISTS idx_llm_cache_created ON llm_response_cache(created_at DESC);
+
+ALTER TABLE llm_response_cache ENABLE ROW LEVEL SECURITY;
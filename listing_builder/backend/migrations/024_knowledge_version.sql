@@ -0,0 +1,44 @@
+-- backend/migrations/024_knowledge_version.sql
+-- Purpose: Change counter for knowledge_chunks — invalidates the API's RAG search cache (services/knowledge_cache.py)
+-- NOT for: Per-chunk versioning or audit history
+
+CREATE TABLE IF NOT EXISTS knowledge_version (
+    id INT PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+INSERT INTO knowledge_version (id, version) VALUES (1, 0) ON CONFLICT (id) DO NOTHING;
+
+-- WHY: Statement-level trigger — ingestion scripts run in other processes and need no code
+-- change to invalidate; one bump per INSERT/UPDATE/DELETE statement, not per row.
+-- Bulk writers (embedding backfill) SET LOCAL knowledge.defer_version_bump = 'on' per batch
+-- and bump once when they finish — each bump flushes the RAG and query-embedding caches
+-- and forces a full vector_index re-export.
+CREATE OR REPLACE FUNCTION bump_knowledge_version() RETURNS trigger AS $$
+BEGIN
+    IF current_setting('knowledge.defer_version_bump', true) = 'on' THEN
+        RETURN NULL;
+    END IF;
+    UPDATE knowledge_version SET version = version + 1, updated_at = NOW() WHERE id = 1;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- WHY: Only writes that change what retrieval returns — minhash backfill (migration 028)
+-- and other housekeeping columns must not invalidate caches or queue on the version row
+DROP TRIGGER IF EXISTS trg_knowledge_chunks_version ON knowledge_chunks;
+CREATE TRIGGER trg_knowledge_chunks_version
+AFTER INSERT OR DELETE OR TRUNCATE ON knowledge_chunks
+FOR EACH STATEMENT EXECUTE FUNCTION bump_knowledge_version();
+
+DROP TRIGGER IF EXISTS trg_knowledge_chunks_version_update ON knowledge_chunks;
+CREATE TRIGGER trg_knowledge_chunks_version_update
+AFTER UPDATE OF content, category, source_type, embedding ON knowledge_chunks
+FOR EACH STATEMENT EXECUTE FUNCTION bump_knowledge_version();
+
+ALTER TABLE knowledge_version ENABLE ROW LEVEL SECURITY;
+
+-- Verification:
+-- SELECT version, updated_at FROM knowledge_version;  -- increments after any ingest script run
+-- UPDATE knowledge_chunks SET minhash = minhash WHERE false;  -- version unchanged
@@ -0,0 +1,17 @@
+-- backend/migrations/025_query_embedding_cache.sql
+-- Purpose: Postgres tier of the query embedding cache (services/embedding_service.py)
+-- NOT for: Chunk embeddings (knowledge_chunks.embedding)
+
+CREATE TABLE IF NOT EXISTS query_embedding_cache (
+    model VARCHAR(100) NOT NULL,
+    -- WHY: sha256 of the exact text — model is part of the key so a model swap never mixes vectors
+    text_hash CHAR(64) NOT NULL,
+    embedding REAL[] NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (model, text_hash)
+);
+
+-- WHY: Oldest-first size eviction scans by time
+CREATE INDEX IF NOT EXISTS idx_query_embedding_cache_created ON query_embedding_cache(created_at DESC);
+
+ALTER TABLE query_embedding_cache ENABLE ROW LEVEL SECURITY;
@@ -0,0 +1,61 @@
+-- backend/migrations/026_knowledge_category_hnsw.sql
+-- Purpose: Partial HNSW indexes per high-traffic knowledge category (services/search_strategies.py)
+-- NOT for: Unfiltered vector search — that keeps idx_knowledge_embedding from migration 007
+-- Run via: psql -f (autocommit) — CREATE INDEX CONCURRENTLY cannot run inside a transaction
+-- block, so not through a tool that wraps the file in BEGIN/COMMIT or sends it as one query.
+
+-- WHY: vector_search filtered `category = ANY(...)` after walking the table-wide HNSW graph.
+-- With 25K copywriting chunks, the ef_search (default 40) nearest neighbours are mostly
+-- copywriting, so small categories came back with fewer than `limit` rows or worse ones.
+-- The search now runs one ORDER BY ... LIMIT per category with `category = '<name>'`, which
+-- the planner matches against these partial indexes — each graph holds one category only.
+-- Categories = every primary/fallback entry of CATEGORY_MAP (services/knowledge_service.py);
+-- others still work through idx_knowledge_category + exact sort (small) or the global index.
+
+-- WHY: pgvector defaults (m=16, ef_construction=64) — each graph is ≤25K vectors, not 60K+.
+-- Building copywriting needs ~100 MB maintenance_work_mem to stay in memory:
+-- SET maintenance_work_mem = '256MB';
+-- WHY CONCURRENTLY: each build reads the whole table — a plain CREATE INDEX would block
+-- ingestion and the embedding backfill (writes) for its full duration. If a build fails it
+-- leaves an INVALID index that IF NOT EXISTS skips — DROP INDEX CONCURRENTLY it and re-run.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_knowledge_emb_listing_optimization
+ON knowledge_chunks USING hnsw (embedding vector_cosine_ops)
+WHERE category = 'listing_optimization';
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_knowledge_emb_keyword_research
+ON knowledge_chunks USING hnsw (embedding vector_cosine_ops)
+WHERE category = 'keyword_research';
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_knowledge_emb_ranking
+ON knowledge_chunks USING hnsw (embedding vector_cosine_ops)
+WHERE category = 'ranking';
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_knowledge_emb_conversion_optimization
+ON knowledge_chunks USING hnsw (embedding vector_cosine_ops)
+WHERE category = 'conversion_optimization';
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_knowledge_emb_market_research
+ON knowledge_chunks USING hnsw (embedding vector_cosine_ops)
+WHERE category = 'market_research';
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_knowledge_emb_copywriting
+ON knowledge_chunks USING hnsw (embedding vector_cosine_ops)
+WHERE category = 'copywriting';
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_knowledge_emb_ppc
+ON knowledge_chunks USING hnsw (embedding vector_cosine_ops)
+WHERE category = 'ppc';
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_knowledge_emb_marketing_psychology
+ON knowledge_chunks USING hnsw (embedding vector_cosine_ops)
+WHERE category = 'marketing_psychology';
+
+ANALYZE knowledge_chunks;
+
+-- Verification (should show "Index Scan using idx_knowledge_emb_copywriting"):
+-- EXPLAIN SELECT id FROM knowledge_chunks
+-- WHERE embedding IS NOT NULL AND category = 'copywriting'
+-- ORDER BY embedding <=> (SELECT embedding FROM knowledge_chunks WHERE embedding IS NOT NULL LIMIT 1)
+-- LIMIT 5;
+-- Recall/latency vs exact search: python scripts/bench_vector_recall.py
@@ -0,0 +1,39 @@
+-- backend/migrations/027_knowledge_ingest_state.sql
+-- Purpose: Content hashes on knowledge_chunks + per-document ingest state (services/knowledge_ingest.py)
+-- NOT for: Near-duplicate detection — content_hash only matches byte-identical chunks
+
+-- WHY: The ingest scripts have written `source` since the Hormozi import, but no migration
+-- declared it — fresh databases need it before the engine's INSERT
+ALTER TABLE knowledge_chunks ADD COLUMN IF NOT EXISTS source TEXT;
+
+-- WHY: sha256 of the stored content. Lets the engine skip chunks already stored under
+-- another document and keep unchanged chunks (and their embeddings) when a file is re-ingested.
+-- Not UNIQUE: rows ingested before this migration may already contain duplicates.
+ALTER TABLE knowledge_chunks ADD COLUMN IF NOT EXISTS content_hash TEXT;
+
+-- WHY: Must equal hashlib.sha256(content.encode("utf-8")).hexdigest() (knowledge_ingest.content_hash)
+UPDATE knowledge_chunks
+SET content_hash = encode(sha256(convert_to(content, 'UTF8')), 'hex')
+WHERE content_hash IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_knowledge_content_hash ON knowledge_chunks(content_hash);
+
+-- WHY: One row per ingested document (knowledge_chunks.filename). fingerprint covers the
+-- document text and its per-document metadata — equal fingerprint = skip on the next run.
+CREATE TABLE IF NOT EXISTS knowledge_ingest_files (
+    filename TEXT PRIMARY KEY,
+    source TEXT,
+    fingerprint TEXT NOT NULL,
+    chunk_count INT NOT NULL,
+    ingested_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_knowledge_ingest_files_source ON knowledge_ingest_files(source);
+
+ALTER TABLE knowledge_ingest_files ENABLE ROW LEVEL SECURITY;
+
+-- Verification:
+-- SELECT COUNT(*) FILTER (WHERE content_hash IS NULL) AS unhashed,
+--        COUNT(*) - COUNT(DISTINCT content_hash) AS exact_duplicates
+-- FROM knowledge_chunks;
+-- SELECT source, COUNT(*), SUM(chunk_count) FROM knowledge_ingest_files GROUP BY source;
@@ -0,0 +1,26 @@
+-- backend/migrations/028_knowledge_near_duplicates.sql
+-- Purpose: MinHash signatures on knowledge_chunks + near-duplicate log (services/knowledge_dedup.py)
+-- NOT for: Exact duplicates — content_hash (migration 027) already blocks those at insert
+
+-- WHY: 128 × uint32 MinHash signature of the chunk's word shingles (512 bytes/row, ~30 MB at
+-- 60K chunks). Stored so the ingest-time pass does not re-hash the whole corpus every run.
+-- NULL = not computed yet; scripts/dedupe_knowledge.py backfills.
+ALTER TABLE knowledge_chunks ADD COLUMN IF NOT EXISTS minhash BYTEA;
+
+-- WHY: Keyed by content_hash, not chunk id — a removed duplicate's row is gone, but its hash
+-- stays here so re-ingesting the file (knowledge_ingest._INSERT) does not add it back.
+-- removed = false rows are "marked" findings waiting for review.
+CREATE TABLE IF NOT EXISTS knowledge_duplicates (
+    content_hash TEXT PRIMARY KEY,
+    chunk_id INT NOT NULL,
+    duplicate_of INT NOT NULL,
+    similarity REAL NOT NULL,
+    removed BOOLEAN NOT NULL DEFAULT FALSE,
+    found_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+ALTER TABLE knowledge_duplicates ENABLE ROW LEVEL SECURITY;
+
+-- Verification:
+-- SELECT COUNT(*) FILTER (WHERE minhash IS NULL) AS unsigned FROM knowledge_chunks;
+-- SELECT removed, COUNT(*), round(avg(similarity)::numeric, 3) FROM knowledge_duplicates GROUP BY removed;
@@ -5,7 +5,7 @@
 from .product import Product, ProductStatus
 from .jobs import ImportJob, BulkJob, SyncLog, Webhook, JobStatus
 from .compliance import ComplianceReport, ComplianceReportItem
-from .optimization import OptimizationRun
+from .optimization import OptimizationRun, OptimizationBatchJob
 from .monitoring import TrackedProduct, MonitoringSnapshot, AlertConfig, Alert
 from .listing import Listing, TrackedKeyword
 from .epr import EprReport, EprReportRow
@@ -31,6 +31,7 @@ __all__ = [
     "ComplianceReport",
     "ComplianceReportItem",
     "OptimizationRun",
+    "OptimizationBatchJob",
     "TrackedProduct",
     "MonitoringSnapshot",
     "AlertConfig",
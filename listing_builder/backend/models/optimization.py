@@ -1,8 +1,8 @@
 # backend/models/optimization.py
-# Purpose: Stores completed optimization runs for history/reload
+# Purpose: Stores completed optimization runs for history/reload + background batch jobs
 # NOT for: Request validation or LLM logic
 
-from sqlalchemy import Column, Integer, String, Float, DateTime, JSON
+from sqlalchemy import Column, Integer, String, Float, DateTime, JSON, Text, Index
 from sqlalchemy.sql import func
 from database import Base
 
@@ -24,7 +24,45 @@ class OptimizationRun(Base):
     response_data = Column(JSON)  # WHY: Full response for reload
     trace_data = Column(JSON)  # WHY: Observability — tokens, latency, cost per run
     client_ip = Column(String(45))  # WHY: Per-IP free tier limit enforcement
+    # WHY: Set when the run came from a background batch job — finished items survive restarts
+    batch_job_id = Column(Integer, nullable=True, index=True)
+    batch_index = Column(Integer, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    # WHY: One row per batch item, enforced by the DB — _save_item upserts against it.
+    # NULLs are distinct, so single-listing runs (no batch_job_id) never conflict
+    __table_args__ = (
+        Index("uq_optimization_runs_batch_item", "batch_job_id", "batch_index", unique=True),
+    )
+
     def __repr__(self):
         return f"<OptimizationRun {self.id}: {self.product_title[:30]}>"
+
+
+class OptimizationBatchJob(Base):
+    """Background batch optimization — products in, one OptimizationRun per finished item.
+
+    WHY: Decouples large batches from the HTTP request — a proxy timeout no longer loses
+    finished work, and a worker restart resumes from the items without an OptimizationRun.
+    """
+    __tablename__ = "optimization_batch_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(String(255), nullable=False, index=True)
+    # WHY: String not Enum — values are JobStatus members, column matches the SQL migration
+    status = Column(String(20), nullable=False, default="pending", index=True)
+    total = Column(Integer, default=0)
+    completed_count = Column(Integer, default=0)
+    failed_count = Column(Integer, default=0)
+    concurrency = Column(Integer, default=4)
+    # SECURITY: Products without llm_api_key — user keys never hit the DB
+    request_data = Column(JSON)
+    # WHY: Append-only [{index, product_title, error}] — failed items have no OptimizationRun row
+    error_log = Column(JSON, default=list)
+    error_message = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return f"<OptimizationBatchJob {self.id}: {self.status} {self.completed_count}/{self.total}>"
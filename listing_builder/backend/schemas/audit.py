@@ -4,7 +4,7 @@
 
 import re
 from pydantic import BaseModel, Field, field_validator, model_validator
-from typing import Optional, List
+from typing import Dict, Optional, List
 
 # WHY: ASIN is always exactly 10 alphanumeric characters
 ASIN_PATTERN = re.compile(r"^[A-Z0-9]{10}$")
@@ -59,3 +59,38 @@ class AuditResult(BaseModel):
     score: float  # 0-100
     issues: List[AuditIssue]
     product_data: dict  # WHY: Raw scraped data for frontend display
+
+
+class TosViolation(BaseModel):
+    """One Amazon TOS rule hit (check_amazon_tos violation)."""
+    rule: str
+    severity: str  # SUPPRESSION | WARNING
+    message: str
+    field: str
+
+
+class TosAuditListing(BaseModel):
+    """TOS audit result for one SKU of a catalog."""
+    sku: str
+    asin: str
+    severity: str  # PASS | WARN | FAIL
+    suppression_risk: bool
+    violations: List[TosViolation]
+
+
+class TosAuditSummary(BaseModel):
+    """Aggregate counts over the whole audited catalog."""
+    total: int
+    by_severity: Dict[str, int]
+    suppression_risk: int
+    violation_count: int
+    violations_by_rule: Dict[str, int]
+    listings_by_rule: Dict[str, int]  # WHY: SKUs affected — a title repeating a word 3x counts once
+    elapsed_ms: float
+    listings_per_sec: float
+
+
+class TosAuditResponse(BaseModel):
+    """Catalog-wide TOS audit — summary plus SKUs with violations."""
+    summary: TosAuditSummary
+    listings: List[TosAuditListing]
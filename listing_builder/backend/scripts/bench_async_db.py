@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# backend/scripts/bench_async_db.py
+# Purpose: Benchmark request-path DB queries on a sync Session (blocks the loop) vs AsyncSession
+# NOT for: Query tuning — both modes run the exact same SQL
+#
+# Usage: cd backend && python scripts/bench_async_db.py [--requests 200] [--slow-ms 50] [--llm-ms 300]
+# Needs: Postgres DATABASE_URL (listing_history + premium_licenses tables) and asyncpg installed.
+# Cost: $0 — the "LLM call" is an asyncio.sleep standing in for awaited provider I/O.
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+# WHY: Add parent dir to path so we can import config and services
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+import logging
+import structlog
+# WHY: learning_fetch / license logs per request would drown the results table
+structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+from sqlalchemy import text
+
+from database import SessionLocal, close_async_engine, get_async_session_factory
+from services.learning_service import aget_past_successes
+from services.stripe_service import avalidate_license
+
+_SLOW_QUERY = text("SELECT pg_sleep(:s)")
+
+
+async def _request(db, slow_s: float, llm_s: float) -> float:
+    """One optimizer-shaped request: license check, slow query, few-shot fetch, then LLM wait."""
+    start = time.perf_counter()
+    await avalidate_license("bench-nonexistent-key", db)
+    if slow_s:
+        # WHY: Stand-in for a slow Supabase round-trip (cold pooler, lock wait)
+        if hasattr(db, "run_sync"):
+            await db.execute(_SLOW_QUERY, {"s": slow_s})
+        else:
+            db.execute(_SLOW_QUERY, {"s": slow_s})
+    await aget_past_successes(db, "amazon_de")
+    # WHY: Hand the connection back before the LLM wait — 200 idle-in-transaction sync
+    # sessions would exhaust the 30-connection pool and block the loop on checkout
+    if hasattr(db, "run_sync"):
+        await db.rollback()
+    else:
+        db.rollback()
+    await asyncio.sleep(llm_s)
+    return time.perf_counter() - start
+
+
+async def _run(label: str, make_session, close_session, n: int, slow_s: float, llm_s: float) -> dict:
+    async def one() -> float:
+        db = make_session()
+        try:
+            return await _request(db, slow_s, llm_s)
+        finally:
+            await close_session(db)
+
+    start = time.perf_counter()
+    latencies = sorted(await asyncio.gather(*(one() for _ in range(n))))
+    elapsed = time.perf_counter() - start
+    return {
+        "mode": label,
+        "seconds": round(elapsed, 2),
+        "p50_ms": round(statistics.median(latencies) * 1000),
+        "p99_ms": round(latencies[min(n - 1, int(n * 0.99))] * 1000),
+    }
+
+
+async def main(n: int, slow_ms: int, llm_ms: int) -> None:
+    factory = get_async_session_factory()
+    if factory is None:
+        print("Async DB layer unavailable (needs Postgres DATABASE_URL, asyncpg, ASYNC_DB_ENABLED=true)")
+        return
+
+    async def close_sync(db):
+        db.close()
+
+    async def close_async(db):
+        await db.close()
+
+    slow_s, llm_s = slow_ms / 1000, llm_ms / 1000
+    print(f"{n} concurrent requests, slow query {slow_ms} ms, LLM wait {llm_ms} ms")
+    for label, make, close in (("sync Session", SessionLocal, close_sync), ("AsyncSession", factory, close_async)):
+        await _run(label, make, close, min(n, 5), 0, 0)  # warm-up: pool connections
+        r = await _run(label, make, close, n, slow_s, llm_s)
+        print(f"  {r['mode']:<14} {r['seconds']:>6}s  p50={r['p50_ms']:>6} ms  p99={r['p99_ms']:>6} ms")
+
+    await close_async_engine()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sync vs async request-path DB benchmark")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--slow-ms", type=int, default=50)
+    parser.add_argument("--llm-ms", type=int, default=300)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.slow_ms, args.llm_ms))
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# backend/scripts/bench_llm_async.py
+# Purpose: Benchmark native async LLM clients vs asyncio.to_thread(sync SDK) under concurrency
+# NOT for: Real provider latency — talks only to a local OpenAI-compatible stub server
+#
+# Usage: cd backend && python scripts/bench_llm_async.py [--requests 200] [--latency-ms 200]
+# Cost: $0 — no external calls. Needs .env only because config.py validates settings on import.
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# WHY: Add parent dir to path so we can import config and services
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+import logging
+import structlog
+# WHY: One llm_call log line per request would drown the results table
+structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+from config import settings
+from services.llm_providers import _call_beast, acall_llm, close_http_pools
+
+
+def _make_handler(latency_s: float):
+    class StubHandler(BaseHTTPRequestHandler):
+        # WHY: HTTP/1.1 so clients can keep connections alive, like a real provider
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            time.sleep(latency_s)
+            body = json.dumps({
+                "id": "stub", "object": "chat.completion", "created": 0, "model": "stub",
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": "Trinkflasche Edelstahl 1L"}}],
+                "usage": {"prompt_tokens": 12, "completion_tokens": 6, "total_tokens": 18},
+            }).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return StubHandler
+
+
+class _StubServer(ThreadingHTTPServer):
+    # WHY: Default listen backlog is 5 — the stub itself would become the bottleneck
+    request_queue_size = 1024
+    daemon_threads = True
+
+
+def start_stub_server(latency_s: float) -> ThreadingHTTPServer:
+    server = _StubServer(("127.0.0.1", 0), _make_handler(latency_s))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def _run(label: str, one_call, n: int) -> dict:
+    start = time.perf_counter()
+    results = await asyncio.gather(*(one_call() for _ in range(n)), return_exceptions=True)
+    elapsed = time.perf_counter() - start
+    errors = sum(1 for r in results if isinstance(r, Exception))
+    return {"mode": label, "requests": n, "errors": errors,
+            "seconds": round(elapsed, 2), "req_per_s": round(n / elapsed, 1)}
+
+
+async def main(n: int, latency_ms: int) -> None:
+    server = start_stub_server(latency_ms / 1000)
+    settings.beast_ollama_url = f"http://127.0.0.1:{server.server_address[1]}"
+    prompt = "Schreibe einen Amazon-Titel für eine Trinkflasche"
+
+    async def threaded():
+        return await asyncio.to_thread(_call_beast, "stub", prompt, 0.4, 250)
+
+    async def native():
+        return await acall_llm("beast", "", "stub", prompt, 0.4, 250)
+
+    print(f"{n} concurrent requests, stub latency {latency_ms} ms, "
+          f"default executor = {min(32, (os.cpu_count() or 1) + 4)} threads")
+    for label, fn in (("to_thread(sync)", threaded), ("native async", native)):
+        await fn()  # warm-up: connection + client construction
+        r = await _run(label, fn, n)
+        print(f"  {r['mode']:<18} {r['seconds']:>6}s  {r['req_per_s']:>7} req/s  errors={r['errors']}")
+
+    await close_http_pools()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Async vs threaded LLM client benchmark")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--latency-ms", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.latency_ms))
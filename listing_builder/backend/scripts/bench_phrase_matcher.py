@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# backend/scripts/bench_phrase_matcher.py
+# Purpose: Micro-benchmark PhraseMatcher (one Aho-Corasick pass) vs one \b regex per phrase
+# NOT for: Scoring correctness — tests/test_phrase_matcher.py checks agreement with re
+#
+# Usage: cd backend && python scripts/bench_phrase_matcher.py [--sizes 200,1000,5000] [--repeat 20]
+# Cost: $0 — synthetic listing text, no DB or network.
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+# WHY: Add parent dir to path so we can import services
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.phrase_matcher import PhraseMatcher, get_matcher
+
+_WORDS = (
+    "trinkflasche edelstahl isoliert auslaufsicher bpa-frei sport fahrrad kinder schule büro "
+    "butelka termiczna stalowa szczelna żółta łódź dla dzieci na rower kubek pokrywka "
+    "water bottle stainless steel insulated leak proof gym kids 1l 750ml 500ml cap lid straw "
+    "thermos vacuum double wall cold 24h hot 12h carbon loop handle wide mouth"
+).split()
+
+
+def _listing(rnd: random.Random, words: int) -> str:
+    return " ".join(rnd.choice(_WORDS) for _ in range(words))
+
+
+def _phrases(rnd: random.Random, n: int) -> list:
+    return [" ".join(rnd.choice(_WORDS) for _ in range(rnd.randint(1, 4))) for _ in range(n)]
+
+
+def _per_phrase_regex(phrases: list, text: str) -> int:
+    # WHY: The pre-matcher count_exact_matches loop
+    return sum(1 for p in phrases if re.search(rf"\b{re.escape(p)}\b", text))
+
+
+def _time(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main(sizes: list, repeat: int) -> None:
+    rnd = random.Random(23)
+    # WHY: ~title + 5 bullets + description + backend of a typical generated listing
+    text = _listing(rnd, 450).lower()
+    print(f"listing: {len(text)} chars, {repeat} runs each (ms per listing scan)")
+    print(f"  {'phrases':>8}  {'regex/phrase':>12}  {'matcher':>8}  {'build':>8}  {'speedup':>7}")
+    for n in sizes:
+        phrases = _phrases(rnd, n)
+        build_ms = _time(lambda: PhraseMatcher(phrases), 3)
+        matcher = get_matcher(phrases)
+        assert matcher.count_found(text) == _per_phrase_regex(phrases, text)
+        regex_ms = _time(lambda: _per_phrase_regex(phrases, text), repeat)
+        matcher_ms = _time(lambda: matcher.count_found(text), repeat)
+        print(f"  {n:>8}  {regex_ms:>12.2f}  {matcher_ms:>8.2f}  {build_ms:>8.2f}  {regex_ms / matcher_ms:>6.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="PhraseMatcher vs per-phrase regex")
+    parser.add_argument("--sizes", default="200,1000,5000")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    main([int(s) for s in args.sizes.split(",")], args.repeat)
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# backend/scripts/bench_rag_fusion.py
+# Purpose: Benchmark hybrid search fused in Python (hybrid_merge) vs fused inside Postgres
+# NOT for: Retrieval quality judgments — agreement is measured against the Python path only
+#
+# Usage: cd backend && python scripts/bench_rag_fusion.py [--limit 5] [--repeat 5] [--queries file.txt]
+# Needs: DATABASE_URL with knowledge_chunks (embeddings filled) + an embedding backend.
+# Cost: $0 on the local backend; one Cloudflare call per query otherwise.
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+# WHY: Add parent dir to path so we can import config and services
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from config import settings
+from services.embedding_service import get_embeddings_batch_sync
+from services.knowledge_service import CATEGORY_MAP
+from services.search_strategies import fused_search, hybrid_merge, lexical_search, vector_search
+
+DEFAULT_QUERIES = [
+    "stainless steel water bottle insulated 1l",
+    "how to write amazon title keywords",
+    "bullet points benefits over features",
+    "backend search terms character limit",
+    "kaufland product description conversion",
+    "ppc campaign keyword harvesting",
+    "a+ content brand story",
+    "listing optimization for mobile shoppers",
+]
+
+
+def _python_path(db, query, emb, categories, limit):
+    v_rows = vector_search(db, emb, categories, limit)
+    k_rows = lexical_search(db, query, categories, limit)
+    merged = hybrid_merge(v_rows, k_rows, limit)
+    # WHY: Bytes the app pulled over the wire — both full candidate lists, not just the winners
+    fetched = sum(len(r[1] or "") for r in v_rows + k_rows)
+    return merged, fetched
+
+
+def _sql_path(method):
+    def run(db, query, emb, categories, limit):
+        rows = fused_search(db, query, emb, categories, limit, method)
+        return rows, sum(len(r[1] or "") for r in rows)
+    return run
+
+
+def _time(fn, db, query, emb, categories, limit, repeat):
+    fn(db, query, emb, categories, limit)  # warm-up: plan cache + buffer pages
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows, fetched = fn(db, query, emb, categories, limit)
+        timings.append((time.perf_counter() - start) * 1000)
+    return rows, fetched, timings
+
+
+def main(queries: list[str], limit: int, repeat: int) -> None:
+    engine = create_engine(settings.database_url, pool_pre_ping=True)
+    db = sessionmaker(bind=engine)()
+    embeddings = get_embeddings_batch_sync(queries)
+    categories = CATEGORY_MAP["title"]["primary"]
+
+    paths = [("python hybrid_merge", _python_path), ("sql weighted", _sql_path("weighted")),
+             ("sql rrf", _sql_path("rrf"))]
+    stats = {label: {"ms": [], "bytes": 0, "same": 0, "overlap": 0.0} for label, _ in paths}
+    for query, emb in zip(queries, embeddings):
+        reference = None
+        for label, fn in paths:
+            rows, fetched, timings = _time(fn, db, query, emb, categories, limit, repeat)
+            ids = [r[0] for r in rows]
+            if reference is None:
+                reference = ids
+            s = stats[label]
+            s["ms"].extend(timings)
+            s["bytes"] += fetched
+            s["same"] += ids == reference
+            s["overlap"] += len(set(ids) & set(reference)) / max(1, len(reference))
+    db.close()
+
+    n = len(queries)
+    print(f"{n} queries × {repeat} runs, limit={limit}, categories={categories}")
+    print(f"  {'path':<20} {'p50 ms':>8} {'p95 ms':>8} {'KB fetched/q':>13} {'same order':>11} {'overlap@k':>10}")
+    for label, _ in paths:
+        s = stats[label]
+        ms = sorted(s["ms"])
+        p95 = ms[min(len(ms) - 1, int(len(ms) * 0.95))]
+        print(f"  {label:<20} {statistics.median(ms):>8.1f} {p95:>8.1f} {s['bytes'] / n / 1024:>13.1f} "
+              f"{s['same']:>6}/{n:<4} {s['overlap'] / n:>10.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Python vs in-Postgres hybrid fusion benchmark")
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--queries", help="Text file, one query per line (default: built-in sample)")
+    args = parser.parse_args()
+    if args.queries:
+        with open(args.queries, encoding="utf-8") as f:
+            qs = [line.strip() for line in f if line.strip()]
+    else:
+        qs = DEFAULT_QUERIES
+    main(qs, args.limit, args.repeat)
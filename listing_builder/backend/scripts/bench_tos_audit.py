@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# backend/scripts/bench_tos_audit.py
+# Purpose: Throughput of the catalog-wide TOS audit (listings/sec) — inline vs process pool
+# NOT for: Rule correctness — tests/test_tos_audit.py and tests/test_amazon_tos_checker.py cover that
+#
+# Usage: cd backend && python scripts/bench_tos_audit.py [--listings 20000] [--workers 1,2,4] [--report file.txt]
+# Cost: $0 — synthetic GET_MERCHANT_LISTINGS_ALL_DATA rows (or a local report file), no DB or network.
+
+import argparse
+import csv
+import logging
+import os
+import random
+import sys
+import time
+
+import structlog
+
+# WHY: Add parent dir to path so we can import services
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import tos_audit_service
+from services.amazon_tos_checker import _check_prohibited_claims
+from services.amazon_tos_rules import CLAIM_CATEGORIES, _build_phrase_pattern
+from services.tos_audit_service import audit_catalog
+
+_WORDS = (
+    "trinkflasche edelstahl isoliert auslaufsicher bpa-frei sport fahrrad kinder schule büro "
+    "water bottle stainless steel insulated leak proof gym kids 1l 750ml 500ml cap lid straw "
+    "thermos vacuum double wall cold 24h hot 12h carbon loop handle wide mouth powder coated"
+).split()
+# WHY: ~1 in 10 fields carries a claim, so roughly half the listings have a violation to report
+_CLAIMS = ["best seller", "free shipping", "detox", "eco-friendly", "antibacterial", "100% natural", "guaranteed"]
+
+
+def _synthetic_rows(n: int, seed: int = 24):
+    rnd = random.Random(seed)
+
+    def txt(k):
+        words = [rnd.choice(_WORDS) for _ in range(k)]
+        if rnd.random() < 0.1:
+            words.insert(rnd.randrange(len(words) + 1), rnd.choice(_CLAIMS))
+        return " ".join(words)
+
+    for i in range(n):
+        yield {
+            # WHY: Distinct title words — random repeats would fail title_word_repetition everywhere
+            "item-name": " ".join(rnd.sample(_WORDS, 18)), "item-description": txt(250), "listing-id": f"L{i}",
+            "seller-sku": f"SKU-{i:06d}", "price": "24.99", "quantity": "10", "asin1": f"B0{i:08d}",
+            "bullet_point1": txt(30), "bullet_point2": txt(30), "bullet_point3": txt(30),
+            "bullet_point4": txt(30), "bullet_point5": txt(30), "generic_keywords": txt(25),
+        }
+
+
+def _report_rows(path: str):
+    with open(path, encoding="utf-8-sig", errors="replace", newline="") as f:
+        yield from csv.DictReader(f, delimiter="," if path.endswith(".csv") else "\t")
+
+
+def _claims_regex_ms(texts: list) -> float:
+    # WHY: The pre-CLAIM_MATCHER path — five alternation regexes per listing
+    patterns = [_build_phrase_pattern(phrases) for phrases, *_ in CLAIM_CATEGORIES]
+    start = time.perf_counter()
+    for text in texts:
+        for pattern in patterns:
+            list(pattern.finditer(text))
+    return (time.perf_counter() - start) / len(texts) * 1000
+
+
+def _claims_matcher_ms(texts: list) -> float:
+    start = time.perf_counter()
+    for text in texts:
+        _check_prohibited_claims(text, [])
+    return (time.perf_counter() - start) / len(texts) * 1000
+
+
+def main(listings: int, workers: list, report: str) -> None:
+    source = (lambda: _report_rows(report)) if report else (lambda: _synthetic_rows(listings))
+
+    texts = [
+        " ".join([r["item-name"], r["bullet_point1"], r["bullet_point2"], r["item-description"]])
+        for _, r in zip(range(500), _synthetic_rows(500, seed=7))
+    ]
+    print(f"claim scan per listing: regex {_claims_regex_ms(texts):.3f} ms  "
+          f"matcher {_claims_matcher_ms(texts):.3f} ms")
+
+    print(f"{'workers':>8}  {'listings':>9}  {'seconds':>8}  {'listings/sec':>12}  {'FAIL':>6}  {'WARN':>6}")
+    baseline = None
+    for w in workers:
+        # WHY: Force the requested mode even for small --listings runs; fresh pool of w processes
+        tos_audit_service.MIN_PARALLEL_LISTINGS = 0 if w > 1 else 10 ** 9
+        tos_audit_service.shutdown_pool()
+        tos_audit_service.MAX_WORKERS = w
+        result = audit_catalog(source(), workers=w)
+        s = result["summary"]
+        line = (f"{w:>8}  {s['total']:>9}  {s['elapsed_ms'] / 1000:>8.2f}  {s['listings_per_sec']:>12.0f}  "
+                f"{s['by_severity']['FAIL']:>6}  {s['by_severity']['WARN']:>6}")
+        if baseline is None:
+            baseline = s["listings_per_sec"]
+        else:
+            line += f"  {s['listings_per_sec'] / baseline:.1f}x"
+        print(line)
+    tos_audit_service.shutdown_pool()
+
+
+if __name__ == "__main__":
+    # WHY: structlog's default logger prints to stdout — keep the table readable
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+    parser = argparse.ArgumentParser(description="Catalog TOS audit throughput")
+    parser.add_argument("--listings", type=int, default=20000)
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--report", default="", help="Audit a local report file instead of synthetic rows")
+    args = parser.parse_args()
+    main(args.listings, [int(w) for w in args.workers.split(",")], args.report)
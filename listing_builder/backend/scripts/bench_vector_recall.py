@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# backend/scripts/bench_vector_recall.py
+# Purpose: Recall@k and latency of category-filtered vector search vs exact search, per ef_search
+# NOT for: Creating indexes — apply migrations/026_knowledge_category_hnsw.sql first
+#
+# Usage: cd backend && python scripts/bench_vector_recall.py [--queries 50] [--limit 5] [--ef 40,100,200]
+# Queries are embeddings of random existing chunks, so no embedding API calls. Cost: $0.
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+# WHY: Add parent dir to path so we can import config and services
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from config import settings
+from services.knowledge_service import CATEGORY_MAP
+from services.search_strategies import set_ef_search, vector_search
+
+# WHY: The pre-026 query — one scan of the table-wide HNSW graph, category filtered afterwards
+GLOBAL_ANY_SQL = text("""
+    SELECT id FROM knowledge_chunks
+    WHERE embedding IS NOT NULL AND category = ANY(:categories)
+    ORDER BY embedding <=> CAST(:emb AS vector)
+    LIMIT :limit
+""")
+
+
+def _sample_queries(db, n: int) -> list[str]:
+    rows = db.execute(text(
+        "SELECT embedding::text FROM knowledge_chunks WHERE embedding IS NOT NULL "
+        "ORDER BY random() LIMIT :n"
+    ), {"n": n}).fetchall()
+    return [r[0] for r in rows]
+
+
+def _exact(db, emb: str, categories: list[str], limit: int) -> list[int]:
+    # WHY: No index scans → bitmap scan on category + full sort = true nearest neighbours
+    db.execute(text("SET LOCAL enable_indexscan = off"))
+    ids = [r[0] for r in db.execute(GLOBAL_ANY_SQL, {"emb": emb, "categories": categories, "limit": limit})]
+    db.rollback()
+    return ids
+
+
+def _global_any(db, emb: str, categories: list[str], limit: int, ef: int) -> list[int]:
+    set_ef_search(db, ef)
+    ids = [r[0] for r in db.execute(GLOBAL_ANY_SQL, {"emb": emb, "categories": categories, "limit": limit})]
+    db.rollback()
+    return ids
+
+
+def _per_category(db, emb: str, categories: list[str], limit: int, ef: int) -> list[int]:
+    vector = [float(x) for x in emb.strip("[]").split(",")]
+    ids = [r[0] for r in vector_search(db, vector, categories, limit, ef_search=ef)]
+    db.rollback()
+    return ids
+
+
+def main(n_queries: int, limit: int, ef_values: list[int]) -> None:
+    engine = create_engine(settings.database_url, pool_pre_ping=True)
+    db = sessionmaker(bind=engine)()
+    queries = _sample_queries(db, n_queries)
+    category_sets = {
+        f"{pt}/{tier}": cats[tier] for pt, cats in CATEGORY_MAP.items() for tier in ("primary", "fallback")
+    }
+
+    print(f"{len(queries)} queries, limit={limit}")
+    print(f"  {'categories':<22} {'method':<14} {'ef':>4} {'recall@k':>9} {'p50 ms':>8} {'p95 ms':>8}")
+    for label, categories in category_sets.items():
+        exact_ms, truth = [], []
+        for emb in queries:
+            start = time.perf_counter()
+            truth.append(_exact(db, emb, categories, limit))
+            exact_ms.append((time.perf_counter() - start) * 1000)
+        _print_row(label, "exact", 0, 1.0, exact_ms)
+
+        for ef in ef_values:
+            for method, fn in (("global ANY()", _global_any), ("per-category", _per_category)):
+                fn(db, queries[0], categories, limit, ef)  # warm-up
+                timings, hits, total = [], 0, 0
+                for emb, expected in zip(queries, truth):
+                    start = time.perf_counter()
+                    got = fn(db, emb, categories, limit, ef)
+                    timings.append((time.perf_counter() - start) * 1000)
+                    hits += len(set(got) & set(expected))
+                    total += len(expected)
+                _print_row(label, method, ef, hits / max(1, total), timings)
+    db.close()
+
+
+def _print_row(label: str, method: str, ef: int, recall: float, timings: list[float]) -> None:
+    ms = sorted(timings)
+    p95 = ms[min(len(ms) - 1, int(len(ms) * 0.95))]
+    print(f"  {label:<22} {method:<14} {ef or '-':>4} {recall:>9.3f} {statistics.median(ms):>8.1f} {p95:>8.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Category-filtered vector search recall/latency benchmark")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--ef", default="40,100,200", help="Comma-separated hnsw.ef_search values")
+    args = parser.parse_args()
+    main(args.queries, args.limit, [int(x) for x in args.ef.split(",")])
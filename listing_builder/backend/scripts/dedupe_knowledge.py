@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# backend/scripts/dedupe_knowledge.py
+# Purpose: One-off / maintenance near-duplicate pass over knowledge_chunks (MinHash + LSH)
+# NOT for: Exact duplicates (blocked at ingest by content_hash) — apply migrations 027 + 028 first
+
+"""
+Usage:
+    cd listing_builder/backend
+    python scripts/dedupe_knowledge.py                    # report only
+    python scripts/dedupe_knowledge.py --threshold 0.9    # stricter similarity
+    python scripts/dedupe_knowledge.py --mark             # record in knowledge_duplicates for review
+    python scripts/dedupe_knowledge.py --remove           # record + delete duplicates
+    python scripts/dedupe_knowledge.py --show 20          # print 20 example pairs
+
+The kept chunk of each cluster is the one with an embedding, then the oldest.
+Afterwards re-export the in-process index (export_vector_index.py) and VACUUM knowledge_chunks
+to return the space to the OS. Cost: $0 (no API calls).
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from config import settings
+from services.knowledge_dedup import DEFAULT_THRESHOLD, dedupe
+
+
+def _show(db, duplicates, n: int) -> None:
+    for dup, keep, sim in sorted(duplicates, key=lambda d: d[2])[:n]:
+        rows = dict(db.execute(
+            text("SELECT id, filename || ': ' || left(regexp_replace(content, '\\s+', ' ', 'g'), 120) "
+                 "FROM knowledge_chunks WHERE id = ANY(:ids)"),
+            {"ids": [dup, keep]},
+        ).fetchall())
+        print(f"\n  {sim:.2f}  keep #{keep} {rows.get(keep, '(gone)')}")
+        print(f"        drop #{dup} {rows.get(dup, '(gone)')}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Near-duplicate pass over knowledge_chunks")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Estimated Jaccard similarity")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--mark", action="store_true", help="Record duplicates without deleting")
+    group.add_argument("--remove", action="store_true", help="Record and delete duplicates")
+    parser.add_argument("--show", type=int, default=0, help="Example pairs to print (lowest similarity first)")
+    args = parser.parse_args()
+
+    action = "remove" if args.remove else "mark" if args.mark else "report"
+    engine = create_engine(settings.database_url, pool_pre_ping=True)
+    db = sessionmaker(bind=engine)()
+    try:
+        if args.show and action == "remove":
+            # WHY: Show examples while both sides still exist
+            _show(db, dedupe(db, args.threshold, "report").duplicates, args.show)
+        report = dedupe(db, args.threshold, action)
+        print()
+        for line in report.lines():
+            print(line)
+        if args.show and action != "remove":
+            _show(db, report.duplicates, args.show)
+        if action == "report":
+            print("\nReport only — nothing changed. Use --mark or --remove.")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# backend/scripts/export_vector_index.py
+# Purpose: Export knowledge_chunks embeddings to the mmap'd in-process index (rag_mode "memory")
+# NOT for: Computing embeddings — run embed_missing_chunks.py first
+
+"""
+Usage:
+    cd listing_builder/backend
+    python scripts/export_vector_index.py               # export to settings.vector_index_dir
+    python scripts/export_vector_index.py --out /tmp/ix # custom directory
+    python scripts/export_vector_index.py --bench 200   # export, then time 200 random queries
+
+Run after ingestion/embedding. The API also re-exports on its own when knowledge_version
+changes (VECTOR_INDEX_AUTO_REBUILD), this is for doing it eagerly or on another machine.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from config import settings
+from services.knowledge_service import CATEGORY_MAP
+from services.vector_index import VectorIndex, export_index
+
+
+def _bench(index: VectorIndex, n: int) -> None:
+    rng = np.random.default_rng(0)
+    queries = np.asarray(index.vectors[rng.integers(0, len(index), n)]) + rng.normal(0, 0.02, (n, index.dim))
+    for prompt_type, cats in CATEGORY_MAP.items():
+        timings = []
+        for q in queries:
+            start = time.perf_counter()
+            index.search(q.tolist(), cats["primary"], 5)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        print(f"  {prompt_type:<12} p50 {timings[len(timings) // 2]:.3f} ms  "
+              f"p95 {timings[int(len(timings) * 0.95)]:.3f} ms")
+    start = time.perf_counter()
+    index.topk(queries, CATEGORY_MAP["title"]["primary"], 5)
+    print(f"  batched      {n} queries in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the in-process knowledge vector index")
+    parser.add_argument("--out", default=settings.vector_index_dir)
+    parser.add_argument("--bench", type=int, default=0, help="Random queries to time after export")
+    args = parser.parse_args()
+
+    engine = create_engine(settings.database_url, pool_pre_ping=True)
+    db = sessionmaker(bind=engine)()
+    start = time.time()
+    try:
+        path = export_index(db, args.out)
+    finally:
+        db.close()
+
+    index = VectorIndex(path)
+    size_mb = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path)) / 1e6
+    print(f"Exported {len(index)} chunks ({index.dim} dims, {size_mb:.1f} MB) "
+          f"in {time.time() - start:.1f}s → {path}")
+    for category, (lo, hi) in sorted(index.categories.items(), key=lambda c: c[1][0] - c[1][1]):
+        print(f"  {category}: {hi - lo}")
+    if args.bench and len(index):
+        _bench(index, args.bench)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,40 +1,34 @@
 #!/usr/bin/env python3
 # backend/scripts/ingest_mega_courses.py
-# Purpose: Ingest 5 MEGA course transcripts into knowledge_chunks for RAG expansion
-# NOT for: Runtime — run once from dev machine
+# Purpose: Source config for MEGA course transcripts → knowledge_chunks (services/knowledge_ingest.py)
+# NOT for: Runtime — run from dev machine
 
 """
 Usage:
     cd listing_builder/backend
     python scripts/ingest_mega_courses.py           # ingest + embed
     python scripts/ingest_mega_courses.py --dry-run  # preview only
+    python scripts/ingest_mega_courses.py --full     # re-chunk unchanged files too
     python scripts/ingest_mega_courses.py --no-embed  # ingest without embeddings
 
-All 52 MEGA courses (~3,067 transcripts). ON CONFLICT DO NOTHING = safe to re-run.
+All 52 MEGA courses (~3,067 transcripts). Only new/changed transcripts are re-chunked.
 """
 
 import os
 import re
 import sys
-import time
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
 from dotenv import load_dotenv
 load_dotenv()
 
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker
-from config import settings
+from services.knowledge_ingest import Document, Source, run, sanitize_filename
 
-CHUNK_SIZE = 1500
-CHUNK_OVERLAP = 200
-EMBED_BATCH = 5
 SOURCE_TAG = "mega_course"
 MEGA_BASE = os.path.expanduser("~/Documents/MegaTranscripts")
 
-# WHY: All 52 courses from MEGA transcripts. ON CONFLICT DO NOTHING = idempotent.
-# Already ingested courses will be skipped automatically.
+# WHY: All 52 courses from MEGA transcripts. Unchanged transcripts are skipped automatically.
 COURSES = [
     # === BATCH 1 (already ingested — will be skipped) ===
     {"dir": "Stefan Georgi - RMBC II", "source_type": "georgi_rmbc", "prefix": "Georgi RMBC", "default_category": "copywriting"},
@@ -161,41 +155,6 @@ def detect_category(filename: str, folder_path: str, default: str) -> str:
     return default
 
 
-def chunk_text(content: str, chunk_size: int = CHUNK_SIZE, overlap: int = CHUNK_OVERLAP) -> list[str]:
-    """Split text into overlapping chunks at sentence boundaries."""
-    if len(content) <= chunk_size:
-        return [content.strip()] if content.strip() else []
-
-    chunks = []
-    start = 0
-    while start < len(content):
-        end = start + chunk_size
-        if end >= len(content):
-            chunk = content[start:].strip()
-            if chunk:
-                chunks.append(chunk)
-            break
-
-        # WHY: Break at sentence boundary to preserve meaning
-        boundary = end
-        for i in range(end, max(start + chunk_size // 2, start), -1):
-            if content[i] in ".!?\n" and i + 1 < len(content):
-                boundary = i + 1
-                break
-
-        chunk = content[start:boundary].strip()
-        if chunk:
-            chunks.append(chunk)
-        start = boundary - overlap if boundary - overlap > start else boundary
-
-    return chunks
-
-
-def sanitize_filename(name: str, max_len: int = 80) -> str:
-    """Create a safe filename for DB unique constraint."""
-    return re.sub(r'[^a-zA-Z0-9_-]', '', name.replace(' ', '_'))[:max_len]
-
-
 def find_transcripts(course_dir: str) -> list[tuple[str, str]]:
     """Find all .txt files in course dir. Returns (full_path, relative_path)."""
     results = []
@@ -208,192 +167,27 @@ def find_transcripts(course_dir: str) -> list[tuple[str, str]]:
     return results
 
 
-def main():
-    dry_run = "--dry-run" in sys.argv
-    no_embed = "--no-embed" in sys.argv
-
-    engine = create_engine(settings.database_url, pool_pre_ping=True)
-    Session = sessionmaker(bind=engine)
-    db = Session()
-
-    # WHY: Check current state before inserting
-    existing = db.execute(text(
-        "SELECT COUNT(*) FROM knowledge_chunks WHERE source = :src"
-    ), {"src": SOURCE_TAG}).scalar()
-    print(f"Existing '{SOURCE_TAG}' chunks: {existing}")
-
-    total_files = 0
-    total_chunks = 0
-    inserted = 0
-    skipped_small = 0
-    stats_by_course = {}
-    stats_by_category = {}
-
+def documents():
     for course in COURSES:
         course_dir = os.path.join(MEGA_BASE, course["dir"])
         if not os.path.isdir(course_dir):
             print(f"WARNING: Not found: {course_dir}")
             continue
-
-        transcripts = find_transcripts(course_dir)
-        print(f"\n{'='*60}")
-        print(f"{course['prefix']}: {len(transcripts)} files in {course['dir']}")
-        print(f"{'='*60}")
-
-        course_chunks = 0
-
-        for file_idx, (full_path, rel_path) in enumerate(transcripts):
+        for full_path, rel_path in find_transcripts(course_dir):
             basename = os.path.splitext(os.path.basename(rel_path))[0]
-
-            with open(full_path, "r", encoding="utf-8", errors="replace") as f:
-                content = f.read().strip()
-
-            # WHY: Skip tiny/empty transcripts (likely failed transcriptions)
-            if len(content) < 100:
-                skipped_small += 1
-                continue
-
-            category = detect_category(basename, rel_path, course["default_category"])
-            chunks = chunk_text(content)
-
-            # WHY: filename = course prefix + sanitized basename for uniqueness
-            db_filename = f"{sanitize_filename(course['prefix'])}_{sanitize_filename(basename)}"
-
-            for chunk_idx, chunk in enumerate(chunks):
+            yield Document(
+                # WHY: filename = course prefix + sanitized basename for uniqueness
+                filename=f"{sanitize_filename(course['prefix'])}_{sanitize_filename(basename)}",
+                source_type=course["source_type"],
+                path=full_path,
                 # WHY: Prepend course + lesson context for better RAG retrieval
-                chunk_with_context = f"[{course['prefix']} - {basename}]\n{chunk}"
-
-                if not dry_run:
-                    try:
-                        db.execute(
-                            text("""
-                                INSERT INTO knowledge_chunks
-                                (content, filename, category, source_type, chunk_index, source)
-                                VALUES (:content, :filename, :category, :source_type, :chunk_index, :source)
-                                ON CONFLICT (filename, chunk_index) DO NOTHING
-                            """),
-                            {
-                                "content": chunk_with_context,
-                                "filename": db_filename,
-                                "category": category,
-                                "source_type": course["source_type"],
-                                "chunk_index": chunk_idx,
-                                "source": SOURCE_TAG,
-                            },
-                        )
-                        inserted += 1
-                    except Exception as e:
-                        print(f"  ERROR {db_filename}[{chunk_idx}]: {e}")
-
-                total_chunks += 1
-                course_chunks += 1
-
-                # Track category stats
-                stats_by_category[category] = stats_by_category.get(category, 0) + 1
-
-            total_files += 1
-
-            if (file_idx + 1) % 50 == 0:
-                if not dry_run:
-                    db.commit()
-                print(f"  Progress: {file_idx + 1}/{len(transcripts)} files, {course_chunks} chunks")
-
-        if not dry_run:
-            db.commit()
-
-        stats_by_course[course["prefix"]] = {
-            "files": len(transcripts),
-            "chunks": course_chunks,
-        }
-
-    # Summary
-    print(f"\n{'='*60}")
-    print(f"SUMMARY {'(DRY RUN)' if dry_run else ''}")
-    print(f"{'='*60}")
-    print(f"Files processed: {total_files}")
-    print(f"Files skipped (too small): {skipped_small}")
-    print(f"Total chunks: {total_chunks}")
-    if not dry_run:
-        print(f"Inserted to DB: {inserted}")
-
-    print(f"\nBy course:")
-    for name, s in stats_by_course.items():
-        print(f"  {name}: {s['files']} files → {s['chunks']} chunks")
-
-    print(f"\nBy category:")
-    for cat, count in sorted(stats_by_category.items(), key=lambda x: -x[1]):
-        print(f"  {cat}: {count}")
-
-    if dry_run or no_embed:
-        if dry_run:
-            print("\nDry run — nothing inserted. Remove --dry-run to execute.")
-        if no_embed:
-            print("\nSkipping embeddings. Run embed_chunks.py separately.")
-        db.close()
-        return
-
-    # Phase 2: Embed new chunks
-    print(f"\n--- Embedding phase ---")
-    try:
-        from services.embedding_service import get_embeddings_batch_sync, EMBEDDING_DIM
-    except ImportError:
-        print("WARNING: embedding_service not available. Run embed_chunks.py separately.")
-        db.close()
-        return
-
-    to_embed = db.execute(text(
-        "SELECT COUNT(*) FROM knowledge_chunks WHERE source = :src AND embedding IS NULL"
-    ), {"src": SOURCE_TAG}).scalar()
-    print(f"Chunks to embed: {to_embed} (dim={EMBEDDING_DIM})")
-
-    if to_embed == 0:
-        print("All chunks already embedded.")
-        db.close()
-        return
-
-    done = 0
-    while True:
-        rows = db.execute(text(
-            "SELECT id, content FROM knowledge_chunks "
-            "WHERE source = :src AND embedding IS NULL ORDER BY id LIMIT :batch"
-        ), {"src": SOURCE_TAG, "batch": EMBED_BATCH}).fetchall()
-
-        if not rows:
-            break
-
-        ids = [r[0] for r in rows]
-        texts = [r[1][:2000] for r in rows]
-
-        try:
-            embeddings = get_embeddings_batch_sync(texts)
-        except Exception as e:
-            err = str(e)
-            print(f"  Embed error at id={ids[0]}: {err[:100]}")
-            if any(code in err for code in ["500", "502", "408", "503"]):
-                time.sleep(15)
-                continue
-            if "429" in err or "rate" in err.lower():
-                time.sleep(60)
-                continue
-            raise
-
-        for chunk_id, emb in zip(ids, embeddings):
-            emb_str = "[" + ",".join(str(x) for x in emb) + "]"
-            db.execute(
-                text("UPDATE knowledge_chunks SET embedding = CAST(:emb AS vector) WHERE id = :id"),
-                {"emb": emb_str, "id": chunk_id},
+                header=f"[{course['prefix']} - {basename}]",
+                category=detect_category(basename, rel_path, course["default_category"]),
             )
 
-        db.commit()
-        done += len(rows)
-        if done % 50 == 0 or done == to_embed:
-            print(f"  Embedded {done}/{to_embed}")
-        # WHY: CF Workers AI free tier — ~10 req/min, 5 texts/req
-        time.sleep(6.0)
 
-    db.close()
-    print(f"\nAll done! {done} chunks embedded.")
+SOURCE = Source(label="MEGA courses", documents=documents, tag=SOURCE_TAG)
 
 
 if __name__ == "__main__":
-    main()
+    run(SOURCE)
@@ -1,31 +1,32 @@
 #!/usr/bin/env python3
 # backend/scripts/ingest_transcripts.py
-# Purpose: One-time local script to ingest Inner Circle transcripts into Supabase
-# NOT for: Production runtime — run once from dev machine, then delete or archive
+# Purpose: Source config for Inner Circle transcripts → knowledge_chunks (services/knowledge_ingest.py)
+# NOT for: Production runtime — run from dev machine
 
 """
 Usage:
     cd listing_builder/backend
-    python scripts/ingest_transcripts.py
+    python scripts/ingest_transcripts.py              # ingest new/changed transcripts
+    python scripts/ingest_transcripts.py --dry-run    # chunk + count only
+    python scripts/ingest_transcripts.py --full       # re-chunk unchanged files too
 
-Expects SUPABASE_DB_URL env var or reads from .env / config.
-Inserts ~7-10K chunks with ON CONFLICT DO NOTHING (idempotent re-runs).
+Expects .env with DATABASE_URL. Re-runs only touch files that changed since the last run.
+No source tag (rows predate it) — embed with scripts/embed_missing_chunks.py.
 """
 
+import functools
 import os
-import re
 import sys
 
-# WHY: Add backend dir to path so we can import config/database
+# WHY: Add backend dir to path so we can import config/services
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker
-from config import settings
+from dotenv import load_dotenv
+load_dotenv()
+
+from services.knowledge_ingest import Document, Source, chunk_text, run
 
 TRANSCRIPTS_DIR = "/Users/shawn/Projects/akademia-marketplace/.knowledge/transcripts"
-CHUNK_SIZE = 1500
-CHUNK_OVERLAP = 200
 
 
 def detect_category(filename: str) -> str:
@@ -59,116 +60,25 @@ def detect_source_type(filename: str) -> str:
     return "standalone"
 
 
-def chunk_text(text: str, chunk_size: int = CHUNK_SIZE, overlap: int = CHUNK_OVERLAP) -> list[str]:
-    """Split text into chunks, breaking at sentence boundaries."""
-    if len(text) <= chunk_size:
-        return [text.strip()] if text.strip() else []
-
-    chunks = []
-    start = 0
-
-    while start < len(text):
-        end = start + chunk_size
-
-        if end >= len(text):
-            chunk = text[start:].strip()
-            if chunk:
-                chunks.append(chunk)
-            break
-
-        # WHY: Find last sentence boundary (. ! ?) before chunk_size limit
-        # Look backwards from end position for a sentence-ending punctuation
-        boundary = end
-        for i in range(end, max(start + chunk_size // 2, start), -1):
-            if text[i] in ".!?" and i + 1 < len(text) and text[i + 1] in " \n":
-                boundary = i + 1
-                break
-
-        chunk = text[start:boundary].strip()
-        if chunk:
-            chunks.append(chunk)
-
-        # WHY: Overlap ensures context isn't lost at chunk boundaries
-        start = boundary - overlap if boundary - overlap > start else boundary
-
-    return chunks
-
-
-def main():
-    engine = create_engine(settings.database_url, pool_pre_ping=True)
-    Session = sessionmaker(bind=engine)
-    db = Session()
-
-    if not os.path.isdir(TRANSCRIPTS_DIR):
-        print(f"ERROR: Transcripts dir not found: {TRANSCRIPTS_DIR}")
-        sys.exit(1)
-
-    txt_files = sorted(f for f in os.listdir(TRANSCRIPTS_DIR) if f.endswith(".txt"))
-    print(f"Found {len(txt_files)} transcript files")
-
-    total_chunks = 0
-    inserted = 0
-    skipped = 0
-
-    for file_idx, filename in enumerate(txt_files):
-        filepath = os.path.join(TRANSCRIPTS_DIR, filename)
-        with open(filepath, "r", encoding="utf-8") as f:
-            content = f.read()
-
-        if not content.strip():
-            print(f"  SKIP (empty): {filename}")
-            continue
-
-        category = detect_category(filename)
-        source_type = detect_source_type(filename)
-        chunks = chunk_text(content)
-        total_chunks += len(chunks)
-
-        for chunk_idx, chunk in enumerate(chunks):
-            try:
-                db.execute(
-                    text("""
-                        INSERT INTO knowledge_chunks (content, filename, category, source_type, chunk_index)
-                        VALUES (:content, :filename, :category, :source_type, :chunk_index)
-                        ON CONFLICT (filename, chunk_index) DO NOTHING
-                    """),
-                    {
-                        "content": chunk,
-                        "filename": filename,
-                        "category": category,
-                        "source_type": source_type,
-                        "chunk_index": chunk_idx,
-                    },
-                )
-                inserted += 1
-            except Exception as e:
-                skipped += 1
-                print(f"  ERROR inserting {filename}[{chunk_idx}]: {e}")
-
-        if (file_idx + 1) % 20 == 0:
-            db.commit()
-            print(f"  Progress: {file_idx + 1}/{len(txt_files)} files, {total_chunks} chunks")
-
-    db.commit()
-    db.close()
-
-    print(f"\nDone!")
-    print(f"  Files processed: {len(txt_files)}")
-    print(f"  Total chunks: {total_chunks}")
-    print(f"  Inserted: {inserted}")
-    print(f"  Skipped (dupes/errors): {skipped}")
-
-    # Verify counts by category
-    db2 = Session()
-    result = db2.execute(text(
-        "SELECT category, COUNT(*) as cnt, COUNT(DISTINCT filename) as files "
-        "FROM knowledge_chunks GROUP BY category ORDER BY cnt DESC"
-    ))
-    print("\nCategory breakdown:")
-    for row in result:
-        print(f"  {row[0]}: {row[1]} chunks from {row[2]} files")
-    db2.close()
+def documents():
+    for filename in sorted(f for f in os.listdir(TRANSCRIPTS_DIR) if f.endswith(".txt")):
+        yield Document(
+            filename=filename,
+            source_type=detect_source_type(filename),
+            path=os.path.join(TRANSCRIPTS_DIR, filename),
+            category=detect_category(filename),
+        )
+
+
+SOURCE = Source(
+    label="Inner Circle transcripts",
+    documents=documents,
+    # WHY: Transcripts only break after ". " style boundaries, and are chunked unstripped
+    chunker=functools.partial(chunk_text, strict=True),
+    min_chars=1,
+    strip=False,
+)
 
 
 if __name__ == "__main__":
-    main()
+    run(SOURCE)
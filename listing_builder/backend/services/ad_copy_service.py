@@ -7,9 +7,8 @@ from __future__ import annotations
 import asyncio
 import json
 from typing import Dict
-from groq import Groq
 from sqlalchemy.orm import Session
-from config import settings
+from services.groq_client import groq_chat
 from services.knowledge_service import _get_search_rows, _expand_query, _get_embedding_if_needed, _format_chunks_with_sources
 import structlog
 
@@ -38,26 +37,11 @@ def _product_block(title: str, features: list[str], audience: str) -> str:
 
 
 def _groq_call(prompt: str, max_tokens: int = 1200, temperature: float = 0.7) -> str:
-    """Call Groq LLM with API key rotation on 429."""
-    keys = settings.groq_api_keys
-    last_error = None
-    for i, key in enumerate(keys):
-        try:
-            client = Groq(api_key=key)
-            response = client.chat.completions.create(
-                model=MODEL,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=temperature,
-                max_tokens=max_tokens,
-            )
-            return response.choices[0].message.content.strip()
-        except Exception as e:
-            last_error = e
-            if "429" in str(e) or "rate_limit" in str(e):
-                logger.warning("groq_rate_limit", key_index=i)
-                continue
-            raise
-    raise last_error  # type: ignore[misc]
+    """Call Groq LLM on the scheduler-picked key, failing over on 429."""
+    response = groq_chat(
+        [{"role": "user", "content": prompt}], temperature=temperature, max_tokens=max_tokens, model=MODEL,
+    )
+    return response.choices[0].message.content.strip()
 
 
 def _parse_json(raw: str) -> list | dict:
@@ -4,10 +4,11 @@
 
 from __future__ import annotations
 
-import re
 from typing import List, Dict, Any
 import structlog
 
+from services.tokenized_listing import ALPHA_WORD_RE, TokenizedListing, count_tokens
+
 logger = structlog.get_logger()
 
 
@@ -51,18 +52,21 @@ STOP_WORDS = {
 
 def _word_counts(text: str) -> Dict[str, int]:
     """Count word occurrences, lowercased, stripped of punctuation."""
-    words = re.findall(r"[a-zA-ZäöüßÄÖÜąćęłńóśźżĄĆĘŁŃÓŚŹŻ]+", text.lower())
-    counts: Dict[str, int] = {}
-    for w in words:
-        if len(w) >= 2 and w not in STOP_WORDS:
-            counts[w] = counts.get(w, 0) + 1
-    return counts
+    return _content_counts(count_tokens(ALPHA_WORD_RE.findall(text.lower())))
+
+
+def _content_counts(alpha_counts: Dict[str, int]) -> Dict[str, int]:
+    """Drop 1-letter words and stop words from raw token counts (order preserved)."""
+    return {w: c for w, c in alpha_counts.items() if len(w) >= 2 and w not in STOP_WORDS}
 
 
 def validate_keyword_density(text: str) -> List[str]:
     """Check no single word exceeds MAX_DENSITY_PCT of total word count."""
+    return _density_warnings(_word_counts(text))
+
+
+def _density_warnings(counts: Dict[str, int]) -> List[str]:
     warnings: List[str] = []
-    counts = _word_counts(text)
     total = sum(counts.values())
     if total == 0:
         return warnings
@@ -82,10 +86,13 @@ def validate_keyword_density(text: str) -> List[str]:
 
 def validate_word_repetition(title: str, bullets: List[str]) -> List[str]:
     """Check word repetition limits — title and full listing separately."""
+    return _repetition_warnings(_word_counts(title), _word_counts(title + " " + " ".join(bullets)))
+
+
+def _repetition_warnings(title_counts: Dict[str, int], listing_counts: Dict[str, int]) -> List[str]:
     warnings: List[str] = []
 
     # Title check
-    title_counts = _word_counts(title)
     for word, count in title_counts.items():
         if count > TITLE_MAX_REPEATS:
             warnings.append(
@@ -93,8 +100,6 @@ def validate_word_repetition(title: str, bullets: List[str]) -> List[str]:
             )
 
     # Full listing check (title + bullets combined)
-    full_text = title + " " + " ".join(bullets)
-    listing_counts = _word_counts(full_text)
     for word, count in listing_counts.items():
         if count > LISTING_MAX_REPEATS:
             warnings.append(
@@ -106,11 +111,18 @@ def validate_word_repetition(title: str, bullets: List[str]) -> List[str]:
 
 def run_anti_stuffing_check(
     title: str, bullets: List[str], description: str,
+    tokens: TokenizedListing | None = None,
 ) -> List[str]:
     """Combined anti-stuffing check — returns list of warning strings."""
-    full_text = title + " " + " ".join(bullets) + " " + description
-    warnings = validate_keyword_density(full_text)
-    warnings.extend(validate_word_repetition(title, bullets))
+    if tokens is None:
+        tokens = TokenizedListing.build(title, bullets, description)
+    warnings = _density_warnings(
+        _content_counts(tokens.counts(tokens.title, tokens.bullets, tokens.description)),
+    )
+    warnings.extend(_repetition_warnings(
+        _content_counts(tokens.title.alpha_counts),
+        _content_counts(tokens.counts(tokens.title, tokens.bullets)),
+    ))
     if warnings:
         logger.info("anti_stuffing_warnings", count=len(warnings), first=warnings[0])
     return warnings
@@ -2,7 +2,6 @@
 # Purpose: Orchestrator — fetch category params, build prompt, call Beast/Groq, parse response
 # NOT for: Allegro API calls (allegro_categories.py) or LLM dispatch (llm_providers.py)
 
-import asyncio
 import json
 import re
 import time
@@ -11,8 +10,8 @@ from typing import Dict, List, Literal, Optional
 from sqlalchemy.orm import Session
 
 from services.allegro_categories import fetch_category_parameters
-from services.llm_providers import call_llm
-from services.groq_client import call_groq, sanitize_llm_input
+from services.llm_providers import acall_llm
+from services.groq_client import acall_groq, sanitize_llm_input
 from models.attribute_run import AttributeRun
 
 logger = structlog.get_logger()
@@ -242,18 +241,14 @@ async def generate_attributes(
     provider_used = "beast"
     tokens_used = 0
     try:
-        raw_text, usage = await asyncio.to_thread(
-            call_llm, "beast", "", None, prompt, 0.2, max_tokens,
-        )
+        raw_text, usage = await acall_llm("beast", "", None, prompt, 0.2, max_tokens)
         if usage:
             tokens_used = usage.get("total_tokens", 0)
     except Exception as e:
         logger.warning("beast_failed_fallback_groq", error=str(e))
         provider_used = "groq"
         try:
-            raw_text, usage = await asyncio.to_thread(
-                call_groq, prompt, 0.2, max_tokens,
-            )
+            raw_text, usage = await acall_groq(prompt, 0.2, max_tokens)
             if usage:
                 tokens_used = usage.get("total_tokens", 0)
         except Exception as e2:
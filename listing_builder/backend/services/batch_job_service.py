@@ -0,0 +1,481 @@
+# backend/services/batch_job_service.py
+# Purpose: Durable background batch optimization — chunked worker, resume, SSE event stream
+# NOT for: Concurrency limits (batch_optimizer.py) or single-listing logic (optimizer_service.py)
+
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set
+
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+import structlog
+
+from database import SessionLocal, task_session
+from models.jobs import JobStatus
+from models.optimization import OptimizationRun, OptimizationBatchJob
+from services.batch_optimizer import run_batch, BATCH_CONCURRENCY
+from services.llm_providers import PROVIDERS
+from services.optimizer_service import optimize_listing
+from utils.sse import sse_event
+
+logger = structlog.get_logger()
+
+# WHY: 500+ SKU catalogs — cap protects the Groq key pool, chunks keep memory bounded
+JOB_MAX_PRODUCTS = 1000
+JOB_CHUNK_SIZE = 25
+
+STREAM_POLL_INTERVAL = 1.0
+STREAM_PAGE_SIZE = 50
+# WHY: Comment line every ~15s so proxies don't close an idle SSE connection
+STREAM_KEEPALIVE_POLLS = 15
+
+ERROR_RATE_LIMITED_JOB = "Serwer AI przeciążony — wznów zadanie za kilka minut"
+ERROR_API_KEY_REQUIRED = "Brak klucza API dla wybranego providera — podaj go ponownie przy wznowieniu zadania"
+# WHY: A failed job may be resumed with the same keys for a while — after that they are dropped
+JOB_API_KEY_TTL_S = 30 * 60
+
+# WHY: Jobs running in this process — prevents a resume request from starting a second worker.
+# Across processes/restarts the UNIQUE (batch_job_id, batch_index) index is the guard (_save_item)
+_running_jobs: Set[int] = set()
+# WHY: Keep references to worker tasks so they aren't garbage-collected mid-run
+_job_tasks: Set[asyncio.Task] = set()
+# SECURITY: User LLM keys live only in memory, keyed by job id then product index.
+# After a restart they are gone — those items fail with ERROR_API_KEY_REQUIRED until
+# /resume supplies the keys again (supply_api_keys), never silently run on Groq.
+_job_api_keys: Dict[int, Dict[int, str]] = {}
+# job id -> pending drop of its keys (FAILED jobs, JOB_API_KEY_TTL_S)
+_key_expiry: Dict[int, asyncio.TimerHandle] = {}
+
+
+def create_job(
+    db: Session, user_id: str, products: List[Dict[str, Any]],
+    concurrency: int = BATCH_CONCURRENCY,
+) -> OptimizationBatchJob:
+    """Persist a new pending job. Products are OptimizerRequest dicts."""
+    api_keys = {i: p["llm_api_key"] for i, p in enumerate(products) if p.get("llm_api_key")}
+    stored = [{k: v for k, v in p.items() if k != "llm_api_key"} for p in products]
+
+    job = OptimizationBatchJob(
+        user_id=user_id,
+        status=JobStatus.PENDING.value,
+        total=len(products),
+        concurrency=concurrency,
+        request_data={"products": stored},
+        error_log=[],
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+
+    if api_keys:
+        _job_api_keys[job.id] = api_keys
+    logger.info("batch_job_created", job_id=job.id, total=len(products), concurrency=concurrency)
+    return job
+
+
+def supply_api_keys(job: OptimizationBatchJob, keys_by_provider: Dict[str, str]) -> int:
+    """Re-attach user LLM keys (provider -> key) to the job's items. Returns items covered."""
+    products = (job.request_data or {}).get("products", [])
+    keys = {
+        i: keys_by_provider[p["llm_provider"]] for i, p in enumerate(products)
+        if p.get("llm_provider") in keys_by_provider and keys_by_provider[p["llm_provider"]]
+    }
+    if keys:
+        _job_api_keys.setdefault(job.id, {}).update(keys)
+    return len(keys)
+
+
+def _drop_api_keys(job_id: int) -> None:
+    _job_api_keys.pop(job_id, None)
+    handle = _key_expiry.pop(job_id, None)
+    if handle is not None:
+        handle.cancel()
+
+
+def _expire_api_keys_later(job_id: int) -> None:
+    """Drop a FAILED job's keys after JOB_API_KEY_TTL_S unless it is running again by then."""
+    if job_id not in _job_api_keys:
+        return
+
+    def expire() -> None:
+        _key_expiry.pop(job_id, None)
+        if job_id not in _running_jobs:
+            _job_api_keys.pop(job_id, None)
+
+    old = _key_expiry.pop(job_id, None)
+    if old is not None:
+        old.cancel()
+    _key_expiry[job_id] = asyncio.get_running_loop().call_later(JOB_API_KEY_TTL_S, expire)
+
+
+def is_running(job_id: int) -> bool:
+    return job_id in _running_jobs
+
+
+def start_job(job_id: int, session_factory: Optional[Callable[[], Session]] = None) -> bool:
+    """Schedule the worker on the running event loop. Returns False if already running."""
+    if job_id in _running_jobs:
+        return False
+    _running_jobs.add(job_id)
+    handle = _key_expiry.pop(job_id, None)
+    if handle is not None:
+        handle.cancel()
+    task = asyncio.create_task(_run_job_guarded(job_id, session_factory))
+    _job_tasks.add(task)
+    task.add_done_callback(_job_tasks.discard)
+    return True
+
+
+async def _run_job_guarded(job_id: int, session_factory: Optional[Callable[[], Session]]) -> None:
+    try:
+        await run_job(job_id, session_factory)
+    except Exception as e:
+        logger.error("batch_job_crashed", job_id=job_id, error=str(e), exc_info=True)
+        # SECURITY: Nothing will pick this job up again on its own — don't keep user keys around
+        _drop_api_keys(job_id)
+        db = (session_factory or SessionLocal)()
+        try:
+            job = db.query(OptimizationBatchJob).filter(OptimizationBatchJob.id == job_id).first()
+            if job:
+                job.status = JobStatus.FAILED.value
+                job.error_message = "Zadanie przerwane — wznów, aby dokończyć"
+                db.commit()
+        finally:
+            db.close()
+    finally:
+        _running_jobs.discard(job_id)
+
+
+def _provider_config(job_id: int, index: int, product: Dict[str, Any]) -> Optional[dict]:
+    """Non-Groq provider config for an item whose key is in memory, else None (Groq)."""
+    provider = product.get("llm_provider")
+    if provider == "beast":
+        # WHY: Local Ollama — no user key (same as the single-listing endpoint)
+        return {"provider": "beast", "api_key": "ollama"}
+    api_key = _job_api_keys.get(job_id, {}).get(index)
+    if provider and provider != "groq" and provider in PROVIDERS and api_key:
+        return {"provider": provider, "api_key": api_key}
+    return None
+
+
+def _missing_api_key(job_id: int, index: int, product: Dict[str, Any]) -> bool:
+    """Item asks for a non-Groq provider but its key isn't in memory (restart, expired TTL)."""
+    provider = product.get("llm_provider")
+    return bool(provider and provider not in ("groq", "beast") and provider in PROVIDERS
+                and not _job_api_keys.get(job_id, {}).get(index))
+
+
+async def run_job(job_id: int, session_factory: Optional[Callable[[], Session]] = None) -> None:
+    """Process every product that has no OptimizationRun yet, JOB_CHUNK_SIZE at a time.
+
+    WHY: Each finished item is committed immediately, so a restart or a rate-limit stop
+    loses nothing — re-running this function picks up exactly the unfinished indices.
+    """
+    db = (session_factory or SessionLocal)()
+    try:
+        job = db.query(OptimizationBatchJob).filter(OptimizationBatchJob.id == job_id).first()
+        if not job:
+            logger.error("batch_job_not_found", job_id=job_id)
+            return
+
+        products: List[Dict[str, Any]] = (job.request_data or {}).get("products", [])
+        done = {
+            idx for (idx,) in db.query(OptimizationRun.batch_index)
+            .filter(OptimizationRun.batch_job_id == job_id).all()
+        }
+        pending = [i for i in range(len(products)) if i not in done]
+
+        job.status = JobStatus.RUNNING.value
+        job.completed_count = len(done)
+        # WHY: Every non-completed item is retried, so earlier failures no longer count
+        job.failed_count = 0
+        job.error_message = None
+        db.commit()
+
+        logger.info("batch_job_start", job_id=job_id, pending=len(pending), already_done=len(done))
+
+        async def _optimize(_i: int, entry: tuple) -> Dict[str, Any]:
+            index, product = entry
+            # WHY own session: items run concurrently — db is the job's, used between awaits only
+            async with task_session(db) as item_db:
+                return await optimize_listing(
+                    product_title=product["product_title"],
+                    brand=product["brand"],
+                    keywords=[
+                        {"phrase": k["phrase"], "search_volume": k.get("search_volume", 0)}
+                        for k in product["keywords"]
+                    ],
+                    marketplace=product.get("marketplace", "amazon_de"),
+                    mode=product.get("mode", "aggressive"),
+                    product_line=product.get("product_line") or "",
+                    language=product.get("language"),
+                    db=item_db,
+                    audience_context=product.get("audience_context") or "",
+                    account_type=product.get("account_type", "seller"),
+                    category=product.get("category") or "",
+                    provider_config=_provider_config(job_id, index, product),
+                    user_id=job.user_id,
+                    original_description=product.get("original_description") or "",
+                    original_bullets=product.get("original_bullets") or [],
+                    use_cache=product.get("use_cache", True),
+                )
+
+        def _provider_for(entry: tuple) -> Optional[str]:
+            config = _provider_config(job_id, entry[0], entry[1])
+            return config["provider"] if config else "groq"
+
+        # WHY: Running these on Groq would silently ignore the provider the user picked
+        keyless = [i for i in pending if _missing_api_key(job_id, i, products[i])]
+        for index in keyless:
+            _save_item(db, job, index, products[index], {
+                "status": "error", "error": ERROR_API_KEY_REQUIRED, "duration_ms": 0.0,
+            })
+        if keyless:
+            logger.warning("batch_job_api_keys_missing", job_id=job_id, items=len(keyless))
+            skip = set(keyless)
+            pending = [i for i in pending if i not in skip]
+
+        rate_limited = False
+        for start in range(0, len(pending), JOB_CHUNK_SIZE):
+            chunk = [(i, products[i]) for i in pending[start:start + JOB_CHUNK_SIZE]]
+
+            async def _persist(result: Dict[str, Any], chunk: List[tuple] = chunk) -> None:
+                index, product = chunk[result["index"]]
+                try:
+                    _save_item(db, job, index, product, result)
+                except Exception as e:
+                    # WHY: Unsaved item has no OptimizationRun — the next resume retries it
+                    db.rollback()
+                    logger.warning("batch_job_item_save_failed", job_id=job_id, index=index, error=str(e))
+                # WHY: Drop the payload once it's in the DB — chunk results stay small
+                result["data"] = None
+
+            batch = await run_batch(
+                chunk, _optimize, _provider_for, concurrency=job.concurrency or BATCH_CONCURRENCY,
+                label_for=lambda entry: entry[1]["product_title"], on_result=_persist,
+            )
+            if batch["rate_limited"]:
+                rate_limited = True
+                break
+
+        if rate_limited or keyless:
+            job.status = JobStatus.FAILED.value
+            job.error_message = ERROR_RATE_LIMITED_JOB if rate_limited else ERROR_API_KEY_REQUIRED
+            # WHY: Keys kept for a while so /resume can reuse them, then dropped
+            _expire_api_keys_later(job_id)
+        else:
+            job.status = JobStatus.COMPLETED.value
+            _drop_api_keys(job_id)
+        job.completed_at = datetime.now(timezone.utc)
+        db.commit()
+
+        logger.info(
+            "batch_job_done", job_id=job_id, status=job.status,
+            completed=job.completed_count, failed=job.failed_count,
+        )
+    finally:
+        db.close()
+
+
+def _save_item(
+    db: Session, job: OptimizationBatchJob, index: int,
+    product: Dict[str, Any], result: Dict[str, Any],
+) -> None:
+    """Commit one finished item — OptimizationRun on success, error_log entry on failure.
+
+    WHY upsert: INSERT … ON CONFLICT (batch_job_id, batch_index) DO NOTHING — a second worker
+    or a resume racing this one cannot write the same item twice or double-count it.
+    """
+    if result["status"] == "completed":
+        data = result["data"] or {}
+        inserted = _insert_run_once(db, dict(
+            user_id=job.user_id,
+            product_title=product["product_title"],
+            brand=product["brand"],
+            marketplace=product.get("marketplace", "amazon_de"),
+            mode=product.get("mode", "aggressive"),
+            coverage_pct=data.get("scores", {}).get("coverage_pct", 0),
+            compliance_status=data.get("compliance", {}).get("status", "UNKNOWN"),
+            request_data=product,
+            response_data=data,
+            trace_data=data.get("trace"),
+            batch_job_id=job.id,
+            batch_index=index,
+        ))
+        if inserted:
+            job.completed_count = (job.completed_count or 0) + 1
+        else:
+            logger.warning("batch_job_item_already_saved", job_id=job.id, index=index)
+    else:
+        # WHY: Reassign — in-place append on a JSON column isn't tracked by SQLAlchemy
+        job.error_log = [*(job.error_log or []), {
+            "index": index, "product_title": product["product_title"],
+            "error": result["error"], "duration_ms": result["duration_ms"],
+        }]
+        job.failed_count = (job.failed_count or 0) + 1
+    db.commit()
+
+
+def _insert_run_once(db: Session, values: Dict[str, Any]) -> bool:
+    """Insert one batch item's OptimizationRun unless it exists. True if this call wrote it."""
+    insert = sqlite_insert if db.get_bind().dialect.name == "sqlite" else pg_insert
+    stmt = insert(OptimizationRun).values(**values).on_conflict_do_nothing(
+        index_elements=["batch_job_id", "batch_index"],
+    )
+    return db.execute(stmt).rowcount == 1
+
+
+def resume_interrupted_jobs(session_factory: Optional[Callable[[], Session]] = None) -> int:
+    """Restart jobs left pending/running by a previous process. Called from app lifespan."""
+    db = (session_factory or SessionLocal)()
+    try:
+        ids = [
+            job_id for (job_id,) in db.query(OptimizationBatchJob.id)
+            .filter(OptimizationBatchJob.status.in_([JobStatus.PENDING.value, JobStatus.RUNNING.value]))
+            .all()
+        ]
+    finally:
+        db.close()
+
+    for job_id in ids:
+        start_job(job_id, session_factory)
+    if ids:
+        logger.info("batch_jobs_resumed", count=len(ids))
+    return len(ids)
+
+
+def job_to_dict(job: OptimizationBatchJob) -> Dict[str, Any]:
+    """Status payload — no products, no results."""
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "total": job.total or 0,
+        "completed": job.completed_count or 0,
+        "failed": job.failed_count or 0,
+        "concurrency": job.concurrency,
+        "running": is_running(job.id),
+        "error_message": job.error_message,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "completed_at": job.completed_at.isoformat() if job.completed_at else None,
+    }
+
+
+def _run_event(run: OptimizationRun) -> Dict[str, Any]:
+    return {
+        "index": run.batch_index,
+        "product_title": run.product_title,
+        "status": "completed",
+        "run_id": run.id,
+        "result": run.response_data,
+    }
+
+
+def _error_event(entry: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "index": entry.get("index"),
+        "product_title": entry.get("product_title", ""),
+        "status": "error",
+        "error": entry.get("error"),
+    }
+
+
+def get_job_results(
+    db: Session, job: OptimizationBatchJob, offset: int = 0, limit: int = 50,
+) -> Dict[str, Any]:
+    """Paginated finished items — works while the job is still running (partial download)."""
+    query = db.query(OptimizationRun).filter(OptimizationRun.batch_job_id == job.id)
+    total_completed = query.count()
+    runs = query.order_by(OptimizationRun.batch_index).offset(offset).limit(limit).all()
+
+    # WHY: Only the latest error per index — a resumed item may have failed more than once
+    completed_indices = {
+        idx for (idx,) in db.query(OptimizationRun.batch_index)
+        .filter(OptimizationRun.batch_job_id == job.id).all()
+    }
+    latest_errors: Dict[int, Dict[str, Any]] = {}
+    for entry in job.error_log or []:
+        if entry.get("index") not in completed_indices:
+            latest_errors[entry.get("index")] = _error_event(entry)
+
+    return {
+        **job_to_dict(job),
+        "items": [_run_event(r) for r in runs],
+        "items_total": total_completed,
+        "errors": sorted(latest_errors.values(), key=lambda e: e["index"]),
+        "offset": offset,
+    }
+
+
+def parse_last_event_id(value: Optional[str]) -> tuple:
+    """Event ids are "<last_run_id>:<errors_seen>" — lets EventSource reconnect mid-stream."""
+    try:
+        run_part, err_part = (value or "").split(":", 1)
+        return max(int(run_part), 0), max(int(err_part), 0)
+    except ValueError:
+        return 0, 0
+
+
+async def stream_job_events(
+    job_id: int, user_id: str,
+    after_run_id: int = 0, errors_seen: int = 0,
+    session_factory: Optional[Callable[[], Session]] = None,
+) -> AsyncIterator[str]:
+    """Yield SSE frames: one "item" per finished product, "progress" on change, then "done".
+
+    WHY: Polls the DB instead of an in-memory queue — reconnects (and other workers) see
+    exactly what's persisted, and replays stream from the DB page by page, not all at once.
+    """
+    last_progress = None
+    idle_polls = 0
+
+    while True:
+        db = (session_factory or SessionLocal)()
+        try:
+            # WHY: Read job status BEFORE rows — if it's terminal, every row is already committed
+            job = db.query(OptimizationBatchJob).filter(
+                OptimizationBatchJob.id == job_id, OptimizationBatchJob.user_id == user_id,
+            ).first()
+            if not job:
+                yield sse_event("error", {"detail": "Job not found"})
+                return
+            terminal = job.status in (JobStatus.COMPLETED.value, JobStatus.FAILED.value)
+            progress = job_to_dict(job)
+
+            runs = (
+                db.query(OptimizationRun)
+                .filter(OptimizationRun.batch_job_id == job_id, OptimizationRun.id > after_run_id)
+                .order_by(OptimizationRun.id)
+                .limit(STREAM_PAGE_SIZE)
+                .all()
+            )
+            for run in runs:
+                after_run_id = run.id
+                yield sse_event("item", _run_event(run), f"{after_run_id}:{errors_seen}")
+
+            for entry in (job.error_log or [])[errors_seen:]:
+                errors_seen += 1
+                yield sse_event("item", _error_event(entry), f"{after_run_id}:{errors_seen}")
+        finally:
+            db.close()
+
+        # WHY: Full page = more rows waiting — drain the replay before sleeping
+        if len(runs) == STREAM_PAGE_SIZE:
+            continue
+
+        snapshot = (progress["status"], progress["completed"], progress["failed"])
+        if snapshot != last_progress:
+            last_progress = snapshot
+            idle_polls = 0
+            yield sse_event("progress", progress)
+        if terminal:
+            yield sse_event("done", progress)
+            return
+
+        idle_polls += 1
+        if idle_polls >= STREAM_KEEPALIVE_POLLS:
+            idle_polls = 0
+            yield ": keep-alive\n\n"
+        await asyncio.sleep(STREAM_POLL_INTERVAL)
@@ -0,0 +1,145 @@
+# backend/services/batch_optimizer.py
+# Purpose: Bounded-concurrency batch engine for /api/optimizer/generate-batch
+# NOT for: Single-listing optimization (optimizer_service.py) or request validation (routes)
+
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import structlog
+
+logger = structlog.get_logger()
+
+# WHY: Default number of products processed at once. Each product fans out to 4 LLM calls,
+# so 4 products = up to 16 in-flight requests — within Groq's 8-key rotation budget.
+BATCH_CONCURRENCY = 4
+BATCH_MAX_CONCURRENCY = 10
+
+# WHY: Per-provider caps on top of BATCH_CONCURRENCY — providers have very different limits.
+# Groq: shared key pool with TPM limits. Beast: one local Mac Studio, parallel calls just queue
+# on the GPU. Gemini/OpenAI: user's own key, generous RPM.
+PROVIDER_CONCURRENCY: Dict[str, int] = {
+    "groq": 4,
+    "beast": 1,
+    "gemini": 4,
+    "openai": 8,
+}
+
+# WHY: Same limits the single-product endpoint uses — Beast (qwen3:235b) is ~14s per call
+DEFAULT_ITEM_TIMEOUT = 60.0
+BEAST_ITEM_TIMEOUT = 180.0
+
+ERROR_TIMEOUT = "Timeout — produkt zbyt duży lub serwer AI przeciążony"
+ERROR_RATE_LIMIT = "Serwer AI przeciążony — spróbuj za minutę"
+ERROR_SKIPPED = "Pominięto — serwer AI przeciążony"
+ERROR_GENERIC = "Optymalizacja nie powiodła się"
+
+
+def provider_family(provider: Optional[str]) -> str:
+    """Map llm_provider to its concurrency bucket (gemini_flash/gemini_pro share one)."""
+    if not provider:
+        return "groq"
+    if provider.startswith("gemini"):
+        return "gemini"
+    return provider
+
+
+def item_timeout(provider: Optional[str]) -> float:
+    """Per-item timeout — Beast runs 4 LLM calls at ~14s each, everything else is fast."""
+    return BEAST_ITEM_TIMEOUT if provider == "beast" else DEFAULT_ITEM_TIMEOUT
+
+
+def is_rate_limit_error(exc: BaseException) -> bool:
+    """WHY: groq_client re-raises the last 429 once every key is exhausted."""
+    msg = str(exc).lower()
+    return "rate_limit" in msg or "429" in msg
+
+
+async def run_batch(
+    items: List[Any],
+    run_item: Callable[[int, Any], Awaitable[Dict[str, Any]]],
+    provider_for: Callable[[Any], Optional[str]],
+    concurrency: int = BATCH_CONCURRENCY,
+    label_for: Callable[[Any], str] = str,
+    on_result: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None,
+) -> Dict[str, Any]:
+    """Run run_item(index, item) for every item with bounded concurrency.
+
+    Returns {"results", "succeeded", "failed", "rate_limited", "duration_ms", "concurrency"}.
+    Results keep input order; each is {"index", "status", "error", "data", "duration_ms"}.
+    on_result is awaited as soon as each item finishes — background jobs persist from it.
+
+    WHY: Keeps the sequential endpoint's per-item semantics — a failure never aborts the
+    batch, and a rate limit (all keys exhausted) skips every item that hasn't started yet.
+    Items already in flight are allowed to finish; they may still succeed on another key.
+    """
+    concurrency = max(1, min(concurrency, BATCH_MAX_CONCURRENCY))
+    # WHY: Semaphores created per run — module-level ones would bind to the first event loop
+    batch_sem = asyncio.Semaphore(concurrency)
+    provider_sems: Dict[str, asyncio.Semaphore] = {}
+    stop = asyncio.Event()
+    results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+
+    def _provider_sem(provider: Optional[str]) -> asyncio.Semaphore:
+        family = provider_family(provider)
+        if family not in provider_sems:
+            provider_sems[family] = asyncio.Semaphore(
+                min(PROVIDER_CONCURRENCY.get(family, concurrency), concurrency)
+            )
+        return provider_sems[family]
+
+    async def _run_one(index: int, item: Any) -> None:
+        provider = provider_for(item)
+        # WHY provider first: an item waiting on a busy provider (Beast = 1) must not hold a
+        # batch slot meanwhile — otherwise queued Beast items fill every slot and Groq/Gemini
+        # items behind them idle even though their providers have room
+        async with _provider_sem(provider), batch_sem:
+            if stop.is_set():
+                results[index] = {"index": index, "status": "error", "error": ERROR_SKIPPED,
+                                  "data": None, "duration_ms": 0.0}
+                if on_result:
+                    await on_result(results[index])
+                return
+
+            start = time.monotonic()
+            status, error, data = "completed", None, None
+            try:
+                data = await asyncio.wait_for(run_item(index, item), timeout=item_timeout(provider))
+                logger.info(
+                    "batch_item_success", index=index, product=label_for(item)[:50],
+                    coverage=data.get("scores", {}).get("coverage_pct", 0),
+                )
+            except asyncio.TimeoutError:
+                logger.error("batch_item_timeout", index=index, product=label_for(item)[:50])
+                status, error = "error", ERROR_TIMEOUT
+            except Exception as e:
+                logger.error("batch_item_error", index=index, error=str(e))
+                status = "error"
+                if is_rate_limit_error(e):
+                    # WHY: Skip remaining products — they'll all hit the same rate limit
+                    stop.set()
+                    error = ERROR_RATE_LIMIT
+                else:
+                    error = ERROR_GENERIC
+
+            results[index] = {
+                "index": index, "status": status, "error": error, "data": data,
+                "duration_ms": round((time.monotonic() - start) * 1000, 1),
+            }
+            if on_result:
+                await on_result(results[index])
+
+    batch_start = time.monotonic()
+    await asyncio.gather(*[_run_one(i, item) for i, item in enumerate(items)])
+    duration_ms = round((time.monotonic() - batch_start) * 1000, 1)
+
+    succeeded = sum(1 for r in results if r["status"] == "completed")
+    return {
+        "results": results,
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "rate_limited": stop.is_set(),
+        "duration_ms": duration_ms,
+        "concurrency": concurrency,
+    }
@@ -7,7 +7,6 @@ import json
 from typing import Dict, Optional
 
 import structlog
-from groq import Groq
 
 from services.converter.static_translations import (
     strip_html,
@@ -31,37 +30,32 @@ class AITranslator:
         self.model = "llama-3.3-70b-versatile"
 
     def _call_groq(self, prompt: str, max_tokens: int = 500, temperature: float = 0.3) -> str:
-        """Groq call with key rotation + model fallback on 429.
+        """Groq call on the scheduler-picked key + model fallback when all keys fail.
 
-        WHY: Tries all available keys per model, then falls back to smaller model.
+        WHY: groq_chat walks the keys (groq_key_scheduler.py), then we fall back to a smaller model.
         WHY timeout=30: Prevents hanging requests from blocking the worker thread.
         """
-        from config import settings
-        keys = settings.groq_api_keys
+        from services.groq_client import groq_chat
         models = [self.model, "llama-3.1-8b-instant"]
         last_error = ""
         for model in models:
-            for i, key in enumerate(keys):
-                try:
-                    client = Groq(api_key=key, timeout=30.0)
-                    response = client.chat.completions.create(
-                        model=model,
-                        messages=[{"role": "user", "content": prompt}],
-                        temperature=temperature,
-                        max_tokens=max_tokens,
-                    )
-                    return response.choices[0].message.content.strip()
-                except Exception as e:
-                    last_error = str(e)
-                    is_rate_limit = "429" in last_error or "rate_limit" in last_error
-                    logger.warning(
-                        "groq_retry",
-                        reason="rate_limit" if is_rate_limit else "error",
-                        model=model,
-                        key_index=i,
-                    )
-                    continue
-            logger.warning("groq_all_keys_exhausted", model=model)
+            try:
+                response = groq_chat(
+                    [{"role": "user", "content": prompt}],
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    model=model,
+                    timeout=30.0,
+                )
+                return response.choices[0].message.content.strip()
+            except Exception as e:
+                last_error = str(e)
+                is_rate_limit = "429" in last_error or "rate_limit" in last_error
+                logger.warning(
+                    "groq_retry",
+                    reason="rate_limit" if is_rate_limit else "error",
+                    model=model,
+                )
         logger.error("groq_all_models_exhausted", last_error=last_error[:200])
         return ""
 
@@ -4,10 +4,12 @@
 
 from __future__ import annotations
 
-import re
-from typing import List, Dict, Any, Tuple, Set
+from typing import List, Dict, Any, Tuple, Set, Union
 import structlog
 
+from services.phrase_matcher import get_matcher
+from services.tokenized_listing import WORD_RE, Section, TokenizedListing
+
 logger = structlog.get_logger()
 
 # WHY: DataDive target is 95% — listings below this leave money on the table
@@ -20,8 +22,7 @@ def extract_words(text: str) -> Set[str]:
     WHY: Simple `w in text` is substring matching — "cap" matches "capsule".
     Using regex word extraction gives us a proper word set for O(1) lookup.
     """
-    # WHY: Include digits — keywords often contain numbers ("750ml", "1 liter")
-    return set(re.findall(r"[a-zA-Z0-9äöüßÄÖÜąćęłńóśźżĄĆĘŁŃÓŚŹŻ]+", text.lower()))
+    return set(WORD_RE.findall(text.lower()))
 
 
 def keyword_covered(phrase: str, word_set: Set[str]) -> bool:
@@ -50,24 +51,30 @@ def _coverage_for_word_set(
 
 
 def coverage_for_text(
-    keywords: List[Dict[str, Any]], text: str,
+    keywords: List[Dict[str, Any]], text: Union[str, Section, TokenizedListing],
 ) -> Tuple[float, int, int]:
-    """Convenience wrapper — extracts words then delegates to _coverage_for_word_set."""
-    return _coverage_for_word_set(keywords, extract_words(text))
+    """Convenience wrapper — extracts words then delegates to _coverage_for_word_set.
+
+    A Section or TokenizedListing reuses its precomputed word set.
+    """
+    words = extract_words(text) if isinstance(text, str) else text.words
+    return _coverage_for_word_set(keywords, words)
 
 
-def count_exact_matches(keywords: List[Dict[str, Any]], text: str) -> int:
+def count_exact_matches(
+    keywords: List[Dict[str, Any]], text: Union[str, Section, TokenizedListing],
+) -> int:
     """Count keywords whose full phrase appears verbatim in text.
 
     WHY: Exact phrase matches are stronger ranking signals than partial word matches.
     Used by optimizer_service for the 'exact_matches_in_title' score.
-    Word-boundary regex prevents "cap" falsely matching inside "capsule".
+    Word-boundary matching prevents "cap" falsely matching inside "capsule".
+    One Aho-Corasick pass over the text covers every keyword (phrase_matcher.py).
     """
-    text_lower = text.lower()
-    return sum(
-        1 for kw in keywords
-        if re.search(rf"\b{re.escape(kw['phrase'].lower())}\b", text_lower)
-    )
+    matcher = get_matcher(kw["phrase"].lower() for kw in keywords)
+    if isinstance(text, TokenizedListing):
+        return len(text.found(matcher))
+    return matcher.count_found(text.lower() if isinstance(text, str) else text.lower)
 
 
 def grade(pct: float) -> str:
@@ -87,21 +94,21 @@ def calculate_multi_tier_coverage(
     bullets: List[str],
     backend: str,
     description: str,
+    tokens: TokenizedListing | None = None,
 ) -> Dict[str, Any]:
     """
     Calculate per-placement and overall coverage.
     WHY: Knowing WHERE keywords are missing lets sellers fix specific sections
     instead of blindly re-optimizing the entire listing.
     """
-    bullets_text = " ".join(bullets)
-    full_text = f"{title} {bullets_text} {description} {backend}"
-
-    # WHY: Precompute all word sets once — avoids 5x redundant regex extraction
-    full_ws = extract_words(full_text)
-    title_ws = extract_words(title)
-    bullets_ws = extract_words(bullets_text)
-    backend_ws = extract_words(backend)
-    desc_ws = extract_words(description)
+    # WHY: Word sets come from the shared tokenization — no per-section regex passes here
+    if tokens is None:
+        tokens = TokenizedListing.build(title, bullets, description, backend)
+    full_ws = tokens.words
+    title_ws = tokens.title.words
+    bullets_ws = tokens.bullets.words
+    backend_ws = tokens.backend.words
+    desc_ws = tokens.description.words
 
     overall_pct, overall_covered, overall_total = _coverage_for_word_set(keywords, full_ws)
     title_pct, _, _ = _coverage_for_word_set(keywords, title_ws)
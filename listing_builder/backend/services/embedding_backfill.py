@@ -0,0 +1,407 @@
+# backend/services/embedding_backfill.py
+# Purpose: Bulk embedding backfill for knowledge_chunks — concurrent batches, AIMD rate control,
+#          one UPDATE per batch, resumable checkpoint, throughput/ETA
+# NOT for: Query-time embeddings (embedding_service.get_embedding) or ingestion (knowledge_ingest.py)
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+import httpx
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# WHY: Additive increase per successful batch (req/s) / multiplicative decrease on throttling —
+# TCP-style AIMD converges just under the provider's limit without knowing it
+AIMD_INCREASE = 0.05
+AIMD_DECREASE = 0.5
+# WHY: Never slower than one call a minute, even after repeated 429s
+MIN_RATE = 1 / 60
+THROTTLE_STATUSES = (429, 503)
+TRANSIENT_STATUSES = (408, 500, 502, 504)
+# WHY: Transient failures per batch before its chunks are skipped (left NULL for the next run)
+MAX_ATTEMPTS = 4
+# WHY: bge-small has a 512 token limit (~2000 chars) — same truncation as the old scripts
+MAX_CHARS = 2000
+CHECKPOINT_EVERY_S = 5.0
+PROGRESS_EVERY_S = 10.0
+# WHY: Throughput over the last minute — reacts to rate changes, not skewed by a slow start
+RATE_WINDOW_S = 60.0
+DEFAULT_CHECKPOINT = os.path.join("data", "embed_backfill.checkpoint.json")
+
+
+class AIMDRate:
+    """Request pacing: rate grows by AIMD_INCREASE per success, halves on 429/503.
+
+    rate=None means unpaced (local backend) until the first throttle. Thread-safe.
+    """
+
+    def __init__(self, rate: Optional[float], max_rate: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.max_rate = max_rate
+        self.clock = clock
+        self.throttled = 0
+        self._next_at = 0.0
+        self._lock = threading.Lock()
+
+    def delay(self) -> float:
+        """Seconds until the next request may start (0 = now)."""
+        with self._lock:
+            return max(0.0, self._next_at - self.clock())
+
+    def sent(self) -> None:
+        with self._lock:
+            now = self.clock()
+            if self.rate:
+                self._next_at = max(self._next_at, now) + 1 / self.rate
+
+    def on_success(self) -> None:
+        with self._lock:
+            if self.rate is not None:
+                self.rate += AIMD_INCREASE
+                if self.max_rate:
+                    self.rate = min(self.rate, self.max_rate)
+
+    def on_throttle(self, retry_after: Optional[float] = None) -> None:
+        with self._lock:
+            self.throttled += 1
+            self.rate = max(MIN_RATE, (self.rate or 1.0) * AIMD_DECREASE)
+            if retry_after:
+                self._next_at = max(self._next_at, self.clock() + retry_after)
+
+
+@dataclass
+class Batch:
+    ids: list[int]
+    texts: list[str]
+    attempts: int = 0
+
+
+@dataclass
+class BackfillStats:
+    total: int = 0
+    done: int = 0
+    failed: int = 0
+    batches: int = 0
+    # WHY: Carried over from the checkpoint so chunks/s and ETA span a resumed run
+    elapsed_before: float = 0.0
+    started: float = field(default_factory=time.monotonic)
+    window: deque = field(default_factory=deque)
+
+    def record(self, n: int) -> None:
+        now = time.monotonic()
+        self.done += n
+        self.batches += 1
+        self.window.append((now, self.done))
+        while self.window and now - self.window[0][0] > RATE_WINDOW_S:
+            self.window.popleft()
+
+    def chunks_per_s(self) -> float:
+        if len(self.window) >= 2:
+            (t0, d0), (t1, d1) = self.window[0], self.window[-1]
+            if t1 > t0:
+                return (d1 - d0) / (t1 - t0)
+        elapsed = time.monotonic() - self.started
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    def eta_s(self) -> Optional[float]:
+        rate = self.chunks_per_s()
+        remaining = self.total - self.done - self.failed
+        return remaining / rate if rate > 0 else None
+
+
+def format_eta(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "?"
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    return f"{seconds // 60}m{seconds % 60:02d}s"
+
+
+# ── Checkpoint ──
+
+def load_checkpoint(path: str, scope: dict) -> Optional[dict]:
+    """Saved state if it belongs to the same scope (source filter + model), else None."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            state = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    return state if state.get("scope") == scope else None
+
+
+def save_checkpoint(path: str, state: dict) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
+# ── Database ──
+
+_BULK_UPDATE = text("""
+    UPDATE knowledge_chunks k
+    SET embedding = CAST(v.emb AS vector)
+    FROM unnest(CAST(:ids AS int[]), CAST(:embs AS text[])) AS v(id, emb)
+    WHERE k.id = v.id
+""")
+
+
+_DEFER_VERSION_BUMP = text("SET LOCAL knowledge.defer_version_bump = 'on'")
+_BUMP_VERSION = text("UPDATE knowledge_version SET version = version + 1, updated_at = NOW() WHERE id = 1")
+
+
+def bump_knowledge_version(db: Session) -> None:
+    """One knowledge_version bump for everything written with the bump deferred."""
+    db.execute(_BUMP_VERSION)
+    db.commit()
+
+
+def _source_filter(source: Optional[str], exact: bool) -> tuple[str, dict]:
+    """SQL fragment + params: exact tag (ingest) or ILIKE keyword (--source on the scripts)."""
+    if not source:
+        return "", {}
+    if exact:
+        return " AND source = :src", {"src": source}
+    return " AND source ILIKE :src", {"src": f"%{source}%"}
+
+
+def count_missing(db: Session, source: Optional[str] = None, after: int = 0, exact: bool = False) -> int:
+    where, params = _source_filter(source, exact)
+    return db.execute(
+        text(f"SELECT COUNT(*) FROM knowledge_chunks WHERE embedding IS NULL AND id > :after{where}"),
+        {"after": after, **params},
+    ).scalar()
+
+
+def fetch_batch(
+    db: Session, after: int, size: int, source: Optional[str] = None, exact: bool = False,
+) -> list[tuple[int, str]]:
+    """Next `size` unembedded chunks with id > after — keyset, so skipped rows are not re-read."""
+    where, params = _source_filter(source, exact)
+    return db.execute(
+        text(f"SELECT id, content FROM knowledge_chunks WHERE embedding IS NULL AND id > :after{where} "
+             "ORDER BY id LIMIT :n"),
+        {"after": after, "n": size, **params},
+    ).fetchall()
+
+
+def write_batch(db: Session, ids: list[int], embeddings: list[list[float]]) -> None:
+    """All embeddings of one batch in one statement, one round trip.
+
+    WHY SET LOCAL: Defers migration 024's knowledge_version bump — a per-batch bump would
+    flush the RAG caches and re-export the vector index every batch; run_backfill bumps once.
+    """
+    db.execute(_DEFER_VERSION_BUMP)
+    db.execute(_BULK_UPDATE, {
+        "ids": ids,
+        "embs": ["[" + ",".join(str(x) for x in emb) + "]" for emb in embeddings],
+    })
+    db.commit()
+
+
+def _classify(exc: BaseException) -> tuple[str, Optional[float]]:
+    """("throttle" | "transient" | "error", Retry-After seconds)."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        status = exc.response.status_code
+        retry_after = exc.response.headers.get("retry-after")
+        try:
+            retry_after = float(retry_after) if retry_after else None
+        except ValueError:
+            retry_after = None
+        if status in THROTTLE_STATUSES:
+            return "throttle", retry_after
+        if status in TRANSIENT_STATUSES:
+            return "transient", retry_after
+        return "error", None
+    if isinstance(exc, httpx.TransportError):
+        return "transient", None
+    err = str(exc)
+    if "429" in err or "rate" in err.lower() or "503" in err:
+        return "throttle", None
+    return "error", None
+
+
+# ── Runner ──
+
+def run_backfill(
+    db: Session,
+    source: Optional[str] = None,
+    exact_source: bool = False,
+    batch_size: Optional[int] = None,
+    max_in_flight: Optional[int] = None,
+    limiter: Optional[AIMDRate] = None,
+    embed: Optional[Callable[[list[str]], list[list[float]]]] = None,
+    checkpoint_path: Optional[str] = DEFAULT_CHECKPOINT,
+    resume: bool = True,
+    log: Callable[[str], None] = print,
+) -> BackfillStats:
+    """Embed every knowledge_chunks row with embedding IS NULL, optionally limited to one source
+    (ILIKE %source%, or source = source with exact_source).
+
+    WHY: Up to max_in_flight batches run on worker threads; this thread fetches, paces,
+    and writes, so the Session is never shared. The checkpoint stores the highest id below
+    which every batch finished — a killed run resumes there, with its counters.
+    """
+    from services import embedding_service
+
+    scope = {"source": source, "exact": exact_source, "model": embedding_service.embedding_model_id()}
+    default_batch, pause = embedding_service.backfill_pacing()
+    batch_size = batch_size or default_batch
+    max_in_flight = max_in_flight or embedding_service.backfill_max_in_flight()
+    limiter = limiter or AIMDRate(1 / pause if pause else None)
+
+    state = load_checkpoint(checkpoint_path, scope) if checkpoint_path and resume else None
+    watermark = state["cursor"] if state else 0
+    stats = BackfillStats(total=count_missing(db, source, watermark, exact_source))
+    done_before = 0
+    if state:
+        stats.done, stats.failed = state["done"], state["failed"]
+        done_before = stats.done
+        stats.total += stats.done + state["failed"]
+        stats.elapsed_before = state["elapsed"]
+        log(f"Resuming after id {watermark}: {stats.done} embedded earlier")
+    log(f"Chunks to embed: {stats.total - stats.done - stats.failed} "
+        f"(batch {batch_size}, up to {max_in_flight} in flight)")
+
+    client = httpx.Client(timeout=30.0) if embed is None else None
+    embed = embed or (lambda texts: embedding_service.embed_batch_once(texts, client))
+    retry: deque[Batch] = deque()
+    # WHY: Fetch order of outstanding batches → the watermark only passes a batch once it is done
+    order: deque[int] = deque()
+    finished: set[int] = set()
+    in_flight: dict[Future, Batch] = {}
+    fetch_after = watermark
+    exhausted = False
+    last_checkpoint = last_progress = time.monotonic()
+
+    def advance() -> None:
+        nonlocal watermark
+        while order and order[0] in finished:
+            watermark = order.popleft()
+            finished.discard(watermark)
+
+    def checkpoint(force: bool = False) -> None:
+        nonlocal last_checkpoint
+        if checkpoint_path and (force or time.monotonic() - last_checkpoint >= CHECKPOINT_EVERY_S):
+            save_checkpoint(checkpoint_path, {
+                "scope": scope, "cursor": watermark, "done": stats.done, "failed": stats.failed,
+                "elapsed": stats.elapsed_before + time.monotonic() - stats.started,
+            })
+            last_checkpoint = time.monotonic()
+
+    def progress(force: bool = False) -> None:
+        nonlocal last_progress
+        if force or time.monotonic() - last_progress >= PROGRESS_EVERY_S:
+            pct = stats.done * 100 // max(1, stats.total)
+            rate = f"{limiter.rate:.2f} req/s" if limiter.rate else "unpaced"
+            log(f"  Embedded {stats.done}/{stats.total} ({pct}%) — {stats.chunks_per_s():.1f} chunks/s, "
+                f"ETA {format_eta(stats.eta_s())}, {len(in_flight)} in flight, {rate}, "
+                f"{limiter.throttled} throttled")
+            last_progress = time.monotonic()
+
+    def finish(batch: Batch) -> None:
+        finished.add(batch.ids[-1])
+        advance()
+
+    with ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="embed-backfill") as pool:
+        try:
+            while True:
+                # ── Submit while there is room and pacing allows ──
+                while len(in_flight) < max_in_flight:
+                    if not retry and exhausted:
+                        break
+                    delay = limiter.delay()
+                    if delay > 0:
+                        if in_flight:
+                            break  # WHY: Wait on completions instead of sleeping blind
+                        time.sleep(delay)
+                        continue
+                    if retry:
+                        batch = retry.popleft()
+                    else:
+                        rows = fetch_batch(db, fetch_after, batch_size, source, exact_source)
+                        db.rollback()  # WHY: Don't hold a snapshot open while waiting on the API
+                        if not rows:
+                            exhausted = True
+                            continue
+                        batch = Batch([r[0] for r in rows], [r[1][:MAX_CHARS] for r in rows])
+                        fetch_after = batch.ids[-1]
+                        order.append(batch.ids[-1])
+                    limiter.sent()
+                    in_flight[pool.submit(embed, batch.texts)] = batch
+
+                if not in_flight:
+                    if retry:
+                        time.sleep(limiter.delay())
+                        continue
+                    break
+
+                done, _ = wait(list(in_flight), timeout=max(0.05, limiter.delay()) if retry else None,
+                               return_when=FIRST_COMPLETED)
+                for future in done:
+                    batch = in_flight.pop(future)
+                    exc = future.exception()
+                    if exc is None:
+                        embeddings = future.result()
+                        # WHY: The bulk UPDATE pairs ids and embeddings by position — a short
+                        # response would silently leave rows NULL or shift vectors onto the wrong ids
+                        if len(embeddings) != len(batch.ids):
+                            raise ValueError(
+                                f"Embedding backend returned {len(embeddings)} vectors for "
+                                f"{len(batch.ids)} chunks (ids {batch.ids[0]}..{batch.ids[-1]})"
+                            )
+                        write_batch(db, batch.ids, embeddings)
+                        limiter.on_success()
+                        stats.record(len(batch.ids))
+                        finish(batch)
+                        continue
+                    kind, retry_after = _classify(exc)
+                    if kind == "throttle":
+                        limiter.on_throttle(retry_after)
+                        retry.append(batch)
+                        continue
+                    if kind == "error":
+                        # WHY: 4xx / bad config fails every batch the same way — stop instead of
+                        # burning MAX_ATTEMPTS calls per batch over the whole table
+                        log(f"  Embedding failed at id={batch.ids[0]}: {str(exc)[:120]}")
+                        raise exc
+                    batch.attempts += 1
+                    if batch.attempts < MAX_ATTEMPTS:
+                        log(f"  {kind} error at id={batch.ids[0]} (attempt {batch.attempts}): {str(exc)[:120]}")
+                        retry.append(batch)
+                    else:
+                        log(f"  Skipping ids {batch.ids[0]}..{batch.ids[-1]} after {MAX_ATTEMPTS} attempts: "
+                            f"{str(exc)[:120]}")
+                        stats.failed += len(batch.ids)
+                        finish(batch)
+                checkpoint()
+                progress()
+        finally:
+            for future in in_flight:
+                future.cancel()
+            checkpoint(force=True)
+            if stats.done > done_before:
+                # WHY: Also on a killed run — rows written so far must become visible to the caches
+                try:
+                    db.rollback()
+                    bump_knowledge_version(db)
+                except Exception as e:
+                    log(f"  knowledge_version bump failed ({str(e)[:120]}) — caches refresh on the next write")
+            if client is not None:
+                client.close()
+
+    progress(force=True)
+    if checkpoint_path and exhausted and not in_flight and not retry:
+        # WHY: Complete — the next run starts from id 0 and retries anything skipped
+        os.remove(checkpoint_path)
+    return stats
@@ -1,13 +1,22 @@
 # backend/services/embedding_service.py
-# Purpose: Generate embeddings via Cloudflare Workers AI (free, uses existing CF account)
-# NOT for: Search logic (that's knowledge_service.py)
+# Purpose: Generate embeddings via Cloudflare Workers AI (free) or the local ONNX backend
+# NOT for: Search logic (that's knowledge_service.py) or running the model (local_embedder.py)
 
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import time
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
 import httpx
+from sqlalchemy import text as sql_text
 import structlog
+
 from config import settings
+from database import SessionLocal
+from services.llm_providers import get_http_pool
+from utils.ttl_cache import TTLCache
 
 logger = structlog.get_logger()
 
@@ -18,6 +27,32 @@ CF_API_URL = (
     f"https://api.cloudflare.com/client/v4/accounts/"
     f"{settings.cf_account_id}/ai/run/{EMBEDDING_MODEL}"
 )
+RETRY_STATUSES = (408, 500, 502, 503, 429)
+# WHY: settings.embedding_backend values — both produce bge-small-en-v1.5 vectors (384 dims)
+EMBEDDING_BACKENDS = ("cloudflare", "local")
+LOCAL_EMBEDDING_MODEL = "local/BAAI/bge-small-en-v1.5"
+# WHY: Backfill (texts per call, starting seconds between calls) — CF free tier rate limits, so
+# the backfill runner starts slow and adapts (services/embedding_backfill.py); the local backend
+# has no rate limit, so batches are sized for throughput
+BACKFILL_PACING = {"cloudflare": (20, 6.0), "local": (256, 0.0)}
+# WHY: Batches in flight at once — CF calls are network-bound; local ONNX already uses every core
+BACKFILL_MAX_IN_FLIGHT = {"cloudflare": 4, "local": 1}
+
+# WHY: Embeddings are deterministic per (model, text) — TTL only bounds memory of stale queries
+EMBED_LRU_MAX_ENTRIES = 2048
+EMBED_LRU_TTL_S = 7 * 86400
+# WHY: 384 floats ≈ 1.5 KB per row — 20K rows ≈ 30 MB, pruned oldest-first
+EMBED_DB_MAX_ROWS = 20_000
+PRUNE_EVERY_WRITES = 200
+# WHY: Concurrent optimizations/batch items embed at nearly the same moment — a few ms of
+# waiting turns N round-trips into one. CF accepts up to 100 texts per bge call.
+EMBED_BATCH_WINDOW_S = 0.005
+EMBED_MAX_BATCH = 32
+
+_lru = TTLCache(maxsize=EMBED_LRU_MAX_ENTRIES, ttl=EMBED_LRU_TTL_S)
+_writes_since_prune = 0
+# WHY: Keep references to fire-and-forget DB writes so they aren't garbage-collected mid-flight
+_pending_writes: Set[asyncio.Task] = set()
 
 
 def _cf_headers() -> dict[str, str]:
@@ -29,40 +64,271 @@ def _cf_headers() -> dict[str, str]:
     }
 
 
-async def get_embedding(text: str) -> list[float] | None:
-    """Get embedding for a single text string. Returns None on failure.
+def _use_local() -> bool:
+    if settings.embedding_backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend: {settings.embedding_backend}")
+    return settings.embedding_backend == "local"
 
-    WHY: Retry on transient CF errors — 408 timeout, 500, 503 cold start, 429 rate limit.
+
+def embedding_model_id() -> str:
+    """Model id for the active backend — part of the Postgres cache key.
+
+    WHY: Same weights, but CF and ONNX Runtime differ in float rounding; keeping their cached
+    query vectors apart means a backend switch never mixes the two.
     """
-    if not settings.cf_account_id:
+    return LOCAL_EMBEDDING_MODEL if _use_local() else EMBEDDING_MODEL
+
+
+def backfill_pacing() -> tuple[int, float]:
+    """(batch size, pause seconds) for bulk embedding scripts with the active backend."""
+    _use_local()
+    return BACKFILL_PACING[settings.embedding_backend]
+
+
+def backfill_max_in_flight() -> int:
+    _use_local()
+    return BACKFILL_MAX_IN_FLIGHT[settings.embedding_backend]
+
+
+def embeddings_available() -> bool:
+    return _use_local() or bool(settings.cf_account_id)
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+# ── Postgres tier ──
+
+def _db_get(text_key: str) -> Optional[List[float]]:
+    db = SessionLocal()
+    try:
+        row = db.execute(
+            sql_text("SELECT embedding FROM query_embedding_cache WHERE model = :model AND text_hash = :key"),
+            {"model": embedding_model_id(), "key": text_key},
+        ).fetchone()
+        return list(row[0]) if row else None
+    finally:
+        db.close()
+
+
+def _db_put_many(rows: List[tuple], prune: bool) -> None:
+    db = SessionLocal()
+    try:
+        db.execute(
+            sql_text("""
+                INSERT INTO query_embedding_cache (model, text_hash, embedding)
+                VALUES (:model, :key, :embedding)
+                ON CONFLICT (model, text_hash) DO NOTHING
+            """),
+            [{"model": embedding_model_id(), "key": key, "embedding": emb} for key, emb in rows],
+        )
+        if prune:
+            db.execute(
+                sql_text("""
+                    DELETE FROM query_embedding_cache WHERE (model, text_hash) IN (
+                        SELECT model, text_hash FROM query_embedding_cache
+                        ORDER BY created_at DESC OFFSET :max_rows
+                    )
+                """),
+                {"max_rows": EMBED_DB_MAX_ROWS},
+            )
+        db.commit()
+    finally:
+        db.close()
+
+
+async def _db_get_safe(text_key: str) -> Optional[List[float]]:
+    if not settings.embedding_cache_db:
         return None
+    try:
+        return await asyncio.to_thread(_db_get, text_key)
+    except Exception as e:
+        # WHY: Cache is an optimization — a missing table or DB blip must never fail a search
+        logger.warning("embedding_cache_db_read_failed", error=str(e)[:200])
+        return None
+
+
+async def _db_put_safe(rows: List[tuple]) -> None:
+    global _writes_since_prune
+    _writes_since_prune += len(rows)
+    prune = _writes_since_prune >= PRUNE_EVERY_WRITES
+    if prune:
+        _writes_since_prune = 0
+    try:
+        await asyncio.to_thread(_db_put_many, rows, prune)
+    except Exception as e:
+        logger.warning("embedding_cache_db_write_failed", error=str(e)[:200])
+
+
+# ── Cloudflare call + micro-batching ──
+
+async def _fetch_embeddings(texts: List[str]) -> Optional[List[List[float]]]:
+    """Embed many texts with the configured backend. None on failure."""
+    if _use_local():
+        try:
+            from services.local_embedder import get_local_embedder
+            return await get_local_embedder().aembed(texts)
+        except Exception as e:
+            logger.warning("local_embedding_error", error=str(e)[:200], batch=len(texts))
+            return None
+    return await _fetch_cloudflare(texts)
+
+
+async def _fetch_cloudflare(texts: List[str]) -> Optional[List[List[float]]]:
+    """One CF call for many texts over the shared pool. None on failure.
 
+    WHY: Retry on transient CF errors — 408 timeout, 500, 503 cold start, 429 rate limit.
+    """
+    client = get_http_pool("cloudflare_ai")
     for attempt in range(3):
         try:
-            async with httpx.AsyncClient(timeout=15.0) as client:
-                resp = await client.post(
-                    CF_API_URL, headers=_cf_headers(), json={"text": [text]},
-                )
-                # WHY: CF Workers AI has transient 408/500/503/429 — retry with backoff
-                if resp.status_code in (408, 500, 502, 503, 429) and attempt < 2:
-                    await _async_sleep(2 ** attempt)
-                    continue
-                resp.raise_for_status()
-                data = resp.json()
-                if data.get("success"):
-                    return data["result"]["data"][0]
-                return None
+            resp = await client.post(
+                CF_API_URL, headers=_cf_headers(), json={"text": texts}, timeout=15.0,
+            )
+            # WHY: CF Workers AI has transient 408/500/503/429 — retry with backoff
+            if resp.status_code in RETRY_STATUSES and attempt < 2:
+                await asyncio.sleep(2 ** attempt)
+                continue
+            resp.raise_for_status()
+            data = resp.json()
+            if data.get("success"):
+                return data["result"]["data"]
+            return None
         except Exception as e:
             if attempt < 2:
-                await _async_sleep(2 ** attempt)
+                await asyncio.sleep(2 ** attempt)
                 continue
-            logger.warning("embedding_error", error=str(e), text_preview=text[:60])
+            logger.warning("embedding_error", error=str(e), batch=len(texts), text_preview=texts[0][:60])
             return None
+    return None
+
+
+async def _fetch_and_store(texts: List[str]) -> Optional[List[List[float]]]:
+    vectors = await _fetch_embeddings(texts)
+    if not vectors or len(vectors) != len(texts):
+        return None
+    rows = []
+    for t, vec in zip(texts, vectors):
+        key = text_hash(t)
+        _lru.set(key, tuple(vec))
+        rows.append((key, vec))
+    if settings.embedding_cache_db:
+        task = asyncio.create_task(_db_put_safe(rows))
+        _pending_writes.add(task)
+        task.add_done_callback(_pending_writes.discard)
+    return vectors
+
+
+class EmbeddingBatcher:
+    """Collects concurrent single-text requests for `window_s` and sends them as one batch.
+
+    WHY: get_embedding() callers stay one-text-at-a-time; the batcher turns a burst of them
+    into a single {"text": [...]} request. Duplicate texts in a window share one slot.
+    A full batch (max_batch distinct texts) is sent immediately.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[List[str]], Awaitable[Optional[List[List[float]]]]],
+        window_s: float = EMBED_BATCH_WINDOW_S,
+        max_batch: int = EMBED_MAX_BATCH,
+    ):
+        self._fetch = fetch
+        self.window_s = window_s
+        self.max_batch = max_batch
+        self._pending: Dict[str, List[asyncio.Future]] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._inflight: Set[asyncio.Task] = set()
+        self.batches_sent = 0
+        self.texts_sent = 0
+
+    async def submit(self, text: str) -> Optional[List[float]]:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # WHY: Futures and timers belong to one loop — tests and scripts may start new ones
+            self._loop, self._pending, self._timer = loop, {}, None
+        fut = loop.create_future()
+        self._pending.setdefault(text, []).append(fut)
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_s, self._flush)
+        return await fut
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, {}
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _run(self, batch: Dict[str, List[asyncio.Future]]) -> None:
+        texts = list(batch)
+        self.batches_sent += 1
+        self.texts_sent += len(texts)
+        try:
+            vectors = await self._fetch(texts)
+        except Exception as e:
+            logger.warning("embedding_batch_error", error=str(e)[:200], batch=len(texts))
+            vectors = None
+        for i, t in enumerate(texts):
+            for fut in batch[t]:
+                # WHY: A cancelled caller (client disconnect) already has a done future
+                if not fut.done():
+                    fut.set_result(list(vectors[i]) if vectors else None)
+
+
+_batcher = EmbeddingBatcher(_fetch_and_store)
+
+
+async def get_embedding(text: str) -> list[float] | None:
+    """Get embedding for a single text string. Returns None on failure.
+
+    Lookup order: in-process LRU → Postgres query_embedding_cache → micro-batched backend call.
+    """
+    if not embeddings_available():
+        return None
+
+    key = text_hash(text)
+    hit = _lru.get(key)
+    if hit is not None:
+        return list(hit)
+    stored = await _db_get_safe(key)
+    if stored is not None:
+        _lru.set(key, tuple(stored))
+        return stored
+    return await _batcher.submit(text)
+
+
+def embedding_cache_stats() -> dict:
+    """In-process counters — for admin/monitoring endpoints."""
+    return {**_lru.stats(), "batches_sent": _batcher.batches_sent, "texts_sent": _batcher.texts_sent}
 
 
-async def _async_sleep(seconds: float):
-    import asyncio
-    await asyncio.sleep(seconds)
+def clear_embedding_cache() -> None:
+    _lru.clear()
+
+
+def embed_batch_once(texts: list[str], client: Optional[httpx.Client] = None) -> list[list[float]]:
+    """One embedding call with the active backend — no retries, no sleeping.
+
+    WHY: The backfill runner adapts its own request rate; it needs every 429/503 as it happens.
+    Raises httpx.HTTPStatusError (status and Retry-After on e.response) for non-2xx replies.
+    """
+    if _use_local():
+        from services.local_embedder import get_local_embedder
+        return get_local_embedder().embed(texts)
+    resp = (client or httpx).post(CF_API_URL, headers=_cf_headers(), json={"text": texts}, timeout=30.0)
+    resp.raise_for_status()
+    data = resp.json()
+    if not data.get("success"):
+        raise RuntimeError(f"CF AI error: {data.get('errors', [])}")
+    return data["result"]["data"]
 
 
 def get_embeddings_batch_sync(texts: list[str]) -> list[list[float]]:
@@ -70,12 +336,15 @@ def get_embeddings_batch_sync(texts: list[str]) -> list[list[float]]:
 
     WHY: Retry on transient CF errors — 408/500/502/503/429 all happen on free tier.
     """
+    if _use_local():
+        from services.local_embedder import get_local_embedder
+        return get_local_embedder().embed(texts)
     for attempt in range(3):
         with httpx.Client(timeout=30.0) as client:
             resp = client.post(
                 CF_API_URL, headers=_cf_headers(), json={"text": texts},
             )
-            if resp.status_code in (408, 500, 502, 503, 429) and attempt < 2:
+            if resp.status_code in RETRY_STATUSES and attempt < 2:
                 time.sleep(2 ** attempt)
                 continue
             resp.raise_for_status()
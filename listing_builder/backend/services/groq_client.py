@@ -1,13 +1,17 @@
 # backend/services/groq_client.py
-# Purpose: Groq LLM client with automatic key rotation on 429 rate limits
+# Purpose: Groq LLM client — scheduled key rotation (groq_key_scheduler.py) with 429 failover and 5xx retry
 # NOT for: Prompt construction (that's prompt_builders.py) or scoring logic
 
 from __future__ import annotations
 
+import asyncio
 import re
-from typing import Tuple, Optional, Dict
-from groq import Groq
+import time
+from typing import AsyncIterator, Tuple, Optional, Dict, List
+from groq import Groq, AsyncGroq, APIConnectionError, APIStatusError
 from config import settings
+from services.llm_providers import get_http_pool, chat_usage, mask_api_key, StreamPart
+from services.groq_key_scheduler import key_scheduler, estimate_tokens
 import structlog
 
 logger = structlog.get_logger()
@@ -16,9 +20,16 @@ logger = structlog.get_logger()
 # without code changes. Default: llama-3.3-70b-versatile (proven stable)
 MODEL = settings.groq_model
 
+# WHY: The clients run with max_retries=0 (see _get_client), so 5xx / connection errors are
+# retried here — up to this many extra attempts once every key has failed, with backoff
+TRANSIENT_RETRIES = 2
+TRANSIENT_BACKOFF_S = 0.5
+
 # WHY: Reuse Groq client objects — avoids recreating HTTP session per call.
 # Keyed by API key string so each key gets its own persistent client.
 _client_cache: Dict[str, Groq] = {}
+# key -> (pool, AsyncGroq). WHY pool: rebuilt if the shared pool was recreated (new loop / closed)
+_async_client_cache: Dict[str, tuple] = {}
 
 # WHY: Common LLM injection patterns that attackers embed in product titles/keywords.
 # These regex patterns catch "Ignore all previous instructions", "You are now a ...",
@@ -50,45 +61,193 @@ def sanitize_llm_input(text: str) -> str:
 def _get_client(key: str) -> Groq:
     """Return cached Groq client for a given API key."""
     if key not in _client_cache:
-        _client_cache[key] = Groq(api_key=key)
+        # WHY max_retries=0: the SDK would retry a 429 on the same key after sleeping —
+        # the scheduler moves to a key with budget left instead, and retries 5xx /
+        # connection errors itself (_transient_delay)
+        _client_cache[key] = Groq(api_key=key, max_retries=0)
     return _client_cache[key]
 
 
-def call_groq(prompt: str, temperature: float, max_tokens: int) -> Tuple[str, Optional[dict]]:
-    """Synchronous Groq call with automatic key rotation on 429 rate limits.
+def _get_async_client(key: str) -> AsyncGroq:
+    """Return cached AsyncGroq for a key — all keys share the "groq" connection pool."""
+    pool = get_http_pool("groq")
+    entry = _async_client_cache.get(key)
+    if entry is None or entry[0] is not pool:
+        _async_client_cache[key] = (pool, AsyncGroq(api_key=key, http_client=pool, max_retries=0))
+    return _async_client_cache[key][1]
 
-    Returns (text, usage_dict | None) — usage_dict contains token counts for tracing.
+
+def _is_rate_limited(e: Exception) -> bool:
+    return "429" in str(e) or "rate_limit" in str(e)
+
+
+def _is_transient(e: Exception) -> bool:
+    """5xx or connection/timeout error — worth another attempt, unlike a 4xx."""
+    if isinstance(e, APIConnectionError):
+        return True
+    return isinstance(e, APIStatusError) and e.status_code >= 500
+
+
+def _transient_delay(tries: List[str], i: int, n_keys: int) -> Optional[float]:
+    """Seconds to wait before the next attempt after a transient error on tries[i]; None = give up.
+
+    Fails over to the next key at once; after the last key, retries that key with
+    exponential backoff (appended to tries) until TRANSIENT_RETRIES is used up.
     """
+    if i + 1 < len(tries):
+        return 0.0
+    retries = len(tries) - n_keys
+    if retries >= TRANSIENT_RETRIES:
+        return None
+    tries.append(tries[i])
+    return TRANSIENT_BACKOFF_S * 2 ** retries
+
+
+def _error_headers(e: Exception):
+    response = getattr(e, "response", None)
+    return getattr(response, "headers", None)
+
+
+def _keys_or_raise() -> List[str]:
     keys = settings.groq_api_keys
     if not keys:
         raise RuntimeError("No Groq API keys configured — set GROQ_API_KEYS env var")
+    return keys
+
+
+def groq_chat(
+    messages: List[dict], temperature: float, max_tokens: int,
+    model: str = MODEL, timeout: Optional[float] = None,
+):
+    """Synchronous Groq chat completion on the key the scheduler picks. Returns the SDK response.
+
+    WHY: Single rotation path for every sync Groq caller (scoring, ad copy, research,
+    converter) so they all feed and respect the same per-key bucket state.
+    """
+    keys = _keys_or_raise()
+    last_error: Optional[Exception] = None
+
+    tries = key_scheduler.order(keys, model, estimate_tokens(messages, max_tokens))
+    n_keys = len(tries)
+    delay = 0.0
+
+    # WHY enumerate over a growing list: _transient_delay appends a key to retry it
+    for i, key in enumerate(tries):
+        if delay:
+            time.sleep(delay)
+        client = _get_client(key)
+        if timeout is not None:
+            client = client.with_options(timeout=timeout)
+        try:
+            raw = client.chat.completions.with_raw_response.create(
+                model=model, messages=messages, temperature=temperature, max_tokens=max_tokens,
+            )
+        except Exception as e:
+            last_error = e
+            if _is_rate_limited(e):
+                wait = key_scheduler.record_rate_limit(key, model, _error_headers(e))
+                logger.warning("groq_rate_limit", key=mask_api_key(key), quarantine_s=round(wait, 1))
+                delay = 0.0
+                continue
+            key_scheduler.record_error(key, model)
+            delay = _transient_delay(tries, i, n_keys) if _is_transient(e) else None
+            if delay is None:
+                raise
+            logger.warning("groq_transient_error", key=mask_api_key(key), error=type(e).__name__,
+                           retry_in_s=delay)
+            continue
+        key_scheduler.record_success(key, model, raw.headers)
+        return raw.parse()
+
+    raise last_error
+
+
+async def agroq_chat(
+    messages: List[dict], temperature: float, max_tokens: int,
+    model: str = MODEL, timeout: Optional[float] = None, stream: bool = False,
+    response_format: Optional[dict] = None,
+):
+    """Async twin of groq_chat — native AsyncGroq on the shared pool, same scheduler.
+
+    stream=True returns the SDK's chunk stream; a 429 surfaces before the first chunk,
+    so failover still happens here.
+    """
+    keys = _keys_or_raise()
     last_error: Optional[Exception] = None
 
-    for i, key in enumerate(keys):
+    tries = key_scheduler.order(keys, model, estimate_tokens(messages, max_tokens))
+    n_keys = len(tries)
+    delay = 0.0
+
+    # WHY enumerate over a growing list: _transient_delay appends a key to retry it
+    for i, key in enumerate(tries):
+        if delay:
+            await asyncio.sleep(delay)
+        client = _get_async_client(key)
+        if timeout is not None:
+            client = client.with_options(timeout=timeout)
         try:
-            client = _get_client(key)
-            response = client.chat.completions.create(
-                model=MODEL,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=temperature,
-                max_tokens=max_tokens,
+            raw = await client.chat.completions.with_raw_response.create(
+                model=model, messages=messages, temperature=temperature, max_tokens=max_tokens,
+                stream=stream, **({"response_format": response_format} if response_format else {}),
             )
-            text = response.choices[0].message.content.strip()
-            # WHY: Extract token usage for observability tracing
-            usage = None
-            if hasattr(response, "usage") and response.usage:
-                usage = {
-                    "prompt_tokens": response.usage.prompt_tokens,
-                    "completion_tokens": response.usage.completion_tokens,
-                    "total_tokens": response.usage.total_tokens,
-                    "model": MODEL,
-                }
-            return text, usage
         except Exception as e:
             last_error = e
-            if "429" in str(e) or "rate_limit" in str(e):
-                logger.warning("groq_rate_limit", key_index=i, remaining_keys=len(keys) - i - 1)
+            if _is_rate_limited(e):
+                wait = key_scheduler.record_rate_limit(key, model, _error_headers(e))
+                logger.warning("groq_rate_limit", key=mask_api_key(key), quarantine_s=round(wait, 1))
+                delay = 0.0
                 continue
-            raise
+            key_scheduler.record_error(key, model)
+            delay = _transient_delay(tries, i, n_keys) if _is_transient(e) else None
+            if delay is None:
+                raise
+            logger.warning("groq_transient_error", key=mask_api_key(key), error=type(e).__name__,
+                           retry_in_s=delay)
+            continue
+        key_scheduler.record_success(key, model, raw.headers)
+        return await raw.parse()
 
     raise last_error
+
+
+def call_groq(prompt: str, temperature: float, max_tokens: int) -> Tuple[str, Optional[dict]]:
+    """Synchronous Groq call with scheduled key rotation (groq_key_scheduler.py).
+
+    Returns (text, usage_dict | None) — usage_dict contains token counts for tracing.
+    """
+    response = groq_chat([{"role": "user", "content": prompt}], temperature, max_tokens)
+    return response.choices[0].message.content.strip(), chat_usage(response, MODEL)
+
+
+async def acall_groq(
+    prompt: str, temperature: float, max_tokens: int, json_schema: Optional[dict] = None,
+) -> Tuple[str, Optional[dict]]:
+    """Async twin of call_groq — same key scheduling, native AsyncGroq on a shared pool.
+
+    WHY: asyncio.to_thread(call_groq) parks one executor thread per in-flight request;
+    batches and jobs ran out of threads long before Groq ran out of capacity.
+    json_schema switches on Groq JSON mode (json_object) — the schema itself goes in the prompt.
+    """
+    response = await agroq_chat(
+        [{"role": "user", "content": prompt}], temperature, max_tokens,
+        response_format={"type": "json_object"} if json_schema is not None else None,
+    )
+    return response.choices[0].message.content.strip(), chat_usage(response, MODEL)
+
+
+async def astream_groq(prompt: str, temperature: float, max_tokens: int) -> AsyncIterator[StreamPart]:
+    """Token-streaming Groq call. Yields (delta_text, None) per chunk, then ("", usage) once.
+
+    WHY: Groq reports usage on the final chunk under x_groq, not in the standard field.
+    """
+    stream = await agroq_chat(
+        [{"role": "user", "content": prompt}], temperature, max_tokens, stream=True,
+    )
+    async for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content, None
+        source = chunk if getattr(chunk, "usage", None) else getattr(chunk, "x_groq", None)
+        usage = chat_usage(source, MODEL) if source is not None else None
+        if usage:
+            yield "", usage
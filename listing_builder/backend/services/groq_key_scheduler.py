@@ -0,0 +1,237 @@
+# backend/services/groq_key_scheduler.py
+# Purpose: Token-bucket scheduler that picks which Groq API key serves the next call
+# NOT for: Making the call itself (groq_client.py) or non-Groq providers
+
+from __future__ import annotations
+
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Mapping, Optional, Tuple
+
+import structlog
+
+from services.llm_providers import mask_api_key
+
+logger = structlog.get_logger()
+
+# WHY: 429 without retry-after/reset headers — Groq's token window is one minute
+DEFAULT_QUARANTINE_S = 30.0
+# WHY: A key we know nothing about (no call yet) or whose window has reset counts as full
+FULL_WEIGHT = 1.0
+# WHY: Nearly-drained keys still get a small share so their counters keep refreshing
+MIN_WEIGHT = 0.05
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_UNIT_SECONDS = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+
+
+def parse_reset(value: Optional[str]) -> Optional[float]:
+    """Groq reset header ("2m59.56s", "7.66s", "120ms", "1h2m") → seconds. None if unparseable."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(num) * _UNIT_SECONDS[unit] for num, unit in parts)
+
+
+def _int_header(headers: Mapping[str, str], name: str) -> Optional[int]:
+    try:
+        return int(headers.get(name))
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass
+class KeyState:
+    """Rate-limit view of one (key, model) pair — Groq limits are per model."""
+    key_index: int
+    masked_key: str
+    model: str
+    limit_requests: Optional[int] = None
+    remaining_requests: Optional[int] = None
+    requests_reset_at: float = 0.0
+    limit_tokens: Optional[int] = None
+    remaining_tokens: Optional[int] = None
+    tokens_reset_at: float = 0.0
+    quarantined_until: float = 0.0
+    # WHY: Smooth weighted round-robin accumulator (nginx algorithm)
+    current_weight: float = 0.0
+    calls: int = 0
+    rate_limited: int = 0
+    errors: int = 0
+    last_used_at: float = field(default=0.0)
+
+
+class GroqKeyScheduler:
+    """Orders Groq keys per call: weighted round-robin over healthy keys, quarantined keys last.
+
+    WHY: Plain rotation always started at key 0, so under load every call paid one failed
+    round-trip on an exhausted key before reaching a fresh one. Weights come from the
+    x-ratelimit-remaining-* headers of each key's last response. Thread-safe — sync callers
+    run in worker threads while async callers share the event loop.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._states: Dict[Tuple[str, str], KeyState] = {}
+        self._key_index: Dict[str, int] = {}
+
+    def _state(self, key: str, model: str) -> KeyState:
+        st = self._states.get((key, model))
+        if st is None:
+            idx = self._key_index.setdefault(key, len(self._key_index))
+            st = KeyState(key_index=idx, masked_key=mask_api_key(key), model=model)
+            self._states[(key, model)] = st
+        return st
+
+    @staticmethod
+    def _fraction(remaining: Optional[int], limit: Optional[int], reset_at: float, now: float) -> float:
+        if remaining is None or not limit or now >= reset_at:
+            return FULL_WEIGHT
+        return remaining / limit
+
+    def _weight(self, st: KeyState, now: float, est_tokens: int) -> float:
+        if st.quarantined_until > now:
+            return 0.0
+        # WHY: A call bigger than the key's remaining token budget would 429 — skip it
+        if (st.remaining_tokens is not None and now < st.tokens_reset_at
+                and st.remaining_tokens < est_tokens):
+            return 0.0
+        frac = min(
+            self._fraction(st.remaining_requests, st.limit_requests, st.requests_reset_at, now),
+            self._fraction(st.remaining_tokens, st.limit_tokens, st.tokens_reset_at, now),
+        )
+        return max(MIN_WEIGHT, frac)
+
+    def order(self, keys: List[str], model: str, est_tokens: int = 0) -> List[str]:
+        """Keys in the order they should be tried for one call.
+
+        First the weighted round-robin pick, then other healthy keys by weight. When every
+        key is quarantined only the one that resets soonest is returned — one round-trip
+        instead of a guaranteed 429 on each key.
+        """
+        now = self._clock()
+        with self._lock:
+            states = [(k, self._state(k, model)) for k in keys]
+            weighted = [(k, st, self._weight(st, now, est_tokens)) for k, st in states]
+            healthy = [(k, st, w) for k, st, w in weighted if w > 0]
+
+            if not healthy:
+                # WHY: Drained-but-not-quarantined keys first, then by soonest reset
+                soonest = min(
+                    states,
+                    key=lambda ks: (ks[1].quarantined_until > now, ks[1].quarantined_until, ks[1].key_index),
+                )
+                return [soonest[0]]
+
+            total = sum(w for _, _, w in healthy)
+            for _, st, w in healthy:
+                st.current_weight += w
+            pick = max(healthy, key=lambda t: t[1].current_weight)
+            pick[1].current_weight -= total
+
+            rest = sorted((t for t in healthy if t is not pick), key=lambda t: -t[2])
+            return [pick[0]] + [k for k, _, _ in rest]
+
+    def record_success(self, key: str, model: str, headers: Mapping[str, str]) -> None:
+        now = self._clock()
+        with self._lock:
+            st = self._state(key, model)
+            st.calls += 1
+            st.last_used_at = now
+            self._apply_headers(st, headers, now)
+            # WHY: Bucket empty — park the key until the window resets rather than eat a 429
+            if st.remaining_requests == 0 and st.requests_reset_at > now:
+                st.quarantined_until = max(st.quarantined_until, st.requests_reset_at)
+            if st.remaining_tokens == 0 and st.tokens_reset_at > now:
+                st.quarantined_until = max(st.quarantined_until, st.tokens_reset_at)
+
+    def record_rate_limit(self, key: str, model: str, headers: Optional[Mapping[str, str]]) -> float:
+        """Quarantine a key after a 429. Returns the quarantine length in seconds."""
+        now = self._clock()
+        headers = headers or {}
+        with self._lock:
+            st = self._state(key, model)
+            st.calls += 1
+            st.rate_limited += 1
+            st.last_used_at = now
+            self._apply_headers(st, headers, now)
+            wait = parse_reset(headers.get("retry-after"))
+            if wait is None:
+                resets = [r for r in (st.requests_reset_at, st.tokens_reset_at) if r > now]
+                wait = (max(resets) - now) if resets else DEFAULT_QUARANTINE_S
+            st.quarantined_until = max(st.quarantined_until, now + wait)
+            return wait
+
+    def record_error(self, key: str, model: str) -> None:
+        with self._lock:
+            st = self._state(key, model)
+            st.calls += 1
+            st.errors += 1
+            st.last_used_at = self._clock()
+
+    @staticmethod
+    def _apply_headers(st: KeyState, headers: Mapping[str, str], now: float) -> None:
+        for attr, name in (
+            ("limit_requests", "x-ratelimit-limit-requests"),
+            ("remaining_requests", "x-ratelimit-remaining-requests"),
+            ("limit_tokens", "x-ratelimit-limit-tokens"),
+            ("remaining_tokens", "x-ratelimit-remaining-tokens"),
+        ):
+            value = _int_header(headers, name)
+            if value is not None:
+                setattr(st, attr, value)
+        reset_req = parse_reset(headers.get("x-ratelimit-reset-requests"))
+        if reset_req is not None:
+            st.requests_reset_at = now + reset_req
+        reset_tok = parse_reset(headers.get("x-ratelimit-reset-tokens"))
+        if reset_tok is not None:
+            st.tokens_reset_at = now + reset_tok
+
+    def snapshot(self) -> List[dict]:
+        """Per-key state for the admin endpoint — keys masked, times relative to now."""
+        now = self._clock()
+        with self._lock:
+            out = []
+            for st in sorted(self._states.values(), key=lambda s: (s.model, s.key_index)):
+                out.append({
+                    "key_index": st.key_index,
+                    "key": st.masked_key,
+                    "model": st.model,
+                    "weight": round(self._weight(st, now, 0), 3),
+                    "quarantined": st.quarantined_until > now,
+                    "quarantine_remaining_s": round(max(0.0, st.quarantined_until - now), 1),
+                    "remaining_requests": st.remaining_requests,
+                    "limit_requests": st.limit_requests,
+                    "requests_reset_in_s": round(max(0.0, st.requests_reset_at - now), 1),
+                    "remaining_tokens": st.remaining_tokens,
+                    "limit_tokens": st.limit_tokens,
+                    "tokens_reset_in_s": round(max(0.0, st.tokens_reset_at - now), 1),
+                    "calls": st.calls,
+                    "rate_limited": st.rate_limited,
+                    "errors": st.errors,
+                })
+            return out
+
+    def reset(self) -> None:
+        with self._lock:
+            self._states.clear()
+            self._key_index.clear()
+
+
+def estimate_tokens(messages: List[dict], max_tokens: int) -> int:
+    """Rough request cost against the TPM bucket — ~4 chars per token plus the output cap."""
+    return sum(len(m.get("content") or "") for m in messages) // 4 + max_tokens
+
+
+# WHY: One process-wide scheduler — every Groq caller must see the same bucket state
+key_scheduler = GroqKeyScheduler()
@@ -0,0 +1,102 @@
+# backend/services/knowledge_cache.py
+# Purpose: In-process cache for RAG knowledge search results, invalidated when knowledge_chunks changes
+# NOT for: LLM response caching (llm_cache.py) or the search itself (knowledge_service.py)
+
+from __future__ import annotations
+
+import re
+import time
+import unicodedata
+from typing import Any, Hashable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+import structlog
+
+from config import settings
+from utils.ttl_cache import TTLCache
+
+logger = structlog.get_logger()
+
+# WHY: One entry per (query, prompt set) — a batch entry holds ~9KB of chunk text, 256 ≈ 2-3 MB
+RAG_CACHE_MAX_ENTRIES = 256
+
+_cache = TTLCache(maxsize=RAG_CACHE_MAX_ENTRIES, ttl=settings.rag_cache_ttl_seconds)
+# WHY: knowledge_version is bumped by a trigger on knowledge_chunks (migration 024) — ingestion
+# scripts run in other processes, so the API polls the counter instead of being told
+_version: Optional[int] = None
+_version_checked_at = 0.0
+
+_WORD = re.compile(r"\w+")
+
+
+def normalize_query(query: str) -> str:
+    """Case/accent-form/punctuation/word-order-insensitive form of a search query.
+
+    WHY: Products in one niche produce queries that differ only in casing, separators
+    ("1L" vs "1 l" stays distinct, "Edelstahl," vs "edelstahl" does not) or keyword order.
+    plainto_tsquery ANDs terms, so word order never changed lexical results anyway.
+    """
+    words = _WORD.findall(unicodedata.normalize("NFKC", query).casefold())
+    return " ".join(sorted(set(words)))
+
+
+def cache_key(kind: str, query: str, categories: Any, limit: int) -> tuple:
+    return (kind, settings.rag_mode, settings.rag_fusion, normalize_query(query), categories, limit)
+
+
+def _read_version(db: Session) -> Optional[int]:
+    # WHY: Own connection — a failed SELECT (table missing) must not abort the caller's transaction
+    with db.get_bind().connect() as conn:
+        return conn.execute(text("SELECT version FROM knowledge_version WHERE id = 1")).scalar()
+
+
+def _check_version(db: Session) -> None:
+    """Drop every entry when knowledge_chunks changed since the last check (at most every N s)."""
+    global _version, _version_checked_at
+    now = time.monotonic()
+    if now - _version_checked_at < settings.rag_cache_version_check_seconds:
+        return
+    _version_checked_at = now
+    try:
+        current = _read_version(db)
+    except Exception as e:
+        # WHY: No version table (SQLite tests, migration not applied) — TTL alone bounds staleness
+        logger.debug("knowledge_version_unavailable", error=str(e)[:200])
+        return
+    if _version is not None and current != _version:
+        logger.info("rag_cache_invalidated", old_version=_version, new_version=current, entries=len(_cache))
+        _cache.clear()
+    _version = current
+
+
+def knowledge_version(db: Session) -> Optional[int]:
+    """Last polled knowledge_version (None when unavailable) — same poll as the result cache."""
+    _check_version(db)
+    return _version
+
+
+def get(db: Session, key: Hashable) -> Any:
+    """Cached value or None. None also when the cache is disabled."""
+    if not settings.rag_cache_enabled:
+        return None
+    _check_version(db)
+    return _cache.get(key)
+
+
+def put(key: Hashable, value: Any) -> None:
+    """Store an immutable value (tuples/str) — callers get the same object back on every hit."""
+    if settings.rag_cache_enabled:
+        _cache.set(key, value)
+
+
+def invalidate() -> None:
+    """Drop everything now — for in-process writers (tests, admin tools)."""
+    global _version_checked_at
+    _cache.clear()
+    _version_checked_at = 0.0
+
+
+def cache_stats() -> dict:
+    """In-process counters — for admin/monitoring endpoints."""
+    return {**_cache.stats(), "knowledge_version": _version}
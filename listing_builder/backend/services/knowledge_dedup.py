@@ -0,0 +1,259 @@
+# backend/services/knowledge_dedup.py
+# Purpose: Near-duplicate detection for knowledge_chunks — MinHash signatures + LSH banding
+# NOT for: Exact duplicates (content_hash, knowledge_ingest.py) or search-time result diversity (search_strategies.py)
+
+from __future__ import annotations
+
+import re
+import time
+import zlib
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Optional
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+NUM_PERM = 128
+# WHY: 5-word shingles — long enough that two unrelated lessons sharing stock phrases
+# ("in this video we will") stay apart, short enough that 200-char overlaps register
+SHINGLE_WORDS = 5
+DEFAULT_THRESHOLD = 0.8
+# WHY: Prime just above 2^32 — (a * x + b) with a, b, x < 2^32 stays below 2^64 in uint64
+_PRIME = np.uint64(4294967311)
+_rng = np.random.default_rng(20240601)  # WHY: Fixed seed — stored signatures stay comparable across runs
+_A = _rng.integers(1, 2**32 - 1, NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, 2**32 - 1, NUM_PERM, dtype=np.uint64)
+
+# WHY: Ingest prepends "[Course - lesson]" — the same lesson under two courses must still match
+_HEADER = re.compile(r"^\[[^\]\n]*\]\n")
+_WORD = re.compile(r"\w+")
+# WHY: Rows per fetch when loading or backfilling signatures — 5000 × 1.5KB content ≈ 8 MB
+_LOAD_BATCH = 5000
+
+
+# ── Signatures ──
+
+def shingles(content: str) -> set[str]:
+    words = _WORD.findall(_HEADER.sub("", content, count=1).lower())
+    if len(words) <= SHINGLE_WORDS:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+
+
+def minhash(content: str) -> np.ndarray:
+    """NUM_PERM uint32 MinHash signature of the chunk's word shingles (header line ignored)."""
+    grams = shingles(content)
+    if not grams:
+        return np.full(NUM_PERM, 2**32 - 1, dtype=np.uint32)
+    hv = np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+    perms = (hv[:, None] * _A + _B) % _PRIME
+    return (perms.min(axis=0) & np.uint64(0xFFFFFFFF)).astype(np.uint32)
+
+
+def signature_bytes(content: str) -> bytes:
+    return minhash(content).tobytes()
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return float(np.count_nonzero(a == b)) / len(a)
+
+
+def lsh_params(threshold: float, num_perm: int = NUM_PERM) -> tuple[int, int]:
+    """(bands, rows) with bands * rows ≤ num_perm minimizing false positives + false negatives.
+
+    WHY: Two chunks share a bucket with probability 1 - (1 - s^r)^b. Candidates are verified
+    on the full signature afterwards, so a false positive costs one comparison while a false
+    negative is a missed duplicate — weigh misses higher.
+    """
+    s = np.linspace(0, 1, 201)
+    best, best_cost = (1, num_perm), float("inf")
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        p = 1 - (1 - s ** rows) ** bands
+        # WHY: Mean over an even grid on [0, 1] = the integral (np.trapz is gone in NumPy 2.x)
+        fp = np.where(s < threshold, p, 0).mean()
+        fn = np.where(s >= threshold, 1 - p, 0).mean()
+        cost = 0.3 * fp + 0.7 * fn
+        if cost < best_cost:
+            best, best_cost = (bands, rows), cost
+    return best
+
+
+def find_duplicates(
+    ids: np.ndarray, signatures: np.ndarray, threshold: float = DEFAULT_THRESHOLD,
+    candidates: Optional[set[int]] = None,
+) -> list[tuple[int, int, float]]:
+    """(duplicate_id, keep_id, similarity) for every near-duplicate in the corpus.
+
+    ids/signatures are in keep-preference order: the first member of a cluster is kept and
+    later members at ≥ threshold to it are duplicates. candidates restricts which ids may be
+    reported as duplicates (ingest: only the chunks just inserted).
+    WHY: Each bucket is verified against its earliest member only — linear in bucket size
+    even for boilerplate buckets, and a kept chunk never hides behind a removed one.
+    """
+    bands, rows = lsh_params(threshold, signatures.shape[1] if len(signatures) else NUM_PERM)
+    keep_of: dict[int, tuple[int, float]] = {}
+    anchors: set[int] = set()
+    for band in range(bands):
+        buckets: dict[bytes, int] = {}
+        block = np.ascontiguousarray(signatures[:, band * rows:(band + 1) * rows])
+        for pos in range(len(ids)):
+            key = block[pos].tobytes()
+            first = buckets.setdefault(key, pos)
+            if first == pos:
+                continue
+            dup = int(ids[pos])
+            if (candidates is not None and dup not in candidates) or dup in keep_of or dup in anchors:
+                continue
+            keep = int(ids[first])
+            if keep in keep_of:
+                continue
+            sim = similarity(signatures[pos], signatures[first])
+            if sim >= threshold:
+                keep_of[dup] = (keep, sim)
+                anchors.add(keep)
+    return [(dup, keep, sim) for dup, (keep, sim) in keep_of.items()]
+
+
+# ── Database ──
+
+@dataclass
+class CorpusSize:
+    chunks: int = 0
+    text_bytes: int = 0
+    embedded: int = 0
+    embedding_bytes: int = 0
+
+
+@dataclass
+class DedupReport:
+    threshold: float
+    action: str
+    duplicates: list[tuple[int, int, float]] = field(default_factory=list)
+    before: CorpusSize = field(default_factory=CorpusSize)
+    after: CorpusSize = field(default_factory=CorpusSize)
+    seconds: float = 0.0
+
+    def lines(self) -> list[str]:
+        def pct(a, b):
+            return f"{(1 - b / a) * 100:.1f}%" if a else "0.0%"
+
+        b, a = self.before, self.after
+        return [
+            f"Near-duplicates at ≥{self.threshold:.2f}: {len(self.duplicates)} ({self.action}, {self.seconds:.1f}s)",
+            f"  chunks          {b.chunks:>9} → {a.chunks:>9}  (-{pct(b.chunks, a.chunks)})",
+            f"  text            {b.text_bytes / 1e6:>7.1f}MB → {a.text_bytes / 1e6:>7.1f}MB  "
+            f"(-{pct(b.text_bytes, a.text_bytes)})",
+            f"  vector index    {b.embedded:>9} → {a.embedded:>9} rows, "
+            f"{b.embedding_bytes / 1e6:.1f}MB → {a.embedding_bytes / 1e6:.1f}MB  "
+            f"(-{pct(b.embedding_bytes, a.embedding_bytes)})",
+        ]
+
+
+def corpus_size(db: Session) -> CorpusSize:
+    row = db.execute(text("""
+        SELECT count(*), coalesce(sum(octet_length(content)), 0),
+               count(embedding), coalesce(sum(pg_column_size(embedding)), 0)
+        FROM knowledge_chunks
+    """)).one()
+    return CorpusSize(*(int(x) for x in row))
+
+
+def _size_of(db: Session, ids: list[int]) -> tuple:
+    return db.execute(text("""
+        SELECT count(*), coalesce(sum(octet_length(content)), 0),
+               count(embedding), coalesce(sum(pg_column_size(embedding)), 0)
+        FROM knowledge_chunks WHERE id = ANY(:ids)
+    """), {"ids": ids}).one()
+
+
+def backfill_signatures(db: Session, log: Callable[[str], None] = print) -> int:
+    """Compute minhash for rows ingested before signatures existed. Returns rows updated."""
+    from services.knowledge_ingest import copy_rows
+
+    done = 0
+    while True:
+        rows = db.execute(text(
+            "SELECT id, content FROM knowledge_chunks WHERE minhash IS NULL ORDER BY id LIMIT :n"
+        ), {"n": _LOAD_BATCH}).fetchall()
+        if not rows:
+            return done
+        db.execute(text("CREATE TEMP TABLE minhash_stage (id INT, minhash BYTEA) ON COMMIT DROP"))
+        copy_rows(db, "minhash_stage", ("id", "minhash"),
+              [(r[0], "\\x" + signature_bytes(r[1]).hex()) for r in rows])
+        db.execute(text(
+            "UPDATE knowledge_chunks k SET minhash = s.minhash FROM minhash_stage s WHERE k.id = s.id"
+        ))
+        db.commit()
+        done += len(rows)
+        log(f"  signatures: {done}")
+
+
+def load_signatures(db: Session, exclude: Iterable[int] = ()) -> tuple[np.ndarray, np.ndarray]:
+    """(ids, signatures) in keep-preference order: embedded first, then oldest.
+
+    exclude ids are ordered last — used at ingest so existing rows always win over new ones.
+    Rows without a stored signature are hashed from their content on the fly.
+    """
+    exclude = set(exclude)
+    result = db.execute(
+        text("SELECT id, minhash, embedding IS NOT NULL, "
+             "CASE WHEN minhash IS NULL THEN content END FROM knowledge_chunks ORDER BY id"),
+        execution_options={"stream_results": True, "yield_per": _LOAD_BATCH},
+    )
+    rows = [(cid in exclude, not embedded, cid, bytes(sig) if sig is not None else signature_bytes(content))
+            for cid, sig, embedded, content in result]
+    rows.sort()
+    ids = np.fromiter((r[2] for r in rows), dtype=np.int64, count=len(rows))
+    sigs = np.frombuffer(b"".join(r[3] for r in rows), dtype=np.uint32).reshape(len(rows), -1) \
+        if rows else np.empty((0, NUM_PERM), dtype=np.uint32)
+    return ids, sigs
+
+
+_RECORD = """
+    INSERT INTO knowledge_duplicates (content_hash, chunk_id, duplicate_of, similarity, removed)
+    SELECT k.content_hash, k.id, :keep, :sim, :removed FROM knowledge_chunks k
+    WHERE k.id = :dup AND k.content_hash IS NOT NULL
+    ON CONFLICT (content_hash) DO UPDATE
+    SET chunk_id = EXCLUDED.chunk_id, duplicate_of = EXCLUDED.duplicate_of,
+        similarity = EXCLUDED.similarity, removed = EXCLUDED.removed, found_at = NOW()
+"""
+
+
+def dedupe(
+    db: Session, threshold: float = DEFAULT_THRESHOLD, action: str = "report",
+    only_ids: Optional[Iterable[int]] = None, log: Callable[[str], None] = print,
+) -> DedupReport:
+    """Find near-duplicate chunks and report, mark or remove them.
+
+    action: "report" (read-only), "mark" (record in knowledge_duplicates for review) or
+    "remove" (record, then delete — the recorded content_hash keeps re-ingestion from
+    adding them back). only_ids limits duplicates to those ids (ingest-time pass).
+    """
+    if action not in ("report", "mark", "remove"):
+        raise ValueError(f"Unknown dedupe action: {action}")
+    started = time.time()
+    report = DedupReport(threshold, action, before=corpus_size(db))
+    if action != "report":
+        backfill_signatures(db, log)
+    only = set(only_ids) if only_ids is not None else None
+    ids, sigs = load_signatures(db, exclude=only or ())
+    report.duplicates = find_duplicates(ids, sigs, threshold, candidates=only)
+
+    dup_ids = [d for d, _, _ in report.duplicates]
+    removed = _size_of(db, dup_ids) if dup_ids else (0, 0, 0, 0)
+    b = report.before
+    report.after = CorpusSize(b.chunks - removed[0], b.text_bytes - removed[1],
+                              b.embedded - removed[2], b.embedding_bytes - removed[3])
+
+    if action != "report" and dup_ids:
+        db.execute(text(_RECORD), [
+            {"dup": d, "keep": k, "sim": s, "removed": action == "remove"} for d, k, s in report.duplicates
+        ])
+        if action == "remove":
+            db.execute(text("DELETE FROM knowledge_chunks WHERE id = ANY(:ids)"), {"ids": dup_ids})
+        db.commit()
+    report.seconds = time.time() - started
+    return report
@@ -0,0 +1,445 @@
+# backend/services/knowledge_ingest.py
+# Purpose: Shared ingestion engine for knowledge_chunks — parallel chunking, content-hash dedupe,
+#          COPY bulk-load, incremental re-ingest of changed files (scripts/ingest_*.py are its configs)
+# NOT for: Runtime search (knowledge_service.py) or embedding the API's queries (embedding_service.py)
+
+from __future__ import annotations
+
+import argparse
+import csv
+import hashlib
+import io
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Iterator, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from services import knowledge_dedup
+
+CHUNK_SIZE = 1500
+CHUNK_OVERLAP = 200
+# WHY: Documents per transaction — one COPY + three set-based statements each, so a crash
+# loses at most one batch and the knowledge_version trigger fires a handful of times per batch
+APPLY_BATCH_DOCS = 200
+# WHY: Below this many changed documents the process pool's start-up costs more than it saves
+MIN_PARALLEL_DOCS = 16
+# WHY: Bump when chunking semantics change — every fingerprint changes, so the next run
+# re-chunks everything instead of trusting state written by the old code
+ENGINE_VERSION = 1
+
+SANITIZE_RE = re.compile(r"[^a-zA-Z0-9_-]")
+
+
+# ── Chunking (pure functions, run in worker processes) ──
+
+def chunk_text(
+    content: str, chunk_size: int = CHUNK_SIZE, overlap: int = CHUNK_OVERLAP, strict: bool = False,
+) -> list[str]:
+    """Split text into overlapping chunks, breaking at the last sentence boundary before chunk_size.
+
+    strict=True only breaks after . ! ? followed by a space/newline (the Inner Circle and
+    ecom creative transcript rule); otherwise any . ! ? or newline is a boundary.
+    """
+    if len(content) <= chunk_size:
+        return [content.strip()] if content.strip() else []
+
+    chunks = []
+    start = 0
+    while start < len(content):
+        end = start + chunk_size
+        if end >= len(content):
+            chunk = content[start:].strip()
+            if chunk:
+                chunks.append(chunk)
+            break
+
+        # WHY: Break at sentence boundary to preserve meaning
+        boundary = end
+        for i in range(end, max(start + chunk_size // 2, start), -1):
+            if strict:
+                if content[i] in ".!?" and i + 1 < len(content) and content[i + 1] in " \n":
+                    boundary = i + 1
+                    break
+            elif content[i] in ".!?\n" and i + 1 < len(content):
+                boundary = i + 1
+                break
+
+        chunk = content[start:boundary].strip()
+        if chunk:
+            chunks.append(chunk)
+        # WHY: Overlap ensures context isn't lost at chunk boundaries
+        start = boundary - overlap if boundary - overlap > start else boundary
+
+    return chunks
+
+
+def chunk_sections(
+    content: str, pattern: str, chunk_size: int = CHUNK_SIZE, overlap: int = CHUNK_OVERLAP,
+    min_section: int = 50,
+) -> list[str]:
+    """Split on section headers (pattern), drop sections under min_section chars, sub-chunk long ones."""
+    chunks = []
+    for section in re.split(pattern, content):
+        section = section.strip()
+        if not section or len(section) < min_section:
+            continue
+        if len(section) <= chunk_size:
+            chunks.append(section)
+        else:
+            chunks.extend(chunk_text(section, chunk_size, overlap))
+    return chunks
+
+
+def sanitize_filename(name: str, max_len: int = 80) -> str:
+    """Create a safe filename for the (filename, chunk_index) unique constraint."""
+    return SANITIZE_RE.sub("", name.replace(" ", "_"))[:max_len]
+
+
+def content_hash(content: str) -> str:
+    """sha256 hex of the stored chunk text — same value as migration 027's SQL backfill."""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+# ── Source configuration ──
+
+@dataclass(frozen=True)
+class Document:
+    """One unit of ingestion — becomes the chunks sharing knowledge_chunks.filename."""
+    filename: str                   # knowledge_chunks.filename (unique per document)
+    source_type: str
+    path: Optional[str] = None      # file to read; None when text is given
+    text: Optional[str] = None      # pre-split content (e.g. one section of a larger file)
+    header: str = ""                # prepended to every chunk, e.g. "[Allegro Marketplace - x]"
+    category: Optional[str] = None  # None → Source.categorize(chunk) per chunk
+
+
+@dataclass(frozen=True)
+class Source:
+    """What an ingest_*.py script declares. Callables must be module-level (they are pickled
+    into worker processes); functools.partial of a module-level function is fine."""
+    label: str
+    documents: Callable[[], Iterable[Document]]
+    tag: Optional[str] = None       # knowledge_chunks.source
+    chunker: Callable[[str], list[str]] = chunk_text
+    categorize: Optional[Callable[[str], str]] = None
+    min_chars: int = 100            # skip documents shorter than this (after strip)
+    strip: bool = True              # strip the document before chunking
+
+
+@dataclass
+class PreparedDoc:
+    filename: str
+    source_type: str
+    fingerprint: str
+    # (chunk_index, content, category, content_hash, minhash signature)
+    rows: list[tuple[int, str, str, str, bytes]] = field(default_factory=list)
+
+
+@dataclass
+class IngestStats:
+    documents: int = 0
+    unchanged: int = 0
+    too_small: int = 0
+    changed: int = 0
+    chunks: int = 0
+    duplicates: int = 0
+    inserted: int = 0
+    deleted: int = 0
+    near_duplicates: int = 0
+    new_ids: list[int] = field(default_factory=list)
+    by_category: dict[str, int] = field(default_factory=dict)
+
+
+def read_document(doc: Document, strip: bool) -> str:
+    if doc.text is not None:
+        content = doc.text
+    else:
+        with open(doc.path, "r", encoding="utf-8", errors="replace") as f:
+            content = f.read()
+    # WHY: Postgres text cannot hold NUL — broken transcriptions occasionally contain it
+    content = content.replace("\x00", "")
+    return content.strip() if strip else content
+
+
+def fingerprint(doc: Document, content: str) -> str:
+    """Changes whenever the document would produce different rows (content or per-doc metadata)."""
+    h = hashlib.sha256(f"{ENGINE_VERSION}\0{doc.source_type}\0{doc.header}\0{doc.category}\0".encode("utf-8"))
+    h.update(content.encode("utf-8"))
+    return h.hexdigest()
+
+
+def prepare_document(
+    chunker: Callable[[str], list[str]], categorize: Optional[Callable[[str], str]],
+    doc: Document, content: str, fp: str,
+) -> PreparedDoc:
+    """Chunk one document into knowledge_chunks rows. Runs in a worker process."""
+    prepared = PreparedDoc(doc.filename, doc.source_type, fp)
+    for idx, chunk in enumerate(chunker(content)):
+        category = doc.category if doc.category is not None else categorize(chunk)
+        stored = f"{doc.header}\n{chunk}" if doc.header else chunk
+        prepared.rows.append((idx, stored, category, content_hash(stored), knowledge_dedup.signature_bytes(stored)))
+    return prepared
+
+
+def _prepare_job(job: tuple) -> PreparedDoc:
+    return prepare_document(*job)
+
+
+def prepare_all(jobs: list[tuple], workers: int) -> Iterator[PreparedDoc]:
+    """prepare_document over jobs, in input order, on a process pool when it pays off."""
+    if workers <= 1 or len(jobs) < MIN_PARALLEL_DOCS:
+        yield from map(_prepare_job, jobs)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # WHY: chunksize amortizes pickling round-trips; map() keeps input order so
+        # "first occurrence wins" dedupe is deterministic
+        yield from pool.map(_prepare_job, jobs, chunksize=max(1, len(jobs) // (workers * 4)))
+
+
+# ── Database ──
+
+STAGE_COLUMNS = ("ord", "filename", "chunk_index", "content", "category", "source_type", "source", "content_hash",
+                 "minhash")
+
+_CREATE_STAGE = """
+    CREATE TEMP TABLE ingest_stage (
+        ord INT, filename TEXT, chunk_index INT, content TEXT, category TEXT,
+        source_type TEXT, source TEXT, content_hash TEXT, minhash BYTEA
+    ) ON COMMIT DROP;
+    CREATE TEMP TABLE ingest_docs (filename TEXT PRIMARY KEY, fingerprint TEXT, chunk_count INT) ON COMMIT DROP
+"""
+
+# WHY: Rows of re-ingested documents that no longer exist at the same index with the same
+# content. Unchanged chunks stay put — and keep their embeddings.
+_DELETE_STALE = """
+    DELETE FROM knowledge_chunks k
+    USING ingest_docs d
+    WHERE k.filename = d.filename
+      AND NOT EXISTS (
+          SELECT 1 FROM ingest_stage s
+          WHERE s.filename = k.filename AND s.chunk_index = k.chunk_index
+            AND s.content_hash = k.content_hash
+      )
+"""
+
+# WHY: Same text, new category/source rules — relabel in place instead of re-embedding;
+# rows stored before migration 028 pick up their MinHash signature on the way
+_RELABEL = """
+    UPDATE knowledge_chunks k
+    SET category = s.category, source_type = s.source_type, source = s.source,
+        minhash = coalesce(k.minhash, s.minhash)
+    FROM ingest_stage s
+    WHERE k.filename = s.filename AND k.chunk_index = s.chunk_index AND k.content_hash = s.content_hash
+      AND ((k.category, k.source_type, k.source) IS DISTINCT FROM (s.category, s.source_type, s.source)
+           OR k.minhash IS NULL)
+"""
+
+# WHY: search_vector is GENERATED ALWAYS AS (to_tsvector(...)) STORED — Postgres builds the
+# tsvector inside this INSERT, no second pass. Content already stored anywhere (another file
+# or another source) is skipped: exact duplicates only waste retrieval slots. So is text a
+# near-duplicate pass removed (knowledge_duplicates, services/knowledge_dedup.py).
+_INSERT = """
+    INSERT INTO knowledge_chunks
+        (content, filename, category, source_type, chunk_index, source, content_hash, minhash)
+    SELECT s.content, s.filename, s.category, s.source_type, s.chunk_index, s.source, s.content_hash, s.minhash
+    FROM ingest_stage s
+    WHERE NOT EXISTS (SELECT 1 FROM knowledge_chunks k WHERE k.content_hash = s.content_hash)
+      AND NOT EXISTS (SELECT 1 FROM knowledge_duplicates d WHERE d.content_hash = s.content_hash AND d.removed)
+    ORDER BY s.ord
+    ON CONFLICT (filename, chunk_index) DO NOTHING
+    RETURNING id
+"""
+
+_SAVE_STATE = """
+    INSERT INTO knowledge_ingest_files (filename, source, fingerprint, chunk_count, ingested_at)
+    SELECT d.filename, :source, d.fingerprint, d.chunk_count, NOW() FROM ingest_docs d
+    ON CONFLICT (filename) DO UPDATE
+    SET source = EXCLUDED.source, fingerprint = EXCLUDED.fingerprint,
+        chunk_count = EXCLUDED.chunk_count, ingested_at = EXCLUDED.ingested_at
+"""
+
+
+def load_state(db: Session) -> dict[str, str]:
+    """filename → fingerprint of the last successful ingest."""
+    return {r[0]: r[1] for r in db.execute(text("SELECT filename, fingerprint FROM knowledge_ingest_files"))}
+
+
+def csv_buffer(rows: Iterable[tuple]) -> io.StringIO:
+    """COPY ... FORMAT csv payload. None (and "") → unquoted empty field, which COPY reads as NULL."""
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n")
+    writer.writerows(rows)
+    buf.seek(0)
+    return buf
+
+
+def copy_rows(db: Session, table: str, columns: tuple[str, ...], rows: list[tuple]) -> None:
+    # WHY: COPY runs on the session's own connection, so it shares the transaction with
+    # the statements below and commits/rolls back with them
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", csv_buffer(rows))
+    finally:
+        cursor.close()
+
+
+def apply_batch(db: Session, source: Source, docs: list[PreparedDoc]) -> tuple[list[int], int]:
+    """Write one batch of re-chunked documents in a single transaction. Returns (new ids, deleted)."""
+    db.execute(text(_CREATE_STAGE))
+    stage = []
+    for doc in docs:
+        for idx, content, category, digest, signature in doc.rows:
+            stage.append((len(stage), doc.filename, idx, content, category,
+                          doc.source_type, source.tag, digest, "\\x" + signature.hex()))
+    copy_rows(db, "ingest_stage", STAGE_COLUMNS, stage)
+    copy_rows(db, "ingest_docs", ("filename", "fingerprint", "chunk_count"),
+          [(d.filename, d.fingerprint, len(d.rows)) for d in docs])
+    deleted = db.execute(text(_DELETE_STALE)).rowcount
+    db.execute(text(_RELABEL))
+    inserted = [r[0] for r in db.execute(text(_INSERT))]
+    db.execute(text(_SAVE_STATE), {"source": source.tag})
+    db.commit()
+    return inserted, deleted
+
+
+def ingest(
+    db: Optional[Session], source: Source, workers: Optional[int] = None,
+    full: bool = False, dry_run: bool = False, near_dedup: Optional[float] = None,
+    log: Callable[[str], None] = print,
+) -> IngestStats:
+    """Chunk every new or changed document of source and bulk-load it into knowledge_chunks.
+
+    WHY: Unchanged documents (same fingerprint as the last run) are skipped before chunking;
+    full=True ignores the recorded state, e.g. after editing a category rule. db=None chunks
+    and counts only. near_dedup=<threshold> removes new chunks that near-duplicate stored ones.
+    """
+    workers = workers or os.cpu_count() or 1
+    stats = IngestStats()
+    state = {} if full or db is None else load_state(db)
+
+    jobs = []
+    for doc in source.documents():
+        stats.documents += 1
+        content = read_document(doc, source.strip)
+        if len(content.strip()) < max(1, source.min_chars):
+            stats.too_small += 1
+            continue
+        fp = fingerprint(doc, content)
+        if state.get(doc.filename) == fp:
+            stats.unchanged += 1
+            continue
+        jobs.append((source.chunker, source.categorize, doc, content, fp))
+    stats.changed = len(jobs)
+    log(f"{source.label}: {stats.documents} documents, {stats.changed} new/changed, "
+        f"{stats.unchanged} unchanged, {stats.too_small} too small")
+
+    seen: set[str] = set()
+    batch: list[PreparedDoc] = []
+    started = time.time()
+    for prepared in prepare_all(jobs, workers):
+        kept = []
+        for row in prepared.rows:
+            stats.chunks += 1
+            # WHY: First occurrence wins within the run. Copies already in the table are
+            # dropped by the INSERT itself (NOT EXISTS on content_hash).
+            if row[3] in seen:
+                stats.duplicates += 1
+                continue
+            seen.add(row[3])
+            kept.append(row)
+            stats.by_category[row[2]] = stats.by_category.get(row[2], 0) + 1
+        prepared.rows = kept
+        batch.append(prepared)
+        if len(batch) >= APPLY_BATCH_DOCS:
+            _flush(db, source, batch, stats, dry_run, log, started)
+            batch = []
+    if batch:
+        _flush(db, source, batch, stats, dry_run, log, started)
+    if near_dedup and stats.new_ids:
+        report = knowledge_dedup.dedupe(db, near_dedup, "remove", only_ids=stats.new_ids, log=log)
+        stats.near_duplicates = len(report.duplicates)
+        for line in report.lines():
+            log(line)
+    return stats
+
+
+def _flush(
+    db: Optional[Session], source: Source, batch: list[PreparedDoc], stats: IngestStats,
+    dry_run: bool, log: Callable[[str], None], started: float,
+) -> None:
+    if db is not None and not dry_run:
+        new_ids, deleted = apply_batch(db, source, batch)
+        stats.new_ids.extend(new_ids)
+        stats.inserted += len(new_ids)
+        stats.deleted += deleted
+    log(f"  {stats.chunks} chunks prepared, {stats.inserted} inserted, {stats.deleted} replaced "
+        f"({stats.chunks / max(time.time() - started, 1e-6):.0f} chunks/s)")
+
+
+# ── Embedding phase ──
+
+def embed_pending(db: Session, tag: str, log: Callable[[str], None] = print) -> int:
+    """Embed this source's chunks that have no embedding yet. Returns how many were embedded."""
+    from services.embedding_backfill import run_backfill
+
+    # WHY: No checkpoint file — a re-run of the ingest script picks up whatever is still NULL
+    return run_backfill(db, source=tag, exact_source=True, checkpoint_path=None, log=log).done
+
+
+# ── Command line (shared by scripts/ingest_*.py) ──
+
+def run(source: Source, argv: Optional[list[str]] = None) -> IngestStats:
+    parser = argparse.ArgumentParser(description=f"Ingest {source.label} into knowledge_chunks")
+    parser.add_argument("--dry-run", action="store_true", help="Chunk and count only, write nothing")
+    parser.add_argument("--no-embed", action="store_true", help="Skip the embedding phase")
+    parser.add_argument("--full", action="store_true", help="Re-chunk unchanged files too (after rule changes)")
+    parser.add_argument("--workers", type=int, default=None, help="Chunking processes (default: CPU count)")
+    parser.add_argument("--near-dedup", type=float, nargs="?", const=knowledge_dedup.DEFAULT_THRESHOLD,
+                        metavar="THRESHOLD", help="Remove new chunks that near-duplicate stored ones")
+    args = parser.parse_args(argv)
+
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from config import settings
+
+    engine = create_engine(settings.database_url, pool_pre_ping=True)
+    db = sessionmaker(bind=engine)()
+    started = time.time()
+    try:
+        try:
+            stats = ingest(db, source, workers=args.workers, full=args.full, dry_run=args.dry_run,
+                           near_dedup=args.near_dedup)
+        except FileNotFoundError as e:
+            print(f"ERROR: Not found: {e.filename or e}")
+            sys.exit(1)
+
+        print(f"\n{'=' * 60}")
+        print(f"SUMMARY {'(DRY RUN)' if args.dry_run else ''} — {time.time() - started:.1f}s")
+        print(f"{'=' * 60}")
+        print(f"Documents: {stats.documents} ({stats.changed} new/changed, {stats.unchanged} unchanged, "
+              f"{stats.too_small} too small)")
+        print(f"Chunks: {stats.chunks} ({stats.duplicates} duplicate within this run)")
+        if not args.dry_run:
+            print(f"Inserted: {stats.inserted}, replaced: {stats.deleted}, "
+                  f"near-duplicates removed: {stats.near_duplicates}")
+        print("\nBy category:")
+        for cat, count in sorted(stats.by_category.items(), key=lambda x: -x[1]):
+            print(f"  {cat}: {count}")
+
+        if args.dry_run:
+            print("\nDry run — nothing inserted. Remove --dry-run to execute.")
+        elif source.tag is None:
+            print("\nNo source tag — run scripts/embed_missing_chunks.py to embed.")
+        elif not args.no_embed:
+            print("\n--- Embedding phase ---")
+            embed_pending(db, source.tag)
+    finally:
+        db.close()
+    return stats
@@ -9,9 +9,16 @@ from sqlalchemy.orm import Session
 import structlog
 
 from config import settings
+from database import AnySession, run_db
+from services import knowledge_cache, vector_index
 from services.embedding_service import get_embedding
+from services.prompt_budget import PromptContext
 from services.query_understanding import analyze_query
-from services.search_strategies import lexical_search, vector_search, hybrid_merge
+from services.search_strategies import (
+    lexical_search, vector_search, hybrid_merge, fused_search,
+    multi_group_search, search_sources, select_group_rows,
+)
+from services.trace_service import record_cache_result
 
 logger = structlog.get_logger()
 
@@ -36,6 +43,11 @@ CATEGORY_MAP = {
 MAX_CONTEXT_CHARS = 3000
 # WHY: Only primary categories for the batch search — keeps results focused
 ALL_PRIMARY = list({c for cats in CATEGORY_MAP.values() for c in cats["primary"]})
+# WHY: Part of the batch cache key — editing CATEGORY_MAP must not serve old results
+_BATCH_CATEGORIES = tuple(
+    (prompt_type, tuple(cats["primary"]), tuple(cats["fallback"]))
+    for prompt_type, cats in CATEGORY_MAP.items()
+)
 
 
 async def _get_search_rows(
@@ -45,11 +57,21 @@ async def _get_search_rows(
     """Route to the right search strategy based on rag_mode config."""
     mode = settings.rag_mode
 
+    if mode == "memory" and query_embedding:
+        # WHY: In-process index when it is current; otherwise the same search in Postgres
+        rows = vector_index.search(db, query_embedding, categories, limit)
+        if rows is not None:
+            return rows
+        return vector_search(db, query_embedding, categories, limit, settings.rag_hnsw_ef_search)
+
     if mode == "semantic" and query_embedding:
-        return vector_search(db, query_embedding, categories, limit)
+        return vector_search(db, query_embedding, categories, limit, settings.rag_hnsw_ef_search)
 
     if mode == "hybrid" and query_embedding:
-        v_rows = vector_search(db, query_embedding, categories, limit)
+        if settings.rag_fusion != "python":
+            return fused_search(db, query, query_embedding, categories, limit, settings.rag_fusion,
+                                settings.rag_hnsw_ef_search)
+        v_rows = vector_search(db, query_embedding, categories, limit, settings.rag_hnsw_ef_search)
         k_rows = lexical_search(db, query, categories, limit)
         return hybrid_merge(v_rows, k_rows, limit)
 
@@ -66,6 +88,11 @@ async def _expand_query(query: str) -> str:
     return query
 
 
+def _degraded(query_embedding: list[float] | None) -> bool:
+    """True when a vector mode fell back to lexical because the embedding call failed."""
+    return settings.rag_mode != "lexical" and query_embedding is None
+
+
 async def _get_embedding_if_needed(query: str) -> list[float] | None:
     """Get query embedding only when rag_mode requires it.
 
@@ -76,8 +103,8 @@ async def _get_embedding_if_needed(query: str) -> list[float] | None:
     return await get_embedding(query)
 
 
-def _format_chunks(rows: list[tuple], max_chars: int = MAX_CONTEXT_CHARS) -> str:
-    """Format search results into context string with source attribution."""
+def _chunk_texts(rows: list[tuple], max_chars: int = MAX_CONTEXT_CHARS) -> list[str]:
+    """Search results → chunk strings with source attribution, capped at max_chars total."""
     parts = []
     total_len = 0
     for row in rows:
@@ -86,7 +113,12 @@ def _format_chunks(rows: list[tuple], max_chars: int = MAX_CONTEXT_CHARS) -> str
             break
         parts.append(chunk)
         total_len += len(chunk)
-    return "\n\n".join(parts)
+    return parts
+
+
+def _format_chunks(rows: list[tuple], max_chars: int = MAX_CONTEXT_CHARS) -> str:
+    """Format search results into context string with source attribution."""
+    return "\n\n".join(_chunk_texts(rows, max_chars))
 
 
 def _format_chunks_with_sources(
@@ -115,49 +147,105 @@ def _format_chunks_with_sources(
     return "\n\n".join(parts), unique_names
 
 
+def _memory_candidates(
+    index: vector_index.VectorIndex, query_embedding: list[float],
+    groups: dict[str, tuple[list[str], list[str]]], limit: int, min_primary: int,
+) -> dict[tuple[str, str], dict[str, list[tuple]]]:
+    """multi_group_search()-shaped vector candidates from the in-process index — no DB call."""
+    result = {}
+    for prompt_type, (primary, fallback) in groups.items():
+        rows = index.search(query_embedding, primary, limit)
+        result[(prompt_type, "primary")] = {"v": rows}
+        if len(rows) < min_primary:
+            result[(prompt_type, "fallback")] = {"v": index.search(query_embedding, fallback, limit)}
+    return result
+
+
 async def search_knowledge_batch(
-    db: Session, query: str, max_chunks_per_type: int = 5,
+    db: AnySession, query: str, max_chunks_per_type: int = 5, span: dict | None = None,
 ) -> dict[str, str]:
+    """Fetch expert context per prompt type as plain strings (see search_knowledge_parts)."""
+    parts = await search_knowledge_parts(db, query, max_chunks_per_type, span=span)
+    return {prompt_type: ctx.render() for prompt_type, ctx in parts.items()}
+
+
+async def search_knowledge_parts(
+    db: AnySession, query: str, max_chunks_per_type: int = 5, span: dict | None = None,
+) -> dict[str, PromptContext]:
     """Fetch expert context per prompt type with primary/fallback category strategy.
 
     WHY: Searching per prompt_type separately prevents copywriting (25K chunks)
     from drowning out high-signal marketplace categories (listing_optimization, ranking).
     Fallback to copywriting only when primary categories return < 2 results.
+    Primary and fallback chunks stay separate so the prompt budget can drop fallback first.
+    Results are cached per normalized query (knowledge_cache.py); span gets rag_cache_* counters.
+    db may be an AsyncSession (optimizer hot path) — the SQL then runs over asyncpg via run_db.
     """
+    key = knowledge_cache.cache_key("batch", query, _BATCH_CATEGORIES, max_chunks_per_type)
+    cached = await run_db(db, knowledge_cache.get, key)
+    if span is not None:
+        record_cache_result(span, hit=cached is not None, prefix="rag_")
+    if cached is not None:
+        # WHY: Fresh PromptContext per call — the optimizer sets audience/reference on them
+        return {pt: PromptContext(primary=list(p), fallback=list(f)) for pt, (p, f) in cached.items()}
+
     try:
         search_query = await _expand_query(query)
         query_embedding = await _get_embedding_if_needed(search_query)
         min_primary_results = 2
+        use_vector, use_lexical = search_sources(settings.rag_mode, query_embedding)
+
+        groups = {pt: (cats["primary"], cats["fallback"]) for pt, cats in CATEGORY_MAP.items()}
+        index = await run_db(db, vector_index.get_index) if settings.rag_mode == "memory" and use_vector else None
+        if index is not None:
+            candidates = _memory_candidates(index, query_embedding, groups, max_chunks_per_type,
+                                            min_primary_results)
+        else:
+            # WHY: One statement for every prompt type × primary/fallback × vector/lexical
+            # (was up to 12 round-trips). Selection below mirrors the per-type queries exactly.
+            candidates = await run_db(
+                db, multi_group_search, search_query, query_embedding if use_vector else None, groups,
+                max_chunks_per_type, MAX_CONTEXT_CHARS,
+                min_primary=min_primary_results, use_lexical=use_lexical, fusion=settings.rag_fusion,
+                ef_search=settings.rag_hnsw_ef_search,
+            )
 
         result = {}
         total_fetched = 0
         for prompt_type, cat_config in CATEGORY_MAP.items():
-            rows = await _get_search_rows(
-                db, search_query, cat_config["primary"],
-                max_chunks_per_type, query_embedding,
+            rows = select_group_rows(
+                candidates.get((prompt_type, "primary"), {}),
+                max_chunks_per_type, use_vector, use_lexical,
             )
+            primary_count = len(rows)
 
             # WHY: If primary categories return too few results, add fallback (copywriting etc.)
             if len(rows) < min_primary_results and cat_config["fallback"]:
-                fallback_rows = await _get_search_rows(
-                    db, search_query, cat_config["fallback"],
-                    max_chunks_per_type - len(rows), query_embedding,
+                rows = rows + select_group_rows(
+                    candidates.get((prompt_type, "fallback"), {}),
+                    max_chunks_per_type - len(rows), use_vector, use_lexical,
                 )
-                rows = rows + fallback_rows
 
             total_fetched += len(rows)
-            result[prompt_type] = _format_chunks(rows[:max_chunks_per_type])
+            chunks = _chunk_texts(rows[:max_chunks_per_type])
+            result[prompt_type] = PromptContext(
+                primary=chunks[:primary_count], fallback=chunks[primary_count:],
+            )
 
-        hit_count = sum(1 for v in result.values() if v)
+        hit_count = sum(1 for v in result.values() if v.primary or v.fallback)
         if hit_count:
             logger.info("knowledge_batch_hit", mode=settings.rag_mode,
                         chunks_fetched=total_fetched, types_with_context=hit_count,
                         query_preview=query[:60])
 
+        if not _degraded(query_embedding):
+            knowledge_cache.put(key, {
+                pt: (tuple(ctx.primary), tuple(ctx.fallback)) for pt, ctx in result.items()
+            })
         return result
     except Exception as e:
         logger.warning("knowledge_batch_error", error=str(e))
-        return {"title": "", "bullets": "", "description": ""}
+        return {prompt_type: PromptContext() for prompt_type in CATEGORY_MAP}
 
 
 async def search_knowledge(
@@ -167,11 +255,16 @@ async def search_knowledge(
 
     WHY: This must never crash the optimizer — expert context is a bonus, not required.
     """
-    try:
-        cat_config = CATEGORY_MAP.get(prompt_type)
-        primary = cat_config["primary"] if cat_config else ["listing_optimization"]
-        fallback = cat_config["fallback"] if cat_config else ["copywriting"]
+    cat_config = CATEGORY_MAP.get(prompt_type)
+    primary = cat_config["primary"] if cat_config else ["listing_optimization"]
+    fallback = cat_config["fallback"] if cat_config else ["copywriting"]
 
+    key = knowledge_cache.cache_key("single", query, (tuple(primary), tuple(fallback)), max_chunks)
+    cached = knowledge_cache.get(db, key)
+    if cached is not None:
+        return cached
+
+    try:
         search_query = await _expand_query(query)
         query_embedding = await _get_embedding_if_needed(search_query)
 
@@ -190,13 +283,16 @@ async def search_knowledge(
             query_embedding = await _get_embedding_if_needed(query)
             rows = await _get_search_rows(db, query, primary, max_chunks, query_embedding)
 
+        context = _format_chunks(rows)
+        if not _degraded(query_embedding):
+            knowledge_cache.put(key, context)
         if not rows:
             return ""
 
         logger.info("knowledge_search_hit", mode=settings.rag_mode,
                     prompt_type=prompt_type, chunks_found=len(rows),
                     query_preview=query[:60])
-        return _format_chunks(rows)
+        return context
     except Exception as e:
         logger.warning("knowledge_search_error", error=str(e))
         return ""
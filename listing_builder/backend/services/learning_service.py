@@ -2,7 +2,8 @@
 # Purpose: Self-learning — store successful listings, retrieve as few-shot examples
 # NOT for: Ranking Juice calculation or LLM calls
 
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Union
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 import structlog
@@ -28,42 +29,72 @@ def store_successful_listing(
         return None
 
     try:
-        # WHY: user_id for tenant isolation — each user's listings are scoped
-        result = db.execute(
-            text("""
-                INSERT INTO listing_history
-                    (brand, marketplace, product_title, title, bullets, description,
-                     backend_keywords, ranking_juice, grade, keyword_count, user_id)
-                VALUES
-                    (:brand, :marketplace, :product_title, :title, CAST(:bullets AS jsonb),
-                     :description, :backend_keywords, :ranking_juice, :grade, :keyword_count, :user_id)
-                RETURNING id
-            """),
-            {
-                "brand": listing_data.get("brand", ""),
-                "marketplace": listing_data.get("marketplace", ""),
-                "product_title": listing_data.get("product_title", ""),
-                "title": listing_data.get("title", ""),
-                "bullets": str(listing_data.get("bullets", "[]")),
-                "description": listing_data.get("description", ""),
-                "backend_keywords": listing_data.get("backend_keywords", ""),
-                "ranking_juice": score,
-                "grade": ranking_juice_data.get("grade", ""),
-                "keyword_count": listing_data.get("keyword_count", 0),
-                "user_id": user_id or None,
-            },
-        )
-        row = result.fetchone()
+        row = db.execute(_INSERT_LISTING, _listing_params(listing_data, ranking_juice_data, user_id)).fetchone()
         db.commit()
-        listing_id = str(row[0]) if row else None
-        logger.info("learning_stored", rj=score, grade=ranking_juice_data.get("grade"))
-        return listing_id
+        return _stored(row, ranking_juice_data)
     except Exception as e:
         logger.warning("learning_store_failed", error=str(e))
         db.rollback()
         return None
 
 
+async def astore_successful_listing(
+    db: Union[Session, AsyncSession],
+    listing_data: Dict,
+    ranking_juice_data: Dict,
+    user_id: str = "",
+) -> Optional[str]:
+    """Async store_successful_listing — awaits on an AsyncSession, runs inline on a sync Session."""
+    if not isinstance(db, AsyncSession):
+        return store_successful_listing(db, listing_data, ranking_juice_data, user_id)
+    if ranking_juice_data.get("score", 0) < MIN_RANKING_JUICE:
+        return None
+
+    try:
+        row = (await db.execute(
+            _INSERT_LISTING, _listing_params(listing_data, ranking_juice_data, user_id),
+        )).fetchone()
+        await db.commit()
+        return _stored(row, ranking_juice_data)
+    except Exception as e:
+        logger.warning("learning_store_failed", error=str(e))
+        await db.rollback()
+        return None
+
+
+# WHY: user_id for tenant isolation — each user's listings are scoped
+_INSERT_LISTING = text("""
+    INSERT INTO listing_history
+        (brand, marketplace, product_title, title, bullets, description,
+         backend_keywords, ranking_juice, grade, keyword_count, user_id)
+    VALUES
+        (:brand, :marketplace, :product_title, :title, CAST(:bullets AS jsonb),
+         :description, :backend_keywords, :ranking_juice, :grade, :keyword_count, :user_id)
+    RETURNING id
+""")
+
+
+def _listing_params(listing_data: Dict, ranking_juice_data: Dict, user_id: str) -> Dict:
+    return {
+        "brand": listing_data.get("brand", ""),
+        "marketplace": listing_data.get("marketplace", ""),
+        "product_title": listing_data.get("product_title", ""),
+        "title": listing_data.get("title", ""),
+        "bullets": str(listing_data.get("bullets", "[]")),
+        "description": listing_data.get("description", ""),
+        "backend_keywords": listing_data.get("backend_keywords", ""),
+        "ranking_juice": ranking_juice_data.get("score", 0),
+        "grade": ranking_juice_data.get("grade", ""),
+        "keyword_count": listing_data.get("keyword_count", 0),
+        "user_id": user_id or None,
+    }
+
+
+def _stored(row, ranking_juice_data: Dict) -> Optional[str]:
+    logger.info("learning_stored", rj=ranking_juice_data.get("score", 0), grade=ranking_juice_data.get("grade"))
+    return str(row[0]) if row else None
+
+
 def get_past_successes(
     db: Session, marketplace: str, limit: int = 3, user_id: str = ""
 ) -> List[Dict]:
@@ -73,41 +104,55 @@ def get_past_successes(
     WHY: user_id filter prevents cross-tenant data leak (User A's listings → User B's prompts).
     """
     try:
-        # WHY: Single query with dynamic user_id filter — DRY, prevents cross-tenant data leak
-        params: Dict = {"min_rj": MIN_RANKING_JUICE, "marketplace": marketplace, "limit": limit}
-        if user_id:
-            user_filter = "AND user_id = :user_id"
-            params["user_id"] = user_id
-        else:
-            user_filter = "AND user_id IS NULL"
+        sql, params = _past_successes_query(marketplace, limit, user_id)
+        return [_example(r) for r in db.execute(sql, params).fetchall()]
+    except Exception as e:
+        logger.warning("learning_fetch_failed", error=str(e))
+        return []
 
-        result = db.execute(
-            text(f"""
-                SELECT title, bullets, description, backend_keywords, ranking_juice, grade
-                FROM listing_history
-                WHERE ranking_juice >= :min_rj AND marketplace = :marketplace {user_filter}
-                ORDER BY ranking_juice DESC
-                LIMIT :limit
-            """),
-            params,
-        )
-        rows = result.fetchall()
-        return [
-            {
-                "title": r[0],
-                "bullets": r[1],  # Already JSONB → Python list
-                "description": r[2],
-                "backend_keywords": r[3],
-                "ranking_juice": r[4],
-                "grade": r[5],
-            }
-            for r in rows
-        ]
+
+async def aget_past_successes(
+    db: Union[Session, AsyncSession], marketplace: str, limit: int = 3, user_id: str = ""
+) -> List[Dict]:
+    """Async get_past_successes — awaits on an AsyncSession, runs inline on a sync Session."""
+    if not isinstance(db, AsyncSession):
+        return get_past_successes(db, marketplace, limit, user_id)
+    try:
+        sql, params = _past_successes_query(marketplace, limit, user_id)
+        return [_example(r) for r in (await db.execute(sql, params)).fetchall()]
     except Exception as e:
         logger.warning("learning_fetch_failed", error=str(e))
         return []
 
 
+def _past_successes_query(marketplace: str, limit: int, user_id: str) -> tuple:
+    # WHY: Single query with dynamic user_id filter — DRY, prevents cross-tenant data leak
+    params: Dict = {"min_rj": MIN_RANKING_JUICE, "marketplace": marketplace, "limit": limit}
+    if user_id:
+        user_filter = "AND user_id = :user_id"
+        params["user_id"] = user_id
+    else:
+        user_filter = "AND user_id IS NULL"
+    return text(f"""
+        SELECT title, bullets, description, backend_keywords, ranking_juice, grade
+        FROM listing_history
+        WHERE ranking_juice >= :min_rj AND marketplace = :marketplace {user_filter}
+        ORDER BY ranking_juice DESC
+        LIMIT :limit
+    """), params
+
+
+def _example(r) -> Dict:
+    return {
+        "title": r[0],
+        "bullets": r[1],  # Already JSONB → Python list
+        "description": r[2],
+        "backend_keywords": r[3],
+        "ranking_juice": r[4],
+        "grade": r[5],
+    }
+
+
 def submit_feedback(db: Session, listing_id: str, rating: int, user_id: str) -> bool:
     """UPDATE user_rating on a listing_history row. Verifies ownership via user_id column."""
     try:
@@ -5,7 +5,10 @@
 from __future__ import annotations
 
 import re
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
+
+from services.phrase_matcher import PhraseMatcher, get_matcher
+from services.tokenized_listing import TokenizedListing
 
 # WHY: Amazon prohibits these in titles/bullets — LLM sometimes ignores the instruction
 PROMO_WORDS = [
@@ -16,13 +19,23 @@ PROMO_WORDS = [
 
 FORBIDDEN_CHARS = ["!", "¡", "$", "€", "™", "®", "©"]
 
+# WHY: Compiled once — strip_promo_words and check_compliance scan every listing for all of them
+_PROMO_MATCHER = PhraseMatcher(PROMO_WORDS)
+# WHY: Text of an existing <b>…</b> with no nested tags — what "already bolded" means
+_BOLD_RUN_RE = re.compile(r"<b>[^<]*</b>", re.IGNORECASE)
+
 
 def strip_promo_words(text: str) -> str:
     """Remove promotional words from LLM output, clean up leftover whitespace."""
+    # WHY: word-boundary match to avoid stripping partial words (e.g. "deal" from "ideal").
+    # Overlaps resolve in PROMO_WORDS order ("best seller" before "sale"), like the old per-word re.sub.
+    removed: List[Tuple[int, int]] = []
+    for idx, start, end in sorted((idx, s, e) for s, e, idx in _PROMO_MATCHER.finditer(text)):
+        if not any(start < r_end and r_start < end for r_start, r_end in removed):
+            removed.append((start, end))
     result = text
-    for pw in PROMO_WORDS:
-        # WHY: word-boundary match to avoid stripping partial words (e.g. "deal" from "ideal")
-        result = re.sub(rf"\b{re.escape(pw)}\b", "", result, flags=re.IGNORECASE)
+    for start, end in sorted(removed, reverse=True):
+        result = result[:start] + result[end:]
     result = re.sub(r"\s{2,}", " ", result)
     result = re.sub(r"\s,", ",", result)
     return result.strip()
@@ -33,25 +46,51 @@ def bold_keywords_in_html(html: str, keywords: List[str]) -> str:
 
     WHY: Allegro buyers scan descriptions — bolded keywords let them spot
     key product features at a glance (Bartek's "game changer" insight).
+    Whole words only — "cap" is not bolded inside "capsule". All phrases are found in
+    one matcher pass over the original HTML; tags are inserted at the end.
     """
-    result = html
-    for phrase in keywords[:15]:
-        if not phrase or len(phrase) < 2:
-            continue
+    phrases = [p for p in keywords[:15] if p and len(p) >= 2]
+    if not phrases:
+        return html
+    occurrences: Dict[int, List[Tuple[int, int]]] = {}
+    for start, end, idx in get_matcher(phrases).finditer(html):
+        occurrences.setdefault(idx, []).append((start, end))
+    bold_runs = [(m.start() + 3, m.end() - 4) for m in _BOLD_RUN_RE.finditer(html)]
+
+    bolded: List[Tuple[int, int]] = []
+    for idx in range(len(phrases)):
+        # WHY: A <b> tag inserted inside an occurrence for an earlier phrase breaks it up
+        spans = sorted(
+            (s, e) for s, e in occurrences.get(idx, [])
+            if not any(s < edge < e for span in bolded for edge in span)
+        )
         # WHY: Skip if this phrase is already inside a <b> tag
-        if re.search(rf"<b>[^<]*{re.escape(phrase)}[^<]*</b>", result, re.IGNORECASE):
+        if any(bs <= s and e <= be for s, e in spans for bs, be in bold_runs + bolded):
             continue
-        # WHY: Match phrase only in text content (not inside HTML tags)
-        pattern = rf"(?<![<\w/])({re.escape(phrase)})(?![^<]*>)"
-        match = re.search(pattern, result, re.IGNORECASE)
-        if match:
-            original = match.group(0)
-            result = result[:match.start()] + f"<b>{original}</b>" + result[match.end():]
+        for s, e in spans:
+            # WHY: Match phrase only in text content (not inside HTML tags)
+            if html[s - 1:s] not in ("<", "/") and not _inside_tag(html, e):
+                bolded.append((s, e))
+                break
+
+    result = html
+    for s, e in sorted(bolded, reverse=True):
+        result = result[:s] + f"<b>{result[s:e]}</b>" + result[e:]
     return result
 
 
+def _inside_tag(html: str, pos: int) -> bool:
+    """True when a '>' comes before any '<' after pos — i.e. pos is inside a tag."""
+    close = html.find(">", pos)
+    if close == -1:
+        return False
+    open_ = html.find("<", pos)
+    return open_ == -1 or close < open_
+
+
 def check_compliance(
     title: str, bullets: List[str], description: str, brand: str, limits: dict,
+    tokens: TokenizedListing | None = None,
 ) -> Dict[str, Any]:
     """Validate listing against marketplace rules — returns status, errors, warnings."""
     errors = []
@@ -69,9 +108,11 @@ def check_compliance(
         warnings.append("Brand not found in first 50 chars of title")
 
     # WHY: Use word-boundary regex to avoid false positives (e.g. "deal" inside "ideal")
-    full_text = (title + " " + " ".join(bullets)).lower()
-    for pw in PROMO_WORDS:
-        if re.search(rf"\b{re.escape(pw)}\b", full_text):
+    if tokens is None:
+        tokens = TokenizedListing.build(title, bullets, description)
+    found = _PROMO_MATCHER.found(tokens.span(tokens.title, tokens.bullets))
+    for idx, pw in enumerate(PROMO_WORDS):
+        if idx in found:
             errors.append(f"Promotional word found: '{pw}'")
 
     for ch in FORBIDDEN_CHARS:
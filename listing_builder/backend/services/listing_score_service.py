@@ -7,9 +7,8 @@ from __future__ import annotations
 import asyncio
 import json
 from typing import Dict
-from groq import Groq
 from sqlalchemy.orm import Session
-from config import settings
+from services.groq_client import groq_chat
 from services.knowledge_service import search_all_categories
 from services.amazon_tos_checker import check_amazon_tos
 import structlog
@@ -139,26 +138,9 @@ def _build_prompt(
 
 
 def _call_groq_with_rotation(prompt: str) -> str:
-    """Call Groq with key rotation on 429 rate limits."""
-    keys = settings.groq_api_keys
-    last_error = None
-    for i, key in enumerate(keys):
-        try:
-            client = Groq(api_key=key)
-            response = client.chat.completions.create(
-                model=MODEL,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.3,
-                max_tokens=1500,
-            )
-            return response.choices[0].message.content.strip()
-        except Exception as e:
-            last_error = e
-            if "429" in str(e) or "rate_limit" in str(e):
-                logger.warning("score_groq_rate_limit", key_index=i)
-                continue
-            raise
-    raise last_error
+    """Call Groq on the scheduler-picked key, failing over on 429 (groq_key_scheduler.py)."""
+    response = groq_chat([{"role": "user", "content": prompt}], temperature=0.3, max_tokens=1500, model=MODEL)
+    return response.choices[0].message.content.strip()
 
 
 def _parse_score_response(raw: str) -> Dict:
@@ -0,0 +1,168 @@
+# backend/services/llm_cache.py
+# Purpose: Content-addressed cache for optimizer LLM responses (in-process LRU + Postgres)
+# NOT for: Provider dispatch (llm_providers.py) or key rotation (groq_client.py)
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+from typing import Awaitable, Callable, Optional, Set, Tuple
+
+from sqlalchemy import text
+import structlog
+
+from config import settings
+from database import SessionLocal
+from services.trace_service import record_cache_result
+from utils.ttl_cache import TTLCache
+
+logger = structlog.get_logger()
+
+# WHY: ~4 entries per optimization → 512 entries ≈ last 128 listings, a few MB of text
+LRU_MAX_ENTRIES = 512
+# WHY: Cap on the Postgres tier — pruned oldest-first every PRUNE_EVERY_WRITES inserts
+DB_MAX_ROWS = 50_000
+PRUNE_EVERY_WRITES = 200
+
+_lru = TTLCache(maxsize=LRU_MAX_ENTRIES, ttl=settings.llm_cache_ttl_seconds)
+_writes_since_prune = 0
+# WHY: Keep references to fire-and-forget DB writes so they aren't garbage-collected mid-flight
+_pending_writes: Set[asyncio.Task] = set()
+
+LLMResult = Tuple[str, Optional[dict]]
+
+
+def cache_key(provider: str, model: str, temperature: float, max_tokens: int, prompt: str) -> str:
+    """SHA-256 over every parameter that changes the response — byte-identical prompts share a key."""
+    prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    raw = f"{provider}|{model}|{temperature:.3f}|{max_tokens}|{prompt_hash}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _db_get(key: str) -> Optional[LLMResult]:
+    db = SessionLocal()
+    try:
+        row = db.execute(
+            text("""
+                UPDATE llm_response_cache SET hit_count = hit_count + 1
+                WHERE cache_key = :key AND expires_at > NOW()
+                RETURNING response, usage
+            """),
+            {"key": key},
+        ).fetchone()
+        db.commit()
+        if not row:
+            return None
+        usage = row[1] if isinstance(row[1], dict) or row[1] is None else json.loads(row[1])
+        return row[0], usage
+    finally:
+        db.close()
+
+
+def _db_put(key: str, provider: str, model: str, result: LLMResult, prune: bool) -> None:
+    db = SessionLocal()
+    try:
+        db.execute(
+            text("""
+                INSERT INTO llm_response_cache (cache_key, provider, model, response, usage, expires_at)
+                VALUES (:key, :provider, :model, :response, CAST(:usage AS jsonb),
+                        NOW() + make_interval(secs => :ttl))
+                ON CONFLICT (cache_key) DO UPDATE
+                SET response = EXCLUDED.response, usage = EXCLUDED.usage,
+                    expires_at = EXCLUDED.expires_at, created_at = NOW()
+            """),
+            {
+                "key": key, "provider": provider, "model": model, "response": result[0],
+                "usage": json.dumps(result[1]) if result[1] else None,
+                "ttl": settings.llm_cache_ttl_seconds,
+            },
+        )
+        if prune:
+            # WHY: Size-based eviction — drop expired rows, then oldest beyond DB_MAX_ROWS
+            db.execute(text("DELETE FROM llm_response_cache WHERE expires_at <= NOW()"))
+            db.execute(
+                text("""
+                    DELETE FROM llm_response_cache WHERE cache_key IN (
+                        SELECT cache_key FROM llm_response_cache
+                        ORDER BY created_at DESC OFFSET :max_rows
+                    )
+                """),
+                {"max_rows": DB_MAX_ROWS},
+            )
+        db.commit()
+    finally:
+        db.close()
+
+
+async def _db_get_safe(key: str) -> Optional[LLMResult]:
+    if not settings.llm_cache_db:
+        return None
+    try:
+        return await asyncio.to_thread(_db_get, key)
+    except Exception as e:
+        # WHY: Cache is an optimization — a missing table or DB blip must never fail a listing
+        logger.warning("llm_cache_db_read_failed", error=str(e)[:200])
+        return None
+
+
+async def _db_put_safe(key: str, provider: str, model: str, result: LLMResult) -> None:
+    global _writes_since_prune
+    _writes_since_prune += 1
+    prune = _writes_since_prune >= PRUNE_EVERY_WRITES
+    if prune:
+        _writes_since_prune = 0
+    try:
+        await asyncio.to_thread(_db_put, key, provider, model, result, prune)
+    except Exception as e:
+        logger.warning("llm_cache_db_write_failed", error=str(e)[:200])
+
+
+async def cached_llm_call(
+    call: Callable[[], Awaitable[LLMResult]],
+    provider: str, model: str, prompt: str, temperature: float, max_tokens: int,
+    span: Optional[dict] = None,
+    use_cache: bool = True,
+    cacheable: Optional[Callable[[str], bool]] = None,
+) -> LLMResult:
+    """Return a cached (text, usage) for identical inputs, else await call() and store it.
+
+    WHY: Re-runs, improve-from-history and resubmitted batches produce byte-identical prompts.
+    Hits return usage=None — no tokens were spent, so the trace cost stays accurate.
+    cacheable: extra check before storing (e.g. "parses as JSON") so bad output isn't pinned.
+    """
+    if not use_cache or not settings.llm_cache_enabled:
+        return await call()
+
+    key = cache_key(provider, model, temperature, max_tokens, prompt)
+
+    hit = _lru.get(key)
+    if hit is None:
+        hit = await _db_get_safe(key)
+        if hit is not None:
+            _lru.set(key, hit)
+    if hit is not None:
+        if span is not None:
+            record_cache_result(span, hit=True)
+        return hit[0], None
+
+    if span is not None:
+        record_cache_result(span, hit=False)
+    result = await call()
+    # WHY: Empty text = failed/filtered generation — never pin that for a day
+    if result[0] and (cacheable is None or cacheable(result[0])):
+        _lru.set(key, result)
+        if settings.llm_cache_db:
+            task = asyncio.create_task(_db_put_safe(key, provider, model, result))
+            _pending_writes.add(task)
+            task.add_done_callback(_pending_writes.discard)
+    return result
+
+
+def cache_stats() -> dict:
+    """In-process tier counters — for admin/monitoring endpoints."""
+    return _lru.stats()
+
+
+def clear_cache() -> None:
+    _lru.clear()
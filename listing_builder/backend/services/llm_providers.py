@@ -4,18 +4,22 @@
 
 from __future__ import annotations
 
-from typing import Tuple, Optional, Dict
+import asyncio
+from typing import AsyncIterator, Tuple, Optional, Dict
+import httpx
 import structlog
 
 logger = structlog.get_logger()
 
 # WHY: Central registry — add new providers here, everything else reads from this
+# WHY prompt_budget: Max estimated input tokens per optimizer prompt (prompt_budget.py trims
+# RAG/audience context to fit). Groq is tight — 4 prompts per listing share one key's TPM bucket.
 PROVIDERS: Dict[str, dict] = {
-    "groq": {"default_model": "llama-3.3-70b-versatile", "label": "Groq (w cenie)"},
-    "beast": {"default_model": "qwen3:235b", "label": "Beast AI (unlimited)"},
-    "gemini_flash": {"default_model": "gemini-2.0-flash", "label": "Gemini Flash"},
-    "gemini_pro": {"default_model": "gemini-2.5-pro-preview-06-05", "label": "Gemini Pro"},
-    "openai": {"default_model": "gpt-4o-mini", "label": "OpenAI"},
+    "groq": {"default_model": "llama-3.3-70b-versatile", "label": "Groq (w cenie)", "prompt_budget": 3000},
+    "beast": {"default_model": "qwen3:235b", "label": "Beast AI (unlimited)", "prompt_budget": 6000},
+    "gemini_flash": {"default_model": "gemini-2.0-flash", "label": "Gemini Flash", "prompt_budget": 8000},
+    "gemini_pro": {"default_model": "gemini-2.5-pro-preview-06-05", "label": "Gemini Pro", "prompt_budget": 8000},
+    "openai": {"default_model": "gpt-4o-mini", "label": "OpenAI", "prompt_budget": 6000},
 }
 
 # WHY: Cost per 1M tokens — used by trace_service for accurate cost tracking per model
@@ -33,6 +37,65 @@ def get_cost_per_1m(model: str) -> dict:
     return COST_TABLE.get(model, COST_TABLE["llama-3.3-70b-versatile"])
 
 
+# WHY: One keep-alive connection pool per provider, shared by every async client for it.
+# Under load the async path holds sockets, not executor threads — see scripts/bench_llm_async.py
+LLM_HTTP_LIMITS = httpx.Limits(max_connections=64, max_keepalive_connections=32, keepalive_expiry=30.0)
+LLM_HTTP_TIMEOUT = httpx.Timeout(120.0, connect=10.0)
+GEMINI_API_BASE = "https://generativelanguage.googleapis.com/v1beta"
+
+# provider -> (event loop, pool). WHY loop: an AsyncClient can't be reused across event loops
+_http_pools: Dict[str, tuple] = {}
+# (provider, api_key) -> (pool, AsyncOpenAI). WHY: SDK client objects are cheap but not free
+_async_openai_clients: Dict[tuple, tuple] = {}
+
+
+def get_http_pool(provider: str) -> httpx.AsyncClient:
+    """Return the shared httpx.AsyncClient for a provider, creating it on the running loop."""
+    loop = asyncio.get_running_loop()
+    entry = _http_pools.get(provider)
+    if entry is None or entry[0] is not loop or entry[1].is_closed:
+        _http_pools[provider] = (loop, httpx.AsyncClient(limits=LLM_HTTP_LIMITS, timeout=LLM_HTTP_TIMEOUT))
+    return _http_pools[provider][1]
+
+
+async def close_http_pools() -> None:
+    """Close every provider pool — called from app shutdown."""
+    for _loop, client in list(_http_pools.values()):
+        await client.aclose()
+    _http_pools.clear()
+    _async_openai_clients.clear()
+
+
+def _get_async_openai(provider: str, api_key: str, base_url: str | None = None):
+    """Cached AsyncOpenAI bound to the provider's shared pool (OpenAI and Beast/Ollama)."""
+    from openai import AsyncOpenAI
+
+    pool = get_http_pool(provider)
+    entry = _async_openai_clients.get((provider, api_key))
+    if entry is None or entry[0] is not pool:
+        client = AsyncOpenAI(api_key=api_key, base_url=base_url, http_client=pool)
+        _async_openai_clients[(provider, api_key)] = (pool, client)
+    return _async_openai_clients[(provider, api_key)][1]
+
+
+# WHY: Streaming yields (delta_text, None) per chunk and ("", usage) once at the end
+StreamPart = Tuple[str, Optional[dict]]
+# WHY: Gemini goes over plain REST without streaming — callers fall back to acall_llm
+STREAMING_PROVIDERS = ("groq", "openai", "beast")
+
+
+def chat_usage(response, model: str) -> Optional[dict]:
+    """Token usage from an OpenAI-compatible chat response (OpenAI, Groq, Ollama)."""
+    if hasattr(response, "usage") and response.usage:
+        return {
+            "prompt_tokens": response.usage.prompt_tokens,
+            "completion_tokens": response.usage.completion_tokens,
+            "total_tokens": response.usage.total_tokens,
+            "model": model,
+        }
+    return None
+
+
 def mask_api_key(key: str) -> str:
     """Mask API key for safe display: 'AIza****abcd'."""
     if not key or len(key) < 8:
@@ -88,16 +151,7 @@ def _call_openai(
         max_tokens=max_tokens,
     )
 
-    text = response.choices[0].message.content.strip()
-    usage = None
-    if hasattr(response, "usage") and response.usage:
-        usage = {
-            "prompt_tokens": response.usage.prompt_tokens,
-            "completion_tokens": response.usage.completion_tokens,
-            "total_tokens": response.usage.total_tokens,
-            "model": model,
-        }
-    return text, usage
+    return response.choices[0].message.content.strip(), chat_usage(response, model)
 
 
 def _call_beast(
@@ -125,18 +179,172 @@ def _call_beast(
         max_tokens=max_tokens,
     )
 
-    text = response.choices[0].message.content.strip()
+    return response.choices[0].message.content.strip(), chat_usage(response, model or settings.beast_model)
+
+
+async def _acall_gemini(
+    api_key: str, model: str, prompt: str, temperature: float, max_tokens: int,
+    json_schema: Optional[dict] = None,
+) -> Tuple[str, Optional[dict]]:
+    """Async Gemini call over the REST API on the shared pool.
+
+    WHY REST, not google-generativeai: the SDK's configure() is process-global, so two
+    concurrent users with different keys would race. The key travels per request here.
+    """
+    pool = get_http_pool("gemini")
+    generation_config = {"temperature": temperature, "maxOutputTokens": max_tokens}
+    if json_schema is not None:
+        # WHY: MIME type only — Gemini's responseSchema is an OpenAPI subset, the prompt carries the shape
+        generation_config["responseMimeType"] = "application/json"
+    resp = await pool.post(
+        f"{GEMINI_API_BASE}/models/{model}:generateContent",
+        # WHY: API key in header (not URL) — prevents key leaking to logs/proxies/error messages
+        headers={"x-goog-api-key": api_key},
+        json={"contents": [{"parts": [{"text": prompt}]}], "generationConfig": generation_config},
+    )
+    if resp.status_code != 200:
+        raise RuntimeError(f"Gemini API error {resp.status_code}: {resp.text[:200]}")
+
+    data = resp.json()
+    candidates = data.get("candidates") or []
+    parts = (candidates[0].get("content") or {}).get("parts", []) if candidates else []
+    text = "".join(p.get("text", "") for p in parts).strip()
+    if not text:
+        # WHY: Blocked (safety/recitation) or empty output — raise like the SDK's response.text
+        # did, so the optimizer falls back to another provider instead of saving an empty listing
+        finish = candidates[0].get("finishReason") if candidates else None
+        raise RuntimeError(
+            f"Gemini returned no text (finishReason={finish}, "
+            f"promptFeedback={data.get('promptFeedback')})"
+        )
+    um = data.get("usageMetadata")
     usage = None
-    if hasattr(response, "usage") and response.usage:
+    if um:
         usage = {
-            "prompt_tokens": response.usage.prompt_tokens,
-            "completion_tokens": response.usage.completion_tokens,
-            "total_tokens": response.usage.total_tokens,
-            "model": model or settings.beast_model,
+            "prompt_tokens": um.get("promptTokenCount", 0),
+            "completion_tokens": um.get("candidatesTokenCount", 0),
+            "total_tokens": um.get("totalTokenCount", 0),
+            "model": model,
         }
     return text, usage
 
 
+async def _acall_openai(
+    api_key: str, model: str, prompt: str, temperature: float, max_tokens: int,
+    json_schema: Optional[dict] = None,
+) -> Tuple[str, Optional[dict]]:
+    """Async OpenAI call on the shared pool. Returns (text, usage_dict)."""
+    client = _get_async_openai("openai", api_key)
+    extra = {}
+    if json_schema is not None:
+        extra["response_format"] = {
+            "type": "json_schema",
+            "json_schema": {"name": "response", "schema": json_schema, "strict": True},
+        }
+    response = await client.chat.completions.create(
+        model=model,
+        messages=[{"role": "user", "content": prompt}],
+        temperature=temperature,
+        max_tokens=max_tokens,
+        **extra,
+    )
+    return response.choices[0].message.content.strip(), chat_usage(response, model)
+
+
+async def _acall_beast(
+    model: str, prompt: str, temperature: float, max_tokens: int,
+    json_schema: Optional[dict] = None,
+) -> Tuple[str, Optional[dict]]:
+    """Async Beast (Ollama, OpenAI-compatible) call on the shared pool."""
+    from config import settings
+
+    if not settings.beast_ollama_url:
+        raise ValueError("Beast nie jest skonfigurowany. Ustaw BEAST_OLLAMA_URL w .env")
+
+    client = _get_async_openai("beast", "ollama", base_url=f"{settings.beast_ollama_url}/v1")
+    # WHY: Ollama's OpenAI endpoint supports JSON mode but not strict json_schema
+    extra = {"response_format": {"type": "json_object"}} if json_schema is not None else {}
+    response = await client.chat.completions.create(
+        model=model or settings.beast_model,
+        messages=[{"role": "user", "content": prompt}],
+        temperature=temperature,
+        max_tokens=max_tokens,
+        **extra,
+    )
+    return response.choices[0].message.content.strip(), chat_usage(response, model or settings.beast_model)
+
+
+async def acall_llm(
+    provider: str,
+    api_key: str,
+    model: str | None,
+    prompt: str,
+    temperature: float,
+    max_tokens: int,
+    json_schema: Optional[dict] = None,
+) -> Tuple[str, Optional[dict]]:
+    """Async twin of call_llm — no executor thread held while waiting on the provider.
+
+    json_schema: ask for a JSON response — strict schema where the provider supports it,
+    plain JSON mode elsewhere. Callers still validate (utils/json_extract.py).
+    """
+    if provider not in PROVIDERS:
+        raise ValueError(f"Unknown LLM provider: {provider}")
+
+    resolved_model = model or PROVIDERS[provider]["default_model"]
+
+    logger.info("llm_call", provider=provider, model=resolved_model, mode="async")
+
+    if provider == "beast":
+        return await _acall_beast(resolved_model, prompt, temperature, max_tokens, json_schema)
+    elif provider in ("gemini_flash", "gemini_pro"):
+        return await _acall_gemini(api_key, resolved_model, prompt, temperature, max_tokens, json_schema)
+    elif provider == "openai":
+        return await _acall_openai(api_key, resolved_model, prompt, temperature, max_tokens, json_schema)
+    else:
+        raise ValueError(f"Provider '{provider}' must use groq_client.acall_groq()")
+
+
+async def astream_llm(
+    provider: str,
+    api_key: str,
+    model: str | None,
+    prompt: str,
+    temperature: float,
+    max_tokens: int,
+) -> AsyncIterator[StreamPart]:
+    """Token-streaming twin of acall_llm for OpenAI-compatible providers (OpenAI, Beast)."""
+    from config import settings
+
+    if provider not in ("openai", "beast"):
+        raise ValueError(f"Provider '{provider}' does not support streaming here")
+
+    resolved_model = model or PROVIDERS[provider]["default_model"]
+    if provider == "beast":
+        if not settings.beast_ollama_url:
+            raise ValueError("Beast nie jest skonfigurowany. Ustaw BEAST_OLLAMA_URL w .env")
+        resolved_model = model or settings.beast_model
+        client = _get_async_openai("beast", "ollama", base_url=f"{settings.beast_ollama_url}/v1")
+    else:
+        client = _get_async_openai("openai", api_key)
+
+    logger.info("llm_call", provider=provider, model=resolved_model, mode="stream")
+    stream = await client.chat.completions.create(
+        model=resolved_model,
+        messages=[{"role": "user", "content": prompt}],
+        temperature=temperature,
+        max_tokens=max_tokens,
+        stream=True,
+        stream_options={"include_usage": True},
+    )
+    async for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content, None
+        usage = chat_usage(chunk, resolved_model)
+        if usage:
+            yield "", usage
+
+
 def call_llm(
     provider: str,
     api_key: str,
@@ -149,6 +357,7 @@ def call_llm(
 
     For provider='groq', callers should use groq_client.call_groq() directly
     (it has key rotation). This function handles gemini_flash, gemini_pro, openai.
+    WHY sync kept: scripts and thread-based workers; async routes use acall_llm().
     """
     if provider not in PROVIDERS:
         raise ValueError(f"Unknown LLM provider: {provider}")
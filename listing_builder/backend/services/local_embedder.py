@@ -0,0 +1,146 @@
+# backend/services/local_embedder.py
+# Purpose: Run bge-small-en-v1.5 on CPU with ONNX Runtime — batched, thread-pooled, no network
+# NOT for: Backend selection or caching (embedding_service.py)
+
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List, Optional
+
+import numpy as np
+import structlog
+
+from config import settings
+
+logger = structlog.get_logger()
+
+# WHY: Same weights Cloudflare serves as @cf/baai/bge-small-en-v1.5 — vectors land in the same
+# 384-dim space, so existing knowledge_chunks.embedding rows stay comparable
+LOCAL_MODEL_REPO = "BAAI/bge-small-en-v1.5"
+LOCAL_MODEL_FILES = ("onnx/model.onnx", "tokenizer.json")
+# WHY: bge-small's position embeddings stop at 512 tokens
+MAX_SEQ_LEN = 512
+# WHY: onnxruntime / tokenizers / huggingface_hub are not in requirements.txt — the default
+# Cloudflare backend doesn't need them
+LOCAL_EMBED_REQUIREMENTS = "requirements-local-embed.txt"
+
+
+def _load_tokenizer(model_dir: str):
+    from tokenizers import Tokenizer
+
+    tok = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+    tok.enable_truncation(max_length=MAX_SEQ_LEN)
+    tok.enable_padding(pad_id=0, pad_token="[PAD]")
+    return tok
+
+
+def _load_session(model_dir: str, intra_threads: int):
+    import onnxruntime as ort
+
+    opts = ort.SessionOptions()
+    # WHY: Parallelism comes from our thread pool running several batches at once;
+    # each session.run gets a slice of the cores instead of all of them fighting
+    opts.intra_op_num_threads = intra_threads
+    opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    return ort.InferenceSession(
+        os.path.join(model_dir, "onnx", "model.onnx"), opts, providers=["CPUExecutionProvider"],
+    )
+
+
+def ensure_model(model_dir: str) -> str:
+    """Return model_dir, downloading the ONNX export from Hugging Face if it is missing."""
+    if all(os.path.isfile(os.path.join(model_dir, f)) for f in LOCAL_MODEL_FILES):
+        return model_dir
+    try:
+        from huggingface_hub import hf_hub_download
+    except ImportError:
+        raise RuntimeError(
+            f"Local embedding model not found in {model_dir}. pip install -r {LOCAL_EMBED_REQUIREMENTS} "
+            f"or download {', '.join(LOCAL_MODEL_FILES)} from {LOCAL_MODEL_REPO} into that directory."
+        )
+    for filename in LOCAL_MODEL_FILES:
+        hf_hub_download(LOCAL_MODEL_REPO, filename, local_dir=model_dir)
+    return model_dir
+
+
+class LocalEmbedder:
+    """bge-small-en-v1.5 on ONNX Runtime: CLS pooling + L2 normalization, like the reference model.
+
+    embed() splits input into length-sorted batches (less padding) and runs them on a thread
+    pool — onnxruntime releases the GIL inside run(), so batches execute in parallel.
+    """
+
+    def __init__(
+        self,
+        session: Any,
+        tokenizer: Any,
+        batch_size: int = 32,
+        workers: int = 2,
+    ):
+        self._session = session
+        self._tokenizer = tokenizer
+        self.batch_size = batch_size
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="local-embed")
+        self._input_names = {i.name for i in session.get_inputs()}
+
+    @classmethod
+    def from_settings(cls) -> "LocalEmbedder":
+        workers = max(1, settings.local_embedding_threads)
+        intra = max(1, (os.cpu_count() or 1) // workers)
+        model_dir = ensure_model(settings.local_embedding_model_dir)
+        logger.info("local_embedder_loading", model_dir=model_dir, workers=workers, intra_threads=intra)
+        try:
+            session, tokenizer = _load_session(model_dir, intra), _load_tokenizer(model_dir)
+        except ImportError as e:
+            raise RuntimeError(
+                f"EMBEDDING_BACKEND=local needs {e.name or 'onnxruntime and tokenizers'} — "
+                f"pip install -r {LOCAL_EMBED_REQUIREMENTS}"
+            ) from e
+        return cls(session, tokenizer, batch_size=settings.local_embedding_batch_size, workers=workers)
+
+    def _run_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self._tokenizer.encode_batch(texts)
+        feeds = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+        }
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+        last_hidden = self._session.run(None, feeds)[0]
+        cls = last_hidden[:, 0, :]
+        norms = np.linalg.norm(cls, axis=1, keepdims=True)
+        return cls / np.maximum(norms, 1e-12)
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts in input order. Blocking — use aembed() from async code."""
+        if not texts:
+            return []
+        # WHY: Similar lengths per batch → less padding → fewer wasted FLOPs
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        batches = [order[i:i + self.batch_size] for i in range(0, len(order), self.batch_size)]
+        results = self._executor.map(lambda idx: self._run_batch([texts[i] for i in idx]), batches)
+        out: List[Optional[List[float]]] = [None] * len(texts)
+        for idx, vectors in zip(batches, results):
+            for i, vec in zip(idx, vectors):
+                out[i] = vec.astype(float).tolist()
+        return out
+
+    async def aembed(self, texts: List[str]) -> List[List[float]]:
+        return await asyncio.to_thread(self.embed, texts)
+
+
+_embedder: Optional[LocalEmbedder] = None
+_embedder_lock = threading.Lock()
+
+
+def get_local_embedder() -> LocalEmbedder:
+    """Process-wide embedder — the model loads once (~130 MB, a few seconds) on first use."""
+    global _embedder
+    if _embedder is None:
+        with _embedder_lock:
+            if _embedder is None:
+                _embedder = LocalEmbedder.from_settings()
+    return _embedder
@@ -6,18 +6,32 @@ from __future__ import annotations
 
 import asyncio
 import re
-from typing import List
+from typing import Awaitable, Callable, List
 from services.trace_service import span, record_llm_usage
 from services.prompt_builders import (
     build_title_prompt, build_bullets_prompt,
     build_description_prompt, build_backend_prompt,
+    build_fused_prompt, FUSED_LISTING_SCHEMA,
 )
-from services.groq_client import call_groq
-from services.llm_providers import call_llm
+from services.groq_client import acall_groq, astream_groq, MODEL as GROQ_MODEL
+from services.llm_providers import acall_llm, astream_llm, PROVIDERS, STREAMING_PROVIDERS
+from services.llm_cache import cached_llm_call
+from services.prompt_budget import PromptContext, fit_prompt, prompt_budget_for
+from config import settings
+from utils.json_extract import extract_json
 import structlog
 
 logger = structlog.get_logger()
 
+# span name → section name sent to on_event (SSE). Backend suggestions never leave the server.
+_PUBLIC_SECTIONS = {"llm_title": "title", "llm_bullets": "bullets", "llm_description": "description"}
+
+OnEvent = Callable[[str, dict], Awaitable[None]]
+
+# WHY: "sequential" = title first, then the rest (pre-speculative behaviour, kept for A/B latency).
+# "fused" = one JSON call for all sections, falls back to "speculative" on unusable output.
+PIPELINE_MODES = ("speculative", "sequential", "fused")
+
 
 async def run_direct_groq(
     trace: dict,
@@ -25,86 +39,261 @@ async def run_direct_groq(
     tier1_phrases: List[str], tier2_phrases: List[str], tier3_phrases: List[str],
     all_kw: List[dict],
     lang: str, limits: dict, bullet_count: int, bullet_char_limit: int,
-    title_context: str, bullets_context: str, desc_context: str,
+    title_context: PromptContext | str, bullets_context: PromptContext | str,
+    desc_context: PromptContext | str,
     marketplace: str,
     provider_config: dict | None = None,
     category: str = "",
+    use_cache: bool = True,
+    pipeline: str | None = None,
+    on_event: OnEvent | None = None,
 ) -> tuple:
-    """Run 4 parallel LLM calls (title, bullets, description, backend suggestions).
+    """Run 4 LLM calls (title, bullets, description, backend suggestions).
 
     Returns (title_text, bullet_lines, desc_text, backend_suggestions).
     WHY: provider_config lets callers switch to Gemini/OpenAI while keeping Groq as default.
+    use_cache=False skips the response cache (llm_cache.py) for this run.
+    pipeline: "speculative" | "sequential" | "fused" — default settings.optimizer_pipeline.
+    on_event: awaited with ("token", {...}) per streamed delta and ("section", {...}) per finished
+    title/bullets/description — used by the SSE endpoint. Backend suggestions are internal.
+    Each prompt is fitted to the provider's prompt_budget (prompt_budget.py) before the call.
     """
     # WHY: Closure so we swap one call site instead of 4. Groq uses its own key rotation.
     if provider_config and provider_config.get("provider") != "groq":
         p = provider_config
+        provider = p["provider"]
+        model = p.get("model") or PROVIDERS[provider]["default_model"]
+
+        def call_fn(prompt, temp, max_tok, json_schema=None):
+            return acall_llm(
+                p["provider"], p["api_key"], p.get("model"), prompt, temp, max_tok, json_schema=json_schema,
+            )
 
-        def call_fn(prompt, temp, max_tok):
-            return call_llm(p["provider"], p["api_key"], p.get("model"), prompt, temp, max_tok)
+        def stream_fn(prompt, temp, max_tok):
+            return astream_llm(p["provider"], p["api_key"], p.get("model"), prompt, temp, max_tok)
     else:
-        call_fn = call_groq
-
-    title_prompt = build_title_prompt(
-        product_title, brand, product_line, tier1_phrases, lang, limits["title"],
-        expert_context=title_context, marketplace=marketplace, category=category,
-    )
-
-    with span(trace, "llm_title") as s:
-        title_text, title_usage = await asyncio.to_thread(call_fn, title_prompt, 0.4, 250)
-        if title_usage:
-            record_llm_usage(s, title_usage)
-
-    # WHY: bullets, description, and backend suggestions are independent — run all 3 in parallel
-    bullets_prompt = build_bullets_prompt(
-        product_title, brand, tier2_phrases, lang, bullet_char_limit,
-        expert_context=bullets_context, bullet_count=bullet_count, marketplace=marketplace,
-        category=category,
-    )
-    desc_prompt = build_description_prompt(
-        product_title, brand, tier3_phrases + tier2_phrases[-5:], lang,
-        expert_context=desc_context, marketplace=marketplace, category=category,
-    )
+        provider, model = "groq", GROQ_MODEL
+        call_fn = acall_groq
+        stream_fn = astream_groq
+
+    streaming = on_event is not None and provider in STREAMING_PROVIDERS
+
+    async def streamed(name: str, prompt: str, temp: float, max_tok: int):
+        parts, usage = [], None
+        async for delta, part_usage in stream_fn(prompt, temp, max_tok):
+            if delta:
+                parts.append(delta)
+                await on_event("token", {"section": name, "delta": delta})
+            if part_usage:
+                usage = part_usage
+        return "".join(parts).strip(), usage
+
+    def llm(prompt: str, temp: float, max_tok: int, s: dict, stream_as: str | None = None):
+        # WHY: Cache hits skip streaming — the "section" event still carries the full text
+        return cached_llm_call(
+            lambda: (streamed(stream_as, prompt, temp, max_tok) if streaming and stream_as
+                     else call_fn(prompt, temp, max_tok)),
+            provider, model, prompt, temp, max_tok, span=s, use_cache=use_cache,
+        )
+
+    title_ctx = PromptContext.of(title_context)
+    bullets_ctx = PromptContext.of(bullets_context)
+    desc_ctx = PromptContext.of(desc_context)
+    budget = prompt_budget_for(provider)
+    budget_report: dict = {}
+
+    with span(trace, "prompt_budget") as bs:
+        bs["budget"] = budget
+        bs["prompts"] = budget_report
+        title_prompt, budget_report["title"] = fit_prompt(
+            lambda ctx, _kw: build_title_prompt(
+                product_title, brand, product_line, tier1_phrases, lang, limits["title"],
+                expert_context=ctx.render(), marketplace=marketplace, category=category,
+            ),
+            title_ctx, budget,
+        )
+        bullets_prompt, budget_report["bullets"] = fit_prompt(
+            lambda ctx, _kw: build_bullets_prompt(
+                product_title, brand, tier2_phrases, lang, bullet_char_limit,
+                expert_context=ctx.render(), bullet_count=bullet_count, marketplace=marketplace,
+                category=category,
+            ),
+            bullets_ctx, budget,
+        )
+        # WHY: tier3 keywords are the only trimmable ones — tier1/tier2 carry ranking weight
+        desc_prompt, budget_report["description"] = fit_prompt(
+            lambda ctx, kw: build_description_prompt(
+                product_title, brand, kw + tier2_phrases[-5:], lang,
+                expert_context=ctx.render(), marketplace=marketplace, category=category,
+            ),
+            desc_ctx, budget, trimmable_keywords=tier3_phrases,
+        )
+        bs["tokens_prompts"] = sum(r["tokens"] for r in budget_report.values())
+
     # WHY: Allegro descriptions need ~1000 chars (Bartek 16.02) — 600 tokens too low, bump to 900
     desc_max_tokens = 900 if "allegro" in marketplace else 600
-    backend_prompt = build_backend_prompt(
-        product_title, brand, title_text, all_kw, lang, limits["backend"],
-        marketplace=marketplace, category=category,
-    )
 
-    # WHY: return_exceptions so optional backend call can fail without killing essential calls
-    with span(trace, "llm_bullets_desc") as s:
-        results = await asyncio.gather(
-            asyncio.to_thread(call_fn, bullets_prompt, 0.5, 800),
-            asyncio.to_thread(call_fn, desc_prompt, 0.5, desc_max_tokens),
-            asyncio.to_thread(call_fn, backend_prompt, 0.3, 200),
+    async def section(name: str, prompt: str, temp: float, max_tok: int) -> str:
+        # WHY: One span per LLM call — overlapping spans show what sits on the critical path
+        public_name = _PUBLIC_SECTIONS.get(name)
+        with span(trace, name) as s:
+            text, usage = await llm(prompt, temp, max_tok, s, stream_as=public_name)
+            if usage:
+                record_llm_usage(s, usage)
+        if on_event is not None and public_name:
+            payload = {"section": public_name}
+            if name == "llm_bullets":
+                payload["bullets"] = _parse_bullets(text, bullet_count)
+            else:
+                payload["text"] = text
+            await on_event("section", payload)
+        return text
+
+    async def backend(title: str) -> str:
+        # WHY: Only the backend prompt needs the generated title
+        backend_prompt, budget_report["backend"] = fit_prompt(
+            lambda _ctx, _kw: build_backend_prompt(
+                product_title, brand, title, all_kw, lang, limits["backend"],
+                marketplace=marketplace, category=category,
+            ),
+            PromptContext(), budget,
+        )
+        return await section("llm_backend", backend_prompt, 0.3, 200)
+
+    async def speculative() -> list:
+        # WHY: Title, bullets and description are independent — start all three at once,
+        # backend follows the title. Critical path: max(title + backend, bullets, desc).
+        title_task = asyncio.ensure_future(section("llm_title", title_prompt, 0.4, 250))
+
+        async def backend_after_title() -> str:
+            return await backend(await title_task)
+
+        return await asyncio.gather(
+            title_task,
+            section("llm_bullets", bullets_prompt, 0.5, 800),
+            section("llm_description", desc_prompt, 0.5, desc_max_tokens),
+            backend_after_title(),
             return_exceptions=True,
         )
-        if isinstance(results[0], Exception):
-            raise results[0]
-        if isinstance(results[1], Exception):
-            raise results[1]
 
-        bullets_raw, b_usage = results[0]
-        desc_text, d_usage = results[1]
+    async def fused() -> tuple | None:
+        """One JSON call for all four sections. None = unusable output → caller falls back."""
+        # WHY: One merged context — build_fused_prompt would dedupe shared paragraphs anyway,
+        # merging first lets the budget trim the shared fallback/audience blocks once
+        fused_prompt, budget_report["fused"] = fit_prompt(
+            lambda ctx, kw: build_fused_prompt(
+                product_title, brand, product_line,
+                tier1_phrases, tier2_phrases, kw + tier2_phrases[-5:],
+                lang, limits, bullet_count, bullet_char_limit,
+                title_context=ctx.render(), bullets_context="", desc_context="",
+                marketplace=marketplace, category=category,
+            ),
+            PromptContext.merged(title_ctx, bullets_ctx, desc_ctx), budget,
+            trimmable_keywords=tier3_phrases,
+        )
+        # WHY: Same output budget as the 4 separate calls combined
+        max_tok = 250 + 800 + desc_max_tokens + 200
+        with span(trace, "llm_fused") as s:
+            try:
+                text, usage = await cached_llm_call(
+                    lambda: call_fn(fused_prompt, 0.4, max_tok, json_schema=FUSED_LISTING_SCHEMA),
+                    provider, model, fused_prompt, 0.4, max_tok, span=s, use_cache=use_cache,
+                    cacheable=lambda t: _parse_fused(t, bullet_count) is not None,
+                )
+            except Exception as e:
+                # WHY: Rate limits must surface (batch stop, provider fallback); anything else —
+                # e.g. Groq's json_validate_failed 400 — is a fused-mode failure, not a run failure
+                if "429" in str(e) or "rate_limit" in str(e):
+                    raise
+                s["error"] = str(e)[:200]
+                return None
+            if usage:
+                record_llm_usage(s, usage)
+            parsed = _parse_fused(text, bullet_count)
+            if parsed is None:
+                s["error"] = "unparseable_json"
+        return parsed
+
+    mode = pipeline or settings.optimizer_pipeline
+    if mode not in PIPELINE_MODES:
+        raise ValueError(f"Unknown optimizer pipeline: {mode}")
 
-        if isinstance(results[2], Exception):
-            logger.warning("backend_llm_failed", error=str(results[2]))
-            backend_suggestions = ""
+    first_span = len(trace["spans"])
+    with span(trace, "llm_pipeline") as ps:
+        ps["pipeline"] = mode
+        ps["provider"] = provider
+        if mode == "fused":
+            parsed = await fused()
+            if parsed is not None:
+                results = list(parsed)
+                if on_event is not None:
+                    await on_event("section", {"section": "title", "text": parsed[0]})
+                    await on_event("section", {"section": "bullets", "bullets": parsed[1]})
+                    await on_event("section", {"section": "description", "text": parsed[2]})
+            else:
+                logger.warning("fused_generation_fallback", provider=provider)
+                ps["fallback"] = "speculative"
+                results = await speculative()
+        elif mode == "speculative":
+            results = await speculative()
         else:
-            backend_suggestions, bk_usage = results[2]
-            if bk_usage:
-                record_llm_usage(s, bk_usage, accumulate=True)
+            title_text = await section("llm_title", title_prompt, 0.4, 250)
+            results = [title_text, *await asyncio.gather(
+                section("llm_bullets", bullets_prompt, 0.5, 800),
+                section("llm_description", desc_prompt, 0.5, desc_max_tokens),
+                backend(title_text),
+                return_exceptions=True,
+            )]
+        # WHY: Per-mode token total on one span — finalize_trace sums tokens_in/out, not this key
+        ps["llm_tokens_total"] = sum(s.get("tokens_total", 0) for s in trace["spans"][first_span:])
 
-        if b_usage:
-            record_llm_usage(s, b_usage)
-        if d_usage:
-            record_llm_usage(s, d_usage, accumulate=True)
+    # WHY: return_exceptions so optional backend call can fail without killing essential calls
+    for essential in results[:3]:
+        if isinstance(essential, Exception):
+            raise essential
+    title_text, bullets_raw, desc_text = results[:3]
 
-    # Parse bullets — one per line, strip numbering artifacts
-    bullet_lines = [
+    if isinstance(results[3], Exception):
+        logger.warning("backend_llm_failed", error=str(results[3]))
+        backend_suggestions = ""
+    else:
+        backend_suggestions = results[3]
+
+    if isinstance(bullets_raw, list):
+        # WHY: Fused mode already returns parsed bullets
+        return title_text, bullets_raw, desc_text, backend_suggestions
+    return title_text, _parse_bullets(bullets_raw, bullet_count), desc_text, backend_suggestions
+
+
+def _parse_fused(text: str, bullet_count: int) -> tuple | None:
+    """Validate a fused JSON answer → (title, bullet_lines, description, backend) or None."""
+    try:
+        data = extract_json(text)
+    except ValueError:
+        return None
+    if not isinstance(data, dict):
+        return None
+    title = data.get("title")
+    bullets = data.get("bullets")
+    description = data.get("description")
+    backend = data.get("backend_keywords") or ""
+    if not isinstance(title, str) or not title.strip() or not isinstance(description, str):
+        return None
+    if isinstance(bullets, str):
+        bullets = _parse_bullets(bullets, bullet_count)
+    elif isinstance(bullets, list):
+        bullets = _parse_bullets("\n".join(str(b) for b in bullets), bullet_count)
+    else:
+        return None
+    if not bullets or not description.strip():
+        return None
+    return title.strip(), bullets, description.strip(), backend.strip() if isinstance(backend, str) else ""
+
+
+def _parse_bullets(bullets_raw: str, bullet_count: int) -> List[str]:
+    """Parse bullets — one per line, strip numbering artifacts."""
+    return [
         re.sub(r"^[\d\.\-\*\•]+\s*", "", line).strip()
         for line in bullets_raw.split("\n")
         if line.strip() and len(line.strip()) > 10
     ][:bullet_count]
-
-    return title_text, bullet_lines, desc_text, backend_suggestions
@@ -14,6 +14,7 @@ from services.anti_stuffing_service import run_anti_stuffing_check
 from services.ppc_service import generate_ppc_recommendations
 from services.listing_post_processing import check_compliance
 from services.amazon_tos_checker import check_amazon_tos
+from services.tokenized_listing import TokenizedListing
 
 
 def score_listing(
@@ -24,19 +25,20 @@ def score_listing(
     """Run all scoring: coverage, compliance, anti-stuffing, RJ, PPC, Amazon TOS.
 
     Returns dict with all scoring results — consumed by optimizer_service.
+    WHY one TokenizedListing: every scorer reads the same lowercased text, word sets and
+    counts instead of re-tokenizing title/bullets/description/backend on its own.
     """
-    full_listing_text = title_text + " " + " ".join(bullet_lines) + " " + desc_text
-    full_text_with_backend = full_listing_text + " " + backend_kw
-    backend_bytes = len(backend_kw.encode("utf-8"))
+    tokens = TokenizedListing.build(title_text, bullet_lines, desc_text, backend_kw)
+    backend_bytes = tokens.backend.n_bytes
 
-    cov_pct, _, _ = coverage_for_text(all_kw, full_text_with_backend)
-    exact_matches = count_exact_matches(all_kw, full_text_with_backend)
-    title_cov, _, _ = coverage_for_text(tier1, title_text)
+    cov_pct, _, _ = coverage_for_text(all_kw, tokens)
+    exact_matches = count_exact_matches(all_kw, tokens)
+    title_cov, _, _ = coverage_for_text(tier1, tokens.title)
 
-    compliance = check_compliance(title_text, bullet_lines, desc_text, brand, limits)
+    compliance = check_compliance(title_text, bullet_lines, desc_text, brand, limits, tokens=tokens)
 
     # WHY: Anti-stuffing catches keyword repetition that compliance check misses
-    stuffing_warnings = run_anti_stuffing_check(title_text, bullet_lines, desc_text)
+    stuffing_warnings = run_anti_stuffing_check(title_text, bullet_lines, desc_text, tokens=tokens)
     if stuffing_warnings:
         compliance["warnings"].extend(stuffing_warnings)
         compliance["warning_count"] = len(compliance["warnings"])
@@ -44,12 +46,14 @@ def score_listing(
             compliance["status"] = "WARN"
 
     backend_util = round((backend_bytes / limits["backend"]) * 100, 1) if limits["backend"] > 0 else 0
-    rj = calculate_ranking_juice(all_kw, title_text, bullet_lines, backend_kw, desc_text)
-    coverage_breakdown = calculate_multi_tier_coverage(all_kw, title_text, bullet_lines, backend_kw, desc_text)
-    ppc = generate_ppc_recommendations(all_kw, full_text_with_backend)
+    rj = calculate_ranking_juice(all_kw, title_text, bullet_lines, backend_kw, desc_text, tokens=tokens)
+    coverage_breakdown = calculate_multi_tier_coverage(
+        all_kw, title_text, bullet_lines, backend_kw, desc_text, tokens=tokens,
+    )
+    ppc = generate_ppc_recommendations(all_kw, tokens)
 
     # WHY: Amazon TOS check catches suppression risks that basic compliance misses
-    tos = check_amazon_tos(title_text, bullet_lines, desc_text, backend_kw, marketplace)
+    tos = check_amazon_tos(title_text, bullet_lines, desc_text, backend_kw, marketplace, tokens=tokens)
     if tos.get("violations"):
         for v in tos["violations"]:
             if v["severity"] == "SUPPRESSION":
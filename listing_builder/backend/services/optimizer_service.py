@@ -6,10 +6,11 @@ from __future__ import annotations
 
 import json
 import re
-from typing import List, Dict, Any
-from sqlalchemy.orm import Session
-from services.knowledge_service import search_knowledge_batch
-from services.learning_service import store_successful_listing, get_past_successes
+from typing import Any, Awaitable, Callable, Dict, List
+from database import AnySession
+from services.knowledge_service import search_knowledge_parts
+from services.prompt_budget import PromptContext
+from services.learning_service import astore_successful_listing, aget_past_successes
 from services.n8n_orchestrator_service import call_n8n_optimizer, build_n8n_payload
 from services.trace_service import new_trace, span, finalize_trace
 from services.keyword_placement_service import (
@@ -28,28 +29,32 @@ logger = structlog.get_logger()
 
 
 async def _fetch_knowledge(
-    db: Session | None, product_title: str, tier1_phrases: List[str],
+    db: AnySession | None, product_title: str, tier1_phrases: List[str],
     marketplace: str, audience_context: str, user_id: str = "",
+    span: dict | None = None,
 ) -> tuple:
-    """Fetch RAG context and past successes from DB."""
-    title_ctx = bullets_ctx = desc_ctx = ""
+    """Fetch RAG context and past successes from DB.
+
+    Returns PromptContext per prompt so run_direct_groq can trim to the provider's token budget.
+    WHY: With an AsyncSession every query here awaits asyncpg instead of blocking the loop.
+    """
+    title_ctx, bullets_ctx, desc_ctx = PromptContext(), PromptContext(), PromptContext()
     past_successes = []
 
     if db:
         search_query = f"{product_title} {' '.join(tier1_phrases[:5])}"
-        knowledge = await search_knowledge_batch(db, search_query)
-        title_ctx = knowledge.get("title", "")
-        bullets_ctx = knowledge.get("bullets", "")
-        desc_ctx = knowledge.get("description", "")
+        knowledge = await search_knowledge_parts(db, search_query, span=span)
+        title_ctx = knowledge.get("title", title_ctx)
+        bullets_ctx = knowledge.get("bullets", bullets_ctx)
+        desc_ctx = knowledge.get("description", desc_ctx)
         # WHY: user_id scopes few-shot examples to prevent cross-tenant data leak
-        past_successes = get_past_successes(db, marketplace, user_id=user_id)
+        past_successes = await aget_past_successes(db, marketplace, user_id=user_id)
 
     # WHY: Audience research gives buyer language — prepend so LLM uses real customer phrases
     if audience_context:
         block = f"AUDIENCE RESEARCH (use buyer language from this):\n{audience_context[:2000]}\n\n"
-        title_ctx = block + title_ctx
-        bullets_ctx = block + bullets_ctx
-        desc_ctx = block + desc_ctx
+        for ctx in (title_ctx, bullets_ctx, desc_ctx):
+            ctx.audience = block
 
     return title_ctx, bullets_ctx, desc_ctx, past_successes
 
@@ -80,15 +85,21 @@ async def optimize_listing(
     mode: str = "aggressive",
     product_line: str = "",
     language: str | None = None,
-    db: Session | None = None,
+    db: AnySession | None = None,
     audience_context: str = "",
     account_type: str = "seller",
     category: str = "",
     provider_config: dict | None = None,
     user_id: str = "",
+    use_cache: bool = True,
+    pipeline: str | None = None,
+    on_event: Callable[[str, dict], Awaitable[None]] | None = None,
     **kwargs,
 ) -> Dict[str, Any]:
-    """Run full listing optimization: keyword prep, LLM calls, packing, scoring."""
+    """Run full listing optimization: keyword prep, LLM calls, packing, scoring.
+
+    on_event receives progressive LLM output for streaming callers (see optimizer_llm.run_direct_groq).
+    """
     trace = new_trace("optimize_listing")
     limits = get_limits(marketplace)
     lang = detect_language(marketplace, language)
@@ -122,9 +133,10 @@ async def optimize_listing(
         root_words = extract_root_words(all_kw)
 
     # 2. RAG knowledge
-    with span(trace, "rag_search"):
+    with span(trace, "rag_search") as rag_span:
         title_ctx, bullets_ctx, desc_ctx, past_successes = await _fetch_knowledge(
             db, product_title, tier1_phrases, marketplace, audience_context, user_id=user_id,
+            span=rag_span,
         )
 
     # WHY: If original listing provided, inject as reference context — AI improves rather than invents
@@ -135,8 +147,8 @@ async def optimize_listing(
         if original_description:
             ref_parts.append(f"Original description:\n{original_description[:2000]}")
         ref_block = "ORIGINAL LISTING (improve upon this, keep key facts):\n" + "\n\n".join(ref_parts) + "\n\n"
-        bullets_ctx = ref_block + bullets_ctx
-        desc_ctx = ref_block + desc_ctx
+        bullets_ctx.reference = ref_block
+        desc_ctx.reference = ref_block
 
     logger.info(
         "optimizer_start", product=product_title[:50],
@@ -154,7 +166,9 @@ async def optimize_listing(
         payload = build_n8n_payload(
             brand=brand, product_title=product_title, keywords=all_kw,
             marketplace=marketplace, mode=mode, language=lang,
-            expert_context={"title": title_ctx, "bullets": bullets_ctx, "description": desc_ctx},
+            expert_context={
+                "title": title_ctx.render(), "bullets": bullets_ctx.render(), "description": desc_ctx.render(),
+            },
             past_successes=past_successes,
         )
         n8n_result = await call_n8n_optimizer(payload)
@@ -172,18 +186,22 @@ async def optimize_listing(
                 tier1_phrases, tier2_phrases, tier3_phrases, all_kw,
                 lang, limits, bullet_count, bullet_char_limit,
                 title_ctx, bullets_ctx, desc_ctx, marketplace,
-                provider_config=provider_config, category=category,
+                provider_config=provider_config, category=category, use_cache=use_cache,
+                pipeline=pipeline, on_event=on_event,
             )
         except Exception as provider_err:
             if used_provider != "groq":
                 logger.warning("provider_fallback_to_groq", provider=used_provider, error=str(provider_err))
                 fallback_from = used_provider
+                if on_event is not None:
+                    # WHY: Streamed partial output from the failed provider must be discarded
+                    await on_event("fallback", {"from": used_provider, "to": "groq"})
                 title_text, bullet_lines, desc_text, backend_suggestions = await run_direct_groq(
                     trace, product_title, brand, product_line,
                     tier1_phrases, tier2_phrases, tier3_phrases, all_kw,
                     lang, limits, bullet_count, bullet_char_limit,
                     title_ctx, bullets_ctx, desc_ctx, marketplace,
-                    category=category,
+                    category=category, use_cache=use_cache, pipeline=pipeline, on_event=on_event,
                 )
                 used_provider = "groq"
             else:
@@ -205,7 +223,7 @@ async def optimize_listing(
     listing_history_id = None
     if db:
         try:
-            listing_history_id = store_successful_listing(
+            listing_history_id = await astore_successful_listing(
                 db,
                 listing_data={
                     "brand": brand, "marketplace": marketplace, "product_title": product_title,
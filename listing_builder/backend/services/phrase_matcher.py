@@ -0,0 +1,146 @@
+# backend/services/phrase_matcher.py
+# Purpose: Compiled multi-phrase matcher (Aho-Corasick) with regex \b word-boundary semantics
+# NOT for: Fuzzy or partial-word matching (coverage_service.keyword_covered does word overlap)
+
+from __future__ import annotations
+
+import re
+from collections import deque
+from functools import lru_cache
+from itertools import accumulate
+from typing import Dict, Iterable, Iterator, List, Sequence, Set, Tuple
+
+# WHY: Word runs, whitespace runs, single punctuation chars. \w is Unicode-aware, so
+# Polish/German letters (ą, ł, ż, ä, ß …) stay inside their word like in re's \b.
+_TOKEN_RE = re.compile(r"\w+|\s+|[^\w\s]")
+
+
+def _is_word(ch: str) -> bool:
+    # WHY: Same definition re uses for \w on str patterns
+    return ch.isalnum() or ch == "_"
+
+
+def _boundary(text: str, pos: int) -> bool:
+    """True where re's \\b would match at pos."""
+    before = pos > 0 and _is_word(text[pos - 1])
+    after = pos < len(text) and _is_word(text[pos])
+    return before != after
+
+
+def _fold(text: str) -> str:
+    """Lowercase without changing length — "İ".lower() is two chars, re.I keeps it one."""
+    lower = text.lower()
+    if len(lower) == len(text):
+        return lower
+    return "".join(c if len(c.lower()) != 1 else c.lower() for c in text)
+
+
+def _keys(phrase: str) -> List[str]:
+    return _TOKEN_RE.findall(_fold(phrase))
+
+
+class PhraseMatcher:
+    """Aho-Corasick automaton over tokens of a fixed phrase list — case-insensitive.
+
+    WHY tokens, not characters: a \\b-anchored literal can only start and end on token
+    edges, so walking ~one token per word finds every phrase in one pass regardless of
+    how many phrases there are (was one regex scan per phrase).
+    Matches equal `re.search(rf"\\b{re.escape(phrase)}\\b", text, re.I)` hits,
+    including overlapping phrases ("steel bottle" and "bottle cap").
+    """
+
+    def __init__(self, phrases: Sequence[str]):
+        self.phrases: Tuple[str, ...] = tuple(phrases)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[int, ...]] = [()]
+        self._lengths: List[int] = []
+        # WHY: Phrases starting/ending on a word token get \b for free — tokens are maximal runs
+        self._checks: List[Tuple[bool, bool]] = []
+        # WHY: re.search(r"\b\b", text) matches wherever text has a word char
+        self._empty: Tuple[int, ...] = ()
+
+        empty = []
+        for idx, phrase in enumerate(self.phrases):
+            keys = _keys(phrase)
+            self._lengths.append(len(keys))
+            self._checks.append((not keys or not _is_word(keys[0][0]), not keys or not _is_word(keys[-1][-1])))
+            if not keys:
+                empty.append(idx)
+                continue
+            state = 0
+            for key in keys:
+                nxt = self._goto[state].get(key)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][key] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                state = nxt
+            self._out[state] += (idx,)
+        self._empty = tuple(empty)
+        self._vocab = frozenset(k for edges in self._goto for k in edges)
+
+        # WHY: BFS so every fail target is finalized before states that point at it
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for key, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and key not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(key, 0)
+                self._out[nxt] += self._out[self._fail[nxt]]
+
+    def finditer(self, text: str) -> Iterator[Tuple[int, int, int]]:
+        """Yield (start, end, phrase_index) for every word-bounded match, in end order."""
+        if self._empty and any(_is_word(ch) for ch in text):
+            for idx in self._empty:
+                yield 0, 0, idx
+        goto, fail, out, vocab = self._goto, self._fail, self._out, self._vocab
+        lengths, checks = self._lengths, self._checks
+        # WHY: Fold once for the whole text; tokens tile it exactly, so offsets are running sums
+        tokens = _TOKEN_RE.findall(_fold(text))
+        ends: List[int] = []
+        state = 0
+        for j, key in enumerate(tokens):
+            if key not in vocab:
+                state = 0
+                continue
+            while state and key not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(key, 0)
+            if not out[state]:
+                continue
+            if not ends:
+                ends = [0, *accumulate(map(len, tokens))]
+            end = ends[j + 1]
+            for idx in out[state]:
+                start = ends[j + 1 - lengths[idx]]
+                check_start, check_end = checks[idx]
+                if (not check_start or _boundary(text, start)) and (not check_end or _boundary(text, end)):
+                    yield start, end, idx
+
+    def found(self, text: str) -> Set[int]:
+        """Indexes of phrases that occur at least once."""
+        return {idx for _, _, idx in self.finditer(text)}
+
+    def count_found(self, text: str) -> int:
+        """Number of phrases (by position in the list, duplicates included) found in text."""
+        return len(self.found(text))
+
+
+@lru_cache(maxsize=256)
+def _cached(phrases: Tuple[str, ...]) -> PhraseMatcher:
+    return PhraseMatcher(phrases)
+
+
+def get_matcher(phrases: Iterable[str]) -> PhraseMatcher:
+    """Compiled matcher for a phrase list — built once per distinct list, then cached.
+
+    WHY: The same keyword set is scored several times per request (coverage, RJ title,
+    RJ bullets) and PROMO_WORDS never changes — compile once, scan many.
+    """
+    return _cached(tuple(phrases))
@@ -4,8 +4,9 @@
 
 from __future__ import annotations
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Union
 from services.coverage_service import extract_words, keyword_covered
+from services.tokenized_listing import TokenizedListing
 import structlog
 
 logger = structlog.get_logger()
@@ -13,16 +14,17 @@ logger = structlog.get_logger()
 
 def generate_ppc_recommendations(
     keywords_sorted: List[Dict[str, Any]],
-    listing_text: str,
+    listing_text: Union[str, TokenizedListing],
 ) -> Dict[str, Any]:
     """
     Generate PPC match-type recommendations from keyword research data.
     WHY: DataDive's approach — high-RJ keywords get exact match (lower ACoS),
     mid-range get phrase match, long-tail get broad match.
     Zero LLM cost — pure post-processing of existing keyword data.
+    listing_text may be a TokenizedListing — its full word set is reused.
     """
     # WHY: Word-set matching — "cap" won't falsely match "capsule"
-    listing_words = extract_words(listing_text)
+    listing_words = extract_words(listing_text) if isinstance(listing_text, str) else listing_text.words
     exact_match: List[Dict[str, Any]] = []
     phrase_match: List[Dict[str, Any]] = []
     broad_match: List[Dict[str, Any]] = []
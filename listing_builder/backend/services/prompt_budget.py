@@ -0,0 +1,124 @@
+# backend/services/prompt_budget.py
+# Purpose: Fit optimizer prompts into a per-provider token budget by trimming low-value context first
+# NOT for: Prompt wording (prompt_builders.py) or exact tokenization (no tokenizer dependency)
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field, replace
+from typing import Callable, List, Tuple
+
+from services.llm_providers import PROVIDERS
+
+# WHY: Used when a provider entry has no prompt_budget — conservative, fits the smallest models
+DEFAULT_PROMPT_BUDGET = 3000
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate BPE token count without a tokenizer.
+
+    WHY: Llama/GPT tokenizers average ~4 chars per token for word pieces, punctuation is one
+    token each, and non-ASCII letters (ä, ł, ß) often cost an extra piece. Within ~10% of
+    tiktoken on our DE/PL/EN prompts — enough to keep a safety margin, not for billing.
+    """
+    n = 0
+    for m in _TOKEN_RE.finditer(text):
+        tok = m.group()
+        n += (len(tok) + 3) // 4 + sum(1 for c in tok if ord(c) > 127) // 2
+    return n
+
+
+def prompt_budget_for(provider: str) -> int:
+    return PROVIDERS.get(provider, {}).get("prompt_budget", DEFAULT_PROMPT_BUDGET)
+
+
+@dataclass
+class PromptContext:
+    """Expert context for one prompt, split by value so trimming can drop the cheapest part first.
+
+    render() keeps the pre-budget layout: original listing, audience research, then RAG chunks.
+    """
+    primary: List[str] = field(default_factory=list)  # RAG chunks from primary categories
+    fallback: List[str] = field(default_factory=list)  # RAG chunks from fallback categories
+    audience: str = ""  # "AUDIENCE RESEARCH ..." block
+    reference: str = ""  # "ORIGINAL LISTING ..." block — kept longest
+
+    @classmethod
+    def of(cls, value: "PromptContext | str") -> "PromptContext":
+        if isinstance(value, PromptContext):
+            return value
+        return cls(primary=[value] if value else [])
+
+    def render(self) -> str:
+        return self.reference + self.audience + "\n\n".join(self.primary + self.fallback)
+
+    @classmethod
+    def merged(cls, *contexts: "PromptContext") -> "PromptContext":
+        """One context for a multi-section prompt — shared chunks and blocks appear once."""
+        out = cls()
+        for ctx in contexts:
+            out.reference = out.reference or ctx.reference
+            out.audience = out.audience or ctx.audience
+            out.primary += [c for c in ctx.primary if c not in out.primary]
+            out.fallback += [c for c in ctx.fallback if c not in out.fallback and c not in out.primary]
+        return out
+
+
+def fit_prompt(
+    build: Callable[[PromptContext, List[str]], str],
+    context: PromptContext,
+    budget: int,
+    trimmable_keywords: List[str] | None = None,
+) -> Tuple[str, dict]:
+    """Build a prompt, trimming until estimate_tokens() fits the budget.
+
+    build(context, keywords) must return the full prompt. Trim order (lowest value first):
+    fallback RAG chunks → audience research → trimmable (tier3) keywords → primary RAG chunks →
+    original listing. Returns (prompt, report) — report goes into the trace.
+    """
+    ctx = replace(context, primary=list(context.primary), fallback=list(context.fallback))
+    keywords = list(trimmable_keywords or [])
+    trimmed = {"fallback_chunks": 0, "audience": False, "keywords": 0, "primary_chunks": 0, "reference": False}
+
+    prompt = build(ctx, keywords)
+    tokens_before = tokens = estimate_tokens(prompt)
+
+    def over() -> bool:
+        return tokens > budget
+
+    while over() and ctx.fallback:
+        ctx.fallback.pop()
+        trimmed["fallback_chunks"] += 1
+        prompt = build(ctx, keywords)
+        tokens = estimate_tokens(prompt)
+    if over() and ctx.audience:
+        ctx.audience = ""
+        trimmed["audience"] = True
+        prompt = build(ctx, keywords)
+        tokens = estimate_tokens(prompt)
+    while over() and keywords:
+        keywords.pop()
+        trimmed["keywords"] += 1
+        prompt = build(ctx, keywords)
+        tokens = estimate_tokens(prompt)
+    while over() and ctx.primary:
+        ctx.primary.pop()
+        trimmed["primary_chunks"] += 1
+        prompt = build(ctx, keywords)
+        tokens = estimate_tokens(prompt)
+    if over() and ctx.reference:
+        ctx.reference = ""
+        trimmed["reference"] = True
+        prompt = build(ctx, keywords)
+        tokens = estimate_tokens(prompt)
+
+    report = {
+        "tokens": tokens,
+        "tokens_before": tokens_before,
+        # WHY: Template + product info alone can exceed a tiny budget — flag it, don't fail
+        "over_budget": tokens > budget,
+        "trimmed": {k: v for k, v in trimmed.items() if v},
+    }
+    return prompt, report
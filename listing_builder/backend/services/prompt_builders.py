@@ -249,3 +249,83 @@ Rules:
 {AMAZON_BACKEND_RULES if marketplace.startswith("amazon") else ""}
 {get_category_rules(category, "backend")}
 Return ONLY space-separated search terms in {lang}, nothing else."""
+
+
+# WHY: Shared by the fused prompt and providers with native schema support (OpenAI json_schema)
+FUSED_LISTING_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "title": {"type": "string"},
+        "bullets": {"type": "array", "items": {"type": "string"}},
+        "description": {"type": "string"},
+        "backend_keywords": {"type": "string"},
+    },
+    "required": ["title", "bullets", "description", "backend_keywords"],
+    "additionalProperties": False,
+}
+
+
+def _merge_contexts(*contexts: str) -> str:
+    """Join per-section RAG contexts, dropping paragraphs that appear in more than one."""
+    seen = set()
+    parts = []
+    for ctx in contexts:
+        for para in (ctx or "").split("\n\n"):
+            key = para.strip()
+            if key and key not in seen:
+                seen.add(key)
+                parts.append(key)
+    return "\n\n".join(parts)
+
+
+def build_fused_prompt(
+    product_title: str, brand: str, product_line: str,
+    tier1_phrases: List[str], tier2_phrases: List[str], remaining_phrases: List[str],
+    lang: str, limits: Dict[str, int], bullet_count: int, bullet_char_limit: int,
+    title_context: str = "", bullets_context: str = "", desc_context: str = "",
+    marketplace: str = "",
+    category: str = "",
+) -> str:
+    """One prompt for title + bullets + description + backend terms, answered as JSON.
+
+    WHY: The 4 single-section prompts each repeat product info, keyword tiers and RAG context —
+    here they appear once. Section rules are the same ones the single prompts use.
+    """
+    is_amazon = marketplace.startswith("amazon")
+    is_allegro = "allegro" in marketplace
+    context = _merge_contexts(title_context, bullets_context, desc_context)
+    context_block = f"""
+EXPERT KNOWLEDGE (use these best practices):
+{context}
+""" if context else ""
+    paragraphs = (
+        "exactly 3 detailed paragraphs, 800-1200 characters of text (excluding HTML tags), "
+        "8-12 key phrases in <b> tags" if is_allegro else "2-3 short paragraphs"
+    )
+
+    return f"""You are an expert {"Allegro" if is_allegro else "Amazon"} listing optimizer. Write a complete listing.
+{context_block}
+Product: {product_title}
+Brand: {brand}
+Product line: {product_line}
+Language: {lang}
+
+TITLE KEYWORDS (include as EXACT phrases): {", ".join(tier1_phrases[:10])}
+BULLET KEYWORDS to weave in: {", ".join(tier2_phrases[:15])}
+DESCRIPTION KEYWORDS to include: {", ".join(remaining_phrases[:10])}
+
+General rules:
+- IMPORTANT: If any keyword or product info is NOT in {lang}, TRANSLATE it to {lang} first
+- Every field must be entirely in {lang} — no words in other languages
+- No promotional words (bestseller, #1, günstig, etc.)
+
+"title": max {limits["title"]} characters, use the full length. Start with brand name. Each keyword phrase ONLY ONCE, " - " between keyword groups, then product attributes (size, color, material, count). No special characters.
+{AMAZON_TITLE_RULES if is_amazon else ""}{get_category_rules(category, "title")}
+"bullets": exactly {bullet_count} strings, each 100-{bullet_char_limit} characters. Start each with a CAPITALIZED benefit keyword, 1-3 keyword phrases woven into benefit-driven sentences. No numbering or bullet symbols.
+{AMAZON_BULLETS_RULES if is_amazon else ""}{get_category_rules(category, "bullets")}
+"description": simple HTML, {paragraphs}. <p> for paragraphs, <ul><li> for feature lists, <b> for emphasis — no classes, inline styles, <div> or <span>. Use cases and benefits, professional tone.
+{AMAZON_DESC_RULES if "amazon" in marketplace else ""}{get_category_rules(category, "description")}
+"backend_keywords": additional search terms, max {limits["backend"]} bytes, lowercase, space-separated, every word unique. Synonyms, alternate spellings, related category and use-case terms NOT already in title, bullets or the keywords above. No brand names.
+{AMAZON_BACKEND_RULES if is_amazon else ""}{get_category_rules(category, "backend")}
+Return ONLY a JSON object with exactly these keys:
+{{"title": "...", "bullets": ["...", "..."], "description": "...", "backend_keywords": "..."}}"""
@@ -6,15 +6,45 @@ from __future__ import annotations
 
 import asyncio
 import json
-from groq import Groq
+import re
 from config import settings
 import structlog
 
+from services.groq_client import agroq_chat
+from services.knowledge_cache import normalize_query
+from utils.ttl_cache import TTLCache
+
 logger = structlog.get_logger()
 
 # WHY: 8b model is fast (~200ms) and free on Groq — perfect for lightweight preprocessing
 MODEL = "llama-3.1-8b-instant"
 
+# WHY: One entry per distinct query — a few hundred bytes of JSON each
+EXPANSION_CACHE_MAX_ENTRIES = 1024
+# WHY: A failed call (429, bad JSON) is remembered briefly — a burst of identical
+# optimizations must not hit a rate-limited Groq once per request
+FAILURE_TTL_S = 60
+_cache = TTLCache(maxsize=EXPANSION_CACHE_MAX_ENTRIES, ttl=settings.query_expansion_cache_ttl_seconds)
+# WHY: Concurrent identical queries share one Groq call (single-flight)
+_inflight: dict[tuple, asyncio.Task] = {}
+_MISS = object()
+
+# WHY: Expansion pays off for natural-language questions ("how do I rank a new listing?").
+# Keyword strings — product title + tier-1 phrases from _fetch_knowledge — are already the
+# terms retrieval needs, and the rewrite only adds ~200ms and Groq rate-limit pressure.
+KEYWORD_QUERY_MAX_WORDS = 6
+KEYWORD_MAX_FUNCTION_RATIO = 0.25
+_WORD = re.compile(r"\w+")
+_QUESTION_WORDS = frozenset(
+    "how what why when where which who should can could do does is are will would explain tips".split()
+)
+# WHY: EN/DE/PL — product titles come from Amazon, Kaufland and Allegro listings
+_FUNCTION_WORDS = frozenset("""
+    a an the to of for in on at by with and or my your our i we you it this that from as be
+    der die das und mit für von zu im den ein eine
+    i w z na do dla od po ze
+""".split())
+
 SYSTEM_PROMPT = """You are a search query analyzer for an Amazon marketplace knowledge base containing expert training transcripts about Amazon selling, keywords, PPC, listing optimization, and ranking.
 
 Given a user query, extract:
@@ -25,43 +55,87 @@ Given a user query, extract:
 Respond ONLY with valid JSON, no explanation."""
 
 
+def is_keyword_query(query: str) -> bool:
+    """True for short or keyword-style queries that expansion would not improve."""
+    words = _WORD.findall(query.casefold())
+    if not words:
+        return True
+    if "?" in query or words[0] in _QUESTION_WORDS:
+        return False
+    if len(words) <= KEYWORD_QUERY_MAX_WORDS:
+        return True
+    return sum(w in _FUNCTION_WORDS for w in words) / len(words) < KEYWORD_MAX_FUNCTION_RATIO
+
+
 async def analyze_query(query: str) -> dict | None:
     """Analyze a search query to extract concepts and expand it for better retrieval.
 
     Returns {"key_concepts": [...], "expanded_query": "...", "category_hints": [...]}
-    or None on failure.
+    or None on failure, for keyword-style queries, and when the latency budget runs out.
 
     WHY: Only called in hybrid/semantic mode — adds ~200ms latency, zero cost (Groq free).
+    Results are cached by normalized query; a call that overruns the budget keeps running
+    in the background and fills the cache for the next request.
     """
     if settings.rag_mode == "lexical":
         return None
+    if settings.query_expansion_gate and is_keyword_query(query):
+        logger.debug("query_expansion_skipped", query=query[:60])
+        return None
+
+    key = (MODEL, normalize_query(query))
+    hit = _cache.get(key, _MISS)
+    if hit is not _MISS:
+        return hit
+    task = _inflight.get(key)
+    if task is None or task.get_loop() is not asyncio.get_running_loop():
+        task = asyncio.ensure_future(_analyze_and_cache(key, query))
+        _inflight[key] = task
+
+    budget_s = settings.query_expansion_budget_ms / 1000
+    if budget_s <= 0:
+        return await asyncio.shield(task)
+    try:
+        return await asyncio.wait_for(asyncio.shield(task), budget_s)
+    except asyncio.TimeoutError:
+        logger.info("query_expansion_timeout", budget_ms=settings.query_expansion_budget_ms, query=query[:60])
+        return None
+
+
+async def _analyze_and_cache(key: tuple, query: str) -> dict | None:
+    try:
+        result = await _call_model(query)
+        _cache.set(key, result, ttl=None if result is not None else FAILURE_TTL_S)
+        return result
+    finally:
+        if _inflight.get(key) is asyncio.current_task():
+            del _inflight[key]
+
+
+def expansion_cache_stats() -> dict:
+    """In-process counters — for admin/monitoring endpoints."""
+    return {**_cache.stats(), "in_flight": len(_inflight)}
+
 
+def clear_expansion_cache() -> None:
+    _cache.clear()
+    _inflight.clear()
+
+
+async def _call_model(query: str) -> dict | None:
+    """One Groq call through the shared key scheduler. None on any failure.
+
+    WHY agroq_chat: quarantine and weighted round-robin apply to this per-optimization call
+    too, and it runs on the shared async pool — no worker thread that outlives a cancel.
+    """
     try:
-        def _call():
-            keys = settings.groq_api_keys
-            if not keys:
-                raise RuntimeError("No Groq API keys configured")
-            last_error = None
-            for key in keys:
-                try:
-                    client = Groq(api_key=key)
-                    return client.chat.completions.create(
-                        model=MODEL,
-                        messages=[
-                            {"role": "system", "content": SYSTEM_PROMPT},
-                            {"role": "user", "content": query},
-                        ],
-                        temperature=0,
-                        max_tokens=200,
-                    )
-                except Exception as e:
-                    last_error = e
-                    if "429" in str(e) or "rate_limit" in str(e):
-                        continue
-                    raise
-            raise last_error
-
-        response = await asyncio.to_thread(_call)
+        response = await agroq_chat(
+            [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": query},
+            ],
+            temperature=0, max_tokens=200, model=MODEL,
+        )
         content = response.choices[0].message.content.strip()
 
         # WHY: Parse JSON — handle markdown code blocks that LLMs sometimes add
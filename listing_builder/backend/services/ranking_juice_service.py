@@ -9,10 +9,10 @@ Five weighted components → single 0-100 score + letter grade.
 WHY in FastAPI: Runs on BOTH n8n and fallback paths, so it must live in Python.
 """
 
-import re
-from typing import List, Dict
+from typing import AbstractSet, List, Dict, Set, Tuple
 
-from services.coverage_service import extract_words
+from services.phrase_matcher import get_matcher
+from services.tokenized_listing import TokenizedListing
 
 
 def calculate_ranking_juice(
@@ -21,6 +21,7 @@ def calculate_ranking_juice(
     bullets: List[str],
     backend: str,
     description: str = "",
+    tokens: TokenizedListing | None = None,
 ) -> Dict:
     """
     Calculate Ranking Juice score (0-100).
@@ -29,12 +30,15 @@ def calculate_ranking_juice(
     RJ = (Coverage × 0.35) + (Exact Match × 0.30) + (Search Volume × 0.20)
          + (Backend Efficiency × 0.10) + (Structure × 0.05)
     """
-    coverage = _coverage_score(keywords, title, bullets, backend, description)
+    if tokens is None:
+        tokens = TokenizedListing.build(title, bullets, description, backend)
+    coverage = _coverage_for_words(keywords, tokens.words)
     # WHY: Visible coverage (without backend) tells us if keywords are well-placed
-    visible_coverage = _coverage_score(keywords, title, bullets, "", description)
-    exact = _exact_match_score(keywords, title, bullets)
-    volume = _search_volume_score(keywords, title, bullets)
-    backend_eff = _backend_efficiency(backend, visible_coverage)
+    visible_coverage = _coverage_for_words(keywords, tokens.visible_words)
+    in_title, in_bullets = _section_hits(keywords, tokens)
+    exact = _exact_match_in(keywords, in_title, in_bullets)
+    volume = _search_volume_in(keywords, in_title, in_bullets, tokens.title.words)
+    backend_eff = _backend_efficiency_for_bytes(tokens.backend.n_bytes, visible_coverage)
     structure = _structure_score(title, bullets)
 
     rj = (
@@ -93,9 +97,13 @@ def _coverage_score(
     """Keyword coverage (0-100). 70%+ word overlap = covered. Scored against top 200."""
     if not keywords:
         return 0
-    all_text = title + " " + " ".join(bullets) + " " + backend + " " + description
-    # WHY: extract_words uses word-boundary regex — "cap" won't match "capsule"
-    all_words = extract_words(all_text)
+    return _coverage_for_words(keywords, TokenizedListing.build(title, bullets, description, backend).words)
+
+
+def _coverage_for_words(keywords: List[Dict], all_words: AbstractSet[str]) -> float:
+    # WHY: Word-set lookup — "cap" won't match "capsule"
+    if not keywords:
+        return 0
     top = keywords[:200]
     covered = 0
     for kw in top:
@@ -117,17 +125,26 @@ def _exact_match_score(keywords: List[Dict], title: str, bullets: List[str] = No
     WHY dynamic target: With 5 keywords, expecting 8 exact matches is impossible.
     Target = min(8, keyword_count * 0.5) so the score is achievable.
     """
-    title_lower = title.lower()
-    bullets_text = " ".join(bullets).lower() if bullets else ""
+    return _exact_match_in(keywords, *_section_hits(keywords, TokenizedListing.build(title, bullets or [])))
+
+
+def _section_hits(keywords: List[Dict], tokens: TokenizedListing) -> Tuple[Set[int], Set[int]]:
+    """Indexes of keywords matched as exact phrases in the title and in the bullets.
+
+    WHY: Word-boundary match prevents "cap" matching inside "capsule". Same matcher
+    (all keywords) as count_exact_matches, so the listing is scanned once for both.
+    """
+    matcher = get_matcher(kw["phrase"].lower() for kw in keywords)
+    return tokens.found(matcher, tokens.title), tokens.found(matcher, tokens.bullets)
+
+
+def _exact_match_in(keywords: List[Dict], in_title: Set[int], in_bullets: Set[int]) -> float:
     top = keywords[:30]
     score = 0
-    for kw in top:
-        phrase = kw["phrase"].lower()
-        # WHY: Word-boundary regex prevents "cap" matching inside "capsule"
-        pattern = rf"\b{re.escape(phrase)}\b"
-        if re.search(pattern, title_lower):
+    for i in range(len(top)):
+        if i in in_title:
             score += 1.5
-        elif re.search(pattern, bullets_text):
+        elif i in in_bullets:
             score += 1.0
     target = max(3, min(8, len(top) * 0.5))
     return min(100, (score / target) * 100)
@@ -137,23 +154,25 @@ def _search_volume_score(
     keywords: List[Dict], title: str, bullets: List[str]
 ) -> float:
     """Search volume weighted by position (0-100). Title=1.5x, bullets=1x, partial=0.3x."""
-    title_lower = title.lower()
-    bullets_text = " ".join(bullets).lower()
+    tokens = TokenizedListing.build(title, bullets)
+    return _search_volume_in(keywords, *_section_hits(keywords, tokens), tokens.title.words)
+
+
+def _search_volume_in(
+    keywords: List[Dict], in_title: Set[int], in_bullets: Set[int], title_words: AbstractSet[str],
+) -> float:
     top50 = keywords[:50]
     total_vol = sum(kw.get("search_volume", 0) for kw in top50)
     if total_vol == 0:
         return 50  # WHY: Default when no search volume data available
 
-    # WHY: Word-boundary matching prevents "cap" matching "capsule"
-    title_words = extract_words(title_lower)
     captured = 0
-    for kw in top50:
+    for i, kw in enumerate(top50):
         vol = kw.get("search_volume", 0)
         phrase = kw["phrase"].lower()
-        pattern = rf"\b{re.escape(phrase)}\b"
-        if re.search(pattern, title_lower):
+        if i in in_title:
             captured += vol * 1.5
-        elif re.search(pattern, bullets_text):
+        elif i in in_bullets:
             captured += vol * 1.0
         else:
             # WHY: Partial overlap still counts (individual words present)
@@ -173,7 +192,10 @@ def _backend_efficiency(backend: str, visible_coverage: float = 0) -> float:
     need backend to compensate. Penalizing empty backend when visible
     coverage is excellent produces misleadingly low scores.
     """
-    byte_size = len(backend.encode("utf-8"))
+    return _backend_efficiency_for_bytes(len(backend.encode("utf-8")), visible_coverage)
+
+
+def _backend_efficiency_for_bytes(byte_size: int, visible_coverage: float = 0) -> float:
     if byte_size > 250:
         return 50  # WHY: Penalty for exceeding limit
     if 240 <= byte_size <= 249:
@@ -1,5 +1,5 @@
 # backend/services/search_strategies.py
-# Purpose: Low-level search functions — lexical, vector, hybrid merge
+# Purpose: Low-level search functions — lexical, vector, hybrid merge, multi-group batch
 # NOT for: High-level knowledge search logic (that's knowledge_service.py)
 
 from __future__ import annotations
@@ -90,26 +90,29 @@ def _lexical_query(
 
 
 def vector_search(
-    db: Session, query_embedding: list[float], categories: list[str] | None, limit: int
+    db: Session, query_embedding: list[float], categories: list[str] | None, limit: int,
+    ef_search: int | None = None,
 ) -> list[tuple]:
     """Vector similarity search using pgvector cosine distance.
 
     Returns (id, content, filename, category, similarity_score).
     WHY: 1 - cosine_distance = cosine_similarity (higher is better).
+    With categories, each category is searched on its own (partial HNSW index, migration 026)
+    and the per-category top-`limit` lists are merged — same result as one filtered scan.
     """
+    set_ef_search(db, ef_search)
     emb_str = "[" + ",".join(str(x) for x in query_embedding) + "]"
     if categories:
+        params = {"emb": emb_str, "limit": limit}
         rows = db.execute(
-            text("""
-                SELECT id, content, filename, category,
-                       1 - (embedding <=> CAST(:emb AS vector)) as score
-                FROM knowledge_chunks
-                WHERE embedding IS NOT NULL
-                  AND category = ANY(:categories)
-                ORDER BY embedding <=> CAST(:emb AS vector)
-                LIMIT :limit
+            text(f"""
+                WITH {_vector_by_category("cand", categories)}
+                SELECT k.id, k.content, k.filename, k.category, c.score
+                FROM (SELECT id, score FROM cand ORDER BY score DESC LIMIT :limit) c
+                JOIN knowledge_chunks k ON k.id = c.id
+                ORDER BY c.score DESC
             """),
-            {"emb": emb_str, "categories": categories, "limit": limit},
+            params,
         ).fetchall()
     else:
         rows = db.execute(
@@ -126,6 +129,49 @@ def vector_search(
     return rows
 
 
+def set_ef_search(db: Session, ef_search: int | None) -> None:
+    """Set pgvector's hnsw.ef_search for the current transaction (None/0 = server default, 40).
+
+    WHY: Transaction-local (set_config(..., true)) — one request can trade latency for recall
+    without changing the pooled connection for the next request.
+    """
+    if ef_search:
+        db.execute(text("SELECT set_config('hnsw.ef_search', :ef, true)"), {"ef": str(int(ef_search))})
+
+
+def _category_literal(category: str) -> str:
+    """`'category'` as an SQL string literal, quotes doubled.
+
+    WHY escape, not reject: categories come from `SELECT DISTINCT category` too — one odd
+    name must not fail the whole statement. Safe with standard_conforming_strings (on by
+    default since PostgreSQL 9.1): backslashes are plain characters inside '...'.
+    """
+    return "'" + category.replace("'", "''") + "'"
+
+
+def _vector_by_category(name: str, categories: list[str], gate: str = "") -> str:
+    """CTE `name(category, id, score)`: top-:limit chunks per category.
+
+    WHY: `category = ANY(:list)` can only post-filter the table-wide HNSW scan — the 25K
+    copywriting vectors crowd out small categories and recall drops. One ORDER BY ... LIMIT
+    per category with `category = '<literal>'` lets the planner pick that category's partial
+    HNSW index, or the category b-tree for tiny categories. Literal, not a bind parameter:
+    asyncpg runs prepared statements, and a generic plan for `category = $1` cannot use a
+    partial index. {cat} in gate is replaced with that branch's category literal.
+    """
+    branches = []
+    for category in categories:
+        literal = _category_literal(category)
+        branch_gate = gate.replace("{cat}", literal)
+        branches.append(f"""(SELECT CAST({literal} AS text) AS category, id,
+            1 - (embedding <=> CAST(:emb AS vector)) AS score
+        FROM knowledge_chunks
+        WHERE embedding IS NOT NULL AND category = {literal}{branch_gate}
+        ORDER BY embedding <=> CAST(:emb AS vector)
+        LIMIT :limit)""")
+    return f"{name} AS (\n    " + "\n    UNION ALL ".join(branches) + "\n)"
+
+
 def _normalize_scores(rows: list[tuple]) -> list[tuple]:
     """Normalize scores to 0-1 range. Input: (id, content, filename, category, score)."""
     if not rows:
@@ -178,3 +224,318 @@ def hybrid_merge(
             remaining.append(r)
 
     return (diverse + remaining)[:limit]
+
+
+def search_sources(mode: str, query_embedding: list[float] | None) -> tuple[bool, bool]:
+    """(use_vector, use_lexical) for a rag_mode — same routing as knowledge_service._get_search_rows."""
+    use_vector = bool(query_embedding) and mode in ("semantic", "hybrid", "memory")
+    use_lexical = not (use_vector and mode in ("semantic", "memory"))
+    return use_vector, use_lexical
+
+
+# WHY: {tier} / {gate} are filled by _add_tier — tier literal and optional extra WHERE;
+# _LEXICAL_LATERAL also takes {cat_filter}, the category restriction (per group or none)
+_VECTOR_LATERAL = """
+    SELECT g.pt, c.id, 1 - c.dist AS score
+    FROM groups g CROSS JOIN LATERAL (
+        SELECT id, embedding <=> CAST(:emb AS vector) AS dist
+        FROM knowledge_chunks
+        WHERE embedding IS NOT NULL
+        ORDER BY embedding <=> CAST(:emb AS vector)
+        LIMIT :limit
+    ) c
+    WHERE g.tier = '{tier}'{gate}"""
+
+# WHY: Category-filtered vector hits come from a *_vec_cat CTE (_vector_by_category) — each
+# category is scanned once even when several prompt types share it
+_VECTOR_FROM_CATEGORIES = """
+    SELECT g.pt, c.id, c.score
+    FROM groups g CROSS JOIN LATERAL (
+        SELECT v.id, v.score FROM {source} v
+        WHERE v.category = ANY(g.cats)
+        ORDER BY v.score DESC
+        LIMIT :limit
+    ) c
+    WHERE g.tier = '{tier}'{gate}"""
+
+_LEXICAL_LATERAL = """
+    SELECT g.pt, c.id, c.rank AS score
+    FROM groups g CROSS JOIN LATERAL (
+        SELECT id, ts_rank(search_vector, plainto_tsquery('english', :{param})) AS rank
+        FROM knowledge_chunks
+        WHERE search_vector @@ plainto_tsquery('english', :{param}){cat_filter}
+        ORDER BY rank DESC
+        LIMIT :limit
+    ) c
+    WHERE g.tier = '{tier}'{gate}"""
+
+_GROUP_CATEGORIES = "\n          AND category = ANY(g.cats)"
+
+# WHY: Hybrid fusion inside Postgres. Input: hits(pt, tier, src, id, score) with each source's
+# top-:limit, and lims(pt, tier, lim) with the final row count per group. Mirrors hybrid_merge
+# step by step — slice each source to lim, min-max normalize, combine, sort with vector-first
+# tie order, then first-chunk-per-filename before the rest — so only `lim` rows carry content.
+_FUSION_SQL = """,
+ranked AS (
+    SELECT h.pt, h.tier, h.src, h.id, CAST(h.score AS float8) AS score,
+           row_number() OVER (PARTITION BY h.pt, h.tier, h.src ORDER BY h.score DESC) AS rnk
+    FROM hits h
+),
+cand AS (
+    SELECT r.pt, r.tier, r.src, r.id, r.rnk,
+           (r.score - min(r.score) OVER w)
+             / COALESCE(NULLIF(max(r.score) OVER w - min(r.score) OVER w, 0), 1.0) AS norm
+    FROM ranked r JOIN lims l ON l.pt = r.pt AND l.tier = r.tier
+    WHERE r.rnk <= l.lim
+    WINDOW w AS (PARTITION BY r.pt, r.tier, r.src)
+),
+fused AS (
+    SELECT c.pt, c.tier, c.id, {combine} AS score,
+           min(CASE WHEN c.src = 'v' THEN c.rnk ELSE :limit + c.rnk END) AS ord
+    FROM cand c
+    GROUP BY c.pt, c.tier, c.id
+),
+diverse AS (
+    SELECT f.pt, f.tier, f.id, f.score, f.ord,
+           row_number() OVER (PARTITION BY f.pt, f.tier, k.filename ORDER BY f.score DESC, f.ord) AS file_rank
+    FROM fused f JOIN knowledge_chunks k ON k.id = f.id
+),
+placed AS (
+    SELECT d.*, row_number() OVER (
+        PARTITION BY d.pt, d.tier ORDER BY d.file_rank > 1, d.score DESC, d.ord
+    ) AS pos
+    FROM diverse d
+)
+SELECT p.pt, p.tier, 'f' AS src, p.id, left(k.content, :max_chars) AS content, k.filename, k.category, p.score
+FROM placed p
+JOIN lims l ON l.pt = p.pt AND l.tier = p.tier
+JOIN knowledge_chunks k ON k.id = p.id
+WHERE p.pos <= l.lim
+ORDER BY p.pt, p.tier, p.pos"""
+
+# WHY: Weighted = hybrid_merge's formula (absent source scores 0). RRF ignores raw scores —
+# ts_rank and cosine similarity live on unrelated scales — and keeps the same weights per source
+_FUSION_COMBINE = {
+    "weighted": "CAST(:vw AS float8) * COALESCE(max(c.norm) FILTER (WHERE c.src = 'v'), 0)"
+                " + CAST(:kw AS float8) * COALESCE(max(c.norm) FILTER (WHERE c.src = 'k'), 0)",
+    "rrf": "CAST(:vw AS float8) * COALESCE(sum(1.0 / CAST(:rrf_k + c.rnk AS float8)) FILTER (WHERE c.src = 'v'), 0)"
+           " + CAST(:kw AS float8) * COALESCE(sum(1.0 / CAST(:rrf_k + c.rnk AS float8)) FILTER (WHERE c.src = 'k'), 0)",
+}
+# WHY: "python" = fetch both sources and hybrid_merge in the app (original path)
+FUSION_METHODS = ("python",) + tuple(_FUSION_COMBINE)
+# WHY: Standard RRF damping constant (Cormack et al.) — top ranks matter, but not overwhelmingly
+RRF_K = 60
+
+
+def _add_tier(
+    ctes: list[str], hits: list[str], prefix: str, tier: str, gate: str, cat_filter: str,
+    use_vector: bool, use_lexical: bool, keyword_retry: bool,
+    vec_categories: list[str] | None = None, vec_gate: str = "",
+) -> list[str]:
+    """Append *_vec / *_lex / *_kw CTEs for one tier and their hits selects; returns CTE names.
+
+    vec_categories: categories for the per-category vector scan (None = unfiltered scan);
+    vec_gate is added to each per-category branch.
+    """
+    names = []
+    if use_vector:
+        if vec_categories is None:
+            sql = _VECTOR_LATERAL.format(tier=tier, gate=gate)
+        else:
+            ctes.append(_vector_by_category(f"{prefix}_vec_cat", vec_categories, vec_gate))
+            sql = _VECTOR_FROM_CATEGORIES.format(source=f"{prefix}_vec_cat", tier=tier, gate=gate)
+        ctes.append(f"{prefix}_vec AS ({sql}\n)")
+        hits.append(f"SELECT pt, '{tier}', 'v', id, score FROM {prefix}_vec")
+        names.append(f"{prefix}_vec")
+    if use_lexical:
+        sql = _LEXICAL_LATERAL.format(param="query", tier=tier, gate=gate, cat_filter=cat_filter)
+        ctes.append(f"{prefix}_lex AS ({sql}\n)")
+        hits.append(f"SELECT pt, '{tier}', 'k', id, score FROM {prefix}_lex")
+        names.append(f"{prefix}_lex")
+        if keyword_retry:
+            kw_gate = gate + f"\n      AND NOT EXISTS (SELECT 1 FROM {prefix}_lex l WHERE l.pt = g.pt)"
+            sql = _LEXICAL_LATERAL.format(param="keywords", tier=tier, gate=kw_gate, cat_filter=cat_filter)
+            ctes.append(f"{prefix}_kw AS ({sql}\n)")
+            hits.append(f"SELECT pt, '{tier}', 'k', id, score FROM {prefix}_kw")
+            names.append(f"{prefix}_kw")
+    return names
+
+
+def _hits_cte(hits: list[str]) -> str:
+    return "hits (pt, tier, src, id, score) AS (\n    " + "\n    UNION ALL ".join(hits) + "\n)"
+
+
+def _fusion_sql(method: str) -> str:
+    if method not in _FUSION_COMBINE:
+        raise ValueError(f"Unknown fusion method {method!r} — expected one of {FUSION_METHODS}")
+    return _FUSION_SQL.format(combine=_FUSION_COMBINE[method])
+
+
+def _multi_group_sql(
+    use_vector: bool, use_lexical: bool, keyword_retry: bool, fusion: str | None = None,
+    vec_categories: tuple[list[str], list[str]] = ([], []),
+) -> str:
+    """Build the one-statement search: top-`limit` candidates per (prompt type, tier, source).
+
+    CTEs per tier (p = primary, f = fallback): *_vec (pgvector), *_lex (raw tsquery),
+    *_kw (extracted-keyword tsquery, only for groups where *_lex found nothing — the same
+    retry lexical_search does). Fallback CTEs only run for prompt types whose primary tier
+    found fewer than :min_primary distinct chunks — the same rule as search_knowledge_batch.
+    With fusion ("weighted" | "rrf") the final rows per group are fused in SQL instead.
+    vec_categories: distinct (primary, fallback) categories for the per-category vector scans.
+    """
+    ctes = ["""groups AS (
+    SELECT t.pt, t.tier, array_agg(t.category) AS cats
+    FROM unnest(CAST(:pts AS text[]), CAST(:tiers AS text[]), CAST(:cats AS text[]))
+         AS t(pt, tier, category)
+    GROUP BY t.pt, t.tier
+)"""]
+    hits: list[str] = []
+    sources = (use_vector, use_lexical, keyword_retry)
+
+    primary = _add_tier(ctes, hits, "p", "primary", "", _GROUP_CATEGORIES, *sources,
+                        vec_categories=vec_categories[0])
+    primary_ids = " UNION ALL ".join(f"SELECT pt, id FROM {n}" for n in primary)
+    ctes.append(f"""need_fallback AS (
+    SELECT g.pt FROM groups g
+    WHERE g.tier = 'fallback'
+      AND (SELECT count(DISTINCT h.id) FROM ({primary_ids}) h WHERE h.pt = g.pt) < :min_primary
+)""")
+    # WHY: A fallback category is only scanned if some prompt type that lists it needs fallback
+    _add_tier(ctes, hits, "f", "fallback", "\n      AND g.pt IN (SELECT pt FROM need_fallback)",
+              _GROUP_CATEGORIES, *sources, vec_categories=vec_categories[1], vec_gate="""
+          AND EXISTS (SELECT 1 FROM groups g JOIN need_fallback n ON n.pt = g.pt
+                      WHERE g.tier = 'fallback' AND {cat} = ANY(g.cats))""")
+    ctes.append(_hits_cte(hits))
+
+    if fusion:
+        # WHY: Fallback fills what primary left — same as `max_chunks - len(rows)` in Python
+        ctes.append("""lims AS (
+    SELECT g.pt, g.tier, CASE WHEN g.tier = 'primary' THEN :limit ELSE :limit - LEAST(:limit, (
+        SELECT count(DISTINCT h.id) FROM hits h WHERE h.pt = g.pt AND h.tier = 'primary'
+    )) END AS lim
+    FROM groups g
+)""")
+        return "WITH " + ",\n".join(ctes) + _fusion_sql(fusion)
+
+    return "WITH " + ",\n".join(ctes) + """
+SELECT h.pt, h.tier, h.src, h.id, left(k.content, :max_chars) AS content, k.filename, k.category, h.score
+FROM hits h
+JOIN knowledge_chunks k ON k.id = h.id
+ORDER BY h.pt, h.tier, h.src, h.score DESC"""
+
+
+def _fusion_params(limit: int) -> dict:
+    return {"vw": VECTOR_WEIGHT, "kw": KEYWORD_WEIGHT, "rrf_k": RRF_K, "limit": limit}
+
+
+def multi_group_search(
+    db: Session, query: str, query_embedding: list[float] | None,
+    groups: dict[str, tuple[list[str], list[str]]], limit: int, max_chars: int,
+    min_primary: int = 2, use_lexical: bool = True, fusion: str = "python",
+    ef_search: int | None = None,
+) -> dict[tuple[str, str], dict[str, list[tuple]]]:
+    """Candidates for every prompt type's primary + fallback categories in one round-trip.
+
+    groups: prompt_type -> (primary categories, fallback categories).
+    Returns {(prompt_type, "primary"|"fallback"): {"v": vector rows, "k": lexical rows}}
+    (sources without hits omitted), rows as (id, content, filename, category, score), best first, content cut to max_chars.
+    Pass query_embedding=None to skip vector search. Combine with select_group_rows().
+    With fusion "weighted"/"rrf" and both sources active, each group instead holds
+    {"f": final fused rows} — fallback groups already sized to what primary left.
+
+    WHY: The per-type path ran up to 12 queries (3 types × primary/fallback × vector/lexical);
+    this is one statement, and only the content prefix a prompt can use leaves the DB.
+    """
+    use_vector = query_embedding is not None
+    keywords = _extract_keywords(query)
+    keyword_retry = use_lexical and keywords != query
+    sql_fusion = fusion if fusion != "python" and use_vector and use_lexical else None
+    pts, tiers, cats = [], [], []
+    for prompt_type, (primary, fallback) in groups.items():
+        for tier, tier_cats in (("primary", primary), ("fallback", fallback)):
+            for category in tier_cats:
+                pts.append(prompt_type)
+                tiers.append(tier)
+                cats.append(category)
+
+    params = {
+        "pts": pts, "tiers": tiers, "cats": cats, "limit": limit,
+        "max_chars": max_chars, "min_primary": min_primary,
+    }
+    tier_cats = {"primary": [], "fallback": []}
+    for tier, category in zip(tiers, cats):
+        if category not in tier_cats[tier]:
+            tier_cats[tier].append(category)
+    if use_vector:
+        set_ef_search(db, ef_search)
+        params["emb"] = "[" + ",".join(str(x) for x in query_embedding) + "]"
+    if use_lexical:
+        params["query"] = query
+    if keyword_retry:
+        params["keywords"] = keywords
+    if sql_fusion:
+        params.update(_fusion_params(limit))
+
+    sql = _multi_group_sql(use_vector, use_lexical, keyword_retry, sql_fusion,
+                           (tier_cats["primary"], tier_cats["fallback"]))
+    result: dict[tuple[str, str], dict[str, list[tuple]]] = {}
+    for pt, tier, src, chunk_id, content, filename, category, score in db.execute(text(sql), params):
+        result.setdefault((pt, tier), {}).setdefault(src, []).append(
+            (chunk_id, content, filename, category, score)
+        )
+    return result
+
+
+def select_group_rows(
+    candidates: dict[str, list[tuple]], limit: int, use_vector: bool, use_lexical: bool,
+) -> list[tuple]:
+    """Final rows for one group — identical to vector_search / lexical_search / hybrid_merge
+    called with this limit, because each source's top-`limit` is a prefix of its candidates."""
+    if "f" in candidates:
+        # WHY: Fused in SQL (multi_group_search with fusion) — already final and sized
+        return candidates["f"][:limit]
+    v_rows = candidates.get("v", [])[:limit]
+    k_rows = candidates.get("k", [])[:limit]
+    if use_vector and use_lexical:
+        return hybrid_merge(v_rows, k_rows, limit)
+    return v_rows if use_vector else k_rows
+
+
+def fused_search(
+    db: Session, query: str, query_embedding: list[float], categories: list[str] | None,
+    limit: int, method: str = "weighted", ef_search: int | None = None,
+) -> list[tuple]:
+    """Hybrid search fused inside Postgres — one statement, only `limit` rows come back.
+
+    Returns (id, content, filename, category, fused_score), like hybrid_merge.
+    method "weighted" reproduces vector_search + lexical_search + hybrid_merge exactly
+    (VECTOR_WEIGHT/KEYWORD_WEIGHT over min-max normalized scores); "rrf" uses weighted
+    reciprocal rank fusion, 1 / (RRF_K + rank) per source.
+    """
+    keywords = _extract_keywords(query)
+    keyword_retry = keywords != query
+    set_ef_search(db, ef_search)
+    if categories:
+        ctes = ["groups AS (SELECT '' AS pt, 'primary' AS tier, CAST(:categories AS text[]) AS cats)"]
+        cat_filter, vec_categories = _GROUP_CATEGORIES, categories
+    else:
+        ctes = ["groups AS (SELECT '' AS pt, 'primary' AS tier)"]
+        cat_filter, vec_categories = "", None
+    hits: list[str] = []
+    _add_tier(ctes, hits, "p", "primary", "", cat_filter, True, True, keyword_retry,
+              vec_categories=vec_categories)
+    ctes.append(_hits_cte(hits))
+    ctes.append("lims AS (SELECT '' AS pt, 'primary' AS tier, CAST(:limit AS int) AS lim)")
+    sql = "WITH " + ",\n".join(ctes) + _fusion_sql(method)
+
+    params = {
+        "emb": "[" + ",".join(str(x) for x in query_embedding) + "]",
+        # WHY: Same full content as vector_search/lexical_search — callers format and cut it
+        "query": query, "max_chars": 2**31 - 1, **_fusion_params(limit),
+    }
+    if keyword_retry:
+        params["keywords"] = keywords
+    if categories:
+        params["categories"] = categories
+    return [tuple(r[3:]) for r in db.execute(text(sql), params)]
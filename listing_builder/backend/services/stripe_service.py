@@ -8,6 +8,8 @@ import secrets
 import stripe
 import structlog
 from datetime import datetime, timezone
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 
@@ -138,22 +140,50 @@ def validate_license(license_key: str, db: Session) -> bool:
     if not license_key:
         return False
 
-    license_obj = db.query(PremiumLicense).filter(
-        PremiumLicense.license_key == license_key,
-        PremiumLicense.status == "active",
-    ).first()
+    license_obj = db.execute(_active_license(license_key)).scalars().first()
+    if not license_obj:
+        return False
+    if _mark_if_expired(license_obj):
+        db.commit()
+        return False
+    return True
+
+
+async def avalidate_license(license_key: str, db: Session | AsyncSession) -> bool:
+    """Async validate_license — awaits on an AsyncSession, runs inline on a sync Session.
+
+    WHY: Called before every optimization; on the event loop a slow Supabase round-trip
+    would stall every other request.
+    """
+    if not isinstance(db, AsyncSession):
+        return validate_license(license_key, db)
+    if not license_key:
+        return False
 
+    license_obj = (await db.execute(_active_license(license_key))).scalars().first()
     if not license_obj:
         return False
+    if _mark_if_expired(license_obj):
+        await db.commit()
+        return False
+    return True
 
+
+def _active_license(license_key: str):
+    return select(PremiumLicense).where(
+        PremiumLicense.license_key == license_key,
+        PremiumLicense.status == "active",
+    ).limit(1)
+
+
+def _mark_if_expired(license_obj: PremiumLicense) -> bool:
+    """Flip status to expired when past expires_at. Caller commits. Returns True if expired."""
     # WHY: Monthly licenses can expire if Stripe says so
     if license_obj.expires_at and license_obj.expires_at < datetime.now(timezone.utc):
         license_obj.status = "expired"
         license_obj.updated_at = datetime.now(timezone.utc)
-        db.commit()
-        return False
-
-    return True
+        return True
+    return False
 
 
 def get_license_by_email(email: str, db: Session) -> str | None:
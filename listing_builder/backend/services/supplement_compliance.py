@@ -4,7 +4,9 @@
 
 import re
 import structlog
-from typing import Dict, List, Any
+from typing import Dict, Iterable, List, Any, Mapping, Tuple
+
+from services.phrase_matcher import PhraseMatcher
 
 logger = structlog.get_logger()
 
@@ -27,6 +29,12 @@ FORBIDDEN_HEALTH_CLAIMS = {
     "gwarantowana utrata wagi", "oczyszcza organizm z toksyn",
 }
 
+# WHY: Sorted — FORBIDDEN_HEALTH_CLAIMS is a set; matcher indexes must be stable across processes
+_CLAIMS = sorted(FORBIDDEN_HEALTH_CLAIMS)
+# WHY: Built once at import — one pass over the listing finds every forbidden claim
+# (was a fresh re.search per claim, plus up to 2 + len(bullets) more to find the field)
+_CLAIM_MATCHER = PhraseMatcher(_CLAIMS)
+
 # WHY: EU FIC 1169/2011 — 14 mandatory allergen declarations
 EU_ALLERGENS = [
     "gluten", "weizen", "wheat", "crustaceans", "krebstiere",
@@ -43,6 +51,7 @@ DOSAGE_CLAIM_PATTERNS = [
     r"(?:empfohlene|recommended).*(?:dosis|dose|dosierung)",
     r"(?:hochdosiert|high[- ]?dose)",
 ]
+_DOSAGE_CLAIM_RES = [re.compile(p, re.IGNORECASE) for p in DOSAGE_CLAIM_PATTERNS]
 
 
 def check_supplement_compliance(
@@ -56,23 +65,79 @@ def check_supplement_compliance(
 
     Returns: {status, issues, score, checks_run}
     """
+    result = _check(title, bullets, description, manufacturer)
+    logger.info("supplement_compliance_check",
+                status=result["status"], score=result["score"],
+                fails=result["summary"]["fail_count"], warnings=result["summary"]["warning_count"])
+    return result
+
+
+def check_supplement_compliance_batch(listings: Iterable[Mapping[str, Any]]) -> List[Dict[str, Any]]:
+    """check_supplement_compliance over many listings — one result per listing, in order.
+
+    Each listing is a dict with title, bullets, description and optional manufacturer/category.
+    WHY: Catalog checks reuse the import-time claim index and log one summary line
+    instead of one line per listing.
+    """
+    results = [
+        _check(
+            listing.get("title", ""), listing.get("bullets") or [], listing.get("description", ""),
+            listing.get("manufacturer", ""),
+        )
+        for listing in listings
+    ]
+    logger.info("supplement_compliance_batch", listings=len(results),
+                fails=sum(1 for r in results if r["status"] == "FAIL"),
+                warnings=sum(1 for r in results if r["status"] == "WARNING"))
+    return results
+
+
+def _claim_fields(title: str, bullets: List[str], description: str) -> Tuple[str, List[Tuple[str, str]]]:
+    """Lowercased full text + (claim, field) for every forbidden claim, in order of first occurrence.
+
+    WHY: One matcher pass over the joined text; each hit is attributed by its offsets.
+    A claim is reported once: title if it occurs there, else bullets if it occurs inside
+    one bullet, else description (which also covers hits spanning two fields).
+    Field edges are spaces in full_text, so \\b behaves as in the field alone.
+    """
+    lower_title = title.lower()
+    lower_bullets = [b.lower() for b in bullets]
+    full_text = f"{lower_title} {' '.join(lower_bullets)} {description.lower()}"
+
+    title_end = len(lower_title)
+    bullet_spans = []
+    offset = title_end + 1
+    for b in lower_bullets:
+        bullet_spans.append((offset, offset + len(b)))
+        offset += len(b) + 1
+
+    rank = {"title": 0, "bullets": 1, "description": 2}
+    fields: Dict[int, str] = {}
+    for start, end, idx in _CLAIM_MATCHER.finditer(full_text):
+        if end <= title_end:
+            field = "title"
+        elif any(lo <= start and end <= hi for lo, hi in bullet_spans):
+            field = "bullets"
+        else:
+            field = "description"
+        if idx not in fields or rank[field] < rank[fields[idx]]:
+            fields[idx] = field
+    return full_text, [(_CLAIMS[idx], field) for idx, field in fields.items()]
+
+
+def _check(title: str, bullets: List[str], description: str, manufacturer: str) -> Dict[str, Any]:
     issues: List[Dict[str, str]] = []
-    full_text = f"{title} {' '.join(bullets)} {description}".lower()
+    full_text, claim_fields = _claim_fields(title, bullets, description)
 
     # --- Check 1: EC 1924/2006 — Forbidden health claims ---
-    for claim in FORBIDDEN_HEALTH_CLAIMS:
-        # WHY: Word-boundary regex prevents false positives (e.g., "heilt" in "aufentheilt")
-        pattern = r"\b" + re.escape(claim) + r"\b"
-        if re.search(pattern, full_text):
-            field = "title" if re.search(pattern, title.lower()) else (
-                "bullets" if any(re.search(pattern, b.lower()) for b in bullets) else "description"
-            )
-            issues.append({
-                "field": field,
-                "severity": "FAIL",
-                "message": f"Forbidden health claim: '{claim}'",
-                "regulation": "EC 1924/2006 (Health Claims Regulation)",
-            })
+    # WHY: Word-boundary matching prevents false positives (e.g., "heilt" in "aufentheilt")
+    for claim, field in claim_fields:
+        issues.append({
+            "field": field,
+            "severity": "FAIL",
+            "message": f"Forbidden health claim: '{claim}'",
+            "regulation": "EC 1924/2006 (Health Claims Regulation)",
+        })
 
     # --- Check 2: GPSR — Manufacturer info ---
     if not manufacturer or len(manufacturer) < 10:
@@ -108,9 +173,8 @@ def check_supplement_compliance(
         })
 
     # --- Check 4: Dosage claims needing substantiation ---
-    for pattern in DOSAGE_CLAIM_PATTERNS:
-        matches = re.findall(pattern, full_text, re.IGNORECASE)
-        for match in matches:
+    for pattern in _DOSAGE_CLAIM_RES:
+        for match in pattern.findall(full_text):
             issues.append({
                 "field": "description",
                 "severity": "WARNING",
@@ -134,9 +198,6 @@ def check_supplement_compliance(
 
     status = "FAIL" if fail_count > 0 else ("WARNING" if warn_count > 0 else "PASS")
 
-    logger.info("supplement_compliance_check",
-                status=status, score=score, fails=fail_count, warnings=warn_count)
-
     return {
         "status": status,
         "score": score,
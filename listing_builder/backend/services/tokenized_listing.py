@@ -0,0 +1,126 @@
+# backend/services/tokenized_listing.py
+# Purpose: Tokenize a generated listing once — per-section word sets, counts, offsets, byte sizes
+# NOT for: Scoring rules (coverage, RJ, anti-stuffing, PPC, TOS consume this model)
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, Iterable, List, Set, Tuple
+
+from services.phrase_matcher import PhraseMatcher
+
+# WHY: Include digits — keywords often contain numbers ("750ml", "1 liter")
+WORD_RE = re.compile(r"[a-zA-Z0-9äöüßÄÖÜąćęłńóśźżĄĆĘŁŃÓŚŹŻ]+")
+# WHY: Letters only — anti-stuffing and TOS title repetition ignore numbers like "2" or "500"
+ALPHA_WORD_RE = re.compile(r"[a-zA-ZäöüßÄÖÜąćęłńóśźżĄĆĘŁŃÓŚŹŻ]+")
+
+
+@dataclass(frozen=True)
+class Section:
+    """One listing field, lowercased and tokenized.
+
+    start/end are offsets of `lower` inside TokenizedListing.lower — adjacent sections
+    can be searched as one slice without re-joining strings.
+    """
+    text: str
+    lower: str
+    start: int
+    end: int
+    words: FrozenSet[str]
+    alpha_counts: Dict[str, int]
+    n_bytes: int
+
+
+@dataclass(frozen=True)
+class TokenizedListing:
+    """Title, bullets, description and backend tokenized once for all post-generation scorers.
+
+    WHY: score_listing fans out to seven scorers that each re-lowercased and re-ran their own
+    regex over the same text. Sections are joined with single spaces in the order
+    title → bullets → description → backend, so `lower` and the unions of word sets match
+    what the scorers used to derive from their own concatenations.
+    """
+    title: Section
+    bullets: Section
+    description: Section
+    backend: Section
+    bullet_lines: Tuple[str, ...]
+    lower: str
+    words: FrozenSet[str]
+    visible_words: FrozenSet[str]
+    visible_text: str
+    _matches: Dict[PhraseMatcher, List[Tuple[int, int, int]]] = field(
+        default_factory=dict, repr=False, compare=False,
+    )
+
+    @classmethod
+    def build(
+        cls, title: str, bullets: List[str], description: str = "", backend: str = "",
+    ) -> "TokenizedListing":
+        texts = (title, " ".join(bullets), description, backend)
+        sections: List[Section] = []
+        offset = 0
+        for text in texts:
+            lower = text.lower()
+            sections.append(Section(
+                text=text,
+                lower=lower,
+                start=offset,
+                end=offset + len(lower),
+                words=frozenset(WORD_RE.findall(lower)),
+                alpha_counts=count_tokens(ALPHA_WORD_RE.findall(lower)),
+                n_bytes=len(text.encode("utf-8")),
+            ))
+            offset += len(lower) + 1
+        title_s, bullets_s, desc_s, backend_s = sections
+        visible_words = title_s.words | bullets_s.words | desc_s.words
+        return cls(
+            title=title_s,
+            bullets=bullets_s,
+            description=desc_s,
+            backend=backend_s,
+            bullet_lines=tuple(bullets),
+            lower=" ".join(s.lower for s in sections),
+            words=visible_words | backend_s.words,
+            visible_words=visible_words,
+            visible_text=f"{title} {texts[1]} {description}",
+        )
+
+    def span(self, first: Section, last: Section) -> str:
+        """Lowercased text from `first` through `last`, joined exactly as in `lower`."""
+        return self.lower[first.start:last.end]
+
+    def found(self, matcher: PhraseMatcher, *sections: Section) -> Set[int]:
+        """Phrase indexes matched inside any of `sections` (whole listing when none given).
+
+        WHY: One matcher pass over `lower` per keyword set, cached — section hits are
+        filtered by offset instead of rescanning title and bullets separately.
+        Section edges are spaces in `lower`, so \b behaves as in the section alone.
+        """
+        matches = self._matches.get(matcher)
+        if matches is None:
+            matches = self._matches[matcher] = list(matcher.finditer(self.lower))
+        if not sections:
+            return {idx for _, _, idx in matches}
+        found: Set[int] = set()
+        for section in sections:
+            lo, hi = section.start, section.end
+            found.update(idx for start, end, idx in matches if lo <= start and end <= hi)
+        return found
+
+    def counts(self, *sections: Section) -> Dict[str, int]:
+        """Alphabetic token counts over several sections, in first-occurrence order."""
+        merged: Dict[str, int] = {}
+        for section in sections:
+            for word, count in section.alpha_counts.items():
+                merged[word] = merged.get(word, 0) + count
+        return merged
+
+
+def count_tokens(tokens: Iterable[str]) -> Dict[str, int]:
+    counts: Dict[str, int] = {}
+    for t in tokens:
+        counts[t] = counts.get(t, 0) + 1
+    return counts
+
@@ -0,0 +1,231 @@
+# backend/services/tos_audit_service.py
+# Purpose: Catalog-wide Amazon TOS audit — stream 10k-100k listings (e.g. GET_MERCHANT_LISTINGS_ALL_DATA
+#          rows) through check_amazon_tos on a process pool, per-SKU violations + aggregate counts
+# NOT for: Single-listing checks (amazon_tos_checker.py) or downloading reports (sp_api_reports.py)
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import chain, islice
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+import structlog
+
+from services.amazon_tos_checker import check_amazon_tos
+
+logger = structlog.get_logger()
+
+# WHY: Listings per worker task — big enough to amortize pickling, small enough to keep
+# every worker busy and memory flat while the report streams in
+CHUNK_LISTINGS = 500
+# WHY: Below this many listings the process pool's start-up costs more than it saves
+MIN_PARALLEL_LISTINGS = 2000
+# WHY: Chunks queued per worker — bounds memory on 100k-row reports without starving the pool
+IN_FLIGHT_PER_WORKER = 2
+# WHY: Global cap — every /tos-audit request shares one pool, so concurrent audits queue
+# for these processes instead of each spawning their own
+MAX_WORKERS = min(4, os.cpu_count() or 1)
+DEFAULT_WORKERS = MAX_WORKERS
+
+# WHY: Column names differ between SP-API reports, flat-file templates and our own exports —
+# first non-empty alias wins
+SKU_COLUMNS = ("seller-sku", "sku", "SKU", "item_sku")
+ASIN_COLUMNS = ("asin1", "asin", "ASIN")
+TITLE_COLUMNS = ("item-name", "item_name", "title")
+DESCRIPTION_COLUMNS = ("item-description", "product_description", "description")
+BACKEND_COLUMNS = ("generic_keywords", "generic-keywords", "backend_keywords", "search_terms")
+BULLET_PREFIXES = ("bullet_point", "bullet-point")
+MAX_BULLETS = 10
+
+# (sku, asin, title, bullets, description, backend_keywords) — what a worker receives
+Listing = Tuple[str, str, str, Tuple[str, ...], str, str]
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """The shared worker pool, started on first use.
+
+    WHY forkserver: the API process is multi-threaded (uvicorn, asyncio.to_thread, httpx and
+    SQLAlchemy pools) — fork() there can copy a lock held by another thread and deadlock the
+    child. Workers fork from a clean server process that has preloaded only this module,
+    so the claim rules compile once per worker, and start-up is paid once per process.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            ctx = multiprocessing.get_context("forkserver")
+            ctx.set_forkserver_preload([__name__])
+            _pool = ProcessPoolExecutor(max_workers=MAX_WORKERS, mp_context=ctx)
+        return _pool
+
+
+def shutdown_pool() -> None:
+    """Stop the worker pool (app lifespan shutdown). The next audit starts a fresh one."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _first(row: Mapping[str, Any], columns: Tuple[str, ...]) -> str:
+    for col in columns:
+        value = row.get(col)
+        if value:
+            return str(value)
+    return ""
+
+
+def listing_from_row(row: Mapping[str, Any]) -> Listing:
+    """Pick the audited fields out of one report/template row.
+
+    WHY: Project in the parent — report rows carry ~30 columns the audit never reads,
+    so only these six strings are pickled to the workers.
+    """
+    bullets = row.get("bullets")
+    if isinstance(bullets, (list, tuple)):
+        bullets = tuple(str(b) for b in bullets if b)
+    else:
+        bullets = tuple(
+            b for b in (
+                _first(row, tuple(f"{prefix}{i}" for prefix in BULLET_PREFIXES))
+                for i in range(1, MAX_BULLETS + 1)
+            ) if b
+        )
+    return (
+        _first(row, SKU_COLUMNS),
+        _first(row, ASIN_COLUMNS),
+        _first(row, TITLE_COLUMNS),
+        bullets,
+        _first(row, DESCRIPTION_COLUMNS),
+        _first(row, BACKEND_COLUMNS),
+    )
+
+
+def _audit_chunk(listings: List[Listing], marketplace: str) -> List[Dict[str, Any]]:
+    """check_amazon_tos over one chunk. Runs in a worker process.
+
+    WHY: Each worker imports amazon_tos_rules once, so CLAIM_MATCHER and the external-reference
+    regexes are compiled once per process, not per listing or per chunk.
+    """
+    results = []
+    for sku, asin, title, bullets, description, backend in listings:
+        tos = check_amazon_tos(title, list(bullets), description, backend, marketplace)
+        results.append({
+            "sku": sku,
+            "asin": asin,
+            "severity": tos["severity"],
+            "suppression_risk": tos["suppression_risk"],
+            "violations": tos["violations"],
+        })
+    return results
+
+
+def _chunks(rows: Iterable[Mapping[str, Any]], size: int) -> Iterator[List[Listing]]:
+    it = map(listing_from_row, rows)
+    while chunk := list(islice(it, size)):
+        yield chunk
+
+
+def iter_audit(
+    rows: Iterable[Mapping[str, Any]],
+    marketplace: str = "amazon",
+    workers: int = DEFAULT_WORKERS,
+    chunk_size: int = CHUNK_LISTINGS,
+) -> Iterator[Dict[str, Any]]:
+    """Yield one audit result per row, in input order, on the shared pool when it pays off.
+
+    rows may be a lazy iterator (csv.DictReader over an uploaded report) — it is consumed
+    chunk by chunk, with at most workers * IN_FLIGHT_PER_WORKER chunks held at once.
+    workers <= 1 audits inline; the pool itself never exceeds MAX_WORKERS processes.
+    """
+    chunks = _chunks(rows, chunk_size)
+    # WHY: Peek far enough to know whether the pool pays off without materializing the catalog
+    head: List[List[Listing]] = []
+    seen = 0
+    for chunk in chunks:
+        head.append(chunk)
+        seen += len(chunk)
+        if seen >= MIN_PARALLEL_LISTINGS:
+            break
+    chunks = chain(head, chunks)
+
+    if workers <= 1 or seen < MIN_PARALLEL_LISTINGS:
+        for chunk in chunks:
+            yield from _audit_chunk(chunk, marketplace)
+        return
+
+    pool = _get_pool()
+    in_flight = min(workers, MAX_WORKERS) * IN_FLIGHT_PER_WORKER
+    window: deque = deque()
+    try:
+        for chunk in chunks:
+            window.append(pool.submit(_audit_chunk, chunk, marketplace))
+            if len(window) >= in_flight:
+                yield from window.popleft().result()
+        while window:
+            yield from window.popleft().result()
+    except BrokenProcessPool:
+        # WHY: A dead worker breaks the whole executor — drop it so the next audit gets a new one
+        shutdown_pool()
+        raise
+    finally:
+        # WHY: Abandoned generator (client gone) — don't leave its chunks queued in the shared pool
+        for future in window:
+            future.cancel()
+
+
+def audit_catalog(
+    rows: Iterable[Mapping[str, Any]],
+    marketplace: str = "amazon",
+    workers: int = DEFAULT_WORKERS,
+    include_passing: bool = False,
+    chunk_size: int = CHUNK_LISTINGS,
+) -> Dict[str, Any]:
+    """Audit a whole catalog. Returns aggregate counts plus per-SKU results.
+
+    WHY include_passing=False: a 100k-SKU catalog is mostly clean — the response lists only
+    SKUs with violations; `summary.total` still counts every listing.
+    """
+    started = time.perf_counter()
+    by_severity = {"PASS": 0, "WARN": 0, "FAIL": 0}
+    violations_by_rule: Dict[str, int] = {}
+    listings_by_rule: Dict[str, int] = {}
+    listings: List[Dict[str, Any]] = []
+    total = violation_count = 0
+
+    for result in iter_audit(rows, marketplace, workers, chunk_size):
+        total += 1
+        by_severity[result["severity"]] += 1
+        violation_count += len(result["violations"])
+        rules = set()
+        for v in result["violations"]:
+            violations_by_rule[v["rule"]] = violations_by_rule.get(v["rule"], 0) + 1
+            rules.add(v["rule"])
+        for rule in rules:
+            listings_by_rule[rule] = listings_by_rule.get(rule, 0) + 1
+        if include_passing or result["violations"]:
+            listings.append(result)
+
+    elapsed = time.perf_counter() - started
+    summary = {
+        "total": total,
+        "by_severity": by_severity,
+        "suppression_risk": by_severity["FAIL"],
+        "violation_count": violation_count,
+        "violations_by_rule": dict(sorted(violations_by_rule.items(), key=lambda kv: -kv[1])),
+        "listings_by_rule": dict(sorted(listings_by_rule.items(), key=lambda kv: -kv[1])),
+        "elapsed_ms": round(elapsed * 1000, 1),
+        "listings_per_sec": round(total / elapsed, 1) if elapsed > 0 else 0.0,
+    }
+    logger.info("tos_audit_done", total=total, fail=by_severity["FAIL"], warn=by_severity["WARN"],
+                elapsed_ms=summary["elapsed_ms"])
+    return {"summary": summary, "listings": listings}
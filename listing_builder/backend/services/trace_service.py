@@ -29,6 +29,8 @@ def span(trace: dict, name: str):
     Yields the span dict so callers can attach token usage via record_llm_usage.
     """
     s = {"name": name, "start": time.monotonic(), "error": None}
+    # WHY: Offset from trace start — shows which spans overlapped (parallel LLM calls)
+    s["offset_ms"] = round((s["start"] - trace["start"]) * 1000, 1)
     try:
         yield s
     except Exception as exc:
@@ -61,15 +63,32 @@ def record_llm_usage(s: dict, usage: dict, accumulate: bool = False):
         s["model"] = usage.get("model", "unknown")
 
 
+def record_cache_result(s: dict, hit: bool, prefix: str = ""):
+    """Count a cache hit or miss on a span (several LLM calls can share one span).
+
+    prefix separates caches: "" = LLM response cache, "rag_" = knowledge search cache.
+    """
+    field = f"{prefix}cache_hits" if hit else f"{prefix}cache_misses"
+    s[field] = s.get(field, 0) + 1
+
+
 def finalize_trace(trace: dict) -> dict:
     """Compute totals and estimated cost. Returns a clean dict for JSON storage."""
     total_ms = round((time.monotonic() - trace["start"]) * 1000, 1)
 
     prompt_tokens = 0
     completion_tokens = 0
+    cache_hits = 0
+    cache_misses = 0
+    rag_cache_hits = 0
+    rag_cache_misses = 0
     for s in trace["spans"]:
         prompt_tokens += s.get("tokens_in", 0)
         completion_tokens += s.get("tokens_out", 0)
+        cache_hits += s.get("cache_hits", 0)
+        cache_misses += s.get("cache_misses", 0)
+        rag_cache_hits += s.get("rag_cache_hits", 0)
+        rag_cache_misses += s.get("rag_cache_misses", 0)
 
     total_tokens = prompt_tokens + completion_tokens
 
@@ -93,5 +112,9 @@ def finalize_trace(trace: dict) -> dict:
         "total_prompt_tokens": prompt_tokens,
         "total_completion_tokens": completion_tokens,
         "estimated_cost_usd": round(est_cost, 6),
+        "cache_hits": cache_hits,
+        "cache_misses": cache_misses,
+        "rag_cache_hits": rag_cache_hits,
+        "rag_cache_misses": rag_cache_misses,
         "spans": trace["spans"],
     }
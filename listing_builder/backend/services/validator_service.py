@@ -14,8 +14,8 @@ import structlog
 from sqlalchemy.orm import Session
 
 from models.validator import ValidationRun
-from services.llm_providers import call_llm
-from services.groq_client import call_groq, sanitize_llm_input
+from services.llm_providers import acall_llm
+from services.groq_client import acall_groq, sanitize_llm_input
 from services.validator_data_sources import (
     fetch_google_trends,
     fetch_allegro_competition,
@@ -147,18 +147,18 @@ async def analyze_product(
     competition_data = {"allegro": allegro_data, "amazon": amazon_data}
     prompt = _build_prompt(product_name, trends_data, competition_data, marketplace)
 
-    # WHY: Beast primary, Groq fallback. to_thread() prevents event loop blocking.
+    # WHY: Beast primary, Groq fallback. Native async clients — no executor thread per call.
     provider_used = "beast"
     tokens_used = 0
     try:
-        text, usage = await asyncio.to_thread(call_llm, "beast", "", None, prompt, 0.3, 1500)
+        text, usage = await acall_llm("beast", "", None, prompt, 0.3, 1500)
         if usage:
             tokens_used = usage.get("total_tokens", 0)
     except Exception as e:
         logger.warning("beast_failed_fallback_groq", error=str(e))
         provider_used = "groq"
         try:
-            text, usage = await asyncio.to_thread(call_groq, prompt, 0.3, 1500)
+            text, usage = await acall_groq(prompt, 0.3, 1500)
             if usage:
                 tokens_used = usage.get("total_tokens", 0)
         except Exception as e2:
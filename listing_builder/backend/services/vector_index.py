@@ -0,0 +1,276 @@
+# backend/services/vector_index.py
+# Purpose: In-process, memory-mapped nearest-neighbour index over knowledge_chunks embeddings (rag_mode "memory")
+# NOT for: Lexical search or hybrid merging (search_strategies.py), routing (knowledge_service.py)
+
+from __future__ import annotations
+
+import fcntl
+import json
+import os
+import shutil
+import threading
+import time
+from typing import Optional
+
+import numpy as np
+import structlog
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from config import settings
+from services import knowledge_cache
+
+logger = structlog.get_logger()
+
+# WHY: Layout of one export (a directory named v<knowledge_version>-<unix time ns>):
+#   vectors.npy  float32 (N, dim), L2-normalized, rows grouped by category
+#   ids.npy      int64 (N,) knowledge_chunks.id per row
+#   file_idx.npy int32 (N,) index into meta["filenames"]
+#   text_offsets.npy int64 (N + 1,) byte offsets into texts.bin (UTF-8 content)
+#   meta.json    version, dim, count, categories {name: [start, end)}, filenames
+# CURRENT in the index root names the live export — replaced atomically, so readers never
+# see a half-written index and old mmaps stay valid until they are dropped.
+CURRENT_FILE = "CURRENT"
+# WHY: Rows per matmul block — bounds the temporary score matrix to ~8 MB for 64 queries
+BLOCK_ROWS = 32768
+# WHY: Keep the previous export for readers that mapped it just before a swap
+KEEP_EXPORTS = 2
+
+
+class VectorIndex:
+    """Read-only cosine top-k over a memory-mapped export. Safe to share between threads."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        self.version: Optional[int] = meta["version"]
+        self.dim: int = meta["dim"]
+        self.categories: dict[str, tuple[int, int]] = {c: tuple(r) for c, r in meta["categories"].items()}
+        self.filenames: list[str] = meta["filenames"]
+        # WHY: mmap — pages load on first touch and are shared by every worker process
+        self.vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+        self.ids = np.load(os.path.join(path, "ids.npy"), mmap_mode="r")
+        self.file_idx = np.load(os.path.join(path, "file_idx.npy"), mmap_mode="r")
+        self.text_offsets = np.load(os.path.join(path, "text_offsets.npy"), mmap_mode="r")
+        texts_path = os.path.join(path, "texts.bin")
+        self.texts = (np.memmap(texts_path, dtype=np.uint8, mode="r")
+                      if os.path.getsize(texts_path) else np.zeros(0, dtype=np.uint8))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _slices(self, categories: list[str] | None) -> list[tuple[int, int]]:
+        if categories is None:
+            return [(0, len(self.ids))]
+        return [self.categories[c] for c in dict.fromkeys(categories) if c in self.categories]
+
+    def topk(
+        self, queries: np.ndarray, categories: list[str] | None, limit: int,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Batched cosine top-k: queries (m, dim) → (row indices, scores), each (m, ≤limit), best first.
+
+        WHY: Per-category row ranges are contiguous, so filtering is slicing — no scan of
+        other categories. One (m × block) matmul per block, argpartition keeps it O(rows).
+        """
+        if limit <= 0:
+            empty = np.empty((len(queries), 0))
+            return empty.astype(np.int64), empty.astype(np.float32)
+        q = np.asarray(queries, dtype=np.float32)
+        q = q / np.maximum(np.linalg.norm(q, axis=1, keepdims=True), 1e-12)
+        best_rows = np.empty((len(q), 0), dtype=np.int64)
+        best_scores = np.empty((len(q), 0), dtype=np.float32)
+        for start, end in self._slices(categories):
+            for lo in range(start, end, BLOCK_ROWS):
+                hi = min(end, lo + BLOCK_ROWS)
+                scores = q @ self.vectors[lo:hi].T
+                k = min(limit, hi - lo)
+                part = np.argpartition(-scores, k - 1, axis=1)[:, :k] if k < hi - lo else \
+                    np.broadcast_to(np.arange(hi - lo), (len(q), hi - lo))
+                best_rows = np.concatenate([best_rows, part + lo], axis=1)
+                best_scores = np.concatenate([best_scores, np.take_along_axis(scores, part, axis=1)], axis=1)
+        # WHY: Stable sort on -score, then row index — deterministic order for equal scores
+        order = np.lexsort((best_rows, -best_scores), axis=1)[:, :limit]
+        return np.take_along_axis(best_rows, order, axis=1), np.take_along_axis(best_scores, order, axis=1)
+
+    def row(self, i: int, score: float) -> tuple:
+        """(id, content, filename, category, score) — same shape as vector_search rows."""
+        lo, hi = int(self.text_offsets[i]), int(self.text_offsets[i + 1])
+        content = self.texts[lo:hi].tobytes().decode("utf-8")
+        category = next(c for c, (s, e) in self.categories.items() if s <= i < e)
+        return (int(self.ids[i]), content, self.filenames[int(self.file_idx[i])], category, float(score))
+
+    def search(self, query_embedding: list[float], categories: list[str] | None, limit: int) -> list[tuple]:
+        rows, scores = self.topk(np.asarray([query_embedding]), categories, limit)
+        return [self.row(int(i), s) for i, s in zip(rows[0], scores[0])]
+
+
+# ── Export (ingestion step) ──
+
+def export_index(db: Session, root: str | None = None) -> str:
+    """Write a new export of every embedded chunk under root and make it CURRENT. Returns its path.
+
+    WHY: One REPEATABLE READ snapshot — the row count, rows and knowledge_version stamp all
+    describe the same table state, so the version check can tell exactly when it went stale.
+    """
+    root = root or settings.vector_index_dir
+    os.makedirs(root, exist_ok=True)
+    db.execute(text("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ"))
+    try:
+        version = db.execute(text("SELECT version FROM knowledge_version WHERE id = 1")).scalar()
+    except Exception:
+        db.rollback()
+        db.execute(text("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ"))
+        version = None
+    count, dim = db.execute(text(
+        "SELECT count(*), max(vector_dims(embedding)) FROM knowledge_chunks WHERE embedding IS NOT NULL"
+    )).one()
+    dim = dim or 0
+
+    path = os.path.join(root, f"v{version if version is not None else 'x'}-{time.time_ns()}")
+    tmp = path + ".tmp"
+    os.makedirs(tmp)
+    vectors = np.lib.format.open_memmap(os.path.join(tmp, "vectors.npy"), mode="w+",
+                                        dtype=np.float32, shape=(count, dim))
+    ids = np.empty(count, dtype=np.int64)
+    file_idx = np.empty(count, dtype=np.int32)
+    offsets = np.zeros(count + 1, dtype=np.int64)
+    categories: dict[str, list[int]] = {}
+    filenames: dict[str, int] = {}
+
+    result = db.execute(
+        text("SELECT id, category, filename, content, embedding::text FROM knowledge_chunks "
+             "WHERE embedding IS NOT NULL ORDER BY category, id"),
+        execution_options={"stream_results": True, "yield_per": 1000},
+    )
+    i = 0
+    with open(os.path.join(tmp, "texts.bin"), "wb") as texts:
+        for chunk_id, category, filename, content, embedding in result:
+            vec = np.array(embedding.strip("[]").split(","), dtype=np.float32)
+            vectors[i] = vec / max(float(np.linalg.norm(vec)), 1e-12)
+            ids[i] = chunk_id
+            file_idx[i] = filenames.setdefault(filename, len(filenames))
+            encoded = content.encode("utf-8")
+            texts.write(encoded)
+            offsets[i + 1] = offsets[i] + len(encoded)
+            categories.setdefault(category, [i, i])[1] = i + 1
+            i += 1
+    db.rollback()
+    if i != count:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise RuntimeError(f"knowledge_chunks changed during export ({i} rows read, {count} counted)")
+
+    vectors.flush()
+    del vectors
+    np.save(os.path.join(tmp, "ids.npy"), ids)
+    np.save(os.path.join(tmp, "file_idx.npy"), file_idx)
+    np.save(os.path.join(tmp, "text_offsets.npy"), offsets)
+    with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({"version": version, "dim": dim, "count": count, "categories": categories,
+                   "filenames": list(filenames)}, f)
+    os.rename(tmp, path)
+    _write_current(root, os.path.basename(path))
+    _prune(root, os.path.basename(path))
+    logger.info("vector_index_exported", path=path, rows=count, version=version)
+    return path
+
+
+def _write_current(root: str, name: str) -> None:
+    tmp = os.path.join(root, CURRENT_FILE + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(name)
+    os.replace(tmp, os.path.join(root, CURRENT_FILE))
+
+
+def _prune(root: str, current: str) -> None:
+    exports = sorted(
+        (d for d in os.listdir(root) if d.startswith("v") and not d.endswith(".tmp") and d != current),
+        key=lambda d: os.path.getmtime(os.path.join(root, d)),
+    )
+    for old in exports[:max(0, len(exports) - (KEEP_EXPORTS - 1))]:
+        shutil.rmtree(os.path.join(root, old), ignore_errors=True)
+
+
+# ── Process-wide index ──
+
+_index: Optional[VectorIndex] = None
+_index_lock = threading.Lock()
+_rebuilding = threading.Event()
+
+
+def _load_current(root: str) -> Optional[VectorIndex]:
+    """Swap in the CURRENT export if it differs from the loaded one (cheap: one small file read)."""
+    global _index
+    try:
+        with open(os.path.join(root, CURRENT_FILE), encoding="utf-8") as f:
+            name = f.read().strip()
+    except FileNotFoundError:
+        return None
+    path = os.path.join(root, name)
+    if _index is None or _index.path != path:
+        with _index_lock:
+            if _index is None or _index.path != path:
+                _index = VectorIndex(path)
+                logger.info("vector_index_loaded", path=path, rows=len(_index), version=_index.version)
+    return _index
+
+
+def _rebuild_in_background(root: str) -> None:
+    """Export a fresh index on a worker thread — at most one per process, one across processes."""
+    if _rebuilding.is_set():
+        return
+    _rebuilding.set()
+
+    def run():
+        from database import SessionLocal
+
+        try:
+            os.makedirs(root, exist_ok=True)
+            # WHY: Every uvicorn worker notices the same version bump — one exports, the rest
+            # pick the result up through CURRENT
+            with open(os.path.join(root, ".lock"), "w") as lock:
+                try:
+                    fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    return
+                db = SessionLocal()
+                try:
+                    export_index(db, root)
+                finally:
+                    db.close()
+        except Exception as e:
+            logger.warning("vector_index_rebuild_failed", error=str(e)[:200])
+        finally:
+            _rebuilding.clear()
+
+    threading.Thread(target=run, name="vector-index-rebuild", daemon=True).start()
+
+
+def get_index(db: Session) -> Optional[VectorIndex]:
+    """Loaded index if it matches knowledge_chunks, else None (caller searches Postgres).
+
+    WHY: A stale index would hide new chunks and return deleted ones — serve from the DB
+    until the background export for the new knowledge_version lands.
+    """
+    root = settings.vector_index_dir
+    try:
+        index = _load_current(root)
+    except Exception as e:
+        logger.warning("vector_index_load_failed", error=str(e)[:200])
+        index = None
+    version = knowledge_cache.knowledge_version(db)
+    if index is not None and (version is None or index.version == version):
+        return index
+    if settings.vector_index_auto_rebuild:
+        _rebuild_in_background(root)
+    return None
+
+
+def search(
+    db: Session, query_embedding: list[float], categories: list[str] | None, limit: int,
+) -> Optional[list[tuple]]:
+    """vector_search() from memory, or None when no up-to-date index is available."""
+    index = get_index(db)
+    if index is None or len(query_embedding) != index.dim:
+        return None
+    return index.search(query_embedding, categories, limit)
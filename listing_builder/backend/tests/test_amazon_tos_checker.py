@@ -208,3 +208,34 @@ class TestSeverityAggregation:
         assert result["severity"] == "PASS"
         assert result["suppression_risk"] is False
         assert result["violation_count"] == 0
+
+
+class TestClaimMatcher:
+    """CLAIM_MATCHER must report exactly what the per-category alternation regexes found."""
+
+    def test_agrees_with_category_regexes(self):
+        import random
+        from services.amazon_tos_checker import _check_prohibited_claims
+        from services.amazon_tos_rules import CLAIM_CATEGORIES, _build_phrase_pattern
+
+        # WHY: The pre-CLAIM_MATCHER rules — one \b(?:a|b|…)\b regex per category, run in order
+        category_res = [
+            (_build_phrase_pattern(phrases), rule, severity, label)
+            for phrases, rule, severity, label in CLAIM_CATEGORIES
+        ]
+        phrases = [p for cat in CLAIM_CATEGORIES for p in cat[0]]
+        extra = "a x İ ß - , . # 1 no nr best top free sales deal-breaker eco carbon".split()
+        rnd = random.Random(24)
+        for _ in range(3000):
+            text = "".join(
+                (w.upper() if rnd.random() < 0.3 else w) + rnd.choice([" ", "", "-", ", "])
+                for w in (rnd.choice(phrases + extra) for _ in range(rnd.randint(0, 25)))
+            )
+            expected = [
+                {"rule": rule, "severity": severity, "message": f"{label}: '{m.group()}'", "field": "content"}
+                for pattern, rule, severity, label in category_res
+                for m in pattern.finditer(text)
+            ]
+            found = []
+            _check_prohibited_claims(text, found)
+            assert found == expected, text
@@ -0,0 +1,73 @@
+# backend/tests/test_async_db.py
+# Purpose: Async DB layer — asyncpg URL translation and sync-Session fallbacks of the hot-path helpers
+# NOT for: Real asyncpg connections (no Postgres in tests)
+
+import pytest
+
+from models.premium_license import PremiumLicense
+
+
+class TestAsyncDatabaseUrl:
+
+    def test_postgres_url_uses_asyncpg(self):
+        from database import async_database_url
+        url, connect_args = async_database_url("postgresql://u:p@db.example.com:5432/app")
+        assert url == "postgresql+asyncpg://u:p@db.example.com:5432/app"
+        assert connect_args == {}
+
+    def test_sslmode_becomes_ssl_connect_arg(self):
+        from database import async_database_url
+        url, connect_args = async_database_url("postgresql://u:p@h:5432/app?sslmode=require")
+        assert "sslmode" not in url
+        assert connect_args["ssl"] == "require"
+
+    def test_transaction_pooler_disables_statement_cache(self):
+        from database import async_database_url
+        url, connect_args = async_database_url("postgresql://u:p@pooler.supabase.com:6543/postgres")
+        assert connect_args["statement_cache_size"] == 0
+        assert "prepared_statement_cache_size=0" in url
+
+    def test_sqlite_has_no_async_url(self):
+        from database import async_database_url
+        assert async_database_url("sqlite:///./test.db") is None
+
+
+class TestAsyncDependency:
+
+    @pytest.mark.asyncio
+    async def test_get_async_db_yields_none_when_disabled(self, mock_settings):
+        from database import get_async_db
+        gen = get_async_db()
+        assert await gen.__anext__() is None
+
+
+class TestSyncSessionFallback:
+
+    @pytest.mark.asyncio
+    async def test_avalidate_license_on_sync_session(self, db_session):
+        from services.stripe_service import avalidate_license
+        db_session.add(PremiumLicense(
+            email="test@example.com", license_key="valid-key-12345678",
+            plan_type="monthly", status="active",
+        ))
+        db_session.commit()
+        assert await avalidate_license("valid-key-12345678", db_session) is True
+        assert await avalidate_license("nonexistent-key", db_session) is False
+
+    @pytest.mark.asyncio
+    async def test_aget_past_successes_swallows_errors(self, db_session):
+        from services.learning_service import aget_past_successes
+        # WHY: listing_history is a raw-SQL table, absent from SQLite → fetch fails → []
+        assert await aget_past_successes(db_session, "amazon_de") == []
+
+    @pytest.mark.asyncio
+    async def test_run_db_calls_sync_fn_inline(self, db_session):
+        from database import run_db
+        assert await run_db(db_session, lambda s, x: (s, x), 7) == (db_session, 7)
+
+    @pytest.mark.asyncio
+    async def test_task_session_is_separate_session_on_same_engine(self, db_session):
+        from database import task_session
+        async with task_session(db_session) as task_db:
+            assert task_db is not db_session
+            assert task_db.get_bind() is db_session.get_bind()
@@ -0,0 +1,202 @@
+# backend/tests/test_batch_job_service.py
+# Purpose: Background batch jobs — persistence per item, resume, SSE replay (SQLite, no LLM)
+# NOT for: Concurrency engine details (see test_batch_optimizer.py)
+
+import asyncio
+
+import pytest
+from unittest.mock import patch
+
+from models.optimization import OptimizationRun, OptimizationBatchJob
+from services import batch_job_service
+from services.batch_job_service import (
+    create_job, run_job, get_job_results, stream_job_events, parse_last_event_id,
+)
+from tests.conftest import TestSessionLocal
+
+
+def _product(i, **extra):
+    return {
+        "product_title": f"Produkt {i}", "brand": "BrandX", "marketplace": "amazon_de",
+        "mode": "aggressive", "keywords": [{"phrase": "trinkflasche", "search_volume": 100}],
+        **extra,
+    }
+
+
+def _result(title):
+    return {
+        "status": "success",
+        "listing": {"title": title},
+        "scores": {"coverage_pct": 90},
+        "compliance": {"status": "PASS"},
+    }
+
+
+@pytest.fixture
+def fake_optimize():
+    async def _fake(**kwargs):
+        if "FAIL" in kwargs["product_title"]:
+            raise ValueError("bad json from LLM")
+        return _result(kwargs["product_title"])
+
+    with patch.object(batch_job_service, "optimize_listing", side_effect=_fake) as m:
+        yield m
+
+
+class TestCreateJob:
+    def test_api_keys_not_persisted(self, db_session):
+        job = create_job(db_session, "user-1", [_product(0, llm_provider="openai", llm_api_key="sk-secret")])
+        assert "llm_api_key" not in job.request_data["products"][0]
+        assert batch_job_service._job_api_keys[job.id] == {0: "sk-secret"}
+        batch_job_service._job_api_keys.pop(job.id, None)
+
+
+class TestRunJob:
+    async def test_persists_each_item(self, db_session, fake_optimize):
+        job = create_job(db_session, "user-1", [_product(0), _product("FAIL"), _product(2)])
+        await run_job(job.id, TestSessionLocal)
+
+        db_session.expire_all()
+        job = db_session.get(OptimizationBatchJob, job.id)
+        assert job.status == "completed"
+        assert job.completed_count == 2
+        assert job.failed_count == 1
+        assert [e["index"] for e in job.error_log] == [1]
+
+        runs = db_session.query(OptimizationRun).filter(OptimizationRun.batch_job_id == job.id).all()
+        assert sorted(r.batch_index for r in runs) == [0, 2]
+        assert all(r.user_id == "user-1" for r in runs)
+
+    async def test_resume_only_runs_missing_items(self, db_session, fake_optimize):
+        job = create_job(db_session, "user-1", [_product(0), _product(1)])
+        db_session.add(OptimizationRun(
+            user_id="user-1", product_title="Produkt 0", brand="BrandX", marketplace="amazon_de",
+            mode="aggressive", response_data=_result("old"), batch_job_id=job.id, batch_index=0,
+        ))
+        db_session.commit()
+
+        await run_job(job.id, TestSessionLocal)
+
+        titles = [c.kwargs["product_title"] for c in fake_optimize.call_args_list]
+        assert titles == ["Produkt 1"]
+        db_session.expire_all()
+        assert db_session.get(OptimizationBatchJob, job.id).completed_count == 2
+
+    def test_item_saved_once(self, db_session):
+        job = create_job(db_session, "user-1", [_product(0)])
+        result = {"status": "completed", "data": _result("Produkt 0")}
+        batch_job_service._save_item(db_session, job, 0, _product(0), result)
+        # WHY: A second worker (or a resume) finishing the same item must not add a row
+        batch_job_service._save_item(db_session, job, 0, _product(0), result)
+
+        runs = db_session.query(OptimizationRun).filter(OptimizationRun.batch_job_id == job.id).all()
+        assert len(runs) == 1
+        assert db_session.get(OptimizationBatchJob, job.id).completed_count == 1
+
+    async def test_start_job_keeps_task_reference(self, db_session, fake_optimize):
+        job = create_job(db_session, "user-1", [_product(0)])
+        assert batch_job_service.start_job(job.id, TestSessionLocal)
+        [task] = batch_job_service._job_tasks
+        await task
+        assert not batch_job_service._job_tasks
+
+    async def test_rate_limit_stops_job(self, db_session):
+        async def _limited(**kwargs):
+            raise RuntimeError("Error code: 429 rate_limit_exceeded")
+
+        job = create_job(db_session, "user-1", [_product(i) for i in range(3)], concurrency=1)
+        with patch.object(batch_job_service, "optimize_listing", side_effect=_limited):
+            await run_job(job.id, TestSessionLocal)
+
+        db_session.expire_all()
+        job = db_session.get(OptimizationBatchJob, job.id)
+        assert job.status == "failed"
+        assert job.error_message == batch_job_service.ERROR_RATE_LIMITED_JOB
+        assert job.failed_count == 3
+
+
+class TestApiKeys:
+    async def test_lost_key_fails_item_instead_of_using_groq(self, db_session, fake_optimize):
+        job = create_job(db_session, "user-1", [_product(0, llm_provider="openai", llm_api_key="sk-secret"),
+                                                _product(1)])
+        # WHY: A restart empties the in-memory key store
+        batch_job_service._job_api_keys.pop(job.id)
+        await run_job(job.id, TestSessionLocal)
+
+        assert [c.kwargs["product_title"] for c in fake_optimize.call_args_list] == ["Produkt 1"]
+        db_session.expire_all()
+        job = db_session.get(OptimizationBatchJob, job.id)
+        assert job.status == "failed"
+        assert job.error_message == batch_job_service.ERROR_API_KEY_REQUIRED
+        assert job.error_log[0]["error"] == batch_job_service.ERROR_API_KEY_REQUIRED
+
+    async def test_resupplied_key_is_used(self, db_session, fake_optimize):
+        job = create_job(db_session, "user-1", [_product(0, llm_provider="openai")])
+        assert batch_job_service.supply_api_keys(job, {"openai": "sk-again"}) == 1
+        await run_job(job.id, TestSessionLocal)
+
+        [call] = fake_optimize.call_args_list
+        assert call.kwargs["provider_config"] == {"provider": "openai", "api_key": "sk-again"}
+        # WHY: Completed — keys are dropped right away
+        assert job.id not in batch_job_service._job_api_keys
+
+    def test_resume_body_rejects_unknown_provider(self):
+        from pydantic import ValidationError
+        from api.optimizer_routes import ResumeJobRequest
+
+        assert ResumeJobRequest(llm_api_keys={"openai": "sk"}).llm_api_keys == {"openai": "sk"}
+        with pytest.raises(ValidationError):
+            ResumeJobRequest(llm_api_keys={"claude": "sk"})
+
+    async def test_failed_job_keys_expire(self, db_session, monkeypatch):
+        monkeypatch.setattr(batch_job_service, "JOB_API_KEY_TTL_S", 0.01)
+
+        async def _limited(**kwargs):
+            raise RuntimeError("Error code: 429 rate_limit_exceeded")
+
+        job = create_job(db_session, "user-1", [_product(0, llm_provider="openai", llm_api_key="sk-secret")])
+        with patch.object(batch_job_service, "optimize_listing", side_effect=_limited):
+            await run_job(job.id, TestSessionLocal)
+        assert job.id in batch_job_service._job_api_keys
+        await asyncio.sleep(0.05)
+        assert job.id not in batch_job_service._job_api_keys
+
+    async def test_crashed_job_drops_keys(self, db_session, monkeypatch):
+        async def _crash(job_id, session_factory=None):
+            raise RuntimeError("worker died")
+
+        job = create_job(db_session, "user-1", [_product(0, llm_provider="openai", llm_api_key="sk-secret")])
+        monkeypatch.setattr(batch_job_service, "run_job", _crash)
+        await batch_job_service._run_job_guarded(job.id, TestSessionLocal)
+        assert job.id not in batch_job_service._job_api_keys
+
+
+class TestResultsAndStream:
+    async def test_partial_results_hide_retried_errors(self, db_session, fake_optimize):
+        job = create_job(db_session, "user-1", [_product(0), _product("FAIL")])
+        await run_job(job.id, TestSessionLocal)
+        db_session.expire_all()
+        job = db_session.get(OptimizationBatchJob, job.id)
+
+        out = get_job_results(db_session, job)
+        assert out["items_total"] == 1
+        assert out["items"][0]["result"]["listing"]["title"] == "Produkt 0"
+        assert [e["index"] for e in out["errors"]] == [1]
+
+    async def test_stream_replays_items_then_done(self, db_session, fake_optimize):
+        job = create_job(db_session, "user-1", [_product(0), _product("FAIL")])
+        await run_job(job.id, TestSessionLocal)
+
+        frames = [f async for f in stream_job_events(job.id, "user-1", session_factory=TestSessionLocal)]
+        events = [f.split("event: ")[1].split("\n")[0] for f in frames if "event: " in f]
+        assert events == ["item", "item", "progress", "done"]
+
+    async def test_stream_rejects_other_user(self, db_session, fake_optimize):
+        job = create_job(db_session, "user-1", [_product(0)])
+        frames = [f async for f in stream_job_events(job.id, "user-2", session_factory=TestSessionLocal)]
+        assert "event: error" in frames[0]
+
+    def test_parse_last_event_id(self):
+        assert parse_last_event_id("12:3") == (12, 3)
+        assert parse_last_event_id("garbage") == (0, 0)
+        assert parse_last_event_id(None) == (0, 0)
@@ -0,0 +1,117 @@
+# backend/tests/test_batch_optimizer.py
+# Purpose: Unit tests for the bounded-concurrency batch engine (no LLM, no DB)
+# NOT for: Route-level tests (see test_user_journeys.py)
+
+import asyncio
+import pytest
+
+from services import batch_optimizer
+from services.batch_optimizer import (
+    run_batch, provider_family, item_timeout,
+    ERROR_RATE_LIMIT, ERROR_SKIPPED, ERROR_TIMEOUT, ERROR_GENERIC,
+)
+
+
+def _groq(_item):
+    return "groq"
+
+
+class TestProviderFamily:
+    def test_gemini_variants_share_bucket(self):
+        assert provider_family("gemini_flash") == "gemini"
+        assert provider_family("gemini_pro") == "gemini"
+
+    def test_none_is_groq(self):
+        assert provider_family(None) == "groq"
+
+    def test_beast_gets_long_timeout(self):
+        assert item_timeout("beast") > item_timeout("groq")
+
+
+class TestRunBatch:
+    async def test_results_keep_input_order(self):
+        async def work(i, item):
+            await asyncio.sleep(0.01 * (5 - i))
+            return {"value": item}
+
+        out = await run_batch(list(range(5)), work, _groq, concurrency=5)
+        assert [r["data"]["value"] for r in out["results"]] == [0, 1, 2, 3, 4]
+        assert out["succeeded"] == 5
+        assert out["failed"] == 0
+        assert all(r["duration_ms"] > 0 for r in out["results"])
+
+    async def test_runs_items_concurrently(self):
+        async def work(i, item):
+            await asyncio.sleep(0.05)
+            return {}
+
+        out = await run_batch(list(range(4)), work, _groq, concurrency=4)
+        # WHY: Sequential would be ~200ms — concurrent should be close to one item
+        assert out["duration_ms"] < 150
+
+    async def test_provider_limit_caps_in_flight(self):
+        in_flight = 0
+        peak = 0
+
+        async def work(i, item):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return {}
+
+        await run_batch(list(range(6)), work, lambda _item: "beast", concurrency=6)
+        assert peak == batch_optimizer.PROVIDER_CONCURRENCY["beast"]
+
+    async def test_busy_provider_does_not_hold_batch_slots(self):
+        started = []
+
+        async def work(i, item):
+            started.append(item)
+            await asyncio.sleep(0.05)
+            return {}
+
+        # WHY: Beast runs one at a time — its queued items must leave the second slot to groq
+        await run_batch(["beast", "beast", "beast", "groq"], work, lambda item: item, concurrency=2)
+        assert started[:2] == ["beast", "groq"]
+
+    async def test_error_does_not_abort_batch(self):
+        async def work(i, item):
+            if i == 1:
+                raise ValueError("bad json")
+            return {}
+
+        out = await run_batch(list(range(3)), work, _groq, concurrency=1)
+        assert [r["status"] for r in out["results"]] == ["completed", "error", "completed"]
+        assert out["results"][1]["error"] == ERROR_GENERIC
+
+    async def test_rate_limit_skips_unstarted_items(self):
+        async def work(i, item):
+            if i == 1:
+                raise RuntimeError("Error code: 429 - rate_limit_exceeded")
+            return {}
+
+        out = await run_batch(list(range(4)), work, _groq, concurrency=1)
+        errors = [r["error"] for r in out["results"]]
+        assert errors == [None, ERROR_RATE_LIMIT, ERROR_SKIPPED, ERROR_SKIPPED]
+        assert out["rate_limited"] is True
+        assert out["failed"] == 3
+
+    async def test_timeout_marks_item(self, monkeypatch):
+        monkeypatch.setattr(batch_optimizer, "DEFAULT_ITEM_TIMEOUT", 0.01)
+
+        async def work(i, item):
+            await asyncio.sleep(1)
+            return {}
+
+        out = await run_batch([0], work, _groq)
+        assert out["results"][0]["error"] == ERROR_TIMEOUT
+
+    @pytest.mark.parametrize("requested,expected", [(0, 1), (99, batch_optimizer.BATCH_MAX_CONCURRENCY)])
+    async def test_concurrency_is_clamped(self, requested, expected):
+        async def work(i, item):
+            return {}
+
+        out = await run_batch([0], work, _groq, concurrency=requested)
+        assert out["concurrency"] == expected
@@ -0,0 +1,243 @@
+# backend/tests/test_embedding_backfill.py
+# Purpose: Embedding backfill runner — AIMD pacing, bulk writes, throttling/retries, checkpoint resume
+# NOT for: The SQL against a live Postgres or real embedding calls
+
+import threading
+
+import httpx
+import pytest
+
+from services import embedding_backfill
+from services.embedding_backfill import AIMDRate, _classify, format_eta, run_backfill
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestAIMDRate:
+    def test_additive_increase_multiplicative_decrease(self):
+        limiter = AIMDRate(1.0, clock=FakeClock())
+        for _ in range(10):
+            limiter.on_success()
+        assert limiter.rate == pytest.approx(1.0 + 10 * embedding_backfill.AIMD_INCREASE)
+        limiter.on_throttle()
+        assert limiter.rate == pytest.approx((1.0 + 10 * embedding_backfill.AIMD_INCREASE) / 2)
+        for _ in range(20):
+            limiter.on_throttle()
+        assert limiter.rate == embedding_backfill.MIN_RATE and limiter.throttled == 21
+
+    def test_pacing_and_retry_after(self):
+        clock = FakeClock()
+        limiter = AIMDRate(2.0, clock=clock)
+        assert limiter.delay() == 0
+        limiter.sent()
+        assert limiter.delay() == pytest.approx(0.5)
+        clock.now += 0.5
+        limiter.on_throttle(retry_after=30)
+        assert limiter.delay() == pytest.approx(30)
+
+    def test_unpaced_until_throttled(self):
+        limiter = AIMDRate(None, clock=FakeClock())
+        limiter.sent()
+        limiter.on_success()
+        assert limiter.delay() == 0 and limiter.rate is None
+        limiter.on_throttle()
+        assert limiter.rate == pytest.approx(embedding_backfill.AIMD_DECREASE)
+
+    def test_max_rate_caps_increase(self):
+        limiter = AIMDRate(1.0, max_rate=1.1, clock=FakeClock())
+        for _ in range(10):
+            limiter.on_success()
+        assert limiter.rate == pytest.approx(1.1)
+
+
+def _status_error(status, retry_after=None):
+    headers = {"retry-after": retry_after} if retry_after else {}
+    request = httpx.Request("POST", "https://example.test")
+    response = httpx.Response(status, headers=headers, request=request)
+    return httpx.HTTPStatusError(f"{status}", request=request, response=response)
+
+
+def test_classify():
+    assert _classify(_status_error(429, "12")) == ("throttle", 12.0)
+    assert _classify(_status_error(503)) == ("throttle", None)
+    assert _classify(_status_error(502)) == ("transient", None)
+    assert _classify(_status_error(400)) == ("error", None)
+    assert _classify(httpx.ReadTimeout("slow")) == ("transient", None)
+    assert format_eta(None) == "?" and format_eta(75) == "1m15s" and format_eta(7260) == "2h01m"
+
+
+class _Result:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def scalar(self):
+        return self.rows
+
+    def fetchall(self):
+        return self.rows
+
+
+class FakeBackfillDB:
+    """knowledge_chunks as {id: (source, embedding)}; applies the bulk UPDATE."""
+
+    def __init__(self, n=100, sources=("hormozi", "amazon")):
+        self.chunks = {i: (sources[i % len(sources)], None) for i in range(1, n + 1)}
+        self.updates = []
+        self.fail_on_update = None
+        self.version_bumps = 0
+
+    def _matching(self, params, sql):
+        src = params.get("src")
+        for cid, (source, emb) in sorted(self.chunks.items()):
+            if emb is not None or cid <= params["after"]:
+                continue
+            if src and ("ILIKE" in sql and src.strip("%") not in source or "source = " in sql and src != source):
+                continue
+            yield cid, f"chunk {cid}"
+
+    def execute(self, statement, params=None):
+        sql = str(statement)
+        if sql.startswith("SET LOCAL knowledge.defer_version_bump"):
+            return _Result(None)
+        if sql.startswith("UPDATE knowledge_version"):
+            self.version_bumps += 1
+            return _Result(None)
+        if sql.startswith("SELECT COUNT(*)"):
+            return _Result(len(list(self._matching(params, sql))))
+        if sql.startswith("SELECT id, content"):
+            return _Result(list(self._matching(params, sql))[:params["n"]])
+        if "UPDATE knowledge_chunks k" in sql:
+            if self.fail_on_update is not None and len(self.updates) == self.fail_on_update:
+                raise KeyboardInterrupt
+            self.updates.append(list(params["ids"]))
+            for cid, emb in zip(params["ids"], params["embs"]):
+                assert emb.startswith("[")
+                self.chunks[cid] = (self.chunks[cid][0], emb)
+            return _Result(None)
+        raise AssertionError(sql)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+def _embed(throttle_every=0):
+    calls = {"n": 0}
+    lock = threading.Lock()
+
+    def embed(texts):
+        with lock:
+            calls["n"] += 1
+            n = calls["n"]
+        if throttle_every and n % throttle_every == 0:
+            raise _status_error(429)
+        return [[float(len(t)), 0.5] for t in texts]
+
+    embed.calls = calls
+    return embed
+
+
+def _run(db, tmp_path, **kwargs):
+    kwargs.setdefault("batch_size", 10)
+    kwargs.setdefault("max_in_flight", 3)
+    kwargs.setdefault("limiter", AIMDRate(None))
+    kwargs.setdefault("embed", _embed())
+    return run_backfill(db, checkpoint_path=str(tmp_path / "ckpt.json"), log=lambda m: None, **kwargs)
+
+
+class TestRunBackfill:
+    def test_one_bulk_update_per_batch(self, tmp_path):
+        db = FakeBackfillDB(95)
+        stats = _run(db, tmp_path)
+        assert stats.done == 95 and stats.failed == 0 and stats.batches == 10
+        assert len(db.updates) == 10 and sorted(i for u in db.updates for i in u) == list(range(1, 96))
+        assert all(emb is not None for _, emb in db.chunks.values())
+        assert not (tmp_path / "ckpt.json").exists()
+        # WHY: Per-batch bumps are deferred — one cache invalidation for the whole run
+        assert db.version_bumps == 1
+
+    def test_nothing_to_embed_does_not_bump_version(self, tmp_path):
+        db = FakeBackfillDB(0)
+        _run(db, tmp_path)
+        assert db.version_bumps == 0
+
+    def test_throttled_batches_are_retried(self, tmp_path):
+        db = FakeBackfillDB(60)
+        limiter = AIMDRate(None)
+        stats = _run(db, tmp_path, embed=_embed(throttle_every=3), limiter=limiter)
+        assert stats.done == 60 and limiter.throttled > 0
+        assert all(emb is not None for _, emb in db.chunks.values())
+
+    def test_persistent_transient_errors_skip_the_batch(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(embedding_backfill, "MAX_ATTEMPTS", 2)
+        db = FakeBackfillDB(30)
+
+        def embed(texts):
+            if "chunk 11" in texts:
+                raise _status_error(502)
+            return [[1.0] for _ in texts]
+
+        stats = _run(db, tmp_path, embed=embed)
+        assert stats.done == 20 and stats.failed == 10
+        assert [cid for cid, (_, emb) in db.chunks.items() if emb is None] == list(range(11, 21))
+
+    def test_client_error_stops_the_run(self, tmp_path):
+        db = FakeBackfillDB(30)
+        calls = []
+
+        def embed(texts):
+            calls.append(texts)
+            if "chunk 11" in texts:
+                raise _status_error(400)
+            return [[1.0] for _ in texts]
+
+        with pytest.raises(httpx.HTTPStatusError):
+            _run(db, tmp_path, embed=embed, max_in_flight=1)
+        # WHY: No retries of the failing batch, nothing fetched after it
+        assert len(calls) == 2
+        assert (tmp_path / "ckpt.json").exists()
+
+    def test_short_embedding_response_stops_the_run(self, tmp_path):
+        db = FakeBackfillDB(20)
+        with pytest.raises(ValueError, match="returned 9 vectors for 10 chunks"):
+            _run(db, tmp_path, embed=lambda texts: [[1.0] for _ in texts[1:]], max_in_flight=1)
+        assert db.updates == []
+
+    def test_source_filter(self, tmp_path):
+        db = FakeBackfillDB(40)
+        assert _run(db, tmp_path, source="horm").done == 20
+        assert {s for s, emb in db.chunks.values() if emb is None} == {"amazon"}
+        assert _run(db, tmp_path, source="amaz", exact_source=True).done == 0
+        assert _run(db, tmp_path, source="amazon", exact_source=True).done == 20
+
+    def test_killed_run_resumes_from_checkpoint(self, tmp_path):
+        db = FakeBackfillDB(100)
+        db.fail_on_update = 4
+        with pytest.raises(KeyboardInterrupt):
+            _run(db, tmp_path, max_in_flight=1)
+        assert (tmp_path / "ckpt.json").exists()
+        assert db.version_bumps == 1
+
+        db.fail_on_update = None
+        stats = _run(db, tmp_path, max_in_flight=1)
+        assert stats.done == 100 and stats.total == 100
+        assert len(db.updates) == 10
+        assert not (tmp_path / "ckpt.json").exists()
+
+    def test_checkpoint_ignored_for_other_scope(self, tmp_path):
+        db = FakeBackfillDB(40)
+        db.fail_on_update = 1
+        with pytest.raises(KeyboardInterrupt):
+            _run(db, tmp_path, max_in_flight=1)
+        db.fail_on_update = None
+        stats = _run(db, tmp_path, source="hormozi")
+        # WHY: Checkpoint belongs to the unfiltered run — the hormozi run counts from scratch
+        assert stats.total == stats.done == sum(1 for s, e in db.chunks.values() if s == "hormozi") - 5
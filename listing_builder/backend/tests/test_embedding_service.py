@@ -0,0 +1,109 @@
+# backend/tests/test_embedding_service.py
+# Purpose: Query embedding cache + micro-batcher (no DB, no Cloudflare)
+# NOT for: Embedding quality or the Postgres tier (needs a real database)
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from services import embedding_service
+from services.embedding_service import EmbeddingBatcher, get_embedding
+
+
+@pytest.fixture
+def fake_cf(monkeypatch, test_settings):
+    """Replace the Cloudflare call; records every batch of texts sent."""
+    monkeypatch.setattr(test_settings, "cf_account_id", "acc")
+    monkeypatch.setattr(embedding_service, "settings", test_settings)
+    batches = []
+    fail = {"value": False}
+
+    async def _fetch(texts):
+        batches.append(list(texts))
+        if fail["value"]:
+            return None
+        return [[float(len(t)), 0.5] for t in texts]
+
+    monkeypatch.setattr(embedding_service, "_fetch_embeddings", _fetch)
+    monkeypatch.setattr(embedding_service, "_batcher", EmbeddingBatcher(embedding_service._fetch_and_store))
+    embedding_service.clear_embedding_cache()
+    yield batches, fail
+    embedding_service.clear_embedding_cache()
+
+
+class TestGetEmbedding:
+    async def test_concurrent_calls_share_one_request(self, fake_cf):
+        batches, _ = fake_cf
+        results = await asyncio.gather(*(get_embedding(f"query {i}") for i in range(5)))
+        assert len(batches) == 1
+        assert sorted(batches[0]) == sorted(f"query {i}" for i in range(5))
+        assert results[0] == [7.0, 0.5]
+
+    async def test_duplicate_texts_sent_once(self, fake_cf):
+        batches, _ = fake_cf
+        a, b = await asyncio.gather(get_embedding("same"), get_embedding("same"))
+        assert batches == [["same"]]
+        assert a == b and a is not b
+
+    async def test_second_call_served_from_lru(self, fake_cf):
+        batches, _ = fake_cf
+        first = await get_embedding("flasche")
+        first.append(99.0)  # WHY: Callers must not be able to corrupt the cached vector
+        assert await get_embedding("flasche") == [7.0, 0.5]
+        assert len(batches) == 1
+
+    async def test_failure_returns_none_and_is_not_cached(self, fake_cf):
+        batches, fail = fake_cf
+        fail["value"] = True
+        assert await get_embedding("flasche") is None
+        fail["value"] = False
+        assert await get_embedding("flasche") == [7.0, 0.5]
+        assert len(batches) == 2
+
+    async def test_no_account_skips_everything(self, fake_cf, test_settings, monkeypatch):
+        batches, _ = fake_cf
+        monkeypatch.setattr(test_settings, "cf_account_id", "")
+        assert await get_embedding("flasche") is None
+        assert batches == []
+
+
+class TestEmbeddingBatcher:
+    async def test_full_batch_sent_without_waiting_for_window(self):
+        sent = []
+
+        async def fetch(texts):
+            sent.append(list(texts))
+            return [[1.0] for _ in texts]
+
+        batcher = EmbeddingBatcher(fetch, window_s=60, max_batch=3)
+        results = await asyncio.wait_for(
+            asyncio.gather(*(batcher.submit(f"t{i}") for i in range(3))), timeout=1,
+        )
+        assert sent == [["t0", "t1", "t2"]]
+        assert results == [[1.0]] * 3
+
+    async def test_fetch_exception_resolves_callers_with_none(self):
+        async def fetch(texts):
+            raise RuntimeError("boom")
+
+        batcher = EmbeddingBatcher(fetch, window_s=0.001)
+        assert await batcher.submit("x") is None
+
+
+class TestFetchEmbeddings:
+    async def test_sends_text_list_over_shared_pool(self, monkeypatch, test_settings):
+        seen = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            seen.append(json.loads(request.content))
+            return httpx.Response(200, json={"success": True, "result": {"data": [[0.1], [0.2]]}})
+
+        pool = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        monkeypatch.setattr(embedding_service, "get_http_pool", lambda provider: pool)
+        monkeypatch.setattr(embedding_service, "settings", test_settings)
+        vectors = await embedding_service._fetch_embeddings(["a", "b"])
+        await pool.aclose()
+        assert seen == [{"text": ["a", "b"]}]
+        assert vectors == [[0.1], [0.2]]
@@ -0,0 +1,197 @@
+# backend/tests/test_groq_key_scheduler.py
+# Purpose: Groq key scheduler — weighting, quarantine, header parsing, client failover (no network)
+# NOT for: Real Groq rate limits (needs live keys)
+
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from services import groq_client
+from services.groq_key_scheduler import GroqKeyScheduler, parse_reset
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def scheduler(clock):
+    return GroqKeyScheduler(clock=clock)
+
+
+def _headers(remaining_req=100, limit_req=100, remaining_tok=6000, limit_tok=6000, reset="30s"):
+    return {
+        "x-ratelimit-remaining-requests": str(remaining_req),
+        "x-ratelimit-limit-requests": str(limit_req),
+        "x-ratelimit-remaining-tokens": str(remaining_tok),
+        "x-ratelimit-limit-tokens": str(limit_tok),
+        "x-ratelimit-reset-requests": reset,
+        "x-ratelimit-reset-tokens": reset,
+    }
+
+
+@pytest.mark.parametrize("value,expected", [
+    ("7.66s", 7.66), ("2m59.5s", 179.5), ("120ms", 0.12), ("1h2m", 3720.0), ("12", 12.0),
+    ("", None), (None, None), ("soon", None),
+])
+def test_parse_reset(value, expected):
+    assert parse_reset(value) == (pytest.approx(expected) if expected is not None else None)
+
+
+class TestOrder:
+    def test_unknown_keys_spread_round_robin(self, scheduler):
+        firsts = [scheduler.order(["a", "b", "c"], "m")[0] for _ in range(6)]
+        assert sorted(firsts) == ["a", "a", "b", "b", "c", "c"]
+
+    def test_weighted_by_remaining_budget(self, scheduler):
+        scheduler.record_success("a", "m", _headers(remaining_req=90))
+        scheduler.record_success("b", "m", _headers(remaining_req=30))
+        firsts = [scheduler.order(["a", "b"], "m")[0] for _ in range(120)]
+        assert firsts.count("a") == pytest.approx(90, abs=2)
+
+    def test_rate_limited_key_quarantined_until_retry_after(self, scheduler, clock):
+        scheduler.record_rate_limit("a", "m", {"retry-after": "20"})
+        assert scheduler.order(["a", "b"], "m") == ["b"]
+        clock.now += 21
+        assert "a" in scheduler.order(["a", "b"], "m")
+
+    def test_drained_bucket_quarantined_without_a_429(self, scheduler, clock):
+        scheduler.record_success("a", "m", _headers(remaining_req=0, reset="10s"))
+        assert scheduler.order(["a", "b"], "m") == ["b"]
+        clock.now += 11
+        assert "a" in scheduler.order(["a", "b"], "m")
+
+    def test_skips_key_without_tokens_for_request(self, scheduler):
+        scheduler.record_success("a", "m", _headers(remaining_tok=500))
+        assert scheduler.order(["a", "b"], "m", est_tokens=1500) == ["b"]
+
+    def test_all_quarantined_returns_soonest_reset_only(self, scheduler):
+        scheduler.record_rate_limit("a", "m", {"retry-after": "50"})
+        scheduler.record_rate_limit("b", "m", {"retry-after": "5"})
+        assert scheduler.order(["a", "b"], "m") == ["b"]
+
+    def test_limits_tracked_per_model(self, scheduler):
+        scheduler.record_rate_limit("a", "big", {"retry-after": "60"})
+        assert "a" in scheduler.order(["a", "b"], "small")
+
+    def test_snapshot_masks_keys(self, scheduler):
+        scheduler.record_rate_limit("gsk_secret_key_123", "m", {"retry-after": "5"})
+        snap = scheduler.snapshot()
+        assert snap[0]["key"] == "gsk_****_123"
+        assert snap[0]["quarantined"] is True
+
+
+async def test_agroq_chat_fails_over_and_records_headers(monkeypatch, scheduler):
+    """AsyncGroq on a mock transport: key k1 is rate limited, k2 answers."""
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.headers["authorization"] == "Bearer k1":
+            return httpx.Response(429, headers={"retry-after": "30"},
+                                  json={"error": {"message": "rate_limit_exceeded"}})
+        return httpx.Response(200, headers=_headers(remaining_req=99), json={
+            "id": "x", "object": "chat.completion", "created": 0, "model": "m",
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": " ok "}}],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+        })
+
+    pool = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(groq_client, "get_http_pool", lambda provider: pool)
+    monkeypatch.setattr(groq_client, "settings", SimpleNamespace(groq_api_keys=["k1", "k2"]))
+    monkeypatch.setattr(groq_client, "key_scheduler", scheduler)
+    monkeypatch.setattr(groq_client, "_async_client_cache", {})
+
+    text, usage = await groq_client.acall_groq("p", 0.4, 100)
+    assert text == "ok"
+    assert usage["total_tokens"] == 2
+
+    k1, k2 = scheduler.snapshot()
+    assert k1["rate_limited"] == 1 and k1["quarantined"]
+    assert k2["remaining_requests"] == 99
+    # WHY: Next call goes straight to k2 — no wasted round-trip on the quarantined key
+    assert scheduler.order(["k1", "k2"], groq_client.MODEL) == ["k2"]
+    await pool.aclose()
+
+
+def _ok_response():
+    return httpx.Response(200, headers=_headers(), json={
+        "id": "x", "object": "chat.completion", "created": 0, "model": "m",
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": "ok"}}],
+    })
+
+
+def _mock_groq(monkeypatch, scheduler, keys, handler):
+    pool = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(groq_client, "get_http_pool", lambda provider: pool)
+    monkeypatch.setattr(groq_client, "settings", SimpleNamespace(groq_api_keys=keys))
+    monkeypatch.setattr(groq_client, "key_scheduler", scheduler)
+    monkeypatch.setattr(groq_client, "_async_client_cache", {})
+    monkeypatch.setattr(groq_client, "TRANSIENT_BACKOFF_S", 0.0)
+    return pool
+
+
+async def test_agroq_chat_fails_over_on_server_error(monkeypatch, scheduler):
+    def handler(request):
+        if request.headers["authorization"] == "Bearer k1":
+            return httpx.Response(503, json={"error": {"message": "over capacity"}})
+        return _ok_response()
+
+    pool = _mock_groq(monkeypatch, scheduler, ["k1", "k2"], handler)
+    text, _ = await groq_client.acall_groq("p", 0.4, 100)
+    assert text == "ok"
+    k1, _k2 = scheduler.snapshot()
+    assert k1["errors"] == 1 and not k1["quarantined"]
+    await pool.aclose()
+
+
+async def test_agroq_chat_retries_single_key_on_connection_error(monkeypatch, scheduler):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if len(calls) < 3:
+            raise httpx.ConnectError("reset by peer")
+        return _ok_response()
+
+    pool = _mock_groq(monkeypatch, scheduler, ["k1"], handler)
+    text, _ = await groq_client.acall_groq("p", 0.4, 100)
+    assert text == "ok"
+    assert len(calls) == 1 + groq_client.TRANSIENT_RETRIES
+    await pool.aclose()
+
+
+async def test_agroq_chat_gives_up_after_transient_retries(monkeypatch, scheduler):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(502, json={"error": {"message": "bad gateway"}})
+
+    pool = _mock_groq(monkeypatch, scheduler, ["k1", "k2"], handler)
+    with pytest.raises(groq_client.APIStatusError):
+        await groq_client.acall_groq("p", 0.4, 100)
+    assert len(calls) == 2 + groq_client.TRANSIENT_RETRIES
+    await pool.aclose()
+
+
+async def test_agroq_chat_raises_client_error_without_retry(monkeypatch, scheduler):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(400, json={"error": {"message": "bad request"}})
+
+    pool = _mock_groq(monkeypatch, scheduler, ["k1", "k2"], handler)
+    with pytest.raises(groq_client.APIStatusError):
+        await groq_client.acall_groq("p", 0.4, 100)
+    assert len(calls) == 1
+    await pool.aclose()
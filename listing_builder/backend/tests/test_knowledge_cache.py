@@ -0,0 +1,134 @@
+# backend/tests/test_knowledge_cache.py
+# Purpose: RAG search result cache — normalization, hits, invalidation, trace counters (no DB, no LLM)
+# NOT for: Search ranking quality (needs real knowledge_chunks data)
+
+import pytest
+
+from services import knowledge_cache, knowledge_service
+from services.knowledge_cache import normalize_query
+from services.trace_service import new_trace, span, finalize_trace
+
+
+@pytest.fixture
+def fake_search(monkeypatch, test_settings):
+    """Count SQL searches; every search returns two chunk rows."""
+    calls = {"rows": 0, "embed": 0}
+    embedding = {"value": [0.1] * 384}
+
+    async def _rows(db, query, categories, limit, query_embedding=None):
+        calls["rows"] += 1
+        return [(1, f"chunk for {query}", "file.md", categories[0]), (2, "second", "f2.md", categories[0])]
+
+    def _multi(db, query, query_embedding, groups, limit, max_chars, min_primary=2, use_lexical=True,
+               fusion="python", ef_search=None):
+        calls["rows"] += 1
+        return {
+            (pt, "primary"): {"k": [(1, f"chunk for {query}", "file.md", cats[0], 1.0),
+                                    (2, "second", "f2.md", cats[0], 0.5)], "v": []}
+            for pt, (cats, _) in groups.items()
+        }
+
+    async def _expand(query):
+        return query
+
+    async def _embed(query):
+        calls["embed"] += 1
+        return embedding["value"]
+
+    monkeypatch.setattr(knowledge_service, "settings", test_settings)
+    monkeypatch.setattr(knowledge_cache, "settings", test_settings)
+    monkeypatch.setattr(knowledge_service, "_get_search_rows", _rows)
+    monkeypatch.setattr(knowledge_service, "multi_group_search", _multi)
+    monkeypatch.setattr(knowledge_service, "_expand_query", _expand)
+    monkeypatch.setattr(knowledge_service, "_get_embedding_if_needed", _embed)
+    # WHY: No knowledge_version table in tests — version fixed unless a test changes it
+    version = {"value": 1}
+    monkeypatch.setattr(knowledge_cache, "_read_version", lambda db: version["value"])
+    knowledge_cache.invalidate()
+    yield calls, embedding, version
+    knowledge_cache.invalidate()
+
+
+class TestNormalizeQuery:
+    def test_case_punctuation_and_order_insensitive(self):
+        assert normalize_query("Trinkflasche, Edelstahl!") == normalize_query("edelstahl  TRINKFLASCHE")
+
+    def test_duplicate_words_collapse(self):
+        assert normalize_query("flasche flasche 1l") == normalize_query("1l flasche")
+
+    def test_different_words_differ(self):
+        assert normalize_query("flasche 1l") != normalize_query("flasche 2l")
+
+
+class TestBatchCache:
+    async def test_second_search_is_a_hit(self, fake_search):
+        calls, _, _ = fake_search
+        first = await knowledge_service.search_knowledge_batch(None, "Trinkflasche Edelstahl")
+        searches = calls["rows"]
+        second = await knowledge_service.search_knowledge_batch(None, "edelstahl, trinkflasche")
+        assert calls["rows"] == searches
+        assert calls["embed"] == 1
+        assert second == first
+
+    async def test_hit_returns_fresh_prompt_contexts(self, fake_search):
+        first = await knowledge_service.search_knowledge_parts(None, "flasche")
+        first["title"].audience = "AUDIENCE"
+        first["title"].primary.append("mutated")
+        second = await knowledge_service.search_knowledge_parts(None, "flasche")
+        assert second["title"].audience == ""
+        assert "mutated" not in second["title"].primary
+
+    async def test_rag_mode_is_part_of_key(self, fake_search, test_settings, monkeypatch):
+        calls, _, _ = fake_search
+        await knowledge_service.search_knowledge_batch(None, "flasche")
+        searches = calls["rows"]
+        monkeypatch.setattr(test_settings, "rag_mode", "lexical")
+        await knowledge_service.search_knowledge_batch(None, "flasche")
+        assert calls["rows"] > searches
+
+    async def test_knowledge_version_change_invalidates(self, fake_search, monkeypatch):
+        calls, _, version = fake_search
+        await knowledge_service.search_knowledge_batch(None, "flasche")
+        searches = calls["rows"]
+        version["value"] = 2
+        # WHY: Pretend the poll interval elapsed
+        monkeypatch.setattr(knowledge_cache, "_version_checked_at", 0.0)
+        await knowledge_service.search_knowledge_batch(None, "flasche")
+        assert calls["rows"] > searches
+
+    async def test_failed_embedding_result_not_cached(self, fake_search):
+        calls, embedding, _ = fake_search
+        embedding["value"] = None
+        await knowledge_service.search_knowledge_batch(None, "flasche")
+        searches = calls["rows"]
+        await knowledge_service.search_knowledge_batch(None, "flasche")
+        assert calls["rows"] == 2 * searches
+
+    async def test_disabled_cache_always_searches(self, fake_search, test_settings, monkeypatch):
+        calls, _, _ = fake_search
+        monkeypatch.setattr(test_settings, "rag_cache_enabled", False)
+        await knowledge_service.search_knowledge_batch(None, "flasche")
+        searches = calls["rows"]
+        await knowledge_service.search_knowledge_batch(None, "flasche")
+        assert calls["rows"] == 2 * searches
+
+    async def test_hits_and_misses_recorded_in_trace(self, fake_search):
+        trace = new_trace("t")
+        with span(trace, "rag_search") as s:
+            await knowledge_service.search_knowledge_parts(None, "flasche", span=s)
+            await knowledge_service.search_knowledge_parts(None, "flasche", span=s)
+        data = finalize_trace(trace)
+        assert data["spans"][0]["rag_cache_hits"] == 1
+        assert data["spans"][0]["rag_cache_misses"] == 1
+        assert (data["rag_cache_hits"], data["cache_hits"]) == (1, 0)
+
+
+class TestSingleCache:
+    async def test_search_knowledge_cached_per_prompt_type(self, fake_search):
+        calls, _, _ = fake_search
+        title = await knowledge_service.search_knowledge(None, "flasche", "title")
+        searches = calls["rows"]
+        assert await knowledge_service.search_knowledge(None, "Flasche", "title") == title
+        assert calls["rows"] == searches
+        await knowledge_service.search_knowledge(None, "flasche", "bullets")
+        assert calls["rows"] > searches
@@ -0,0 +1,181 @@
+# backend/tests/test_knowledge_dedup.py
+# Purpose: MinHash/LSH near-duplicate detection — signature accuracy, clustering rules, report/remove flow
+# NOT for: The SQL against a live Postgres (needs the database)
+
+import random
+
+import numpy as np
+import pytest
+
+from services import knowledge_dedup
+from services.knowledge_dedup import (
+    DedupReport, CorpusSize, dedupe, find_duplicates, lsh_params, minhash, shingles, signature_bytes, similarity,
+)
+
+VOCAB = [f"w{i}" for i in range(3000)]
+
+
+def _doc(rng, n=250):
+    return " ".join(rng.choice(VOCAB) for _ in range(n))
+
+
+def _jaccard(a, b):
+    sa, sb = shingles(a), shingles(b)
+    return len(sa & sb) / len(sa | sb)
+
+
+class TestSignatures:
+    def test_estimate_tracks_jaccard(self):
+        rng = random.Random(0)
+        base = _doc(rng).split()
+        for keep in (1.0, 0.9, 0.7, 0.4):
+            words = [w if rng.random() < keep else rng.choice(VOCAB) for w in base]
+            other = " ".join(words)
+            est = similarity(minhash(" ".join(base)), minhash(other))
+            assert abs(est - _jaccard(" ".join(base), other)) < 0.12
+
+    def test_ingest_header_is_ignored(self):
+        body = _doc(random.Random(1))
+        assert signature_bytes(f"[Georgi RMBC - Lesson 3]\n{body}") == signature_bytes(f"[Ecom Talent - L3]\n{body}")
+
+    def test_short_and_empty(self):
+        assert shingles("Hi there") == {"hi there"}
+        assert similarity(minhash(""), minhash("  ")) == 1.0
+        assert len(signature_bytes("x")) == knowledge_dedup.NUM_PERM * 4
+
+    def test_lsh_params_fit_signature(self):
+        for threshold in (0.5, 0.8, 0.95):
+            bands, rows = lsh_params(threshold)
+            assert bands * rows <= knowledge_dedup.NUM_PERM
+            # WHY: S-curve midpoint (1/b)^(1/r) sits at or below the threshold — misses cost more
+            assert (1 / bands) ** (1 / rows) <= threshold + 0.05
+
+
+def _corpus(n=200, copies=20, seed=2):
+    rng = random.Random(seed)
+    docs = [_doc(rng) for _ in range(n)]
+    near = []
+    for i in range(copies):
+        words = docs[i].split()
+        # WHY: Mimic a 200-char overlap shift + light edits — same lesson, different chunking
+        words = words[5:] + [rng.choice(VOCAB) for _ in range(5)]
+        near.append(" ".join(words))
+    return docs + near
+
+
+def _sigs(texts):
+    return np.stack([minhash(t) for t in texts])
+
+
+class TestFindDuplicates:
+    def test_finds_planted_copies_only(self):
+        texts = _corpus()
+        ids = np.arange(1, len(texts) + 1)
+        found = find_duplicates(ids, _sigs(texts), 0.8)
+        assert sorted((d, k) for d, k, _ in found) == [(201 + i, 1 + i) for i in range(20)]
+        assert all(s >= 0.8 for _, _, s in found)
+
+    def test_preference_order_decides_keeper(self):
+        texts = _corpus()
+        order = list(range(len(texts)))[::-1]
+        ids = np.arange(1, len(texts) + 1)[order]
+        found = find_duplicates(ids, _sigs([texts[i] for i in order]), 0.8)
+        assert sorted((d, k) for d, k, _ in found) == [(1 + i, 201 + i) for i in range(20)]
+
+    def test_candidates_restrict_removals(self):
+        texts = _corpus()
+        ids = np.arange(1, len(texts) + 1)
+        found = find_duplicates(ids, _sigs(texts), 0.8, candidates={205, 210, 3})
+        assert sorted(d for d, _, _ in found) == [205, 210]
+
+    def test_kept_chunk_is_never_removed(self):
+        body = _doc(random.Random(4)).split()
+        texts = [" ".join(body)] * 4
+        found = find_duplicates(np.array([10, 11, 12, 13]), _sigs(texts), 0.8)
+        keepers = {k for _, k, _ in found}
+        assert keepers == {10} and sorted(d for d, _, _ in found) == [11, 12, 13]
+
+
+class _Result:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def one(self):
+        return self.rows[0]
+
+    def fetchall(self):
+        return self.rows
+
+    def __iter__(self):
+        return iter(self.rows)
+
+
+class FakeDedupDB:
+    """Chunks (id, content, embedded); answers dedupe()'s statements and applies its DELETE."""
+
+    def __init__(self, chunks):
+        self.chunks = {cid: (content, embedded) for cid, content, embedded in chunks}
+        self.recorded, self.commits = [], 0
+
+    def _size(self, ids):
+        rows = [self.chunks[i] for i in ids if i in self.chunks]
+        return (len(rows), sum(len(c.encode()) for c, _ in rows), sum(e for _, e in rows), 1544 * sum(e for _, e in rows))
+
+    def execute(self, statement, params=None, execution_options=None):
+        sql = str(statement)
+        if "octet_length" in sql:
+            return _Result([self._size(params["ids"] if params else list(self.chunks))])
+        if "WHERE minhash IS NULL ORDER BY id LIMIT" in sql:
+            return _Result([])
+        if "CASE WHEN minhash IS NULL" in sql:
+            return _Result([(cid, None, e, c) for cid, (c, e) in sorted(self.chunks.items())])
+        if "INSERT INTO knowledge_duplicates" in sql:
+            self.recorded.extend(params)
+            return _Result([])
+        if sql.startswith("DELETE FROM knowledge_chunks"):
+            for cid in params["ids"]:
+                self.chunks.pop(cid)
+            return _Result([])
+        raise AssertionError(sql)
+
+    def commit(self):
+        self.commits += 1
+
+
+class TestDedupe:
+    def _db(self):
+        texts = _corpus(n=40, copies=5)
+        # WHY: Planted copies 41..45 of chunks 1..5 — copy 43 is the embedded one
+        return FakeDedupDB([(i + 1, t, i + 1 == 43) for i, t in enumerate(texts)])
+
+    def test_report_changes_nothing(self):
+        db = self._db()
+        report = dedupe(db, 0.8, "report", log=lambda m: None)
+        assert len(report.duplicates) == 5 and not db.recorded and len(db.chunks) == 45
+        assert report.after.chunks == 40 and report.before.embedded == 1 and report.after.embedded == 1
+
+    def test_embedded_copy_is_kept(self):
+        found = {d: k for d, k, _ in dedupe(self._db(), 0.8, "report", log=lambda m: None).duplicates}
+        assert found[3] == 43 and 43 not in found
+
+    def test_remove_records_and_deletes(self):
+        db = self._db()
+        report = dedupe(db, 0.8, "remove", log=lambda m: None)
+        assert len(db.chunks) == 40 and db.commits == 1
+        assert all(r["removed"] for r in db.recorded) and len(db.recorded) == 5
+        assert {r["dup"] for r in db.recorded} == {d for d, _, _ in report.duplicates}
+
+    def test_ingest_pass_only_removes_new_rows(self):
+        db = self._db()
+        report = dedupe(db, 0.8, "remove", only_ids=[41, 42], log=lambda m: None)
+        assert sorted(d for d, _, _ in report.duplicates) == [41, 42]
+
+    def test_unknown_action(self):
+        with pytest.raises(ValueError):
+            dedupe(self._db(), 0.8, "purge")
+
+    def test_report_lines(self):
+        report = DedupReport(0.8, "remove", [(2, 1, 0.9)], CorpusSize(10, 10_000, 10, 15_440),
+                             CorpusSize(9, 9_000, 9, 13_896))
+        text = "\n".join(report.lines())
+        assert "10 →         9  (-10.0%)" in text and "(-10.0%)" in text.splitlines()[-1]
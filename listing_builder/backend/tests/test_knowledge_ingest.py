@@ -0,0 +1,247 @@
+# backend/tests/test_knowledge_ingest.py
+# Purpose: Ingestion engine — chunking parity with the old per-script chunkers, dedupe, incremental skip, COPY payload
+# NOT for: The SQL against a live Postgres (needs the database)
+
+import csv
+import functools
+import glob
+import hashlib
+import importlib.util
+import os
+import random
+import re
+
+import pytest
+
+from services import knowledge_ingest
+from services.knowledge_ingest import (
+    Document, Source, apply_batch, chunk_sections, chunk_text, csv_buffer, ingest, prepare_document,
+)
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(__file__), "..", "scripts")
+
+
+# ── The chunkers the ingest scripts used to carry (verbatim logic) ──
+
+def _legacy_chunk(content, chunk_size=1500, overlap=200, transcript=False):
+    if len(content) <= chunk_size:
+        return [content.strip()] if content.strip() else []
+    chunks = []
+    start = 0
+    while start < len(content):
+        end = start + chunk_size
+        if end >= len(content):
+            chunk = content[start:].strip()
+            if chunk:
+                chunks.append(chunk)
+            break
+        boundary = end
+        for i in range(end, max(start + chunk_size // 2, start), -1):
+            if transcript:
+                if content[i] in ".!?" and i + 1 < len(content) and content[i + 1] in " \n":
+                    boundary = i + 1
+                    break
+            elif content[i] in ".!?\n" and i + 1 < len(content):
+                boundary = i + 1
+                break
+        chunk = content[start:boundary].strip()
+        if chunk:
+            chunks.append(chunk)
+        start = boundary - overlap if boundary - overlap > start else boundary
+    return chunks
+
+
+def _legacy_sections(content, pattern):
+    chunks = []
+    for section in re.split(pattern, content):
+        section = section.strip()
+        if not section or len(section) < 50:
+            continue
+        if len(section) <= 1500:
+            chunks.append(section)
+            continue
+        chunks.extend(_legacy_chunk(section))
+    return chunks
+
+
+def _random_text(rng, n):
+    words = ["Listing", "ranking", "PPC.", "bullet", "title!", "keyword?", "ZDJĘCIA", "\n", "== OPŁATY ==\n",
+             "=== SEO ===\n", "a", "to", "the", "x" * 40, "größe", "...", " "]
+    return " ".join(rng.choice(words) for _ in range(n))
+
+
+def _category(chunk):
+    return "ppc" if "PPC" in chunk else "general"
+
+
+class TestChunkingParity:
+    @pytest.mark.parametrize("seed", range(25))
+    def test_chunk_text_matches_legacy(self, seed):
+        rng = random.Random(seed)
+        text = _random_text(rng, rng.randint(1, 1500))
+        assert chunk_text(text) == _legacy_chunk(text)
+        assert chunk_text(text, strict=True) == _legacy_chunk(text, transcript=True)
+
+    @pytest.mark.parametrize("pattern", [r"\n(?=={2,}\s)", r"\n(?====\s)"])
+    @pytest.mark.parametrize("seed", range(10))
+    def test_sections_match_legacy(self, pattern, seed):
+        text = _random_text(random.Random(seed), 2000)
+        assert chunk_sections(text, pattern) == _legacy_sections(text, pattern)
+
+    def test_empty_and_short(self):
+        assert chunk_text("   ") == []
+        assert chunk_text("  short  ") == ["short"]
+
+
+class TestPrepare:
+    def test_header_category_and_hash(self):
+        doc = Document("Allegro_x", "allegro_marketplace", text="", header="[Allegro Marketplace - x]")
+        prepared = prepare_document(chunk_text, _category, doc, "Run PPC. " * 300, "fp")
+        assert prepared.filename == "Allegro_x" and prepared.source_type == "allegro_marketplace"
+        assert [r[0] for r in prepared.rows] == list(range(len(prepared.rows)))
+        for _, content, category, digest, _ in prepared.rows:
+            assert content.startswith("[Allegro Marketplace - x]\n") and "Run PPC." in content
+            assert category == "ppc"
+            assert digest == hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def test_document_category_wins(self):
+        doc = Document("f", "t", text="", category="ranking")
+        assert prepare_document(chunk_text, _category, doc, "PPC " * 10, "fp").rows[0][2] == "ranking"
+
+
+def _write(tmp_path, files):
+    for name, body in files.items():
+        (tmp_path / name).write_text(body, encoding="utf-8")
+
+
+def _docs(root):
+    for path in sorted(glob.glob(os.path.join(root, "*.txt"))):
+        name = os.path.basename(path)
+        yield Document(name, "test", path=path, header=f"[Test - {name}]")
+
+
+def _source(tmp_path, **kw):
+    return Source(label="test", documents=functools.partial(_docs, str(tmp_path)), tag="test",
+                  categorize=_category, **kw)
+
+
+class TestIngestDryRun:
+    def test_counts_and_in_run_dedupe(self, tmp_path):
+        body = "PPC campaigns need structure. " * 100
+        _write(tmp_path, {"a.txt": body, "tiny.txt": "too small"})
+        source = Source(label="t", documents=functools.partial(_docs, str(tmp_path)), categorize=_category)
+        stats = ingest(None, source, workers=1, log=lambda m: None)
+        assert (stats.documents, stats.too_small, stats.changed) == (2, 1, 1)
+        assert stats.duplicates == 0 and stats.by_category == {"ppc": stats.chunks}
+
+        # WHY: Same text under two documents without headers → second copy is a duplicate
+        _write(tmp_path, {"b.txt": body})
+        plain = [Document(d.filename, d.source_type, path=d.path) for d in _docs(str(tmp_path))]
+        stats = ingest(None, Source(label="t", documents=lambda: plain, categorize=_category),
+                       workers=1, log=lambda m: None)
+        assert stats.duplicates == stats.chunks // 2
+
+    def test_process_pool_matches_inline(self, tmp_path, monkeypatch):
+        rng = random.Random(3)
+        _write(tmp_path, {f"f{i}.txt": _random_text(rng, 800) for i in range(12)})
+        monkeypatch.setattr(knowledge_ingest, "MIN_PARALLEL_DOCS", 2)
+        jobs = [(chunk_text, _category, d, knowledge_ingest.read_document(d, True), "fp")
+                for d in _docs(str(tmp_path))]
+        inline = list(knowledge_ingest.prepare_all(jobs, 1))
+        pooled = list(knowledge_ingest.prepare_all(jobs, 2))
+        assert [(p.filename, p.rows) for p in pooled] == [(p.filename, p.rows) for p in inline]
+
+
+class _Result:
+    def __init__(self, rows=(), rowcount=0):
+        self.rows, self.rowcount = list(rows), rowcount
+
+    def __iter__(self):
+        return iter(self.rows)
+
+
+class _Cursor:
+    def __init__(self, db):
+        self.db = db
+
+    def copy_expert(self, sql, buf):
+        self.db.copies.append((sql, list(csv.reader(buf))))
+
+    def close(self):
+        pass
+
+
+class FakeIngestDB:
+    """Records statements and COPY payloads; serves knowledge_ingest_files from a dict."""
+
+    def __init__(self, state=None):
+        self.state = dict(state or {})
+        self.statements, self.copies, self.commits = [], [], 0
+
+    def execute(self, statement, params=None):
+        sql = str(statement)
+        self.statements.append(sql)
+        if "FROM knowledge_ingest_files" in sql:
+            return _Result(self.state.items())
+        if "INSERT INTO knowledge_chunks" in sql:
+            return _Result([(101,), (102,), (103,)])
+        return _Result(rowcount=1)
+
+    def connection(self):
+        db = self
+
+        class _Conn:
+            connection = type("Raw", (), {"cursor": lambda self: _Cursor(db)})()
+
+        return _Conn()
+
+    def commit(self):
+        self.commits += 1
+
+
+class TestIncremental:
+    def test_only_changed_files_are_written(self, tmp_path):
+        _write(tmp_path, {"a.txt": "Keyword research basics. " * 20, "b.txt": "Ranking factors matter. " * 20})
+        source = _source(tmp_path)
+        first = FakeIngestDB()
+        ingest(first, source, workers=1, log=lambda m: None)
+        staged = first.copies[1][1]
+        assert {row[0] for row in staged} == {"a.txt", "b.txt"}
+
+        state = {row[0]: row[1] for row in staged}
+        _write(tmp_path, {"b.txt": "Ranking factors changed. " * 20})
+        second = FakeIngestDB(state)
+        stats = ingest(second, source, workers=1, log=lambda m: None)
+        assert (stats.unchanged, stats.changed) == (1, 1)
+        assert [row[0] for row in second.copies[1][1]] == ["b.txt"]
+
+        assert ingest(FakeIngestDB(state), source, workers=1, full=True, log=lambda m: None).changed == 2
+
+    def test_apply_batch_statement_order_and_copy_roundtrip(self, tmp_path):
+        tricky = 'Quotes "here", commas, and\nnewlines; größe ✓. ' * 10
+        doc = Document("f.txt", "test", text="", header="[T - f]")
+        prepared = prepare_document(chunk_text, _category, doc, tricky, "fp1")
+        db = FakeIngestDB()
+        inserted, deleted = apply_batch(db, _source(tmp_path), [prepared])
+        assert (inserted, deleted, db.commits) == ([101, 102, 103], 1, 1)
+        order = [s for s in db.statements if "knowledge_chunks" in s or "knowledge_ingest_files" in s]
+        assert ["DELETE" in order[0], "UPDATE" in order[1], "INSERT INTO knowledge_chunks" in order[2],
+                "knowledge_ingest_files" in order[3]] == [True] * 4
+        sql, rows = db.copies[0]
+        assert sql.startswith("COPY ingest_stage (ord, filename, chunk_index, content")
+        assert [(r[1], int(r[2]), r[3], r[4], r[7]) for r in rows] == \
+            [("f.txt", i, c, cat, h) for i, c, cat, h, _ in prepared.rows]
+        assert all(r[8].startswith("\\x") and len(r[8]) == 2 + 2 * 512 for r in rows)
+
+    def test_csv_none_is_null(self):
+        assert csv_buffer([(1, None, 'a,"b"\nc')]).getvalue() == '1,,"a,""b""\nc"\n'
+
+
+class TestScriptConfigs:
+    @pytest.mark.parametrize("path", sorted(glob.glob(os.path.join(SCRIPTS_DIR, "ingest_*.py"))))
+    def test_each_script_declares_a_source(self, path):
+        spec = importlib.util.spec_from_file_location(os.path.basename(path)[:-3], path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        assert isinstance(module.SOURCE, Source)
+        assert module.SOURCE.categorize is not None or "category=" in open(path, encoding="utf-8").read()
@@ -0,0 +1,94 @@
+# backend/tests/test_llm_cache.py
+# Purpose: Unit tests for the LLM response cache and its in-process LRU (no DB, no LLM)
+# NOT for: Postgres tier behaviour (needs a real database)
+
+import pytest
+
+from services import llm_cache
+from services.llm_cache import cached_llm_call, cache_key
+from services.trace_service import new_trace, span, finalize_trace
+from utils.ttl_cache import TTLCache
+
+
+@pytest.fixture(autouse=True)
+def _memory_only(monkeypatch, test_settings):
+    monkeypatch.setattr(llm_cache, "settings", test_settings)
+    llm_cache.clear_cache()
+    yield
+    llm_cache.clear_cache()
+
+
+def _counting_call(text="Trinkflasche Edelstahl 1L"):
+    calls = {"n": 0}
+
+    async def call():
+        calls["n"] += 1
+        return text, {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15, "model": "m"}
+
+    return call, calls
+
+
+class TestCacheKey:
+    def test_same_inputs_same_key(self):
+        assert cache_key("groq", "m", 0.4, 250, "p") == cache_key("groq", "m", 0.4, 250, "p")
+
+    @pytest.mark.parametrize("changed", [
+        ("openai", "m", 0.4, 250, "p"),
+        ("groq", "m2", 0.4, 250, "p"),
+        ("groq", "m", 0.5, 250, "p"),
+        ("groq", "m", 0.4, 300, "p"),
+        ("groq", "m", 0.4, 250, "p "),
+    ])
+    def test_any_parameter_changes_key(self, changed):
+        assert cache_key(*changed) != cache_key("groq", "m", 0.4, 250, "p")
+
+
+class TestCachedLlmCall:
+    async def test_second_call_is_a_hit(self):
+        call, calls = _counting_call()
+        first = await cached_llm_call(call, "groq", "m", "prompt", 0.4, 250)
+        second = await cached_llm_call(call, "groq", "m", "prompt", 0.4, 250)
+        assert calls["n"] == 1
+        assert second[0] == first[0]
+        # WHY: Hits spend no tokens — usage must not inflate trace cost
+        assert second[1] is None
+
+    async def test_opt_out_always_calls(self):
+        call, calls = _counting_call()
+        await cached_llm_call(call, "groq", "m", "prompt", 0.4, 250, use_cache=False)
+        await cached_llm_call(call, "groq", "m", "prompt", 0.4, 250, use_cache=False)
+        assert calls["n"] == 2
+
+    async def test_empty_response_not_cached(self):
+        call, calls = _counting_call(text="")
+        await cached_llm_call(call, "groq", "m", "prompt", 0.4, 250)
+        await cached_llm_call(call, "groq", "m", "prompt", 0.4, 250)
+        assert calls["n"] == 2
+
+    async def test_hits_and_misses_recorded_in_trace(self):
+        call, _ = _counting_call()
+        trace = new_trace("t")
+        with span(trace, "llm_title") as s:
+            await cached_llm_call(call, "groq", "m", "prompt", 0.4, 250, span=s)
+            await cached_llm_call(call, "groq", "m", "prompt", 0.4, 250, span=s)
+        data = finalize_trace(trace)
+        assert data["spans"][0]["cache_hits"] == 1
+        assert data["spans"][0]["cache_misses"] == 1
+        assert data["cache_hits"] == 1
+
+
+class TestTTLCache:
+    def test_evicts_least_recently_used(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        assert "a" in cache
+        assert "b" not in cache
+
+    def test_expired_entry_is_a_miss(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1, ttl=-1)
+        assert cache.get("a") is None
+        assert cache.stats()["misses"] == 1
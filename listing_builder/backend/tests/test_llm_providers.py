@@ -2,13 +2,18 @@
 # Purpose: Unit tests for LLM provider abstraction
 # NOT for: Integration tests with real API keys
 
+import httpx
 import pytest
+from services import llm_providers
 from services.llm_providers import (
     PROVIDERS,
     COST_TABLE,
     get_cost_per_1m,
     mask_api_key,
     call_llm,
+    acall_llm,
+    get_http_pool,
+    close_http_pools,
 )
 
 
@@ -65,3 +70,62 @@ def test_call_llm_groq_raises():
     """Groq should use groq_client directly, not call_llm."""
     with pytest.raises(ValueError, match="must use groq_client"):
         call_llm("groq", "key", None, "hello", 0.5, 100)
+
+
+async def test_acall_llm_unknown_provider_raises():
+    with pytest.raises(ValueError, match="Unknown LLM provider"):
+        await acall_llm("nonexistent", "key", None, "hello", 0.5, 100)
+
+
+async def test_acall_llm_groq_raises():
+    with pytest.raises(ValueError, match="must use groq_client"):
+        await acall_llm("groq", "key", None, "hello", 0.5, 100)
+
+
+async def test_http_pool_shared_per_provider():
+    pool = get_http_pool("openai")
+    assert get_http_pool("openai") is pool
+    assert get_http_pool("gemini") is not pool
+    await close_http_pools()
+    assert pool.is_closed
+
+
+async def test_acall_gemini_parses_rest_response(monkeypatch):
+    """Gemini goes over REST with the key per request — no global genai.configure()."""
+    seen = {}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen["url"] = str(request.url)
+        seen["key"] = request.headers.get("x-goog-api-key")
+        return httpx.Response(200, json={
+            "candidates": [{"content": {"parts": [{"text": " Titel "}]}}],
+            "usageMetadata": {"promptTokenCount": 7, "candidatesTokenCount": 3, "totalTokenCount": 10},
+        })
+
+    pool = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(llm_providers, "get_http_pool", lambda provider: pool)
+
+    text, usage = await acall_llm("gemini_flash", "AIza-test", None, "hi", 0.5, 100)
+    assert text == "Titel"
+    assert usage["total_tokens"] == 10
+    # SECURITY: Key in the header only — URLs end up in access logs and exception messages
+    assert seen["key"] == "AIza-test"
+    assert "AIza-test" not in seen["url"]
+    await pool.aclose()
+
+
+
+@pytest.mark.parametrize("body,reason", [
+    ({"candidates": [], "promptFeedback": {"blockReason": "SAFETY"}}, "blockReason"),
+    ({"promptFeedback": {"blockReason": "OTHER"}}, "OTHER"),
+    ({"candidates": [{"finishReason": "SAFETY"}]}, "finishReason=SAFETY"),
+    ({"candidates": [{"content": {"parts": [{"text": "  "}]}, "finishReason": "MAX_TOKENS"}]}, "MAX_TOKENS"),
+])
+async def test_acall_gemini_raises_on_empty_response(monkeypatch, body, reason):
+    """Blocked/empty output must raise so the optimizer falls back — not return "" as a success."""
+    pool = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200, json=body)))
+    monkeypatch.setattr(llm_providers, "get_http_pool", lambda provider: pool)
+
+    with pytest.raises(RuntimeError, match=reason):
+        await acall_llm("gemini_flash", "AIza-test", None, "hi", 0.5, 100)
+    await pool.aclose()
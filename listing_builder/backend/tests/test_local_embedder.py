@@ -0,0 +1,124 @@
+# backend/tests/test_local_embedder.py
+# Purpose: LocalEmbedder batching, pooling and normalization with a stand-in session/tokenizer
+# NOT for: Real ONNX inference (needs onnxruntime + the downloaded model)
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from services import embedding_service
+from services.local_embedder import LocalEmbedder
+
+
+class FakeTokenizer:
+    """One token per character, padded to the longest text in the batch."""
+
+    def encode_batch(self, texts):
+        width = max(len(t) for t in texts)
+        return [
+            SimpleNamespace(
+                ids=[ord(c) for c in t] + [0] * (width - len(t)),
+                attention_mask=[1] * len(t) + [0] * (width - len(t)),
+                type_ids=[0] * width,
+            )
+            for t in texts
+        ]
+
+
+class FakeSession:
+    """last_hidden_state where the CLS vector is (len(text), 3, 4) and other tokens are noise."""
+
+    def __init__(self):
+        self.batch_sizes = []
+        self.feeds = []
+
+    def get_inputs(self):
+        return [SimpleNamespace(name=n) for n in ("input_ids", "attention_mask", "token_type_ids")]
+
+    def run(self, _outputs, feeds):
+        self.feeds.append(feeds)
+        ids = feeds["input_ids"]
+        self.batch_sizes.append(ids.shape[0])
+        hidden = np.full((ids.shape[0], ids.shape[1], 3), 99.0)
+        hidden[:, 0, :] = np.stack([feeds["attention_mask"].sum(axis=1), np.full(ids.shape[0], 3),
+                                    np.full(ids.shape[0], 4)], axis=1)
+        return [hidden]
+
+
+@pytest.fixture
+def embedder():
+    session = FakeSession()
+    return LocalEmbedder(session, FakeTokenizer(), batch_size=2, workers=2), session
+
+
+class TestLocalEmbedder:
+    def test_cls_pooling_and_l2_normalization(self, embedder):
+        emb, _ = embedder
+        [vec] = emb.embed(["abcdefghijkl"])  # CLS = (12, 3, 4), norm 13
+        assert vec == pytest.approx([12 / 13, 3 / 13, 4 / 13])
+        assert np.linalg.norm(vec) == pytest.approx(1.0)
+
+    def test_batches_and_preserves_input_order(self, embedder):
+        emb, session = embedder
+        texts = ["a" * 9, "a", "a" * 5, "a" * 3, "a" * 7]
+        vectors = emb.embed(texts)
+        assert session.batch_sizes == [2, 2, 1]
+        # WHY: First component grows with text length — order must match the input
+        firsts = [v[0] / v[1] for v in vectors]
+        assert firsts == pytest.approx([len(t) / 3 for t in texts])
+
+    def test_token_type_ids_sent_when_model_expects_them(self, embedder):
+        emb, session = embedder
+        emb.embed(["ab"])
+        assert set(session.feeds[0]) == {"input_ids", "attention_mask", "token_type_ids"}
+
+    def test_empty_input(self, embedder):
+        emb, session = embedder
+        assert emb.embed([]) == []
+        assert session.batch_sizes == []
+
+    async def test_aembed(self, embedder):
+        emb, _ = embedder
+        assert len(await emb.aembed(["ab", "cd"])) == 2
+
+
+    def test_missing_runtime_points_at_requirements_file(self, monkeypatch, tmp_path):
+        from services import local_embedder
+
+        def no_onnxruntime(*_args):
+            raise ImportError("No module named 'onnxruntime'", name="onnxruntime")
+
+        monkeypatch.setattr(local_embedder, "ensure_model", lambda model_dir: str(tmp_path))
+        monkeypatch.setattr(local_embedder, "_load_session", no_onnxruntime)
+        with pytest.raises(RuntimeError, match="onnxruntime — pip install -r requirements-local-embed.txt"):
+            LocalEmbedder.from_settings()
+
+
+class TestBackendSelection:
+    @pytest.fixture
+    def local_settings(self, monkeypatch, test_settings):
+        monkeypatch.setattr(test_settings, "embedding_backend", "local")
+        monkeypatch.setattr(embedding_service, "settings", test_settings)
+        return test_settings
+
+    def test_local_backend_needs_no_cloudflare_account(self, local_settings):
+        assert local_settings.cf_account_id == ""
+        assert embedding_service.embeddings_available()
+
+    def test_local_vectors_cached_under_their_own_model_id(self, local_settings):
+        assert embedding_service.embedding_model_id() != embedding_service.EMBEDDING_MODEL
+
+    def test_sync_batch_uses_local_embedder(self, local_settings, monkeypatch, embedder):
+        emb, _ = embedder
+        monkeypatch.setattr("services.local_embedder.get_local_embedder", lambda: emb)
+        assert len(embedding_service.get_embeddings_batch_sync(["ab", "cd", "ef"])) == 3
+
+    def test_backfill_pacing_has_no_pause_locally(self, local_settings):
+        batch, pause = embedding_service.backfill_pacing()
+        assert batch > 5 and pause == 0
+
+    def test_unknown_backend_rejected(self, local_settings, monkeypatch):
+        monkeypatch.setattr(local_settings, "embedding_backend", "gpu")
+        with pytest.raises(ValueError):
+            embedding_service.embeddings_available()
@@ -0,0 +1,202 @@
+# backend/tests/test_optimizer_llm.py
+# Purpose: run_direct_groq call ordering (speculative vs sequential) and per-call trace spans
+# NOT for: Prompt content (prompt_builders) or scoring (test_optimizer_scoring.py)
+
+import asyncio
+
+import pytest
+
+from services import optimizer_llm
+from services.optimizer_llm import run_direct_groq
+from services.prompt_budget import PromptContext
+from services.trace_service import new_trace, finalize_trace
+
+LATENCY = 0.05
+
+
+@pytest.fixture
+def fake_groq(monkeypatch, test_settings):
+    """Fake provider: every call sleeps LATENCY; records prompts in start order."""
+    calls = []
+
+    async def _fake(prompt, temperature, max_tokens):
+        calls.append(prompt)
+        # WHY: Only the backend prompt embeds a generated title
+        if "FAIL_BACKEND" in prompt and "GENERATED TITLE" in prompt:
+            raise RuntimeError("backend boom")
+        await asyncio.sleep(LATENCY)
+        return f"GENERATED TITLE {len(calls)}", {"prompt_tokens": 10, "completion_tokens": 5,
+                                                  "total_tokens": 15, "model": "m"}
+
+    monkeypatch.setattr(optimizer_llm, "acall_groq", _fake)
+    monkeypatch.setattr(optimizer_llm, "settings", test_settings)
+    return calls
+
+
+async def _run(trace, pipeline, product_title="Trinkflasche Edelstahl"):
+    return await run_direct_groq(
+        trace, product_title, "BrandX", "",
+        ["trinkflasche"], ["edelstahl"], ["bpa frei"],
+        [{"phrase": "trinkflasche", "search_volume": 100}],
+        "de", {"title": 200, "backend": 249}, 5, 200,
+        "", "", "", "amazon_de",
+        use_cache=False, pipeline=pipeline,
+    )
+
+
+class TestPipelineOrdering:
+    async def test_speculative_runs_title_with_bullets_and_desc(self, fake_groq):
+        trace = new_trace("t")
+        await _run(trace, "speculative")
+        spans = {s["name"]: s for s in finalize_trace(trace)["spans"]}
+
+        assert spans["llm_bullets"]["offset_ms"] < spans["llm_title"]["duration_ms"]
+        # WHY: Backend must wait for the title it embeds
+        assert spans["llm_backend"]["offset_ms"] >= spans["llm_title"]["duration_ms"]
+        assert spans["llm_pipeline"]["pipeline"] == "speculative"
+        assert spans["llm_pipeline"]["duration_ms"] < 3 * LATENCY * 1000
+
+    async def test_sequential_starts_others_after_title(self, fake_groq):
+        trace = new_trace("t")
+        await _run(trace, "sequential")
+        spans = {s["name"]: s for s in finalize_trace(trace)["spans"]}
+        assert spans["llm_bullets"]["offset_ms"] >= spans["llm_title"]["duration_ms"]
+
+    async def test_backend_prompt_gets_generated_title(self, fake_groq):
+        trace = new_trace("t")
+        title, _, _, _ = await _run(trace, "speculative")
+        assert title in fake_groq[-1]
+
+    async def test_each_call_has_its_own_span_with_tokens(self, fake_groq):
+        trace = new_trace("t")
+        await _run(trace, "speculative")
+        data = finalize_trace(trace)
+        names = sorted(s["name"] for s in data["spans"] if s["name"] not in ("llm_pipeline", "prompt_budget"))
+        assert names == ["llm_backend", "llm_bullets", "llm_description", "llm_title"]
+        assert data["total_tokens"] == 4 * 15
+
+    async def test_backend_failure_is_not_fatal(self, fake_groq):
+        trace = new_trace("t")
+        _, _, _, backend = await _run(trace, "speculative", product_title="FAIL_BACKEND Flasche")
+        assert backend == ""
+
+    async def test_unknown_pipeline_rejected(self, fake_groq):
+        with pytest.raises(ValueError, match="Unknown optimizer pipeline"):
+            await _run(new_trace("t"), "yolo")
+
+
+class TestOnEvent:
+    async def test_streams_tokens_then_sections(self, monkeypatch, fake_groq):
+        async def fake_stream(prompt, temperature, max_tokens):
+            for word in ("Ein ", "langer ", "Text fuer Tests"):
+                yield word, None
+            yield "", {"prompt_tokens": 1, "completion_tokens": 3, "total_tokens": 4, "model": "m"}
+
+        monkeypatch.setattr(optimizer_llm, "astream_groq", fake_stream)
+        events = []
+
+        async def on_event(event, data):
+            events.append((event, data))
+
+        await run_direct_groq(
+            new_trace("t"), "Trinkflasche", "BrandX", "", ["a"], ["b"], ["c"], [],
+            "de", {"title": 200, "backend": 249}, 5, 200, "", "", "", "amazon_de",
+            use_cache=False, on_event=on_event,
+        )
+
+        sections = {d["section"]: d for e, d in events if e == "section"}
+        assert sections["title"]["text"] == "Ein langer Text fuer Tests"
+        assert sections["bullets"]["bullets"] == ["Ein langer Text fuer Tests"]
+        assert "backend" not in sections
+        title_tokens = [d["delta"] for e, d in events if e == "token" and d["section"] == "title"]
+        assert title_tokens == ["Ein ", "langer ", "Text fuer Tests"]
+
+
+FUSED_JSON = (
+    '```json\n{"title": "BrandX Trinkflasche Edelstahl", '
+    '"bullets": ["AUSLAUFSICHER - Deckel schliesst dicht", "1. LEICHT - nur 300 g schwer"], '
+    '"description": "<p>Opis</p>", "backend_keywords": "flasche thermos"}\n```'
+)
+
+
+@pytest.fixture
+def fused_groq(monkeypatch, test_settings):
+    calls = []
+
+    async def _fake(prompt, temperature, max_tokens, json_schema=None):
+        calls.append({"json": json_schema is not None, "prompt": prompt})
+        usage = {"prompt_tokens": 100, "completion_tokens": 50, "total_tokens": 150, "model": "m"}
+        if json_schema is not None:
+            return calls_reply["fused"], usage
+        return "Ein separat generierter Abschnitt", usage
+
+    calls_reply = {"fused": FUSED_JSON}
+    monkeypatch.setattr(optimizer_llm, "acall_groq", _fake)
+    monkeypatch.setattr(optimizer_llm, "settings", test_settings)
+    return calls, calls_reply
+
+
+class TestFusedMode:
+    async def test_single_json_call(self, fused_groq):
+        calls, _ = fused_groq
+        trace = new_trace("t")
+        title, bullets, desc, backend = await _run(trace, "fused")
+
+        assert len(calls) == 1 and calls[0]["json"]
+        assert title == "BrandX Trinkflasche Edelstahl"
+        assert bullets == ["AUSLAUFSICHER - Deckel schliesst dicht", "LEICHT - nur 300 g schwer"]
+        assert backend == "flasche thermos"
+        spans = {s["name"]: s for s in finalize_trace(trace)["spans"]}
+        assert spans["llm_pipeline"]["pipeline"] == "fused"
+        assert spans["llm_pipeline"]["llm_tokens_total"] == 150
+        assert "fallback" not in spans["llm_pipeline"]
+
+    async def test_unparseable_json_falls_back_to_four_calls(self, fused_groq):
+        calls, reply = fused_groq
+        reply["fused"] = "Sorry, here is your listing: Title ..."
+        trace = new_trace("t")
+        title, _, _, _ = await _run(trace, "fused")
+
+        assert len(calls) == 5
+        assert title == "Ein separat generierter Abschnitt"
+        spans = {s["name"]: s for s in finalize_trace(trace)["spans"]}
+        assert spans["llm_fused"]["error"] == "unparseable_json"
+        assert spans["llm_pipeline"]["fallback"] == "speculative"
+        assert spans["llm_pipeline"]["llm_tokens_total"] == 5 * 150
+
+    async def test_prompt_carries_shared_context_once(self, fused_groq):
+        calls, _ = fused_groq
+        shared = "Titel immer mit Marke beginnen."
+        await run_direct_groq(
+            new_trace("t"), "Trinkflasche", "BrandX", "", ["a"], ["b"], ["c"], [],
+            "de", {"title": 200, "backend": 249}, 5, 200, shared, shared, shared, "amazon_de",
+            use_cache=False, pipeline="fused",
+        )
+        assert calls[0]["prompt"].count(shared) == 1
+
+
+class TestPromptBudget:
+    async def test_low_value_context_trimmed_and_reported(self, fake_groq, monkeypatch):
+        monkeypatch.setattr(optimizer_llm, "prompt_budget_for", lambda provider: 1500)
+        ctx = PromptContext(
+            primary=["PRIMARY_CHUNK listing tips"],
+            fallback=["FALLBACK_CHUNK " + "copywriting filler " * 600],
+        )
+        trace = new_trace("t")
+        await run_direct_groq(
+            trace, "Trinkflasche Edelstahl", "BrandX", "",
+            ["trinkflasche"], ["edelstahl"], ["bpa frei"],
+            [{"phrase": "trinkflasche", "search_volume": 100}],
+            "de", {"title": 200, "backend": 249}, 5, 200,
+            ctx, ctx, ctx, "amazon_de",
+            use_cache=False, pipeline="speculative",
+        )
+        title_prompt = fake_groq[0]
+        assert "PRIMARY_CHUNK" in title_prompt and "FALLBACK_CHUNK" not in title_prompt
+
+        spans = {s["name"]: s for s in finalize_trace(trace)["spans"]}
+        report = spans["prompt_budget"]
+        assert report["budget"] == 1500
+        assert set(report["prompts"]) == {"title", "bullets", "description", "backend"}
+        assert report["prompts"]["title"]["trimmed"] == {"fallback_chunks": 1}
+        assert all(r["tokens"] <= 1500 for r in report["prompts"].values())
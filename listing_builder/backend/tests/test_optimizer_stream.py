@@ -0,0 +1,88 @@
+# backend/tests/test_optimizer_stream.py
+# Purpose: SSE relay for /api/optimizer/generate/stream — event order, errors, cancellation (no LLM)
+# NOT for: Call ordering inside run_direct_groq (see test_optimizer_llm.py)
+
+import asyncio
+import json
+from unittest.mock import patch
+
+from api import optimizer_routes
+from api.optimizer_routes import _generate_events
+from tests.conftest import TestSessionLocal
+
+KWARGS = {"product_title": "Trinkflasche", "brand": "BrandX", "keywords": []}
+
+
+def _parse(frames):
+    out = []
+    for f in frames:
+        if f.startswith(":"):
+            continue
+        event = f.split("event: ")[1].split("\n")[0]
+        data = json.loads(f.split("data: ")[1])
+        out.append((event, data))
+    return out
+
+
+async def _collect(gen):
+    return [f async for f in gen]
+
+
+async def test_relays_progress_then_done_and_saves():
+    async def fake(db, on_event, **kwargs):
+        await on_event("token", {"section": "title", "delta": "Trink"})
+        await on_event("section", {"section": "title", "text": "Trinkflasche 1L"})
+        await on_event("section", {"section": "bullets", "bullets": ["B1"]})
+        return {"status": "success", "scores": {"coverage_pct": 91}}
+
+    saved = []
+    with patch.object(optimizer_routes, "optimize_listing", side_effect=fake):
+        frames = await _collect(_generate_events(
+            KWARGS, 5.0, on_result=lambda db, r: saved.append(r), session_factory=TestSessionLocal,
+        ))
+
+    events = _parse(frames)
+    assert [e for e, _ in events] == ["token", "section", "section", "done"]
+    assert events[-1][1]["scores"]["coverage_pct"] == 91
+    assert saved == [events[-1][1]]
+
+
+async def test_rate_limit_becomes_503_error_event():
+    async def fake(db, on_event, **kwargs):
+        raise RuntimeError("Error code: 429 rate_limit_exceeded")
+
+    with patch.object(optimizer_routes, "optimize_listing", side_effect=fake):
+        events = _parse(await _collect(_generate_events(KWARGS, 5.0, session_factory=TestSessionLocal)))
+
+    assert events == [("error", {"status": 503, "detail": events[0][1]["detail"]})]
+    # WHY: Provider details must not leak into the stream
+    assert "429" not in events[0][1]["detail"]
+
+
+async def test_timeout_becomes_504():
+    async def fake(db, on_event, **kwargs):
+        await asyncio.sleep(1)
+
+    with patch.object(optimizer_routes, "optimize_listing", side_effect=fake):
+        events = _parse(await _collect(_generate_events(KWARGS, 0.05, session_factory=TestSessionLocal)))
+
+    assert events[0][0] == "error"
+    assert events[0][1]["status"] == 504
+
+
+async def test_closing_stream_cancels_optimization():
+    cancelled = asyncio.Event()
+
+    async def fake(db, on_event, **kwargs):
+        await on_event("section", {"section": "title", "text": "T"})
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    with patch.object(optimizer_routes, "optimize_listing", side_effect=fake):
+        gen = _generate_events(KWARGS, 30.0, session_factory=TestSessionLocal)
+        await gen.__anext__()
+        await gen.aclose()
+        await asyncio.wait_for(cancelled.wait(), timeout=1)
@@ -0,0 +1,85 @@
+# backend/tests/test_phrase_matcher.py
+# Purpose: PhraseMatcher — one-pass multi-phrase matching must agree with per-phrase \b regexes
+# NOT for: Scoring math (see test_ranking_juice.py, test_optimizer_scoring.py)
+
+import random
+import re
+
+import pytest
+
+from services.listing_post_processing import bold_keywords_in_html, strip_promo_words
+from services.phrase_matcher import PhraseMatcher, get_matcher
+
+_VOCAB = (
+    "a b ab cap capsule steel bottle İ ß łódź Żółta Flasche für #1 nr. 1 100% - , _x x_ 1l . "
+    "bpa-free free"
+).split(" ")
+
+
+def _random_cases(n: int):
+    rnd = random.Random(23)
+    for _ in range(n):
+        text = "".join(rnd.choice(_VOCAB) + rnd.choice([" ", "  ", "", ",", "-"])
+                       for _ in range(rnd.randint(0, 25)))
+        phrases = [
+            "".join(rnd.choice(_VOCAB) + rnd.choice([" ", "", "-"]) for _ in range(rnd.randint(1, 3))).strip()
+            for _ in range(rnd.randint(1, 12))
+        ]
+        yield text, phrases
+
+
+class TestPhraseMatcher:
+
+    def test_word_boundary(self):
+        m = PhraseMatcher(["cap"])
+        assert m.found("screw cap bottle") == {0}
+        assert m.found("capsule bottle") == set()
+
+    def test_polish_and_german_letters_are_word_chars(self):
+        m = PhraseMatcher(["łódź", "für"])
+        assert m.found("żółta łódźka, flasche für kinder") == {1}
+
+    def test_overlapping_phrases_all_found(self):
+        m = PhraseMatcher(["steel bottle", "bottle cap", "bottle"])
+        assert m.found("steel bottle cap") == {0, 1, 2}
+
+    def test_positions(self):
+        m = PhraseMatcher(["Water Bottle"])
+        assert list(m.finditer("a water bottle")) == [(2, 14, 0)]
+
+    def test_duplicate_phrases_counted_per_entry(self):
+        assert PhraseMatcher(["cap", "cap"]).count_found("cap") == 2
+
+    def test_get_matcher_is_cached(self):
+        assert get_matcher(["steel", "bottle"]) is get_matcher(("steel", "bottle"))
+
+    @pytest.mark.parametrize("flags", [0, re.IGNORECASE])
+    def test_agrees_with_regex(self, flags):
+        for text, phrases in _random_cases(1500):
+            if not flags:
+                text, phrases = text.lower(), [p.lower() for p in phrases]
+            expected = {
+                i for i, p in enumerate(phrases) if re.search(rf"\b{re.escape(p)}\b", text, flags)
+            }
+            assert PhraseMatcher(phrases).found(text) == expected, (text, phrases)
+
+
+class TestCallSites:
+
+    def test_strip_promo_prefers_earlier_promo_word(self):
+        assert strip_promo_words("Our best seller bottle") == "Our bottle"
+
+    def test_strip_promo_is_case_insensitive(self):
+        assert strip_promo_words("FREE Shipping, Rabatt heute") == "Shipping, heute"
+
+    def test_bold_whole_words_only(self):
+        html = "<p>capsule with a cap</p>"
+        assert bold_keywords_in_html(html, ["cap"]) == "<p>capsule with a <b>cap</b></p>"
+
+    def test_bold_skips_inside_tags(self):
+        html = '<p class="bottle">steel bottle</p>'
+        assert bold_keywords_in_html(html, ["bottle"]) == '<p class="bottle">steel <b>bottle</b></p>'
+
+    def test_bold_skips_phrase_inside_new_bold(self):
+        html = "<p>steel bottle</p>"
+        assert bold_keywords_in_html(html, ["steel bottle", "bottle"]) == "<p><b>steel bottle</b></p>"
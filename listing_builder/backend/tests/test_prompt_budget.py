@@ -0,0 +1,106 @@
+# backend/tests/test_prompt_budget.py
+# Purpose: Unit tests for prompt token estimation and budget trimming (no DB, no LLM)
+# NOT for: Prompt wording (test_prompt_builders.py) or live provider limits
+
+from services.prompt_budget import (
+    DEFAULT_PROMPT_BUDGET, PromptContext, estimate_tokens, fit_prompt, prompt_budget_for,
+)
+from services.llm_providers import PROVIDERS
+
+
+def _build(ctx: PromptContext, keywords: list) -> str:
+    return f"Write a title.\nKeywords: {', '.join(keywords)}\n{ctx.render()}"
+
+
+def _ctx(**overrides) -> PromptContext:
+    base = dict(
+        primary=["primary chunk " + "alpha " * 200],
+        fallback=["fallback chunk " + "beta " * 200, "fallback two " + "gamma " * 200],
+        audience="AUDIENCE " + "delta " * 200,
+        reference="ORIGINAL " + "epsilon " * 200,
+    )
+    base.update(overrides)
+    return PromptContext(**base)
+
+
+class TestEstimateTokens:
+    def test_empty(self):
+        assert estimate_tokens("") == 0
+
+    def test_short_words_and_punctuation(self):
+        # 4 words (≤4 chars → 1 token each) + 2 punctuation marks
+        assert estimate_tokens("the cat, sat.") == 5
+
+    def test_long_words_cost_more(self):
+        assert estimate_tokens("Edelstahltrinkflasche") > estimate_tokens("Flasche")
+
+    def test_non_ascii_costs_extra(self):
+        assert estimate_tokens("źdźbło żółć") > estimate_tokens("zdzblo zolc")
+
+
+class TestPromptBudgetFor:
+    def test_every_provider_has_a_budget(self):
+        for name in PROVIDERS:
+            assert prompt_budget_for(name) == PROVIDERS[name]["prompt_budget"]
+
+    def test_unknown_provider_gets_default(self):
+        assert prompt_budget_for("nope") == DEFAULT_PROMPT_BUDGET
+
+
+class TestPromptContext:
+    def test_render_order_matches_legacy_layout(self):
+        ctx = PromptContext(primary=["P"], fallback=["F"], audience="A\n\n", reference="R\n\n")
+        assert ctx.render() == "R\n\nA\n\nP\n\nF"
+
+    def test_of_wraps_plain_string(self):
+        assert PromptContext.of("ctx").primary == ["ctx"]
+        assert PromptContext.of("").primary == []
+
+    def test_merged_dedupes_shared_chunks(self):
+        a = PromptContext(primary=["x", "y"], fallback=["f"], audience="A")
+        b = PromptContext(primary=["y", "z"], fallback=["f", "x"], audience="A", reference="R")
+        m = PromptContext.merged(a, b)
+        assert m.primary == ["x", "y", "z"]
+        assert m.fallback == ["f"]
+        assert (m.audience, m.reference) == ("A", "R")
+
+
+class TestFitPrompt:
+    def test_under_budget_untouched(self):
+        ctx = _ctx()
+        prompt, report = fit_prompt(_build, ctx, 100_000, ["kw1", "kw2"])
+        assert prompt == _build(ctx, ["kw1", "kw2"])
+        assert report["trimmed"] == {}
+        assert report["tokens"] == report["tokens_before"]
+        assert not report["over_budget"]
+
+    def test_fallback_dropped_before_audience(self):
+        ctx = _ctx()
+        full = estimate_tokens(_build(ctx, []))
+        prompt, report = fit_prompt(_build, ctx, full - estimate_tokens(ctx.fallback[1]))
+        assert report["trimmed"] == {"fallback_chunks": 1}
+        assert "fallback chunk" in prompt and "fallback two" not in prompt
+        assert "AUDIENCE" in prompt
+
+    def test_trim_order(self):
+        ctx = _ctx()
+        keywords = [f"keyword{i}" for i in range(30)]
+        # WHY: Budget fits only the reference + template — everything cheaper goes first
+        budget = estimate_tokens(_build(PromptContext(reference=ctx.reference), [])) + 5
+        prompt, report = fit_prompt(_build, ctx, budget, keywords)
+        assert report["trimmed"] == {
+            "fallback_chunks": 2, "audience": True, "keywords": 30, "primary_chunks": 1,
+        }
+        assert "ORIGINAL" in prompt
+        assert report["tokens"] <= budget
+
+    def test_impossible_budget_flags_over_budget(self):
+        prompt, report = fit_prompt(_build, _ctx(), 1)
+        assert report["over_budget"]
+        assert report["trimmed"]["reference"] is True
+        assert prompt == _build(PromptContext(), [])
+
+    def test_input_context_not_mutated(self):
+        ctx = _ctx()
+        fit_prompt(_build, ctx, 1)
+        assert len(ctx.fallback) == 2 and ctx.audience and ctx.reference
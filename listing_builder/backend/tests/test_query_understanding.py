@@ -0,0 +1,119 @@
+# backend/tests/test_query_understanding.py
+# Purpose: Query expansion gate, cache, single-flight and latency budget (Groq call stubbed)
+# NOT for: Expansion quality (needs the real model)
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from services import query_understanding
+from services.query_understanding import analyze_query, is_keyword_query
+
+
+@pytest.fixture
+def fake_model(monkeypatch, test_settings):
+    """Stand-in for the Groq call — counts calls, optional delay and failure."""
+    state = {"calls": 0, "delay": 0.0, "result": True}
+
+    async def _call(query):
+        state["calls"] += 1
+        await asyncio.sleep(state["delay"])
+        if not state["result"]:
+            return None
+        return {"key_concepts": ["ppc"], "expanded_query": f"expanded {query}", "category_hints": ["ppc"]}
+
+    monkeypatch.setattr(query_understanding, "settings", test_settings)
+    monkeypatch.setattr(query_understanding, "_call_model", _call)
+    query_understanding.clear_expansion_cache()
+    yield state
+    query_understanding.clear_expansion_cache()
+
+
+QUESTION = "how should I structure PPC campaigns for a new product launch"
+
+
+class TestGate:
+    @pytest.mark.parametrize("query", [
+        "stainless steel water bottle 1L",
+        "Edelstahl Trinkflasche 1L für Kinder mit Strohhalm trinkflasche kinder wasserflasche edelstahl",
+        "Insulated Water Bottle for Kids with Straw water bottle kids insulated bottle bpa free bottle",
+        "",
+    ])
+    def test_keyword_queries(self, query):
+        assert is_keyword_query(query)
+
+    @pytest.mark.parametrize("query", [
+        QUESTION,
+        "best way to rank a new product on amazon in the first month",
+        "PPC bids?",
+    ])
+    def test_natural_language_queries(self, query):
+        assert not is_keyword_query(query)
+
+    async def test_keyword_query_skips_model(self, fake_model):
+        assert await analyze_query("garlic press stainless steel") is None
+        assert fake_model["calls"] == 0
+
+    async def test_gate_can_be_disabled(self, fake_model, test_settings, monkeypatch):
+        monkeypatch.setattr(test_settings, "query_expansion_gate", False)
+        assert (await analyze_query("garlic press"))["expanded_query"] == "expanded garlic press"
+
+    async def test_lexical_mode_never_calls(self, fake_model, test_settings, monkeypatch):
+        monkeypatch.setattr(test_settings, "rag_mode", "lexical")
+        assert await analyze_query(QUESTION) is None
+        assert fake_model["calls"] == 0
+
+
+class TestCache:
+    async def test_normalized_query_hits(self, fake_model):
+        first = await analyze_query(QUESTION)
+        again = await analyze_query(QUESTION.upper() + "  ")
+        assert first == again and fake_model["calls"] == 1
+
+    async def test_concurrent_identical_queries_share_one_call(self, fake_model):
+        fake_model["delay"] = 0.02
+        results = await asyncio.gather(*(analyze_query(QUESTION) for _ in range(5)))
+        assert fake_model["calls"] == 1 and all(r == results[0] for r in results)
+
+    async def test_failure_is_cached_briefly(self, fake_model):
+        fake_model["result"] = False
+        assert await analyze_query(QUESTION) is None
+        assert await analyze_query(QUESTION) is None
+        assert fake_model["calls"] == 1
+
+
+class TestBudget:
+    async def test_slow_call_returns_raw_and_fills_cache(self, fake_model, test_settings, monkeypatch):
+        monkeypatch.setattr(test_settings, "query_expansion_budget_ms", 20)
+        fake_model["delay"] = 0.1
+        assert await analyze_query(QUESTION) is None
+        await asyncio.sleep(0.15)
+        assert (await analyze_query(QUESTION))["expanded_query"].startswith("expanded")
+        assert fake_model["calls"] == 1
+
+    async def test_zero_budget_waits(self, fake_model, test_settings, monkeypatch):
+        monkeypatch.setattr(test_settings, "query_expansion_budget_ms", 0)
+        fake_model["delay"] = 0.05
+        assert await analyze_query(QUESTION) is not None
+
+
+class TestCallModel:
+    async def test_goes_through_key_scheduler(self, monkeypatch):
+        seen = {}
+
+        async def fake_agroq_chat(messages, temperature, max_tokens, model, **kwargs):
+            seen.update(model=model, user=messages[-1]["content"], temperature=temperature)
+            content = '```json\n{"key_concepts": ["ppc"], "expanded_query": "x", "category_hints": []}```'
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+        monkeypatch.setattr(query_understanding, "agroq_chat", fake_agroq_chat)
+        assert (await query_understanding._call_model(QUESTION))["key_concepts"] == ["ppc"]
+        assert seen == {"model": query_understanding.MODEL, "user": QUESTION, "temperature": 0}
+
+    async def test_failure_returns_none(self, monkeypatch):
+        async def rate_limited(*args, **kwargs):
+            raise RuntimeError("Error code: 429 rate_limit_exceeded")
+
+        monkeypatch.setattr(query_understanding, "agroq_chat", rate_limited)
+        assert await query_understanding._call_model(QUESTION) is None
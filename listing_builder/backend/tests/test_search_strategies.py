@@ -0,0 +1,274 @@
+# backend/tests/test_search_strategies.py
+# Purpose: Multi-group search assembly — SQL shape per mode and equivalence with per-type queries
+# NOT for: Executing the Postgres SQL (pgvector/tsvector need a real database)
+
+import random
+
+import pytest
+
+from services import knowledge_service
+from services.search_strategies import (
+    KEYWORD_WEIGHT, VECTOR_WEIGHT,
+    _multi_group_sql, fused_search, hybrid_merge, multi_group_search, search_sources, select_group_rows,
+    vector_search,
+)
+
+
+class TestSearchSources:
+    @pytest.mark.parametrize("mode,emb,expected", [
+        ("lexical", [0.1], (False, True)),
+        ("hybrid", [0.1], (True, True)),
+        ("hybrid", None, (False, True)),
+        ("semantic", [0.1], (True, False)),
+        ("semantic", None, (False, True)),
+    ])
+    def test_matches_get_search_rows_routing(self, mode, emb, expected):
+        assert search_sources(mode, emb) == expected
+
+
+class TestMultiGroupSql:
+    def test_hybrid_with_keyword_retry(self):
+        sql = _multi_group_sql(True, True, True)
+        for cte in ("p_vec", "p_lex", "p_kw", "need_fallback", "f_vec", "f_lex", "f_kw"):
+            assert f"{cte} AS (" in sql
+        assert "hits (pt, tier, src, id, score) AS (" in sql
+        assert "left(k.content, :max_chars)" in sql
+
+    def test_semantic_has_no_lexical_ctes(self):
+        sql = _multi_group_sql(True, False, False)
+        assert "p_vec AS (" in sql and "p_lex" not in sql and ":query" not in sql
+
+    def test_lexical_without_retry(self):
+        sql = _multi_group_sql(False, True, False)
+        assert "p_vec" not in sql and "p_kw" not in sql and ":emb" not in sql
+
+    @pytest.mark.parametrize("method", ["weighted", "rrf"])
+    def test_fusion_returns_only_final_rows(self, method):
+        sql = _multi_group_sql(True, True, True, method)
+        assert "lims AS (" in sql and "'f' AS src" in sql
+        assert "PARTITION BY f.pt, f.tier, k.filename" in sql
+        assert "WHERE p.pos <= l.lim" in sql
+        assert (":rrf_k" in sql) == (method == "rrf")
+
+    def test_unknown_fusion_rejected(self):
+        with pytest.raises(ValueError):
+            _multi_group_sql(True, True, False, "borda")
+
+
+class FakeResult(list):
+    def fetchall(self):
+        return list(self)
+
+
+class FakeDB:
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = []
+
+    def execute(self, statement, params):
+        self.calls.append((str(statement), params))
+        return FakeResult(self.rows)
+
+
+class TestMultiGroupSearch:
+    def test_one_round_trip_and_grouped_rows(self):
+        db = FakeDB([
+            ("title", "primary", "v", 1, "c1", "f1.md", "ranking", 0.9),
+            ("title", "primary", "k", 2, "c2", "f2.md", "ranking", 0.4),
+            ("bullets", "fallback", "k", 3, "c3", "f3.md", "copywriting", 0.2),
+        ])
+        out = multi_group_search(
+            db, "how to write a trinkflasche title", [0.1, 0.2],
+            {"title": (["ranking"], ["ppc"]), "bullets": (["listing_optimization"], ["copywriting"])},
+            5, 3000,
+        )
+        assert len(db.calls) == 1
+        params = db.calls[0][1]
+        assert params["cats"] == ["ranking", "ppc", "listing_optimization", "copywriting"]
+        assert params["tiers"] == ["primary", "fallback", "primary", "fallback"]
+        assert params["keywords"] == "trinkflasche title"
+        assert out[("title", "primary")]["v"] == [(1, "c1", "f1.md", "ranking", 0.9)]
+        assert out[("bullets", "fallback")]["k"] == [(3, "c3", "f3.md", "copywriting", 0.2)]
+
+
+    def test_fusion_rows_pass_through(self):
+        db = FakeDB([("title", "primary", "f", 1, "c1", "f1.md", "ranking", 0.8)])
+        out = multi_group_search(db, "flasche", [0.1], {"title": (["ranking"], ["ppc"])}, 5, 3000,
+                                 fusion="weighted")
+        params = db.calls[0][1]
+        assert (params["vw"], params["kw"]) == (VECTOR_WEIGHT, KEYWORD_WEIGHT)
+        assert select_group_rows(out[("title", "primary")], 5, True, True) == [(1, "c1", "f1.md", "ranking", 0.8)]
+
+    def test_fusion_needs_both_sources(self):
+        db = FakeDB([])
+        multi_group_search(db, "flasche", None, {"title": (["ranking"], ["ppc"])}, 5, 3000, fusion="rrf")
+        assert "lims AS (" not in db.calls[0][0] and "vw" not in db.calls[0][1]
+
+
+class TestFusedSearch:
+    def test_single_statement_with_category_filter(self):
+        db = FakeDB([("", "primary", "f", 7, "c7", "f7.md", "ranking", 0.5)])
+        rows = fused_search(db, "how to write a title", [0.1, 0.2], ["ranking"], 3, "rrf")
+        sql, params = db.calls[0]
+        assert rows == [(7, "c7", "f7.md", "ranking", 0.5)]
+        assert "category = 'ranking'" in sql and "p_kw AS (" in sql
+        assert params["categories"] == ["ranking"]
+        assert params["keywords"] == "title"
+
+    def test_all_categories(self):
+        db = FakeDB([])
+        fused_search(db, "flasche", [0.1], None, 3)
+        sql, params = db.calls[0]
+        assert "ANY(" not in sql and "categories" not in params
+        assert len(db.calls) == 1
+
+
+class TestPerCategoryVector:
+    def test_vector_search_scans_each_category(self):
+        db = FakeDB([])
+        vector_search(db, [0.1], ["ranking", "ppc"], 5)
+        sql, params = db.calls[0]
+        # WHY: Literals, not bind parameters — a generic plan can't pick a partial index
+        assert "category = 'ranking'" in sql and "category = 'ppc'" in sql and "ANY(" not in sql
+        assert set(params) == {"emb", "limit"}
+
+    def test_category_literal_is_escaped(self):
+        db = FakeDB([])
+        vector_search(db, [0.1], ["ranking' OR 'x'='x", "Amazon PPC"], 5)
+        sql, _ = db.calls[0]
+        assert "category = 'ranking'' OR ''x''=''x'" in sql
+        assert "category = 'Amazon PPC'" in sql
+
+    def test_shared_categories_scanned_once(self):
+        db = FakeDB([])
+        multi_group_search(db, "flasche", [0.1], {
+            "title": (["listing_optimization", "ranking"], ["copywriting"]),
+            "bullets": (["listing_optimization", "keyword_research"], ["copywriting", "ppc"]),
+        }, 5, 3000)
+        sql, params = db.calls[0]
+        for category in ("listing_optimization", "ranking", "keyword_research", "copywriting", "ppc"):
+            assert sql.count(f"AND category = '{category}'") == 1
+        assert sql.count("AND category = '") == 5
+        # WHY: Fallback category scans only run when a prompt type listing them needs fallback
+        assert "'ppc' = ANY(g.cats)" in sql
+
+    def test_ef_search_set_for_the_transaction(self):
+        db = FakeDB([])
+        vector_search(db, [0.1], ["ranking"], 5, ef_search=100)
+        sql, params = db.calls[0]
+        assert "set_config('hnsw.ef_search', :ef, true)" in sql and params == {"ef": "100"}
+        assert len(db.calls) == 2
+
+    def test_ef_search_default_issues_no_statement(self):
+        db = FakeDB([])
+        multi_group_search(db, "flasche", [0.1], {"title": (["ranking"], ["ppc"])}, 5, 3000, ef_search=0)
+        assert len(db.calls) == 1
+
+
+class TestSelectGroupRows:
+    def test_hybrid_equals_merge_of_sliced_sources(self):
+        v = [(i, f"v{i}", f"f{i % 3}", "c", 1 - i / 10) for i in range(5)]
+        k = [(i + 3, f"k{i}", f"f{i % 2}", "c", 0.5 - i / 20) for i in range(5)]
+        got = select_group_rows({"v": v, "k": k}, 3, True, True)
+        assert got == hybrid_merge(v[:3], k[:3], 3)
+
+
+class TestFusionRouting:
+    async def test_hybrid_uses_sql_fusion_when_configured(self, monkeypatch, test_settings):
+        calls = []
+        monkeypatch.setattr(test_settings, "rag_fusion", "rrf")
+        monkeypatch.setattr(knowledge_service, "settings", test_settings)
+        monkeypatch.setattr(knowledge_service, "fused_search",
+                            lambda db, q, e, cats, lim, method, ef=None: calls.append(method) or [])
+        await knowledge_service._get_search_rows(None, "flasche", ["ranking"], 5, [0.1])
+        assert calls == ["rrf"]
+
+    def test_fusion_is_part_of_cache_key(self, monkeypatch, test_settings):
+        from services import knowledge_cache
+
+        monkeypatch.setattr(knowledge_cache, "settings", test_settings)
+        python_key = knowledge_cache.cache_key("batch", "flasche", (), 5)
+        monkeypatch.setattr(test_settings, "rag_fusion", "rrf")
+        assert knowledge_cache.cache_key("batch", "flasche", (), 5) != python_key
+
+
+# ── Equivalence with the per-type path ──
+
+def _corpus(seed: int):
+    rnd = random.Random(seed)
+    cats = ["listing_optimization", "keyword_research", "ranking", "conversion_optimization",
+            "market_research", "copywriting", "ppc", "marketing_psychology"]
+    # WHY: Sparse primary categories so some prompt types need their fallback
+    weights = [1, 1, 1, 1, 1, 6, 2, 4]
+    return [
+        {"id": i, "content": f"chunk {i} " + "x" * rnd.randint(10, 900), "filename": f"file{rnd.randint(0, 8)}.md",
+         "category": rnd.choices(cats, weights)[0], "v": rnd.random(), "k": rnd.random() if rnd.random() < 0.3 else None}
+        for i in range(rnd.randint(3, 40))
+    ]
+
+
+def _vector(corpus, categories, limit):
+    rows = sorted((c for c in corpus if c["category"] in categories), key=lambda c: -c["v"])[:limit]
+    return [(c["id"], c["content"], c["filename"], c["category"], c["v"]) for c in rows]
+
+
+def _lexical(corpus, categories, limit):
+    rows = sorted((c for c in corpus if c["category"] in categories and c["k"] is not None),
+                  key=lambda c: -c["k"])[:limit]
+    return [(c["id"], c["content"], c["filename"], c["category"], c["k"]) for c in rows]
+
+
+def _fake_multi(corpus):
+    """Python model of the SQL contract: top-`limit` per group/source, fallback gated on primary."""
+    def multi(db, query, query_embedding, groups, limit, max_chars, min_primary=2, use_lexical=True,
+              fusion="python", ef_search=None):
+        out = {}
+        for pt, (primary, fallback) in groups.items():
+            p = {"v": _vector(corpus, primary, limit) if query_embedding else [],
+                 "k": _lexical(corpus, primary, limit) if use_lexical else []}
+            out[(pt, "primary")] = p
+            if len({r[0] for r in p["v"] + p["k"]}) < min_primary:
+                out[(pt, "fallback")] = {
+                    "v": _vector(corpus, fallback, limit) if query_embedding else [],
+                    "k": _lexical(corpus, fallback, limit) if use_lexical else [],
+                }
+        return out
+    return multi
+
+
+class TestBatchEquivalence:
+    @pytest.mark.parametrize("mode", ["lexical", "hybrid", "semantic"])
+    @pytest.mark.parametrize("seed", range(25))
+    async def test_matches_per_type_queries(self, seed, mode, monkeypatch, test_settings):
+        from services import knowledge_cache
+
+        corpus = _corpus(seed)
+        monkeypatch.setattr(test_settings, "rag_mode", mode)
+        monkeypatch.setattr(test_settings, "rag_cache_enabled", False)
+        monkeypatch.setattr(knowledge_service, "settings", test_settings)
+        monkeypatch.setattr(knowledge_cache, "settings", test_settings)
+
+        async def same(query):
+            return query
+
+        async def embed(query):
+            return None if mode == "lexical" else [0.1]
+
+        monkeypatch.setattr(knowledge_service, "_expand_query", same)
+        monkeypatch.setattr(knowledge_service, "_get_embedding_if_needed", embed)
+        monkeypatch.setattr(knowledge_service, "multi_group_search", _fake_multi(corpus))
+        monkeypatch.setattr(knowledge_service, "vector_search", lambda db, e, cats, lim, ef=None: _vector(corpus, cats, lim))
+        monkeypatch.setattr(knowledge_service, "lexical_search", lambda db, q, cats, lim: _lexical(corpus, cats, lim))
+
+        got = await knowledge_service.search_knowledge_batch(None, "trinkflasche")
+
+        # Reference: the per-type algorithm from before the single-statement query
+        expected = {}
+        for prompt_type, cats in knowledge_service.CATEGORY_MAP.items():
+            rows = await knowledge_service._get_search_rows(None, "trinkflasche", cats["primary"], 5, await embed(""))
+            if len(rows) < 2:
+                rows = rows + await knowledge_service._get_search_rows(
+                    None, "trinkflasche", cats["fallback"], 5 - len(rows), await embed(""),
+                )
+            expected[prompt_type] = knowledge_service._format_chunks(rows[:5])
+        assert got == expected
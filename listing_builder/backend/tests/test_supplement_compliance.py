@@ -0,0 +1,76 @@
+# backend/tests/test_supplement_compliance.py
+# Purpose: Supplement compliance + EFSA lookup — claim index matching, field attribution, batch, aliases
+# NOT for: Amazon TOS rules (see test_amazon_tos_checker.py)
+
+from data.efsa_claims import auto_detect_ingredients, lookup_ingredients, resolve_ingredient
+from services.supplement_compliance import check_supplement_compliance, check_supplement_compliance_batch
+
+_MANUFACTURER = "Firma GmbH, Hauptstr. 1, Berlin DE"
+
+
+def _claims(result):
+    return [(i["message"], i["field"]) for i in result["issues"] if "health claim" in i["message"]]
+
+
+class TestForbiddenClaims:
+
+    def test_field_attribution(self):
+        result = check_supplement_compliance(
+            "Kapseln heilt alles", ["Boosts immunity fast"], "Senkt Blutdruck. Heilt auch.", _MANUFACTURER,
+        )
+        assert _claims(result) == [
+            ("Forbidden health claim: 'heilt'", "title"),
+            ("Forbidden health claim: 'boosts immunity'", "bullets"),
+            ("Forbidden health claim: 'senkt blutdruck'", "description"),
+        ]
+
+    def test_word_boundary(self):
+        result = check_supplement_compliance("Aufentheilt", [], "heilung", _MANUFACTURER)
+        assert _claims(result) == [("Forbidden health claim: 'heilung'", "description")]
+
+    def test_claim_across_bullets_reported_as_description(self):
+        # WHY: Matches the joined text, but lies inside no single field
+        result = check_supplement_compliance("Tabs", ["senkt", "blutdruck"], "", _MANUFACTURER)
+        assert _claims(result) == [("Forbidden health claim: 'senkt blutdruck'", "description")]
+
+    def test_clean_listing_passes(self):
+        result = check_supplement_compliance(
+            "Vitamin C 500", ["Trägt zur normalen Funktion des Immunsystems bei"], "Frei von Allergenen",
+            _MANUFACTURER,
+        )
+        assert result["status"] == "PASS"
+
+    def test_batch_matches_single_calls(self):
+        listings = [
+            {"title": "Heilt alles", "bullets": ["x"], "description": "", "manufacturer": _MANUFACTURER},
+            {"title": "Vitamin C", "description": "allergen-free", "manufacturer": _MANUFACTURER},
+            {"title": "Zink", "bullets": ["500 mg daily"]},
+        ]
+        expected = [
+            check_supplement_compliance(l["title"], l.get("bullets", []), l.get("description", ""),
+                                        l.get("manufacturer", ""))
+            for l in listings
+        ]
+        assert check_supplement_compliance_batch(listings) == expected
+
+
+class TestEfsaIndex:
+
+    def test_exact_alias_beats_partial_match(self):
+        # WHY: Partial matching alone resolved these to earlier entries ("se" in "casein")
+        assert resolve_ingredient("casein") == "protein"
+        assert resolve_ingredient("se") == "selen"
+        assert resolve_ingredient("Withania  Somnifera") == "ashwagandha"
+
+    def test_partial_match_fallback(self):
+        assert resolve_ingredient("magnesium citrate") == "magnesium"
+        assert resolve_ingredient("unobtainium") is None
+        assert resolve_ingredient("  ") is None
+
+    def test_lookup_reports_forbidden_patterns(self):
+        [result] = lookup_ingredients(["Vitamin C"], ["Boosts immune system", "stärkt das Immunsystem"])
+        assert result["found"] is True
+        assert [f["matched_text"] for f in result["forbidden_in_listing"]][:2] == ["boosts immun", "stärkt das immunsystem"]
+
+    def test_auto_detect_whole_words_in_db_order(self):
+        assert auto_detect_ingredients("Zinc + Vitamin C", ["mit Lipoprotein"]) == ["vitamin c", "zink"]
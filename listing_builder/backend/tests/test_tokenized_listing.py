@@ -0,0 +1,116 @@
+# backend/tests/test_tokenized_listing.py
+# Purpose: TokenizedListing — must reproduce exactly what each scorer used to derive from raw text
+# NOT for: Scoring thresholds (see test_optimizer_scoring.py, test_ranking_juice.py)
+
+import hashlib
+import json
+import os
+import random
+import re
+
+import pytest
+
+from services.anti_stuffing_service import (
+    run_anti_stuffing_check, validate_keyword_density, validate_word_repetition,
+)
+from services.amazon_tos_checker import check_amazon_tos
+from services.coverage_service import (
+    calculate_multi_tier_coverage, count_exact_matches, coverage_for_text, extract_words,
+)
+from services.marketplace_config import get_limits
+from services.optimizer_scoring import score_listing
+from services.ppc_service import generate_ppc_recommendations
+from services.ranking_juice_service import calculate_ranking_juice
+from services.tokenized_listing import TokenizedListing
+
+_VOCAB = (
+    "stainless steel water bottle 1l 750ml insulated Trinkflasche Edelstahl BPA-free leak-proof "
+    "cap capsule caps sport gym ŻÓŁTA łódź für und mit best seller 100% natural eco-friendly "
+    "www.shop.com FREE SHIPPING B0ABCDEFGH top-rated - , . bottle bottle"
+).split()
+
+
+def _corpus(n: int = 40):
+    rnd = random.Random(22)
+
+    def txt(k):
+        return " ".join(rnd.choice(_VOCAB) for _ in range(k))
+
+    for _ in range(n):
+        keywords = [{"phrase": txt(rnd.randint(1, 3)), "search_volume": rnd.choice([0, 600, 1500])}
+                    for _ in range(rnd.randint(0, 25))]
+        bullets = [txt(rnd.randint(0, 30)) for _ in range(rnd.randint(0, 5))]
+        yield keywords, txt(rnd.randint(0, 25)), bullets, txt(rnd.randint(0, 60)), txt(rnd.randint(0, 40))
+
+
+# WHY: Captured from score_listing before TokenizedListing existed (raw-text scorers) — one
+# digest per result key per _corpus() listing, so a drift names the case and the scorer
+_GOLDEN_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "score_listing_golden.json")
+
+
+def _digest(value) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True, ensure_ascii=False).encode()).hexdigest()[:16]
+
+
+class TestBuild:
+
+    def test_full_text_matches_concatenation(self):
+        tokens = TokenizedListing.build("Title A", ["b1", "b2"], "Desc", "kw1 kw2")
+        assert tokens.lower == "title a b1 b2 desc kw1 kw2"
+        assert tokens.visible_text == "Title A b1 b2 Desc"
+
+    def test_offsets_slice_sections(self):
+        tokens = TokenizedListing.build("Flasche İ", ["Deckel"], "Beschreibung", "x")
+        for section in (tokens.title, tokens.bullets, tokens.description, tokens.backend):
+            assert tokens.lower[section.start:section.end] == section.lower
+        assert tokens.span(tokens.title, tokens.bullets) == (tokens.title.text + " " + "Deckel").lower()
+
+    def test_byte_sizes(self):
+        tokens = TokenizedListing.build("", [], "", "łódź")
+        assert tokens.backend.n_bytes == len("łódź".encode("utf-8"))
+
+    def test_counts_keep_first_occurrence_order(self):
+        tokens = TokenizedListing.build("b a", ["c a"])
+        assert list(tokens.counts(tokens.title, tokens.bullets).items()) == [("b", 1), ("a", 2), ("c", 1)]
+
+
+class TestMatchesRawTextScorers:
+    """Each scorer with shared tokens must equal the same scorer fed raw strings."""
+
+    @pytest.mark.parametrize("case", list(_corpus()))
+    def test_equivalence(self, case):
+        keywords, title, bullets, desc, backend = case
+        tokens = TokenizedListing.build(title, bullets, desc, backend)
+        full = f"{title} {' '.join(bullets)} {desc} {backend}"
+
+        assert set(tokens.words) == extract_words(full)
+        assert coverage_for_text(keywords, tokens) == coverage_for_text(keywords, full)
+        assert count_exact_matches(keywords, tokens) == sum(
+            1 for kw in keywords if re.search(rf"\b{re.escape(kw['phrase'].lower())}\b", full.lower())
+        )
+        assert calculate_multi_tier_coverage(keywords, title, bullets, backend, desc, tokens=tokens) == \
+            calculate_multi_tier_coverage(keywords, title, bullets, backend, desc)
+        assert calculate_ranking_juice(keywords, title, bullets, backend, desc, tokens=tokens) == \
+            calculate_ranking_juice(keywords, title, bullets, backend, desc)
+        assert generate_ppc_recommendations(keywords, tokens) == generate_ppc_recommendations(keywords, full)
+        assert check_amazon_tos(title, bullets, desc, backend, tokens=tokens) == \
+            check_amazon_tos(title, bullets, desc, backend)
+
+        visible = f"{title} {' '.join(bullets)} {desc}"
+        assert run_anti_stuffing_check(title, bullets, desc, tokens=tokens) == (
+            validate_keyword_density(visible) + validate_word_repetition(title, bullets)
+        )
+
+
+class TestMatchesPreTokenizationGolden:
+    """score_listing must still produce what the raw-text scorers produced on the same corpus."""
+
+    with open(_GOLDEN_PATH, encoding="utf-8") as f:
+        GOLDEN = json.load(f)
+
+    @pytest.mark.parametrize("index,case", list(enumerate(_corpus())))
+    def test_score_listing(self, index, case):
+        keywords, title, bullets, desc, backend = case
+        result = score_listing(keywords, keywords[:5], title, bullets, desc, backend, "BrandX",
+                               get_limits("amazon_de"))
+        assert {key: _digest(value) for key, value in result.items()} == self.GOLDEN[index]
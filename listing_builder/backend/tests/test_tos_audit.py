@@ -0,0 +1,117 @@
+# backend/tests/test_tos_audit.py
+# Purpose: Catalog-wide TOS audit — row mapping, pool vs inline equivalence, aggregates, upload route
+# NOT for: Individual TOS rules (see test_amazon_tos_checker.py)
+
+import random
+from unittest.mock import patch
+
+from services import tos_audit_service
+from services.amazon_tos_checker import check_amazon_tos
+from services.tos_audit_service import audit_catalog, iter_audit, listing_from_row
+
+_VOCAB = (
+    "stainless steel water bottle 750ml insulated BPA-free cap sport gym best seller detox "
+    "eco-friendly antibacterial cbd www.shop.com FREE SHIPPING bottle bottle bottle"
+).split()
+
+
+def _rows(n: int, seed: int = 24):
+    rnd = random.Random(seed)
+
+    def txt(k):
+        return " ".join(rnd.choice(_VOCAB) for _ in range(k))
+
+    for i in range(n):
+        yield {
+            "seller-sku": f"SKU-{i}", "asin1": f"B0{i:08d}", "item-name": txt(rnd.randint(3, 15)),
+            "item-description": txt(rnd.randint(0, 40)), "price": "19.99",
+            "bullet_point1": txt(rnd.randint(0, 12)), "bullet_point2": txt(rnd.randint(0, 12)),
+        }
+
+
+class TestListingFromRow:
+
+    def test_merchant_listings_report_columns(self):
+        row = {"seller-sku": "A-1", "asin1": "B012345678", "item-name": "Bottle",
+               "item-description": "Steel", "quantity": "4"}
+        assert listing_from_row(row) == ("A-1", "B012345678", "Bottle", (), "Steel", "")
+
+    def test_flat_file_columns(self):
+        row = {"item_sku": "A-2", "item_name": "Bottle", "bullet_point1": "one", "bullet_point3": "three",
+               "generic_keywords": "flask"}
+        assert listing_from_row(row) == ("A-2", "", "Bottle", ("one", "three"), "", "flask")
+
+    def test_bullets_list(self):
+        assert listing_from_row({"title": "T", "bullets": ["a", "", "b"]})[3] == ("a", "b")
+
+
+class TestAuditCatalog:
+
+    def test_results_match_single_listing_checker(self):
+        rows = list(_rows(50))
+        results = list(iter_audit(rows, workers=1))
+        assert [r["sku"] for r in results] == [row["seller-sku"] for row in rows]
+        for row, result in zip(rows, results):
+            tos = check_amazon_tos(row["item-name"], [b for b in (row["bullet_point1"], row["bullet_point2"]) if b],
+                                   row["item-description"])
+            assert (result["severity"], result["violations"]) == (tos["severity"], tos["violations"])
+
+    def test_process_pool_matches_inline(self, monkeypatch):
+        monkeypatch.setattr(tos_audit_service, "MIN_PARALLEL_LISTINGS", 10)
+        monkeypatch.setattr(tos_audit_service, "MAX_WORKERS", 2)
+        inline = list(iter_audit(_rows(300), workers=1, chunk_size=40))
+        try:
+            # WHY: Generator input — the pool path must stream, not need len()
+            pooled = list(iter_audit(_rows(300), workers=2, chunk_size=40))
+            # WHY: Second audit reuses the same pool instead of starting processes again
+            pool = tos_audit_service._pool
+            assert list(iter_audit(_rows(100), workers=2, chunk_size=40)) == inline[:100]
+            assert tos_audit_service._pool is pool
+        finally:
+            tos_audit_service.shutdown_pool()
+        assert pooled == inline
+        assert tos_audit_service._pool is None
+
+    def test_aggregates(self):
+        rows = [
+            {"sku": "clean", "title": "Steel Water Bottle 750ml"},
+            {"sku": "promo", "title": "Bottle", "description": "best seller, free shipping"},
+            {"sku": "eco", "title": "Bottle", "description": "eco-friendly"},
+        ]
+        report = audit_catalog(rows, workers=1)
+        summary = report["summary"]
+        assert summary["total"] == 3
+        assert summary["by_severity"] == {"PASS": 1, "WARN": 1, "FAIL": 1}
+        assert summary["suppression_risk"] == 1
+        assert summary["violations_by_rule"] == {"promo_phrase": 2, "eco_claim": 1}
+        assert summary["listings_by_rule"] == {"promo_phrase": 1, "eco_claim": 1}
+        assert [item["sku"] for item in report["listings"]] == ["promo", "eco"]
+        assert len(audit_catalog(rows, workers=1, include_passing=True)["listings"]) == 3
+
+    def test_non_amazon_marketplace_passes(self):
+        report = audit_catalog(_rows(5), marketplace="allegro", workers=1)
+        assert report["summary"]["by_severity"]["PASS"] == 5
+
+
+class TestTosAuditRoute:
+
+    def test_report_upload(self, auth_client):
+        report = ("seller-sku\tasin1\titem-name\titem-description\n"
+                  "A-1\tB012345678\tSteel Bottle\tFree shipping today\n"
+                  "A-2\tB012345679\tSteel Bottle\tDouble wall\n")
+        with patch("api.compliance_routes.require_premium"):
+            resp = auth_client.post(
+                "/api/compliance/tos-audit",
+                files={"file": ("listings.txt", report.encode("utf-8"), "text/plain")},
+            )
+        assert resp.status_code == 200
+        body = resp.json()
+        assert body["summary"]["total"] == 2
+        assert [item["sku"] for item in body["listings"]] == ["A-1"]
+        assert body["listings"][0]["violations"][0]["rule"] == "promo_phrase"
+
+    def test_rejects_unsupported_extension(self, auth_client):
+        resp = auth_client.post(
+            "/api/compliance/tos-audit", files={"file": ("listings.pdf", b"x", "application/pdf")},
+        )
+        assert resp.status_code == 400
@@ -0,0 +1,188 @@
+# backend/tests/test_vector_index.py
+# Purpose: In-process mmap vector index — export format, exact top-k, staleness, rag_mode "memory" routing
+# NOT for: The Postgres export query itself (needs pgvector)
+
+import numpy as np
+import pytest
+
+from services import knowledge_cache, knowledge_service, vector_index
+from services.vector_index import VectorIndex, export_index
+
+DIM = 8
+
+
+class _Result:
+    def __init__(self, value):
+        self.value = value
+
+    def scalar(self):
+        return self.value
+
+    def one(self):
+        return self.value
+
+
+class FakeExportDB:
+    """Answers the statements export_index issues from an in-memory chunk list."""
+
+    def __init__(self, chunks, version=7):
+        self.chunks = chunks
+        self.version = version
+
+    def execute(self, statement, params=None, execution_options=None):
+        sql = str(statement)
+        if sql.startswith("SET TRANSACTION"):
+            return None
+        if "knowledge_version" in sql:
+            return _Result(self.version)
+        if "count(*)" in sql:
+            return _Result((len(self.chunks), DIM if self.chunks else None))
+        rows = sorted(self.chunks, key=lambda c: (c[1], c[0]))
+        return iter([(i, cat, fn, content, "[" + ",".join(str(x) for x in vec) + "]")
+                     for i, cat, fn, content, vec in rows])
+
+    def rollback(self):
+        pass
+
+
+def _chunks(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    cats = ["copywriting", "ranking", "ppc", "listing_optimization"]
+    return [(i + 1, cats[rng.integers(0, 4)], f"file{i % 17}.md", f"chunk {i} — größe ✓",
+             rng.normal(size=DIM).round(6).tolist()) for i in range(n)]
+
+
+def _exact(chunks, query, categories, limit):
+    q = np.asarray(query) / np.linalg.norm(query)
+    scored = []
+    for cid, cat, _, _, vec in chunks:
+        if categories is None or cat in categories:
+            v = np.asarray(vec, dtype=np.float32)
+            scored.append((-float(q @ (v / np.linalg.norm(v))), cid))
+    return [cid for _, cid in sorted(scored)[:limit]]
+
+
+@pytest.fixture
+def exported(tmp_path):
+    chunks = _chunks()
+    path = export_index(FakeExportDB(chunks), str(tmp_path))
+    return chunks, VectorIndex(path), tmp_path
+
+
+class TestExportAndSearch:
+    def test_rows_match_vector_search_shape(self, exported):
+        chunks, index, _ = exported
+        row = index.search(chunks[0][4], ["ranking", "copywriting"], 3)[0]
+        by_id = {c[0]: c for c in chunks}
+        cid, content, filename, category, score = row
+        assert (content, filename, category) == (by_id[cid][3], by_id[cid][2], by_id[cid][1])
+        assert -1.0 <= score <= 1.0001
+
+    @pytest.mark.parametrize("categories", [None, ["ranking"], ["ppc", "copywriting"], ["missing"]])
+    def test_top_k_is_exact(self, exported, categories):
+        chunks, index, _ = exported
+        rng = np.random.default_rng(1)
+        for _ in range(20):
+            query = rng.normal(size=DIM).tolist()
+            got = [r[0] for r in index.search(query, categories, 5)]
+            assert got == _exact(chunks, query, categories, 5)
+
+    def test_batched_equals_single(self, exported, monkeypatch):
+        _, index, _ = exported
+        # WHY: Force several blocks per category to cover the block merge
+        monkeypatch.setattr(vector_index, "BLOCK_ROWS", 16)
+        queries = np.random.default_rng(2).normal(size=(6, DIM))
+        rows, _ = index.topk(queries, ["copywriting", "ppc"], 4)
+        for q, expected in zip(queries, rows):
+            assert [r[0] for r in index.search(q.tolist(), ["copywriting", "ppc"], 4)] == \
+                [int(index.ids[i]) for i in expected]
+
+    def test_limit_larger_than_category(self, exported):
+        chunks, index, _ = exported
+        size = sum(1 for c in chunks if c[1] == "ppc")
+        assert len(index.search(chunks[0][4], ["ppc"], size + 10)) == size
+
+    def test_reexport_swaps_current_and_prunes(self, exported, monkeypatch):
+        chunks, _, root = exported
+        monkeypatch.setattr(vector_index, "_index", None)
+        for version in (8, 9):
+            latest = export_index(FakeExportDB(chunks[:50], version=version), str(root))
+        loaded = vector_index._load_current(str(root))
+        assert loaded.path == latest and loaded.version == 9 and len(loaded) == 50
+        exports = [p for p in root.iterdir() if p.name.startswith("v")]
+        assert len(exports) == vector_index.KEEP_EXPORTS
+
+
+class TestStaleness:
+    @pytest.fixture(autouse=True)
+    def _settings(self, exported, monkeypatch, test_settings):
+        _, _, root = exported
+        monkeypatch.setattr(test_settings, "vector_index_dir", str(root))
+        monkeypatch.setattr(vector_index, "settings", test_settings)
+        monkeypatch.setattr(vector_index, "_index", None)
+
+    def test_current_version_serves_index(self, monkeypatch):
+        monkeypatch.setattr(knowledge_cache, "knowledge_version", lambda db: 7)
+        assert vector_index.get_index(None) is not None
+
+    def test_stale_index_falls_back_and_rebuilds(self, monkeypatch, test_settings):
+        rebuilds = []
+        monkeypatch.setattr(knowledge_cache, "knowledge_version", lambda db: 8)
+        monkeypatch.setattr(vector_index, "_rebuild_in_background", rebuilds.append)
+        assert vector_index.search(None, [0.1] * DIM, None, 3) is None
+        assert rebuilds == []
+        monkeypatch.setattr(test_settings, "vector_index_auto_rebuild", True)
+        assert vector_index.get_index(None) is None
+        assert rebuilds == [test_settings.vector_index_dir]
+
+    def test_unknown_version_serves_index(self, monkeypatch):
+        monkeypatch.setattr(knowledge_cache, "knowledge_version", lambda db: None)
+        assert vector_index.get_index(None) is not None
+
+    def test_no_export_yet(self, monkeypatch, test_settings, tmp_path):
+        monkeypatch.setattr(test_settings, "vector_index_dir", str(tmp_path / "empty"))
+        monkeypatch.setattr(knowledge_cache, "knowledge_version", lambda db: 7)
+        assert vector_index.get_index(None) is None
+
+
+class TestMemoryMode:
+    @pytest.fixture(autouse=True)
+    def _memory_mode(self, monkeypatch, test_settings):
+        monkeypatch.setattr(test_settings, "rag_mode", "memory")
+        monkeypatch.setattr(test_settings, "rag_cache_enabled", False)
+        monkeypatch.setattr(knowledge_service, "settings", test_settings)
+        monkeypatch.setattr(knowledge_cache, "settings", test_settings)
+
+    async def test_get_search_rows_uses_index(self, exported, monkeypatch):
+        chunks, index, _ = exported
+        monkeypatch.setattr(vector_index, "get_index", lambda db: index)
+        monkeypatch.setattr(knowledge_service, "vector_search", lambda *a: pytest.fail("hit Postgres"))
+        rows = await knowledge_service._get_search_rows(None, "q", ["ranking"], 3, chunks[0][4])
+        assert [r[0] for r in rows] == _exact(chunks, chunks[0][4], ["ranking"], 3)
+
+    async def test_get_search_rows_falls_back_to_postgres(self, monkeypatch):
+        monkeypatch.setattr(vector_index, "get_index", lambda db: None)
+        monkeypatch.setattr(knowledge_service, "vector_search", lambda db, e, cats, lim, ef: [("pg",)])
+        assert await knowledge_service._get_search_rows(None, "q", ["ranking"], 3, [0.1] * DIM) == [("pg",)]
+
+    async def test_batch_search_without_db(self, exported, monkeypatch):
+        chunks, index, _ = exported
+        query = chunks[3][4]
+
+        async def same(q):
+            return q
+
+        async def embed(q):
+            return query
+
+        monkeypatch.setattr(knowledge_service, "_expand_query", same)
+        monkeypatch.setattr(knowledge_service, "_get_embedding_if_needed", embed)
+        monkeypatch.setattr(vector_index, "get_index", lambda db: index)
+        monkeypatch.setattr(knowledge_service, "multi_group_search", lambda *a, **k: pytest.fail("hit Postgres"))
+        parts = await knowledge_service.search_knowledge_parts(None, "flasche")
+        by_id = {c[0]: c for c in chunks}
+        for prompt_type, cats in knowledge_service.CATEGORY_MAP.items():
+            expected = _exact(chunks, query, cats["primary"], 5)
+            assert parts[prompt_type].primary == [
+                f"[{by_id[i][1]} — {by_id[i][2]}]\n{by_id[i][3]}" for i in expected
+            ]
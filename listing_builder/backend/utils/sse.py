@@ -0,0 +1,19 @@
+# backend/utils/sse.py
+# Purpose: Server-sent-event frame formatting shared by streaming endpoints
+# NOT for: Stream orchestration (batch_job_service.py, api/optimizer_routes.py _generate_events)
+
+import json
+from typing import Any, Dict, Optional
+
+# WHY: nginx/Render buffer responses by default — SSE needs each frame flushed
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def sse_event(event: str, data: Dict[str, Any], event_id: Optional[str] = None) -> str:
+    """One SSE frame: optional id, event name, single-line JSON data."""
+    lines = []
+    if event_id:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, default=str, ensure_ascii=False)}")
+    return "\n".join(lines) + "\n\n"